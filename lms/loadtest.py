@@ -0,0 +1,482 @@
+"""Load-test harness for the LMS.
+
+Opens N simulated ClassTop client WebSockets against a local LMS instance.
+Each client sends heartbeats, state updates and (optionally) camera frames
+like the real client, and answers commands after a synthetic delay. A
+command driver calls the REST API and viewers watch the camera clients.
+
+Reports connection-setup rate, command round-trip percentiles, frame fan-out
+latency, server memory per client (when the LMS process is known) and
+LMSDatabase write throughput.
+
+Usage:
+    python loadtest.py --spawn --clients 1000 --duration 30
+    python loadtest.py --url http://127.0.0.1:8000 --lms-pid 12345 --clients 2000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import websockets
+
+from db import LMSDatabase
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("loadtest")
+
+LMS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p90/p99/max (nearest rank) of a list of milliseconds."""
+    if not samples:
+        return {"count": 0, "p50": None, "p90": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+    return {"count": len(ordered), "p50": rank(0.5), "p90": rank(0.9), "p99": rank(0.99),
+            "max": round(ordered[-1], 3)}
+
+
+class Stats:
+    """Samples and counters shared by all simulated connections."""
+
+    def __init__(self):
+        self.connect_ms: List[float] = []
+        self.connect_failures = 0
+        self.command_rtt_ms: List[float] = []
+        self.command_overhead_ms: List[float] = []
+        self.command_failures = 0
+        self.frame_latency_ms: List[float] = []
+        self.sent = {"heartbeat": 0, "state_update": 0, "camera_frame": 0, "response": 0}
+        self.send_errors = 0
+        self.disconnects = 0
+
+
+class SimulatedClient:
+    """One ClassTop client speaking the /ws/{client_uuid} protocol."""
+
+    def __init__(self, index: int, ws_base: str, args: argparse.Namespace, stats: Stats):
+        self.index = index
+        self.uuid = f"loadtest-{index:05d}-{uuid.uuid4().hex[:8]}"
+        self.url = f"{ws_base}/ws/{self.uuid}"
+        self.args = args
+        self.stats = stats
+        self.websocket = None
+        self.tasks: List[asyncio.Task] = []
+
+    async def connect(self) -> bool:
+        start = time.perf_counter()
+        try:
+            self.websocket = await websockets.connect(
+                self.url, ping_interval=self.args.ping_interval or None, max_size=None, open_timeout=30)
+        except Exception as e:
+            self.stats.connect_failures += 1
+            logger.debug(f"Client {self.index} failed to connect: {e}")
+            return False
+        self.stats.connect_ms.append((time.perf_counter() - start) * 1000)
+        # The real client announces its state right after connecting
+        await self.send({"type": "state_update", "data": self._state()})
+        return True
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            "settings": {"theme_mode": "auto", "show_clock": "true", "client_name": f"Room {self.index}"},
+            "class_state": {"status": "class", "current": {"name": "Math", "end_time": "09:45"}},
+        }
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        try:
+            await self.websocket.send(json.dumps(message))
+            self.stats.sent[message["type"]] += 1
+        except Exception:
+            self.stats.send_errors += 1
+
+    def start(self, camera: bool) -> None:
+        self.tasks.append(asyncio.create_task(self._receive()))
+        self.tasks.append(asyncio.create_task(self._every(self.args.heartbeat_interval, self._heartbeat)))
+        self.tasks.append(asyncio.create_task(self._every(self.args.state_interval, self._state_update)))
+        if camera and self.args.frame_rate > 0:
+            self.tasks.append(asyncio.create_task(self._every(1.0 / self.args.frame_rate, self._frame)))
+
+    async def _every(self, interval: float, action) -> None:
+        if interval <= 0:
+            return
+        # Spread clients over the interval instead of sending in lockstep
+        await asyncio.sleep(random.uniform(0, interval))
+        while True:
+            await action()
+            await asyncio.sleep(interval)
+
+    async def _heartbeat(self) -> None:
+        await self.send({"type": "heartbeat", "timestamp": time.time()})
+
+    async def _state_update(self) -> None:
+        await self.send({"type": "state_update", "data": self._state()})
+
+    async def _frame(self) -> None:
+        # The frame is opaque to the LMS; its prefix carries the send time
+        frame = f"{time.time():.6f}|" + "A" * self.args.frame_size
+        await self.send({"type": "camera_frame", "camera_index": 0, "frame": frame})
+
+    async def _receive(self) -> None:
+        try:
+            async for raw in self.websocket:
+                message = json.loads(raw)
+                if message.get("type") == "command":
+                    asyncio.create_task(self._answer(message))
+        except websockets.ConnectionClosed:
+            self.stats.disconnects += 1
+
+    async def _answer(self, message: Dict[str, Any]) -> None:
+        delay_ms = max(0.0, random.gauss(self.args.command_latency_ms, self.args.command_jitter_ms))
+        await asyncio.sleep(delay_ms / 1000)
+        await self.send({
+            "type": "response",
+            "request_id": message.get("request_id"),
+            "success": True,
+            "data": {"command": message.get("command"), "delay_ms": delay_ms},
+        })
+
+    async def close(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        if self.websocket is not None:
+            await self.websocket.close()
+
+
+class Viewer:
+    """An admin browser watching one client's camera preview."""
+
+    def __init__(self, ws_base: str, client_uuid: str, stats: Stats):
+        self.url = f"{ws_base}/ws/viewer/{client_uuid}/viewer-{uuid.uuid4().hex[:8]}"
+        self.stats = stats
+        self.websocket = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        self.websocket = await websockets.connect(self.url, max_size=None, open_timeout=30)
+        self.task = asyncio.create_task(self._receive())
+
+    async def _receive(self) -> None:
+        try:
+            async for raw in self.websocket:
+                received = time.time()
+                message = json.loads(raw)
+                sent = float(message["frame"].split("|", 1)[0])
+                self.stats.frame_latency_ms.append((received - sent) * 1000)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def close(self) -> None:
+        if self.task:
+            self.task.cancel()
+        if self.websocket is not None:
+            await self.websocket.close()
+
+
+def _post_command(url: str, client_uuid: str, timeout: float) -> Dict[str, Any]:
+    body = json.dumps({"command": "get_settings", "params": {}}).encode()
+    request = urllib.request.Request(f"{url}/api/clients/{client_uuid}/command", data=body,
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+async def drive_commands(url: str, clients: List[SimulatedClient], rate: float, concurrency: int,
+                         stats: Stats, stop: asyncio.Event) -> None:
+    """Send ``rate`` REST commands per second to random clients until ``stop`` is set."""
+    if rate <= 0 or not clients:
+        return
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="command")
+    in_flight = set()
+
+    async def one(client: SimulatedClient) -> None:
+        start = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(executor, _post_command, url, client.uuid, 35.0)
+        except Exception:
+            stats.command_failures += 1
+            return
+        rtt = (time.perf_counter() - start) * 1000
+        if not result.get("success"):
+            stats.command_failures += 1
+            return
+        stats.command_rtt_ms.append(rtt)
+        stats.command_overhead_ms.append(rtt - result["data"]["delay_ms"])
+
+    try:
+        while not stop.is_set():
+            task = asyncio.create_task(one(random.choice(clients)))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            await asyncio.sleep(random.expovariate(rate))
+        await asyncio.gather(*in_flight)
+    finally:
+        executor.shutdown(wait=False)
+
+
+def benchmark_database(operations: int) -> Dict[str, float]:
+    """Operations per second of the LMSDatabase writes done per connection and command."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="lms-loadtest-") as tmp:
+        database = LMSDatabase(os.path.join(tmp, "bench.db"))
+        uuids = [f"client-{i:06d}" for i in range(operations)]
+        writes = {
+            "register_client": lambda u: database.register_client(u, f"Client-{u[:8]}", "127.0.0.1"),
+            "log_connection": lambda u: database.log_connection(u, "connected", "127.0.0.1"),
+            "update_client_status": lambda u: database.update_client_status(u, "offline"),
+            "log_command": lambda u: database.log_command(u, "get_settings", {}, {"ok": True}, True),
+        }
+        db_logger = logging.getLogger("db")
+        level = db_logger.level
+        db_logger.setLevel(logging.WARNING)  # register_client logs every call
+        try:
+            for name, write in writes.items():
+                start = time.perf_counter()
+                for client_uuid in uuids:
+                    write(client_uuid)
+                results[name] = round(operations / (time.perf_counter() - start), 1)
+        finally:
+            db_logger.setLevel(level)
+            database.close()
+    return results
+
+
+def rss_kib(pid: int) -> Optional[int]:
+    """Resident set size of a process in KiB (psutil if installed, else /proc)."""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss // 1024
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def spawn_lms(port: int, db_path: str, verbose: bool) -> subprocess.Popen:
+    """Start the LMS with uvicorn on 127.0.0.1:port using a throwaway database."""
+    env = {**os.environ, "LMS_DB_PATH": db_path}
+    output = None if verbose else subprocess.DEVNULL
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "info" if verbose else "warning", "--backlog", "4096"],
+        cwd=LMS_DIR, env=env, stdout=output, stderr=output)
+
+
+def wait_ready(url: str, process: Optional[subprocess.Popen] = None, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except Exception:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"LMS exited with status {process.returncode} (run with --verbose)")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"LMS at {url} did not become ready within {timeout:.0f}s")
+            time.sleep(0.2)
+
+
+def raise_file_limit() -> None:
+    """Allow as many sockets as the hard limit permits (POSIX only)."""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+async def run_load(args: argparse.Namespace, url: str, lms_pid: Optional[int]) -> Dict[str, Any]:
+    ws_base = url.replace("http://", "ws://").replace("https://", "wss://")
+    stats = Stats()
+    rss_before = rss_kib(lms_pid) if lms_pid else None
+
+    # Phase 1: connect everyone, at most --connect-concurrency at a time
+    clients = [SimulatedClient(i, ws_base, args, stats) for i in range(args.clients)]
+    semaphore = asyncio.Semaphore(args.connect_concurrency)
+
+    async def connect(client: SimulatedClient) -> bool:
+        async with semaphore:
+            return await client.connect()
+
+    logger.info(f"Connecting {args.clients} clients...")
+    start = time.perf_counter()
+    connected_flags = await asyncio.gather(*(connect(c) for c in clients))
+    connect_seconds = time.perf_counter() - start
+    connected = [c for c, ok in zip(clients, connected_flags) if ok]
+    logger.info(f"{len(connected)} clients connected in {connect_seconds:.2f}s")
+
+    await asyncio.sleep(1.0)  # let the server settle before sampling memory
+    rss_connected = rss_kib(lms_pid) if lms_pid else None
+
+    # Phase 2: steady state traffic, commands and camera fan-out
+    cameras = connected[:args.camera_clients]
+    viewers = [Viewer(ws_base, c.uuid, stats) for c in cameras for _ in range(args.viewers_per_camera)]
+    await asyncio.gather(*(v.connect() for v in viewers))
+    for client in connected:
+        client.start(camera=client in cameras)
+
+    logger.info(f"Running for {args.duration:.0f}s with {len(cameras)} camera clients and {len(viewers)} viewers...")
+    stop = asyncio.Event()
+    driver = asyncio.create_task(
+        drive_commands(url, connected, args.command_rate, args.command_concurrency, stats, stop))
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await driver
+    rss_loaded = rss_kib(lms_pid) if lms_pid else None
+
+    await asyncio.gather(*(v.close() for v in viewers), *(c.close() for c in connected),
+                         return_exceptions=True)
+
+    per_client = None
+    if rss_before is not None and rss_connected is not None and connected:
+        per_client = round((rss_connected - rss_before) / len(connected), 2)
+
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output",)},
+        "connections": {
+            "requested": args.clients,
+            "connected": len(connected),
+            "failed": stats.connect_failures,
+            "setup_seconds": round(connect_seconds, 3),
+            "setup_rate_per_second": round(len(connected) / connect_seconds, 1) if connect_seconds else None,
+            "setup_ms": percentiles(stats.connect_ms),
+            "dropped_during_run": stats.disconnects,
+        },
+        "commands": {
+            "failed": stats.command_failures,
+            "round_trip_ms": percentiles(stats.command_rtt_ms),
+            # Round trip minus the client's synthetic delay: LMS + HTTP + WebSocket cost
+            "overhead_ms": percentiles(stats.command_overhead_ms),
+        },
+        "frames": {
+            "sent": stats.sent["camera_frame"],
+            "delivered": len(stats.frame_latency_ms),
+            "fan_out_latency_ms": percentiles(stats.frame_latency_ms),
+        },
+        "messages_sent": dict(stats.sent),
+        "send_errors": stats.send_errors,
+        "memory": {
+            "lms_pid": lms_pid,
+            "rss_kib_before": rss_before,
+            "rss_kib_connected": rss_connected,
+            "rss_kib_after_run": rss_loaded,
+            "kib_per_client": per_client,
+        },
+    }
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    conn = report["connections"]
+    print(f"Connections: {conn['connected']}/{conn['requested']} in {conn['setup_seconds']}s "
+          f"({conn['setup_rate_per_second']}/s), setup p50/p99 {conn['setup_ms']['p50']}/{conn['setup_ms']['p99']} ms, "
+          f"{conn['failed']} failed, {conn['dropped_during_run']} dropped", file=sys.stderr)
+    rtt = report["commands"]["round_trip_ms"]
+    overhead = report["commands"]["overhead_ms"]
+    print(f"Commands: {rtt['count']} ok, {report['commands']['failed']} failed, round trip p50/p90/p99 "
+          f"{rtt['p50']}/{rtt['p90']}/{rtt['p99']} ms (overhead p50/p99 {overhead['p50']}/{overhead['p99']} ms)",
+          file=sys.stderr)
+    frames = report["frames"]
+    fan_out = frames["fan_out_latency_ms"]
+    print(f"Frames: {frames['sent']} sent, {frames['delivered']} delivered to viewers, fan-out p50/p99 "
+          f"{fan_out['p50']}/{fan_out['p99']} ms", file=sys.stderr)
+    memory = report["memory"]
+    if memory["kib_per_client"] is not None:
+        print(f"Memory: {memory['rss_kib_before']} -> {memory['rss_kib_connected']} KiB "
+              f"({memory['kib_per_client']} KiB per client)", file=sys.stderr)
+    if "database_writes_per_second" in report:
+        writes = ", ".join(f"{k} {v}/s" for k, v in report["database_writes_per_second"].items())
+        print(f"LMSDatabase: {writes}", file=sys.stderr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Simulate many ClassTop clients against an LMS")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="LMS base URL (ignored with --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="Start a local LMS with a temporary database")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --spawn")
+    parser.add_argument("--lms-pid", type=int, help="PID of an already running LMS, for memory sampling")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--connect-concurrency", type=int, default=100, help="Handshakes in flight at once")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of steady-state load")
+    parser.add_argument("--heartbeat-interval", type=float, default=30.0, help="Seconds (client default: 30)")
+    parser.add_argument("--state-interval", type=float, default=60.0, help="Seconds between state updates")
+    parser.add_argument("--ping-interval", type=float, default=20.0, help="WebSocket keepalive, 0 to disable")
+    parser.add_argument("--camera-clients", type=int, default=10, help="Clients that stream camera frames")
+    parser.add_argument("--viewers-per-camera", type=int, default=2)
+    parser.add_argument("--frame-rate", type=float, default=10.0, help="Frames per second per camera client")
+    parser.add_argument("--frame-size", type=int, default=30000, help="Bytes of (base64) frame payload")
+    parser.add_argument("--command-rate", type=float, default=20.0, help="REST commands per second in total")
+    parser.add_argument("--command-concurrency", type=int, default=32, help="Concurrent REST requests")
+    parser.add_argument("--command-latency-ms", type=float, default=20.0, help="Mean client-side command delay")
+    parser.add_argument("--command-jitter-ms", type=float, default=10.0)
+    parser.add_argument("--db-operations", type=int, default=2000,
+                        help="Writes per LMSDatabase method to time (0 to skip)")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--verbose", action="store_true", help="Show the spawned LMS's output")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("db").setLevel(logging.WARNING)
+    raise_file_limit()
+
+    process = None
+    tmp = None
+    url, lms_pid = args.url.rstrip("/"), args.lms_pid
+    try:
+        if args.spawn:
+            tmp = tempfile.TemporaryDirectory(prefix="lms-loadtest-")
+            process = spawn_lms(args.port, os.path.join(tmp.name, "lms.db"), args.verbose)
+            url, lms_pid = f"http://127.0.0.1:{args.port}", process.pid
+        wait_ready(url, process)
+
+        report = asyncio.run(run_load(args, url, lms_pid))
+        if args.db_operations > 0:
+            report["database_writes_per_second"] = benchmark_database(args.db_operations)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if tmp is not None:
+            tmp.cleanup()
+
+    print_summary(report)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
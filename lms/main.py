@@ -19,8 +19,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize database
-lms_db = LMSDatabase()
+# Initialize database (LMS_DB_PATH lets the load test use a throwaway file)
+lms_db = LMSDatabase(os.getenv("LMS_DB_PATH", "lms.db"))
 
 # Initialize Management-Server client (optional)
 management_url = os.getenv("MANAGEMENT_SERVER_URL")
@@ -18,6 +18,7 @@ class ClientInfo(BaseModel):
     status: ClientStatus
     last_seen: datetime
     settings: Optional[Dict[str, str]] = None
+    class_state: Optional[Dict[str, Any]] = None
     ip_address: Optional[str] = None
     user_agent: Optional[str] = None
 
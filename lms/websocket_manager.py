@@ -152,8 +152,17 @@ class WebSocketManager:
                 data = message.get("data", {})
                 if "settings" in data:
                     self.clients[client_uuid].settings = data["settings"]
+                if "class_state" in data:
+                    self.clients[client_uuid].class_state = data["class_state"]
                 self.clients[client_uuid].last_seen = datetime.now()
 
+        elif message_type == "class_state":
+            # Class started/ended, break started or day finished on the client
+            if client_uuid in self.clients:
+                self.clients[client_uuid].class_state = message.get("data")
+                self.clients[client_uuid].last_seen = datetime.now()
+            logger.info(f"Client {client_uuid} class state: {message.get('event')}")
+
         elif message_type == "camera_frame":
             # Broadcast camera frame to all viewers
             await self.broadcast_camera_frame(client_uuid, message)
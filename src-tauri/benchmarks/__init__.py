@@ -0,0 +1,7 @@
+"""
+Benchmarks for ClassTop's schedule, statistics and sync hot paths.
+
+Run from ``src-tauri``::
+
+    python -m benchmarks.run --output results.json --baseline benchmarks/baseline.json
+"""
@@ -0,0 +1,291 @@
+"""
+Benchmark runner.
+
+Builds a synthetic database in a temporary directory, times each hot path
+and writes the results as JSON. With ``--baseline`` every benchmark's median
+is compared with the baseline's; the process exits with status 1 if any is
+slower than ``baseline * (1 + tolerance)`` (and by more than ``--min-delta-ms``,
+so sub-millisecond noise does not fail a build).
+
+Usage (from ``src-tauri``)::
+
+    python -m benchmarks.run                                  # full scale, print results
+    python -m benchmarks.run --output results.json --baseline benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+
+from tauri_app import db as _db  # noqa: E402
+from tauri_app.schedule_manager import ScheduleManager  # noqa: E402
+from tauri_app.statistics_manager import StatisticsManager  # noqa: E402
+from tauri_app.sync_client import SyncClient  # noqa: E402
+
+from .synthetic import SCALES, Scale, populate  # noqa: E402
+
+RESULTS_SCHEMA = 1
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA_MS = 1.0
+CONFLICT_QUERIES = 200
+
+
+class Benchmark:
+    """A timed function plus optional untimed per-repetition setup."""
+
+    def __init__(self, name: str, func: Callable[[Any], Any],
+                 setup: Optional[Callable[[int], Any]] = None, teardown: Optional[Callable[[Any], None]] = None):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.teardown = teardown
+
+    def run(self, repeat: int, warmup: int = 1) -> Dict[str, Any]:
+        timings = []
+        for i in range(warmup + repeat):
+            state = self.setup(i) if self.setup else None
+            start = time.perf_counter()
+            self.func(state)
+            elapsed = (time.perf_counter() - start) * 1000
+            if self.teardown:
+                self.teardown(state)
+            if i >= warmup:
+                timings.append(elapsed)
+        return {
+            "median_ms": round(statistics.median(timings), 3),
+            "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "repeat": repeat,
+        }
+
+
+def _shift(hhmm: str, minutes: int) -> str:
+    total = int(hhmm[:2]) * 60 + int(hhmm[3:]) + minutes
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def _server_variant(local: Dict[str, List[Dict]], fraction: float = 0.1) -> Dict[str, List[Dict]]:
+    """A copy of ``local`` in which ``fraction`` of courses and entries differ."""
+    courses = [dict(c) for c in local["courses"]]
+    entries = [dict(e) for e in local["schedule_entries"]]
+    for course in courses[::int(1 / fraction)]:
+        course["location"] = f"{course['location']} (moved)"
+    for entry in entries[::int(1 / fraction)]:
+        entry["end_time"] = _shift(entry["end_time"], 5)
+    return {"courses": courses, "schedule_entries": entries}
+
+
+def build_benchmarks(work_dir: Path, db_path: Path) -> List[Benchmark]:
+    schedule = ScheduleManager(db_path)
+    stats = StatisticsManager(db_path)
+    sync = SyncClient(None, schedule)
+    rng = random.Random(1)
+
+    local = {"courses": schedule.get_all_courses(), "schedule_entries": schedule.get_all_schedule_entries()}
+    server = _server_variant(local)
+    conflict_queries = [
+        (rng.randint(1, 7), f"{rng.randint(8, 19):02d}:{rng.choice(('00', '30'))}", rng.sample(range(1, 21), 4))
+        for _ in range(CONFLICT_QUERIES)
+    ]
+    for query in conflict_queries:
+        query[2].sort()
+
+    def check_conflicts(_):
+        for day, start, weeks in conflict_queries:
+            schedule.check_conflicts(day, start, _shift(start, 90), weeks)
+
+    def export_json(_):
+        json.dumps({"courses": schedule.get_courses(), "schedule": schedule.get_schedule(None)},
+                   ensure_ascii=False, indent=2)
+
+    exported = json.dumps({"courses": schedule.get_courses(), "schedule": schedule.get_schedule(None)})
+    imports = []
+
+    def import_setup(i):
+        path = work_dir / f"import_{i}.db"
+        manager = ScheduleManager(path)
+        manager.get_courses()  # open and migrate the database outside the timing
+        imports.append(path)
+        return manager
+
+    def import_json(manager):
+        # Mirrors the JSON branch of the import_schedule_data command
+        data = json.loads(exported)
+        courses = [
+            {k: c.get(k) for k in ("id", "name", "teacher", "location", "color")} for c in data["courses"]
+        ]
+        entries = [
+            {k: e.get(k) for k in ("course_id", "day_of_week", "start_time", "end_time", "weeks", "note")}
+            for e in data["schedule"]
+        ]
+        if not manager.import_bulk(courses, entries):
+            raise RuntimeError("import_bulk failed")
+
+    def import_teardown(manager):
+        _db.close_connections(manager.db_path)
+
+    def apply_setup(i):
+        # Alternate so every repetition applies a 10% diff
+        return server if i % 2 == 0 else local
+
+    def apply_server_data(data):
+        if not sync.apply_server_data(data):
+            raise RuntimeError("apply_server_data failed")
+
+    return [
+        Benchmark("schedule.get_schedule", lambda _: schedule.get_schedule(None)),
+        Benchmark("schedule.get_schedule_week", lambda _: schedule.get_schedule(5)),
+        Benchmark("schedule.get_schedule_for_week", lambda _: schedule.get_schedule_for_week(5)),
+        Benchmark("schedule.check_conflicts_x200", check_conflicts),
+        Benchmark("statistics.calculate_all_statistics_cold", lambda _: stats.calculate_all_statistics(),
+                  setup=lambda i: stats.clear_cache()),
+        Benchmark("statistics.calculate_all_statistics_cached", lambda _: stats.calculate_all_statistics()),
+        Benchmark("sync.detect_conflicts", lambda _: sync.detect_conflicts(local, server)),
+        Benchmark("sync.merge_data", lambda _: sync.merge_data(local, server)),
+        Benchmark("sync.apply_server_data", apply_server_data, setup=apply_setup),
+        Benchmark("export.json", export_json),
+        Benchmark("import.json", import_json, setup=import_setup, teardown=import_teardown),
+    ]
+
+
+def run(scale: Scale, repeat: int = 5, seed: int = 0,
+        only: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Generate the dataset and run every benchmark (or those whose name starts with ``only``)."""
+    with tempfile.TemporaryDirectory(prefix="classtop-bench-") as tmp:
+        work_dir = Path(tmp)
+        db_path = work_dir / "bench.db"
+        start = time.perf_counter()
+        dataset = populate(db_path, scale, seed)
+        populate_ms = (time.perf_counter() - start) * 1000
+
+        results = {}
+        try:
+            for benchmark in build_benchmarks(work_dir, db_path):
+                if only and not any(benchmark.name.startswith(prefix) for prefix in only):
+                    continue
+                results[benchmark.name] = benchmark.run(repeat)
+        finally:
+            _db.close_connections()
+
+    return {
+        "schema": RESULTS_SCHEMA,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "dataset": {**asdict(scale), "seed": seed, "populate_ms": round(populate_ms, 1), "rows": dataset},
+        "results": results,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE,
+            min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> Dict[str, Any]:
+    """Compare medians with a baseline produced by ``run()`` for the same dataset.
+
+    Returns:
+        ``{"comparable", "regressions", "benchmarks": {name: {baseline_ms, median_ms, ratio, regressed}}}``
+    """
+    keys = ("courses", "entries", "sessions", "seed")
+    comparable = all(results["dataset"].get(k) == baseline.get("dataset", {}).get(k) for k in keys)
+    report = {"comparable": comparable, "tolerance": tolerance, "regressions": [], "benchmarks": {}}
+    if not comparable:
+        return report
+
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        base_ms, median_ms = previous["median_ms"], current["median_ms"]
+        regressed = median_ms > base_ms * (1 + tolerance) and median_ms - base_ms > min_delta_ms
+        report["benchmarks"][name] = {
+            "baseline_ms": base_ms,
+            "median_ms": median_ms,
+            "ratio": round(median_ms / base_ms, 3) if base_ms else None,
+            "regressed": regressed,
+        }
+        if regressed:
+            report["regressions"].append(name)
+    return report
+
+
+def _print_table(results: Dict[str, Any], comparison: Optional[Dict[str, Any]]) -> None:
+    dataset = results["dataset"]
+    print(f"Dataset: {dataset['courses']} courses, {dataset['entries']} entries, "
+          f"{dataset['sessions']} sessions (generated in {dataset['populate_ms']:.0f} ms)", file=sys.stderr)
+    rows = (comparison or {}).get("benchmarks", {})
+    for name, result in results["results"].items():
+        line = f"  {name:<45} {result['median_ms']:>10.3f} ms"
+        if name in rows:
+            row = rows[name]
+            line += f"  (baseline {row['baseline_ms']:.3f} ms, x{row['ratio']}){'  REGRESSED' if row['regressed'] else ''}"
+        print(line, file=sys.stderr)
+    if comparison is not None and not comparison["comparable"]:
+        print("Baseline was recorded for a different dataset; not compared", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ClassTop hot path benchmarks")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="full")
+    parser.add_argument("--courses", type=int, help="Override the number of courses")
+    parser.add_argument("--entries", type=int, help="Override the number of schedule entries")
+    parser.add_argument("--sessions", type=int, help="Override the number of attendance sessions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", action="append", help="Run benchmarks whose name starts with this (repeatable)")
+    parser.add_argument("--output", type=Path, help="Write the JSON results here (default: stdout)")
+    parser.add_argument("--baseline", type=Path, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown relative to the baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="Ignore slowdowns smaller than this many milliseconds")
+    parser.add_argument("--save-baseline", type=Path, help="Write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    base = SCALES[args.scale]
+    scale = Scale(
+        courses=args.courses or base.courses,
+        entries=args.entries or base.entries,
+        sessions=args.sessions if args.sessions is not None else base.sessions,
+    )
+    results = run(scale, repeat=args.repeat, seed=args.seed, only=args.only)
+
+    comparison = None
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        comparison = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        results["comparison"] = comparison
+
+    _print_table(results, comparison)
+
+    text = json.dumps(results, indent=2) + "\n"
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+    if args.save_baseline:
+        baseline = {k: v for k, v in results.items() if k != "comparison"}
+        args.save_baseline.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+
+    if comparison and comparison["regressions"]:
+        print(f"Regressions: {', '.join(comparison['regressions'])}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Synthetic timetable and attendance data for the benchmarks.
+
+Data is generated from a seeded RNG, so the same sizes always produce the
+same database.
+"""
+
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List
+
+SEMESTER_START = date(2025, 9, 1)  # a Monday
+TOTAL_WEEKS = 20
+
+# Class periods: 14 x 45 minutes from 08:00 with 10 minute breaks
+PERIODS = [(8 * 60 + i * 55, 8 * 60 + i * 55 + 45) for i in range(14)]
+
+
+@dataclass(frozen=True)
+class Scale:
+    """How much data to generate."""
+
+    courses: int
+    entries: int
+    sessions: int
+
+
+SCALES = {
+    "small": Scale(courses=5, entries=100, sessions=2_000),
+    "full": Scale(courses=50, entries=2_000, sessions=100_000),
+}
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def generate_courses(scale: Scale, rng: random.Random) -> List[Dict]:
+    """Course dicts as accepted by ``ScheduleManager.add_courses_bulk``."""
+    return [
+        {
+            "name": f"Course {i:03d}",
+            "teacher": f"Teacher {rng.randrange(scale.courses // 2 + 1):02d}",
+            "location": f"Room {rng.randrange(100, 500)}",
+            "color": f"#{rng.randrange(0x1000000):06x}",
+        }
+        for i in range(scale.courses)
+    ]
+
+
+def generate_entries(course_ids: List[int], scale: Scale, rng: random.Random) -> List[Dict]:
+    """Schedule entry dicts as accepted by ``ScheduleManager.add_schedule_entries_bulk``.
+
+    Most entries run for a contiguous range of weeks, some only on odd or
+    even weeks, like a real timetable; overlaps between entries happen.
+    """
+    entries = []
+    for _ in range(scale.entries):
+        first = rng.randint(1, TOTAL_WEEKS // 2)
+        last = rng.randint(first, TOTAL_WEEKS)
+        weeks = list(range(first, last + 1))
+        pattern = rng.random()
+        if pattern < 0.15:
+            weeks = [w for w in weeks if w % 2 == 1] or [first]
+        elif pattern < 0.3:
+            weeks = [w for w in weeks if w % 2 == 0] or [first]
+
+        period = rng.randrange(len(PERIODS) - 1)
+        length = rng.choice((1, 2))
+        entries.append({
+            "course_id": rng.choice(course_ids),
+            "day_of_week": rng.randint(1, 7),
+            "start_time": _hhmm(PERIODS[period][0]),
+            "end_time": _hhmm(PERIODS[period + length - 1][1]),
+            "weeks": weeks,
+            "note": None,
+        })
+    return entries
+
+
+def generate_sessions(entries: List[Dict], entry_ids: List[int], scale: Scale,
+                      rng: random.Random) -> List[tuple]:
+    """``course_sessions`` rows (course_id, entry_id, date, start, end, attended)."""
+    rows = []
+    for _ in range(scale.sessions):
+        index = rng.randrange(len(entries))
+        entry = entries[index]
+        week = rng.choice(entry["weeks"])
+        day = SEMESTER_START + timedelta(days=(week - 1) * 7 + entry["day_of_week"] - 1)
+        rows.append((
+            entry["course_id"], entry_ids[index], day.isoformat(),
+            entry["start_time"], entry["end_time"], 1 if rng.random() < 0.9 else 0,
+        ))
+    return rows
+
+
+def populate(db_path, scale: Scale, seed: int = 0) -> Dict[str, int]:
+    """Fill a fresh database with courses, schedule entries and attendance sessions.
+
+    Courses and entries go through the ScheduleManager bulk APIs (so caches
+    and derived tables are maintained as in the app); sessions are inserted
+    directly, letting the attendance triggers keep the rollups current.
+
+    Returns:
+        The number of rows written per table
+    """
+    from tauri_app import db as _db
+    from tauri_app.schedule_manager import ScheduleManager
+
+    rng = random.Random(seed)
+    with _db.get_connection(db_path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+            [("semester_start_date", SEMESTER_START.isoformat()), ("total_weeks", str(TOTAL_WEEKS))],
+        )
+        conn.commit()
+
+    manager = ScheduleManager(db_path)
+    course_ids = manager.add_courses_bulk(generate_courses(scale, rng))
+    entries = generate_entries(course_ids, scale, rng)
+    entry_ids = manager.add_schedule_entries_bulk(entries)
+    if len(course_ids) != scale.courses or len(entry_ids) != scale.entries:
+        raise RuntimeError("Failed to generate the synthetic timetable (see the log)")
+
+    sessions = generate_sessions(entries, entry_ids, scale, rng)
+    with _db.get_connection(db_path) as conn:
+        conn.executemany(
+            """INSERT INTO course_sessions (course_id, schedule_entry_id, date, start_time, end_time, attended)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            sessions,
+        )
+        conn.commit()
+
+    return {"courses": len(course_ids), "entries": len(entry_ids), "sessions": len(sessions)}
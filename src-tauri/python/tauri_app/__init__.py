@@ -1,6 +1,13 @@
+from . import startup_profiler as _startup_profiler
+
+# Must run before any other import to measure it (CLASSTOP_PROFILE_IMPORTS=1)
+_startup_profiler.install_from_env()
+
 # --8<-- [start:command]
 
 from . import logger as _logger
+from . import metrics as _metrics
+from . import tracing as _tracing
 
 # --8<-- [end:command]
 
@@ -26,7 +33,6 @@ def main() -> int:
     from .schedule_manager import ScheduleManager
     from .settings_manager import SettingsManager
     from .statistics_manager import StatisticsManager
-    from .api_server import APIServer
     from . import db as _db
 
     context = context_factory()
@@ -41,6 +47,7 @@ def main() -> int:
 
         # Initialize event handler with app handle and portal for thread safety
         event_handler.initialize(app_handle, portal)
+        _startup_profiler.checkpoint("app built")
 
         # Initialize database and managers
         try:
@@ -50,6 +57,8 @@ def main() -> int:
             settings_manager = SettingsManager(_db.DB_PATH, event_handler)
             _db.set_settings_manager(settings_manager)
             settings_manager.initialize_defaults()
+            _metrics.follow_setting(settings_manager)
+            _tracing.follow_setting(settings_manager)
             _logger.log_message(
                 "info", "Settings manager initialized with defaults")
 
@@ -75,16 +84,28 @@ def main() -> int:
             except Exception as e:
                 _logger.log_message("warning", f"Failed to initialize reminder manager: {e}")
 
+            # Initialize class state service (pushes class start/end events)
+            class_state_service = None
+            try:
+                from .class_state import ClassStateService
+                class_state_service = ClassStateService(schedule_manager, settings_manager, event_handler)
+                _db.set_class_state_service(class_state_service)
+                class_state_service.start()
+            except Exception as e:
+                _logger.log_message("warning", f"Failed to start class state service: {e}")
+
             # Initialize WebSocket client for admin server (before camera manager)
             ws_client = None
             try:
-                from .websocket_client import WebSocketClient
-
                 server_url = settings_manager.get_setting('server_url')
                 client_uuid = settings_manager.get_setting('client_uuid')
 
                 if server_url and client_uuid:
+                    from .websocket_client import WebSocketClient
+
                     ws_client = WebSocketClient(server_url, client_uuid, settings_manager, portal)
+                    if class_state_service:
+                        class_state_service.add_subscriber(ws_client.send_class_state)
                     # Note: ws_client.start() will be called after camera_manager initialization
                     _logger.log_message("info", "WebSocket client created")
                 else:
@@ -92,22 +113,18 @@ def main() -> int:
             except Exception as e:
                 _logger.log_message("error", f"Failed to create WebSocket client: {e}")
 
-            # Initialize sync client for Management Server
-            sync_client = None
+            # Create the sync client now only if auto-sync is on; otherwise
+            # sync_client (and requests) is imported on first use (db.get_sync_client)
             try:
-                from .sync_client import SyncClient
-
-                sync_client = SyncClient(settings_manager, schedule_manager)
-                _db.set_sync_client(sync_client)
-
                 # 启动时尝试注册并启动自动同步
                 sync_enabled = settings_manager.get_setting_bool("sync_enabled", False)
                 if sync_enabled:
+                    sync_client = _db.get_sync_client()
                     sync_client.register_client()
                     sync_client.start_auto_sync()
                     _logger.log_message("info", "Sync client initialized and auto-sync started")
                 else:
-                    _logger.log_message("info", "Sync client initialized but auto-sync disabled")
+                    _logger.log_message("info", "Sync client deferred: auto-sync disabled")
             except Exception as e:
                 _logger.log_message("error", f"Failed to initialize sync client: {e}")
 
@@ -127,15 +144,8 @@ def main() -> int:
                 else:
                     _logger.log_message("info", "Camera manager not initialized: platform is not Windows")
 
-            # Initialize audio manager
-            try:
-                from .audio_manager import AudioManager
-                audio_manager = AudioManager()
-                _db.set_audio_manager(audio_manager)
-                _logger.log_message("info", "Audio manager initialized")
-            except Exception as e:
-                _logger.log_message(
-                    "warning", f"Failed to initialize audio manager: {e}")
+            # The audio manager (sounddevice, numpy) is created on first use
+            # by the audio monitoring commands (db.get_audio_manager)
 
             # Start WebSocket client after camera manager is initialized
             if ws_client:
@@ -147,11 +157,14 @@ def main() -> int:
 
             _logger.log_message(
                 "info", "All managers initialized successfully")
+            _startup_profiler.checkpoint("managers initialized")
 
             # Initialize and start API server if enabled
             try:
                 api_enabled = settings_manager.get_setting_bool('api_server_enabled', False)
                 if api_enabled:
+                    from .api_server import APIServer
+
                     api_server = APIServer(_db.DB_PATH, schedule_manager, settings_manager)
                     api_host = settings_manager.get_setting('api_server_host') or '0.0.0.0'
                     api_port = int(settings_manager.get_setting('api_server_port') or 8765)
@@ -172,6 +185,12 @@ def main() -> int:
         success = system_tray.setup_tray(app_handle, portal)
         if not success:
             print("Warning: Failed to setup system tray")
+        _startup_profiler.checkpoint("tray ready")
+        _startup_profiler.report()
 
         exit_code = app.run_return()
+
+        from . import async_db
+        async_db.shutdown(wait=False)
+        _logger.shutdown()
         return exit_code
@@ -11,6 +11,7 @@ from datetime import datetime
 try:
     from fastapi import FastAPI, HTTPException, Query
     from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import PlainTextResponse
     from pydantic import BaseModel
     import uvicorn
 except ImportError:
@@ -18,6 +19,9 @@ except ImportError:
     print("Warning: FastAPI not installed. API server will not be available.")
 
 from . import logger as _logger
+from . import metrics as _metrics
+from . import tracing as _tracing
+from .async_db import AsyncProxy, run_db
 
 
 class APIServer:
@@ -34,6 +38,9 @@ class APIServer:
         self.db_path = db_path
         self.schedule_manager = schedule_manager
         self.settings_manager = settings_manager
+        # Routes await these so SQLite work never blocks uvicorn's event loop
+        self.async_schedule = AsyncProxy(schedule_manager)
+        self.async_settings = AsyncProxy(settings_manager)
         self.logger = _logger
         self.app = None
         self.server_thread = None
@@ -64,6 +71,16 @@ class APIServer:
             allow_headers=["*"],
         )
 
+        @self.app.middleware("http")
+        async def trace_requests(request, call_next):
+            """Make sampled API requests the root span of a trace."""
+            if not _tracing.sampling():
+                return await call_next(request)
+            with _tracing.start_trace(f"{request.method} {request.url.path}", "request") as span:
+                response = await call_next(request)
+                span.set_attribute("status_code", response.status_code)
+                return response
+
         self._register_routes()
         self.logger.log_message("info", "API server initialized")
 
@@ -76,7 +93,7 @@ class APIServer:
         async def get_courses():
             """获取所有课程 / Get all courses."""
             try:
-                courses = self.schedule_manager.get_courses()
+                courses = await self.async_schedule.get_courses()
                 return {"success": True, "data": courses}
             except Exception as e:
                 self.logger.log_message("error", f"API error getting courses: {e}")
@@ -90,7 +107,7 @@ class APIServer:
                 if not name:
                     raise HTTPException(status_code=400, detail="Course name is required")
 
-                course_id = self.schedule_manager.add_course(
+                course_id = await self.async_schedule.add_course(
                     name=name,
                     teacher=course.get("teacher"),
                     location=course.get("location"),
@@ -120,7 +137,7 @@ class APIServer:
         async def get_course(course_id: int):
             """获取单个课程 / Get a specific course."""
             try:
-                courses = self.schedule_manager.get_courses()
+                courses = await self.async_schedule.get_courses()
                 course = next((c for c in courses if c["id"] == course_id), None)
 
                 if course:
@@ -137,7 +154,7 @@ class APIServer:
         async def update_course(course_id: int, updates: Dict[str, Any]):
             """更新课程 / Update a course."""
             try:
-                success = self.schedule_manager.update_course(course_id, **updates)
+                success = await self.async_schedule.update_course(course_id, **updates)
 
                 if success:
                     return {"success": True, "message": "Course updated"}
@@ -153,7 +170,7 @@ class APIServer:
         async def delete_course(course_id: int):
             """删除课程 / Delete a course."""
             try:
-                success = self.schedule_manager.delete_course(course_id)
+                success = await self.async_schedule.delete_course(course_id)
 
                 if success:
                     return {"success": True, "message": "Course deleted"}
@@ -171,7 +188,7 @@ class APIServer:
         async def get_schedule(week: Optional[int] = Query(None, description="Week number to filter by")):
             """获取课程表 / Get schedule entries."""
             try:
-                schedule = self.schedule_manager.get_schedule(week)
+                schedule = await self.async_schedule.get_schedule(week)
                 return {"success": True, "data": schedule}
             except Exception as e:
                 self.logger.log_message("error", f"API error getting schedule: {e}")
@@ -186,7 +203,7 @@ class APIServer:
                     if field not in entry:
                         raise HTTPException(status_code=400, detail=f"Field '{field}' is required")
 
-                entry_id = self.schedule_manager.add_schedule_entry(
+                entry_id = await self.async_schedule.add_schedule_entry(
                     course_id=entry["course_id"],
                     day_of_week=entry["day_of_week"],
                     start_time=entry["start_time"],
@@ -212,7 +229,7 @@ class APIServer:
                 if not 1 <= day_of_week <= 7:
                     raise HTTPException(status_code=400, detail="day_of_week must be between 1-7")
 
-                classes = self.schedule_manager.get_schedule_by_day(day_of_week, week)
+                classes = await self.async_schedule.get_schedule_by_day(day_of_week, week)
                 return {"success": True, "data": classes}
             except HTTPException:
                 raise
@@ -224,17 +241,51 @@ class APIServer:
         async def get_schedule_for_week(week: Optional[int] = Query(None)):
             """获取整周课程表 / Get schedule for entire week."""
             try:
-                classes = self.schedule_manager.get_schedule_for_week(week)
+                classes = await self.async_schedule.get_schedule_for_week(week)
                 return {"success": True, "data": classes}
             except Exception as e:
                 self.logger.log_message("error", f"API error getting weekly schedule: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
 
+        @self.app.get("/api/schedule/timeline", tags=["Schedule"])
+        async def get_timeline_state():
+            """获取当前/下一节/上一节课程 / Get current, next and previous class."""
+            try:
+                from . import db as _db
+                state = await run_db(_db.get_timeline_state)
+                return {"success": True, "data": state}
+            except Exception as e:
+                self.logger.log_message("error", f"API error getting timeline state: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        @self.app.get("/api/schedule/dates", tags=["Schedule"])
+        async def get_schedule_for_dates(
+            start_date: str = Query(..., description="First date (YYYY-MM-DD)"),
+            end_date: str = Query(..., description="Last date (YYYY-MM-DD)")
+        ):
+            """获取日期范围内的课程 / Get dated class occurrences in a date range."""
+            try:
+                occurrences = await self.async_schedule.get_schedule_for_dates(start_date, end_date)
+                return {"success": True, "data": occurrences}
+            except Exception as e:
+                self.logger.log_message("error", f"API error getting schedule for dates: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        @self.app.get("/api/schedule/conflicts", tags=["Schedule"])
+        async def get_schedule_conflicts(week: Optional[int] = Query(None, description="Week number to filter by")):
+            """获取整个课程表的冲突 / Get all conflicts in the timetable."""
+            try:
+                conflicts = await self.async_schedule.get_all_conflicts(week)
+                return {"success": True, "data": conflicts}
+            except Exception as e:
+                self.logger.log_message("error", f"API error getting schedule conflicts: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
         @self.app.delete("/api/schedule/{entry_id}", tags=["Schedule"])
         async def delete_schedule_entry(entry_id: int):
             """删除课程表条目 / Delete a schedule entry."""
             try:
-                success = self.schedule_manager.delete_schedule_entry(entry_id)
+                success = await self.async_schedule.delete_schedule_entry(entry_id)
 
                 if success:
                     return {"success": True, "message": "Schedule entry deleted"}
@@ -252,7 +303,7 @@ class APIServer:
         async def get_all_settings():
             """获取所有设置 / Get all settings."""
             try:
-                settings = self.settings_manager.get_all_settings()
+                settings = await self.async_settings.get_all_settings()
                 return {"success": True, "data": settings}
             except Exception as e:
                 self.logger.log_message("error", f"API error getting settings: {e}")
@@ -262,7 +313,7 @@ class APIServer:
         async def get_setting(key: str):
             """获取单个设置 / Get a specific setting."""
             try:
-                value = self.settings_manager.get_setting(key)
+                value = await self.async_settings.get_setting(key)
 
                 if value is not None:
                     return {"success": True, "data": {"key": key, "value": value}}
@@ -278,7 +329,7 @@ class APIServer:
         async def update_settings(settings: Dict[str, str]):
             """批量更新设置 / Update multiple settings."""
             try:
-                success = self.settings_manager.update_multiple(settings)
+                success = await self.async_settings.update_multiple(settings)
 
                 if success:
                     return {"success": True, "message": "Settings updated"}
@@ -298,7 +349,7 @@ class APIServer:
                 if val is None:
                     raise HTTPException(status_code=400, detail="Value is required")
 
-                success = self.settings_manager.set_setting(key, val)
+                success = await self.async_settings.set_setting(key, val)
 
                 if success:
                     return {"success": True, "message": "Setting updated"}
@@ -315,7 +366,7 @@ class APIServer:
             """重置设置为默认值 / Reset settings to defaults."""
             try:
                 exclude_keys = exclude.get("exclude", []) if exclude else []
-                success = self.settings_manager.reset_to_defaults(exclude_keys)
+                success = await self.async_settings.reset_to_defaults(exclude_keys)
 
                 if success:
                     return {"success": True, "message": "Settings reset to defaults"}
@@ -334,8 +385,8 @@ class APIServer:
             """获取当前周次 / Get current week number."""
             try:
                 from . import db as _db
-                week = _db.get_calculated_week_number()
-                semester_start = self.settings_manager.get_setting("semester_start_date")
+                week = await run_db(_db.get_calculated_week_number)
+                semester_start = await self.async_settings.get_setting("semester_start_date")
 
                 return {
                     "success": True,
@@ -354,10 +405,10 @@ class APIServer:
             """设置学期开始日期 / Set semester start date."""
             try:
                 date = data.get("date", "")
-                self.settings_manager.set_setting("semester_start_date", date)
+                await self.async_settings.set_setting("semester_start_date", date)
 
                 from . import db as _db
-                week = _db.get_calculated_week_number() if date else 1
+                week = await run_db(_db.get_calculated_week_number) if date else 1
 
                 return {
                     "success": True,
@@ -376,7 +427,7 @@ class APIServer:
         async def get_statistics():
             """获取课程表统计信息 / Get schedule statistics."""
             try:
-                stats = self.schedule_manager.get_statistics()
+                stats = await self.async_schedule.get_statistics()
                 return {"success": True, "data": stats}
             except Exception as e:
                 self.logger.log_message("error", f"API error getting statistics: {e}")
@@ -388,12 +439,50 @@ class APIServer:
         async def get_logs(max_lines: int = Query(200, description="Maximum number of log lines")):
             """获取应用日志 / Get application logs."""
             try:
-                lines = _logger.tail_logs(max_lines)
+                lines = await run_db(_logger.tail_logs, max_lines)
                 return {"success": True, "data": {"lines": lines}}
             except Exception as e:
                 self.logger.log_message("error", f"API error getting logs: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
 
+        @self.app.get("/api/logs/query", tags=["Logs"])
+        async def query_logs(
+            level: Optional[str] = Query(None, description="Minimum level (DEBUG/INFO/WARNING/ERROR/CRITICAL)"),
+            start: Optional[str] = Query(None, description="Earliest time (ISO format)"),
+            end: Optional[str] = Query(None, description="Latest time (ISO format)"),
+            module: Optional[str] = Query(None, description="Module name prefix"),
+            contains: Optional[str] = Query(None, description="Case-insensitive message substring"),
+            offset: int = Query(0, ge=0, description="Matching entries to skip"),
+            limit: int = Query(200, ge=1, le=1000, description="Maximum number of entries")
+        ):
+            """查询日志（含轮转文件） / Query logs including rotated files, newest first."""
+            try:
+                result = await run_db(
+                    _logger.query_logs, level=level, start=start, end=end, module=module,
+                    contains=contains, offset=offset, limit=limit
+                )
+                return {"success": True, "data": result}
+            except Exception as e:
+                self.logger.log_message("error", f"API error querying logs: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        # ==================== Metrics ====================
+
+        @self.app.get("/api/metrics", tags=["System"], response_class=PlainTextResponse)
+        async def get_metrics():
+            """Prometheus 格式的性能指标 / Metrics in Prometheus text format."""
+            return PlainTextResponse(_metrics.render(), media_type=_metrics.PROMETHEUS_CONTENT_TYPE)
+
+        @self.app.get("/api/traces", tags=["System"])
+        async def get_traces(
+            limit: int = Query(50, ge=1, le=200, description="Maximum number of traces"),
+            min_duration_ms: Optional[float] = Query(None, ge=0, description="Only traces at least this slow"),
+            name: Optional[str] = Query(None, description="Root span name substring")
+        ):
+            """最近的请求追踪（新的在前） / Recently finished traces, newest first."""
+            traces = _tracing.get_traces(limit=limit, min_duration_ms=min_duration_ms, name=name)
+            return {"success": True, "data": {"sample_rate": _tracing.sample_rate(), "traces": traces}}
+
         # ==================== Health Check ====================
 
         @self.app.get("/api/health", tags=["System"])
@@ -0,0 +1,89 @@
+"""
+Async access to the synchronous database managers.
+
+pytauri command handlers run on the anyio portal's asyncio loop and the API
+server routes on uvicorn's loop. Calling SQLite (or the blocking sync client)
+directly from those coroutines stalls every other IPC call, event emission and
+audio channel send on the same loop until the query finishes.
+
+``run_db()`` hands such a call to a small bounded thread pool and returns an
+awaitable. Each worker thread keeps its own pooled connection from
+``db.get_connection()``, so at most ``MAX_WORKERS`` extra connections are
+opened. ``AsyncProxy`` wraps a manager so that every method call becomes an
+awaitable running on that pool.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from . import logger
+
+T = TypeVar("T")
+
+# SQLite serialises writers anyway; a few workers are enough to keep slow
+# statistics queries from blocking quick reads.
+MAX_WORKERS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared database thread pool, creating it on first use."""
+    global _executor
+    executor = _executor
+    if executor is not None:
+        return executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="classtop-db")
+            logger.log_message("debug", f"Database thread pool started ({MAX_WORKERS} workers)")
+        return _executor
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking database call on the thread pool and await its result.
+
+    The caller's context variables are propagated to the worker thread.
+    Exceptions raised by ``func`` are re-raised in the awaiting coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(), call)
+
+
+class AsyncProxy:
+    """Wrap an object so that its methods return awaitables run by ``run_db``.
+
+    Non-callable attributes are returned unchanged.
+    """
+
+    def __init__(self, target: Any):
+        self._target = target
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await run_db(attr, *args, **kwargs)
+
+        return call
+
+
+def shutdown(wait: bool = True) -> None:
+    """Stop the thread pool; a later ``run_db`` call starts a new one."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+        logger.log_message("debug", "Database thread pool stopped")
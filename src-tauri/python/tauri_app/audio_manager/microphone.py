@@ -7,6 +7,7 @@ import time
 from .core import AudioMonitor, AudioLevel
 from threading import Thread
 from .. import _logger
+from .. import metrics as _metrics
 
 
 class MicrophoneMonitor(AudioMonitor):
@@ -36,6 +37,7 @@ class MicrophoneMonitor(AudioMonitor):
 
         # 通知回调
         self._notify_callbacks(level)
+        _metrics.AUDIO_FRAMES.inc("microphone")
 
     def _monitor_loop(self):
         """监控循环"""
@@ -8,6 +8,7 @@ from threading import Thread
 from .core import AudioMonitor, AudioLevel
 from datetime import datetime
 from .. import logger
+from .. import metrics as _metrics
 
 
 class SystemAudioMonitor(AudioMonitor):
@@ -87,6 +88,7 @@ class SystemAudioMonitor(AudioMonitor):
 
                 # 通知回调
                 self._notify_callbacks(level)
+                _metrics.AUDIO_FRAMES.inc("system")
 
                 # 控制更新频率
                 time.sleep(0.05)  # 20Hz更新率
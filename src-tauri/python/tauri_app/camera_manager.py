@@ -9,6 +9,7 @@ from .camera_monitor import (
     RecordingOptions
 )
 from . import logger
+from . import metrics as _metrics
 
 
 class CameraManager:
@@ -309,6 +310,7 @@ class CameraManager:
                             # 通过WebSocket客户端发送帧（如果有的话）
                             if hasattr(self, 'websocket_client') and self.websocket_client:
                                 self.websocket_client.send_camera_frame(camera_index, frame_base64)
+                            _metrics.CAMERA_FRAMES.inc(camera_index)
 
                         time.sleep(interval)
                     except Exception as e:
@@ -0,0 +1,253 @@
+"""
+Push-based classroom state.
+
+ClassStateService walks the cached class timeline (``ScheduleManager.timeline_at``)
+and sleeps until the next class starts or ends. At each boundary it emits
+``class-started``, ``class-ended``, ``break-started`` or ``day-finished``
+through EventHandler and hands the same payload to subscribers such as
+WebSocketClient. Every payload carries the state of the following interval
+(``upcoming``) so consumers can switch over on time without querying the
+backend in between.
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import logger
+from .schedule_manager import DAY_MINUTES, Timeline
+
+CLASS_STARTED = "class-started"
+CLASS_ENDED = "class-ended"
+BREAK_STARTED = "break-started"
+DAY_FINISHED = "day-finished"
+
+# Longest wait between evaluations, and the wait after a failed one
+MAX_SLEEP_SECONDS = 300
+ERROR_RETRY_SECONDS = 5
+
+# Settings that move classes on the timeline
+CLASS_STATE_SETTING_KEYS = frozenset({"semester_start_date"})
+
+# Status of an interval: a class is running, between two classes of the day,
+# before the first class of the day, or no class left today
+STATUS_CLASS = "class"
+STATUS_BREAK = "break"
+STATUS_IDLE = "idle"
+STATUS_FINISHED = "finished"
+
+
+def _class_key(cls: Optional[Dict]) -> Optional[Tuple[int, int]]:
+    return (cls["id"], cls["week"]) if cls else None
+
+
+class ClassStateService:
+    """Emits class state transitions at timeline boundaries from a background thread."""
+
+    def __init__(self, schedule_manager, settings_manager, event_handler=None):
+        """
+        Args:
+            schedule_manager: Schedule manager providing the class timeline
+            settings_manager: Settings manager (semester start date)
+            event_handler: EventHandler used to emit the transition events
+        """
+        self.schedule_manager = schedule_manager
+        self.settings_manager = settings_manager
+        self.event_handler = event_handler
+        self.logger = logger
+
+        self._subscribers: List[Callable[[str, Dict], None]] = []
+        self._state: Optional[Dict] = None
+
+        # Background task
+        self._task = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+
+    def add_subscriber(self, callback: Callable[[str, Dict], None]) -> None:
+        """Register ``callback(event_name, payload)``, called for every emitted transition."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def remove_subscriber(self, callback: Callable[[str, Dict], None]) -> None:
+        """Unregister a callback added with add_subscriber()."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def start(self) -> None:
+        """Start the class state service."""
+        if self._running:
+            self.logger.log_message("warning", "Class state service already running")
+            return
+
+        self._running = True
+
+        def run_loop():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._task = loop.create_task(self._state_loop())
+            try:
+                loop.run_until_complete(self._task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                loop.close()
+
+        thread = threading.Thread(target=run_loop, daemon=True)
+        thread.start()
+
+        self.logger.log_message("info", "Class state service started")
+
+    def stop(self) -> None:
+        """Stop the class state service."""
+        self._running = False
+        if self._task and self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        self.logger.log_message("info", "Class state service stopped")
+
+    def get_state(self) -> Dict:
+        """The state of the current interval (last published, or evaluated now)."""
+        return self._state or self.evaluate(datetime.now())
+
+    def evaluate(self, now: datetime) -> Dict:
+        """
+        Compute the classroom state at ``now``.
+
+        Returns:
+            Dict with status, at, week, day_of_week, minute, current, next,
+            previous, next_transition_at, minutes_until_transition and the
+            same fields for the following interval under ``upcoming``
+            (None when the timeline has no boundary left)
+        """
+        timeline, week_start, position = self.schedule_manager.timeline_at(
+            self.settings_manager.get_setting("semester_start_date"), now
+        )
+
+        state = self._snapshot(timeline, week_start, position)
+        until = state["minutes_until_transition"]
+        state["upcoming"] = (
+            self._snapshot(timeline, week_start, position + until) if until is not None else None
+        )
+        return state
+
+    @staticmethod
+    def _snapshot(timeline: Timeline, week_start: datetime, position: int) -> Dict:
+        day_start = position - position % DAY_MINUTES
+
+        def today(cls: Optional[Dict]) -> bool:
+            return cls is not None and timeline.position(cls["week"], cls["day_of_week"], 0) == day_start
+
+        current = timeline.current(position)
+        next_class = timeline.next(position)
+        previous = timeline.previous(position)
+        if current:
+            status = STATUS_CLASS
+        elif today(next_class):
+            status = STATUS_BREAK if today(previous) else STATUS_IDLE
+        else:
+            status = STATUS_FINISHED
+
+        until = timeline.until_next_transition(position)
+        return {
+            "status": status,
+            "at": (week_start + timedelta(minutes=position)).isoformat(),
+            "week": timeline.week_of(position),
+            "day_of_week": timeline.day_of_week(position),
+            "minute": position % DAY_MINUTES,
+            "current": current,
+            "next": next_class,
+            "previous": previous,
+            "next_transition_at": (
+                (week_start + timedelta(minutes=position + until)).isoformat() if until is not None else None
+            ),
+            "minutes_until_transition": until,
+        }
+
+    @staticmethod
+    def transitions(before: Optional[Dict], after: Dict) -> List[str]:
+        """Event names for moving from state ``before`` to ``after``, in emission order."""
+        if before is None:
+            return []
+
+        events = []
+        old, new = _class_key(before["current"]), _class_key(after["current"])
+        if old and old != new:
+            events.append(CLASS_ENDED)
+        if new and old != new:
+            events.append(CLASS_STARTED)
+        if not new and (old or after["status"] != before["status"]):
+            if after["status"] == STATUS_BREAK:
+                events.append(BREAK_STARTED)
+            elif after["status"] == STATUS_FINISHED:
+                events.append(DAY_FINISHED)
+        return events
+
+    def _step(self, now: datetime) -> List[str]:
+        """Re-evaluate the state and publish any transitions since the last step."""
+        state = self.evaluate(now)
+        events = self.transitions(self._state, state)
+        self._state = state
+
+        for name in events:
+            payload = {"event": name, "timestamp": now.isoformat(), **state}
+            if self.event_handler:
+                self.event_handler.emit_custom_event(name, payload)
+            for callback in list(self._subscribers):
+                try:
+                    callback(name, payload)
+                except Exception as e:
+                    self.logger.log_message("error", f"Class state subscriber failed: {e}")
+            self.logger.log_message("info", f"Class state event: {name}")
+        return events
+
+    def _seconds_until_transition(self, now: float) -> float:
+        """Seconds until the next boundary of the published state, at most MAX_SLEEP_SECONDS."""
+        at = self._state and self._state["next_transition_at"]
+        if not at:
+            return MAX_SLEEP_SECONDS
+        return max(0.0, min(datetime.fromisoformat(at).timestamp() - now, MAX_SLEEP_SECONDS))
+
+    def _wake(self) -> None:
+        """Wake the background task to re-evaluate (can be called from any thread)."""
+        loop, wakeup = self._loop, self._wakeup
+        if loop and wakeup and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def _on_schedule_changed(self, version: int) -> None:
+        self._wake()
+
+    def _on_settings_changed(self, keys: List[str], version: int) -> None:
+        if CLASS_STATE_SETTING_KEYS.intersection(keys):
+            self._wake()
+
+    async def _state_loop(self):
+        """Sleep until the next class boundary, a capped timeout or a schedule change."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.schedule_manager.add_listener(self._on_schedule_changed)
+        self.settings_manager.add_listener(self._on_settings_changed)
+
+        try:
+            while self._running:
+                wall = time.time()
+                self._wakeup.clear()
+                try:
+                    self._step(datetime.fromtimestamp(wall))
+                    # The timeout is capped so that a suspended machine catches
+                    # up within MAX_SLEEP_SECONDS of resuming
+                    timeout = self._seconds_until_transition(wall)
+                except Exception as e:
+                    # Retry soon (or on the next wakeup) rather than miss a boundary
+                    self.logger.log_message("error", f"Error in class state loop: {e}")
+                    timeout = ERROR_RETRY_SECONDS
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                except asyncio.CancelledError:
+                    break
+        finally:
+            self.schedule_manager.remove_listener(self._on_schedule_changed)
+            self.settings_manager.remove_listener(self._on_settings_changed)
@@ -2,9 +2,9 @@
 Command handlers for ClassTop application.
 """
 
+import math
 import sys
-import numpy as np
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict
 
 from pydantic import BaseModel
 from pytauri import Commands
@@ -12,11 +12,26 @@ from pytauri.ipc import Channel, JavaScriptChannelId, WebviewWindow
 
 from . import logger as _logger
 from . import db as _db
+from . import metrics as _metrics
+from . import tracing as _tracing
+from .async_db import run_db
 
 
 # Command registration
 commands: Commands = Commands()
 
+
+def command():
+    """Register a command handler; its latency is recorded while metrics are enabled
+    and sampled calls are traced."""
+    register = commands.command()
+
+    def decorator(func):
+        return register(_metrics.instrument_command(func))
+
+    return decorator
+
+
 # 全局存储 audio channel 以避免重复创建
 _audio_channel = None
 
@@ -57,46 +72,121 @@ class GetLogsRequest(BaseModel):
     max_lines: Optional[int] = 200
 
 
+class QueryLogsRequest(BaseModel):
+    level: Optional[str] = None
+    start: Optional[str] = None
+    end: Optional[str] = None
+    module: Optional[str] = None
+    contains: Optional[str] = None
+    offset: Optional[int] = 0
+    limit: Optional[int] = 200
+
+
+class LogEntry(BaseModel):
+    time: str
+    level: str
+    module: str
+    function: Optional[str] = None
+    line: Optional[int] = None
+    message: str
+
+
+class QueryLogsResponse(BaseModel):
+    entries: List[LogEntry]
+    offset: int
+    limit: int
+    has_more: bool
+
+
 class GetConfigRequest(BaseModel):
     key: str
 
 
+class GetMetricsResponse(BaseModel):
+    enabled: bool
+    metrics: Dict[str, Any]
+
+
+class GetTracesRequest(BaseModel):
+    limit: Optional[int] = 50
+    min_duration_ms: Optional[float] = None
+    name: Optional[str] = None
+
+
+class GetTracesResponse(BaseModel):
+    sample_rate: float
+    traces: List[Dict[str, Any]]
+
+
 # Command handlers
-@commands.command()
+@command()
 async def greet(body: Person) -> Greeting:
     return Greeting(
         message=f"Hello, {body.name}! You've been greeted from Python {sys.version}!"
     )
 
 
-@commands.command()
+@command()
 async def log_message(body: LogRequest) -> LogResponse:
     lvl = body.level or "info"
     _logger.log_message(lvl, body.message)
     return LogResponse(ok=True)
 
 
-@commands.command()
+@command()
 async def get_logs(body: GetLogsRequest) -> LogsResponse:
-    lines = _logger.tail_logs(int(body.max_lines or 200))
+    lines = await run_db(_logger.tail_logs, int(body.max_lines or 200))
     return LogsResponse(lines=lines)
 
 
-@commands.command()
+@command()
+async def query_logs(body: QueryLogsRequest) -> QueryLogsResponse:
+    """Search logs (including rotated files) by level, time range, module and text."""
+    result = await run_db(
+        _logger.query_logs,
+        level=body.level,
+        start=body.start,
+        end=body.end,
+        module=body.module,
+        contains=body.contains,
+        offset=int(body.offset or 0),
+        limit=int(body.limit if body.limit is not None else 200),
+    )
+    return QueryLogsResponse(**result)
+
+
+@command()
+async def get_metrics() -> GetMetricsResponse:
+    """Snapshot of the metrics registry (empty samples while metrics are disabled)."""
+    return GetMetricsResponse(enabled=_metrics.enabled(), metrics=_metrics.snapshot())
+
+
+@command()
+async def get_traces(body: GetTracesRequest) -> GetTracesResponse:
+    """Recently finished traces, newest first, with their spans."""
+    traces = _tracing.get_traces(
+        limit=int(body.limit if body.limit is not None else 50),
+        min_duration_ms=body.min_duration_ms,
+        name=body.name,
+    )
+    return GetTracesResponse(sample_rate=_tracing.sample_rate(), traces=traces)
+
+
+@command()
 async def set_config(body: SetConfigRequest) -> ConfigResponse:
-    _db.set_config(body.key, body.value)
+    await run_db(_db.set_config, body.key, body.value)
     return ConfigResponse(key=body.key, value=body.value)
 
 
-@commands.command()
+@command()
 async def get_config(body: GetConfigRequest) -> ConfigResponse:
-    val = _db.get_config(body.key)
+    val = await run_db(_db.get_config, body.key)
     return ConfigResponse(key=body.key, value=val)
 
 
-@commands.command()
+@command()
 async def list_configs() -> Dict[str, str]:
-    return _db.list_configs()
+    return await run_db(_db.list_configs)
 
 
 # Schedule commands
@@ -163,9 +253,9 @@ class WeekRequest(BaseModel):
     week: Optional[int] = None
 
 
-@commands.command()
+@command()
 async def add_course(body: CourseRequest) -> CourseResponse:
-    course_id = _db.add_course(body.name, body.teacher, body.location, body.color)
+    course_id = await run_db(_db.add_course, body.name, body.teacher, body.location, body.color)
     return CourseResponse(
         id=course_id,
         name=body.name,
@@ -175,28 +265,29 @@ async def add_course(body: CourseRequest) -> CourseResponse:
     )
 
 
-@commands.command()
+@command()
 async def get_courses() -> List[CourseResponse]:
-    courses = _db.get_courses()
+    courses = await run_db(_db.get_courses)
     return [CourseResponse(**course) for course in courses]
 
 
-@commands.command()
+@command()
 async def update_course(body: Dict) -> Dict:
     course_id = body.pop("id")
-    success = _db.update_course(course_id, **body)
+    success = await run_db(_db.update_course, course_id, **body)
     return {"success": success}
 
 
-@commands.command()
+@command()
 async def delete_course(body: Dict) -> Dict:
-    success = _db.delete_course(body["id"])
+    success = await run_db(_db.delete_course, body["id"])
     return {"success": success}
 
 
-@commands.command()
+@command()
 async def add_schedule_entry(body: ScheduleEntryRequest) -> Dict:
-    entry_id = _db.add_schedule_entry(
+    entry_id = await run_db(
+        _db.add_schedule_entry,
         body.course_id,
         body.day_of_week,
         body.start_time,
@@ -232,13 +323,14 @@ class ConflictCheckResponse(BaseModel):
     conflicts: List[ConflictEntry]
 
 
-@commands.command()
+@command()
 async def check_schedule_conflict(body: ConflictCheckRequest) -> ConflictCheckResponse:
     """Check if a schedule entry conflicts with existing entries."""
     if not _db.schedule_manager:
         return ConflictCheckResponse(has_conflict=False, conflicts=[])
 
-    conflicts = _db.schedule_manager.check_conflicts(
+    conflicts = await run_db(
+        _db.schedule_manager.check_conflicts,
         body.day_of_week,
         body.start_time,
         body.end_time,
@@ -254,69 +346,158 @@ async def check_schedule_conflict(body: ConflictCheckRequest) -> ConflictCheckRe
     )
 
 
-@commands.command()
+class TimetableConflictEntry(BaseModel):
+    id: int
+    course_id: int
+    course_name: str
+    teacher: Optional[str]
+    location: Optional[str]
+    start_time: str
+    end_time: str
+    day_of_week: int
+    weeks: List[int]
+
+
+class TimetableConflict(BaseModel):
+    day_of_week: int
+    overlap_start: str
+    overlap_end: str
+    conflict_weeks: List[int]  # 空列表表示每周都冲突
+    entries: List[TimetableConflictEntry]
+
+
+class GetAllConflictsResponse(BaseModel):
+    has_conflict: bool
+    conflicts: List[TimetableConflict]
+
+
+@command()
+async def get_all_conflicts(body: WeekRequest) -> GetAllConflictsResponse:
+    """Report every conflicting pair of entries in the whole timetable."""
+    if not _db.schedule_manager:
+        return GetAllConflictsResponse(has_conflict=False, conflicts=[])
+
+    conflicts = await run_db(_db.schedule_manager.get_all_conflicts, body.week)
+
+    return GetAllConflictsResponse(
+        has_conflict=len(conflicts) > 0,
+        conflicts=[TimetableConflict(**conflict) for conflict in conflicts]
+    )
+
+
+@command()
 async def get_schedule(body: WeekRequest) -> List[ScheduleEntryResponse]:
-    schedule = _db.get_schedule(body.week)
+    schedule = await run_db(_db.get_schedule, body.week)
     return [ScheduleEntryResponse(**entry) for entry in schedule]
 
 
-@commands.command()
+@command()
 async def delete_schedule_entry(body: Dict) -> Dict:
-    success = _db.delete_schedule_entry(body["id"])
+    success = await run_db(_db.delete_schedule_entry, body["id"])
     return {"success": success}
 
 
-@commands.command()
+@command()
 async def get_current_class() -> Optional[CurrentClassResponse]:
     """DEPRECATED: Use get_schedule_by_day and calculate on frontend."""
-    current = _db.get_current_class()
+    current = await run_db(_db.get_current_class)
     if current:
         return CurrentClassResponse(**current)
     return None
 
 
-@commands.command()
+@command()
 async def get_next_class() -> Optional[NextClassResponse]:
     """DEPRECATED: Use get_schedule_by_day and calculate on frontend."""
-    next_class = _db.get_next_class()
+    next_class = await run_db(_db.get_next_class)
     if next_class:
         return NextClassResponse(**next_class)
     return None
 
 
-@commands.command()
+@command()
 async def get_last_class() -> Optional[NextClassResponse]:
     """DEPRECATED: Use get_schedule_by_day and calculate on frontend."""
-    last_class = _db.get_last_class()
+    last_class = await run_db(_db.get_last_class)
     if last_class:
         return NextClassResponse(**last_class)
     return None
 
 
+class TimelineClass(NextClassResponse):
+    week: int
+    start_min: int
+    end_min: int
+
+
+class TimelineStateResponse(BaseModel):
+    week: int
+    day_of_week: int
+    minute: int  # 当天零点起的分钟数
+    current: Optional[TimelineClass] = None
+    next: Optional[TimelineClass] = None
+    previous: Optional[TimelineClass] = None
+    minutes_until_transition: Optional[int] = None
+
+
+@command()
+async def get_timeline_state() -> Optional[TimelineStateResponse]:
+    """Get the current, next and previous class and the minutes until the next change."""
+    state = await run_db(_db.get_timeline_state)
+    if state:
+        return TimelineStateResponse(**state)
+    return None
+
+
 class ScheduleByDayRequest(BaseModel):
     day_of_week: int
     week: Optional[int] = None
 
 
-@commands.command()
+@command()
 async def get_schedule_by_day(body: ScheduleByDayRequest) -> List[NextClassResponse]:
     """Get all classes for a specific day, optionally filtered by week."""
-    classes = _db.get_schedule_by_day(body.day_of_week, body.week)
+    classes = await run_db(_db.get_schedule_by_day, body.day_of_week, body.week)
     return [NextClassResponse(**cls) for cls in classes]
 
 
-@commands.command()
+@command()
 async def get_schedule_for_week(body: WeekRequest) -> List[NextClassResponse]:
     """Get all classes for the entire week."""
-    classes = _db.get_schedule_for_week(body.week)
+    classes = await run_db(_db.get_schedule_for_week, body.week)
     return [NextClassResponse(**cls) for cls in classes]
 
 
-@commands.command()
+class DateRangeRequest(BaseModel):
+    start_date: str  # YYYY-MM-DD
+    end_date: str  # YYYY-MM-DD
+
+
+class ClassOccurrenceResponse(NextClassResponse):
+    date: str
+    week: int
+    start_min: int
+    end_min: int
+    weeks: List[int]
+
+
+@command()
+async def get_schedule_for_dates(body: DateRangeRequest) -> List[ClassOccurrenceResponse]:
+    """Get the dated class occurrences between two dates (inclusive)."""
+    if not _db.schedule_manager:
+        return []
+
+    occurrences = await run_db(
+        _db.schedule_manager.get_schedule_for_dates, body.start_date, body.end_date
+    )
+    return [ClassOccurrenceResponse(**occurrence) for occurrence in occurrences]
+
+
+@command()
 async def get_current_week() -> Dict:
     """Get the current week number, either calculated or manually set."""
-    week = _db.get_calculated_week_number()
-    semester_start = _db.get_config("semester_start_date")
+    week = await run_db(_db.get_calculated_week_number)
+    semester_start = await run_db(_db.get_config, "semester_start_date")
     return {
         "week": week,
         "semester_start_date": semester_start,
@@ -324,21 +505,21 @@ async def get_current_week() -> Dict:
     }
 
 
-@commands.command()
+@command()
 async def get_calculated_week_number() -> int:
     """Get current week number (calculated from semester start date or fallback to manual)."""
-    return _db.get_calculated_week_number()
+    return await run_db(_db.get_calculated_week_number)
 
 
-@commands.command()
+@command()
 async def set_semester_start_date(body: Dict) -> Dict:
     """Set the semester start date for automatic week calculation."""
     start_date = body.get("date", "")
-    _db.set_config("semester_start_date", start_date)
+    await run_db(_db.set_config, "semester_start_date", start_date)
 
     # Calculate and return the current week
     if start_date:
-        week = _db.get_calculated_week_number()
+        week = await run_db(_db.get_calculated_week_number)
         return {"success": True, "semester_start_date": start_date, "calculated_week": week}
     else:
         return {"success": True, "semester_start_date": "", "calculated_week": 1}
@@ -346,13 +527,13 @@ async def set_semester_start_date(body: Dict) -> Dict:
 
 # ========== Settings Management Commands ==========
 
-@commands.command()
+@command()
 async def get_all_settings() -> Dict[str, str]:
     """Get all application settings."""
-    return _db.list_configs()
+    return await run_db(_db.list_configs)
 
 
-@commands.command()
+@command()
 async def update_settings(body: Dict) -> Dict:
     """Update multiple settings at once."""
     settings = body.get("settings", {})
@@ -362,35 +543,35 @@ async def update_settings(body: Dict) -> Dict:
 
     # Update through settings manager if available
     if _db.settings_manager:
-        success = _db.settings_manager.update_multiple(settings)
+        success = await run_db(_db.settings_manager.update_multiple, settings)
         return {"success": success}
     else:
         # Fallback to individual updates
         for key, value in settings.items():
-            _db.set_config(key, str(value))
+            await run_db(_db.set_config, key, str(value))
         return {"success": True}
 
 
-@commands.command()
+@command()
 async def regenerate_uuid() -> Dict:
     """Regenerate client UUID."""
     if _db.settings_manager:
-        new_uuid = _db.settings_manager.regenerate_uuid()
+        new_uuid = await run_db(_db.settings_manager.regenerate_uuid)
         return {"success": True, "uuid": new_uuid}
     else:
         import uuid
         new_uuid = str(uuid.uuid4())
-        _db.set_config('client_uuid', new_uuid)
+        await run_db(_db.set_config, 'client_uuid', new_uuid)
         return {"success": True, "uuid": new_uuid}
 
 
-@commands.command()
+@command()
 async def reset_settings(body: Dict) -> Dict:
     """Reset settings to default values."""
     exclude_keys = body.get("exclude", [])
 
     if _db.settings_manager:
-        success = _db.settings_manager.reset_to_defaults(exclude_keys)
+        success = await run_db(_db.settings_manager.reset_to_defaults, exclude_keys)
         return {"success": success}
     else:
         return {"success": False, "message": "Settings manager not available"}
@@ -440,7 +621,7 @@ class CameraStatusResponse(BaseModel):
     status: Dict
 
 
-@commands.command()
+@command()
 async def initialize_camera() -> CameraInitResponse:
     """Initialize camera monitoring system."""
     if not _db.camera_manager:
@@ -466,7 +647,7 @@ async def initialize_camera() -> CameraInitResponse:
         )
 
 
-@commands.command()
+@command()
 async def get_cameras() -> CameraListResponse:
     """Get list of available cameras."""
     if not _db.camera_manager:
@@ -476,7 +657,7 @@ async def get_cameras() -> CameraListResponse:
     return CameraListResponse(cameras=cameras)
 
 
-@commands.command()
+@command()
 async def get_camera_encoders() -> CameraEncodersResponse:
     """Get available video encoders."""
     if not _db.camera_manager:
@@ -489,7 +670,7 @@ async def get_camera_encoders() -> CameraEncodersResponse:
     return CameraEncodersResponse(**encoders)
 
 
-@commands.command()
+@command()
 async def start_camera_recording(body: StartRecordingRequest) -> RecordingResponse:
     """Start recording from camera."""
     if not _db.camera_manager:
@@ -521,7 +702,7 @@ async def start_camera_recording(body: StartRecordingRequest) -> RecordingRespon
         )
 
 
-@commands.command()
+@command()
 async def stop_camera_recording(body: StopRecordingRequest) -> RecordingResponse:
     """Stop recording from camera."""
     if not _db.camera_manager:
@@ -544,7 +725,7 @@ async def stop_camera_recording(body: StopRecordingRequest) -> RecordingResponse
         )
 
 
-@commands.command()
+@command()
 async def get_camera_status(body: CameraStatusRequest) -> CameraStatusResponse:
     """Get camera status."""
     if not _db.camera_manager:
@@ -588,7 +769,7 @@ class AudioDevicesResponse(BaseModel):
     output_devices: List[Dict]
 
 
-@commands.command()
+@command()
 async def start_audio_monitoring(
     body: StartAudioMonitoringRequest,
     webview_window: WebviewWindow
@@ -596,7 +777,9 @@ async def start_audio_monitoring(
     """启动音频监控并通过 Channel 实时传输数据"""
     global _audio_channel
 
-    if not _db.audio_manager:
+    # Created (importing sounddevice and numpy) on first use
+    audio_manager = await run_db(_db.get_audio_manager)
+    if not audio_manager:
         return AudioMonitoringResponse(
             success=False,
             message="Audio manager not available"
@@ -613,7 +796,7 @@ async def start_audio_monitoring(
             def mic_callback(level):
                 try:
                     # 确保 db 值是有限数值，避免 JSON 序列化问题
-                    db_value = level.db if np.isfinite(level.db) else -100.0
+                    db_value = level.db if math.isfinite(level.db) else -100.0
 
                     data = AudioLevelData(
                         timestamp=level.timestamp.isoformat(),
@@ -626,7 +809,7 @@ async def start_audio_monitoring(
                 except Exception as e:
                     _logger.log_message("error", f"Failed to send mic audio data: {e}")
 
-            _db.audio_manager.start_microphone_monitoring(callback=mic_callback)
+            audio_manager.start_microphone_monitoring(callback=mic_callback)
             return AudioMonitoringResponse(
                 success=True,
                 message="Microphone monitoring started"
@@ -635,7 +818,7 @@ async def start_audio_monitoring(
             def sys_callback(level):
                 try:
                     # 确保 db 值是有限数值，避免 JSON 序列化问题
-                    db_value = level.db if np.isfinite(level.db) else -100.0
+                    db_value = level.db if math.isfinite(level.db) else -100.0
 
                     data = AudioLevelData(
                         timestamp=level.timestamp.isoformat(),
@@ -648,7 +831,7 @@ async def start_audio_monitoring(
                 except Exception as e:
                     _logger.log_message("error", f"Failed to send sys audio data: {e}")
 
-            _db.audio_manager.start_system_monitoring(callback=sys_callback)
+            audio_manager.start_system_monitoring(callback=sys_callback)
             return AudioMonitoringResponse(
                 success=True,
                 message="System audio monitoring started"
@@ -658,7 +841,7 @@ async def start_audio_monitoring(
             def mic_callback(level):
                 try:
                     # 确保 db 值是有限数值，避免 JSON 序列化问题
-                    db_value = level.db if np.isfinite(level.db) else -100.0
+                    db_value = level.db if math.isfinite(level.db) else -100.0
 
                     data = AudioLevelData(
                         timestamp=level.timestamp.isoformat(),
@@ -674,7 +857,7 @@ async def start_audio_monitoring(
             def sys_callback(level):
                 try:
                     # 确保 db 值是有限数值，避免 JSON 序列化问题
-                    db_value = level.db if np.isfinite(level.db) else -100.0
+                    db_value = level.db if math.isfinite(level.db) else -100.0
 
                     data = AudioLevelData(
                         timestamp=level.timestamp.isoformat(),
@@ -687,7 +870,7 @@ async def start_audio_monitoring(
                 except Exception as e:
                     _logger.log_message("error", f"Failed to send sys audio data: {e}")
 
-            _db.audio_manager.start_all(
+            audio_manager.start_all(
                 mic_callback=mic_callback,
                 sys_callback=sys_callback
             )
@@ -708,7 +891,7 @@ async def start_audio_monitoring(
         )
 
 
-@commands.command()
+@command()
 async def stop_audio_monitoring(body: StopAudioMonitoringRequest) -> AudioMonitoringResponse:
     """停止音频监控"""
     global _audio_channel
@@ -753,7 +936,7 @@ async def stop_audio_monitoring(body: StopAudioMonitoringRequest) -> AudioMonito
         )
 
 
-@commands.command()
+@command()
 async def get_audio_devices() -> AudioDevicesResponse:
     """获取所有可用的音频设备"""
     try:
@@ -781,7 +964,7 @@ class DownloadThemeImageResponse(BaseModel):
     message: str
 
 
-@commands.command()
+@command()
 async def download_random_theme_image() -> DownloadThemeImageResponse:
     """Download a random image from color_ref folder on GitHub for theme generation."""
     try:
@@ -880,7 +1063,7 @@ class ImportDataResponse(BaseModel):
     schedule_imported: int = 0
 
 
-@commands.command()
+@command()
 async def export_schedule_data(body: ExportDataRequest) -> ExportDataResponse:
     """Export schedule data to JSON or CSV format."""
     try:
@@ -892,17 +1075,17 @@ async def export_schedule_data(body: ExportDataRequest) -> ExportDataResponse:
 
         # Export courses
         if body.include_courses:
-            courses = _db.get_courses()
+            courses = await run_db(_db.get_courses)
             data_dict['courses'] = courses
 
         # Export schedule
         if body.include_schedule:
-            schedule = _db.get_schedule(week=None)
+            schedule = await run_db(_db.get_schedule, week=None)
             data_dict['schedule'] = schedule
 
         # Export settings (optional)
         if body.include_settings:
-            settings = _db.list_configs()
+            settings = await run_db(_db.list_configs)
             # Exclude sensitive settings
             safe_settings = {k: v for k, v in settings.items()
                            if k not in ['client_uuid', 'server_url', 'api_server_enabled']}
@@ -964,7 +1147,7 @@ async def export_schedule_data(body: ExportDataRequest) -> ExportDataResponse:
         )
 
 
-@commands.command()
+@command()
 async def import_schedule_data(body: ImportDataRequest) -> ImportDataResponse:
     """Import schedule data from JSON or CSV format."""
     try:
@@ -972,117 +1155,66 @@ async def import_schedule_data(body: ImportDataRequest) -> ImportDataResponse:
         import csv
         import io
 
-        courses_imported = 0
-        schedule_imported = 0
-
         if body.format == 'json':
-            # Parse JSON data
+            # Parse JSON data; entries refer to courses by their exported IDs
             data_dict = json.loads(body.data)
-
-            # Clear existing data if requested
-            if body.replace_existing:
-                # Delete all schedule entries and courses
-                all_courses = _db.get_courses()
-                for course in all_courses:
-                    _db.delete_course(course['id'])
-
-            # Import courses
-            if 'courses' in data_dict:
-                course_id_map = {}  # Map old IDs to new IDs
-                for course_data in data_dict['courses']:
-                    # Remove ID to create new course
-                    course_name = course_data.get('name')
-                    teacher = course_data.get('teacher')
-                    location = course_data.get('location')
-                    color = course_data.get('color')
-
-                    new_id = _db.add_course(course_name, teacher, location, color)
-                    if new_id > 0:
-                        old_id = course_data.get('id')
-                        course_id_map[old_id] = new_id
-                        courses_imported += 1
-
-            # Import schedule entries
-            if 'schedule' in data_dict:
-                for entry_data in data_dict['schedule']:
-                    old_course_id = entry_data.get('course_id')
-                    new_course_id = course_id_map.get(old_course_id)
-
-                    if new_course_id:
-                        entry_id = _db.add_schedule_entry(
-                            course_id=new_course_id,
-                            day_of_week=entry_data.get('day_of_week'),
-                            start_time=entry_data.get('start_time'),
-                            end_time=entry_data.get('end_time'),
-                            weeks=entry_data.get('weeks'),
-                            note=entry_data.get('note')
-                        )
-                        if entry_id > 0:
-                            schedule_imported += 1
-
-            return ImportDataResponse(
-                success=True,
-                message=f"成功导入 {courses_imported} 门课程和 {schedule_imported} 条课程表",
-                courses_imported=courses_imported,
-                schedule_imported=schedule_imported
-            )
+            courses = [
+                {
+                    'id': course_data.get('id'),
+                    'name': course_data.get('name'),
+                    'teacher': course_data.get('teacher'),
+                    'location': course_data.get('location'),
+                    'color': course_data.get('color'),
+                }
+                for course_data in data_dict.get('courses', [])
+            ]
+            entries = [
+                {
+                    'course_id': entry_data.get('course_id'),
+                    'day_of_week': entry_data.get('day_of_week'),
+                    'start_time': entry_data.get('start_time'),
+                    'end_time': entry_data.get('end_time'),
+                    'weeks': entry_data.get('weeks'),
+                    'note': entry_data.get('note'),
+                }
+                for entry_data in data_dict.get('schedule', [])
+            ]
 
         elif body.format == 'csv':
-            # Parse CSV data
+            # Parse CSV data; courses are keyed by name (first row wins)
             reader = csv.DictReader(io.StringIO(body.data))
-
-            # Clear existing data if requested
-            if body.replace_existing:
-                all_courses = _db.get_courses()
-                for course in all_courses:
-                    _db.delete_course(course['id'])
-
-            # Map to track created courses
-            course_map = {}  # name -> course_id
-
+            course_rows = {}  # name -> first CSV row for that course
+            entries = []
             for row in reader:
-                course_name = row.get('course_name', '').strip()
+                course_name = (row.get('course_name') or '').strip()
                 if not course_name:
                     continue
+                course_rows.setdefault(course_name, row)
 
-                # Create or get course
-                if course_name not in course_map:
-                    course_id = _db.add_course(
-                        name=course_name,
-                        teacher=row.get('teacher'),
-                        location=row.get('location'),
-                        color=row.get('color')
-                    )
-                    if course_id > 0:
-                        course_map[course_name] = course_id
-                        courses_imported += 1
-                else:
-                    course_id = course_map[course_name]
-
-                # Add schedule entry
                 try:
                     weeks_str = row.get('weeks', '[]')
                     weeks = json.loads(weeks_str) if weeks_str else None
                 except:
                     weeks = None
 
-                entry_id = _db.add_schedule_entry(
-                    course_id=course_id,
-                    day_of_week=int(row.get('day_of_week', 1)),
-                    start_time=row.get('start_time'),
-                    end_time=row.get('end_time'),
-                    weeks=weeks,
-                    note=row.get('note')
-                )
-                if entry_id > 0:
-                    schedule_imported += 1
-
-            return ImportDataResponse(
-                success=True,
-                message=f"成功导入 {courses_imported} 门课程和 {schedule_imported} 条课程表",
-                courses_imported=courses_imported,
-                schedule_imported=schedule_imported
-            )
+                entries.append({
+                    'course_id': course_name,
+                    'day_of_week': int(row.get('day_of_week', 1)),
+                    'start_time': row.get('start_time'),
+                    'end_time': row.get('end_time'),
+                    'weeks': weeks,
+                    'note': row.get('note'),
+                })
+            courses = [
+                {
+                    'id': name,
+                    'name': name,
+                    'teacher': row.get('teacher'),
+                    'location': row.get('location'),
+                    'color': row.get('color'),
+                }
+                for name, row in course_rows.items()
+            ]
 
         else:
             return ImportDataResponse(
@@ -1090,6 +1222,20 @@ async def import_schedule_data(body: ImportDataRequest) -> ImportDataResponse:
                 message=f"不支持的导入格式: {body.format}"
             )
 
+        # Validate everything, then replace/insert in one transaction
+        result = await run_db(_db.import_bulk, courses, entries, body.replace_existing)
+        if not result:
+            return ImportDataResponse(success=False, message="导入失败: 数据校验或写入失败，现有数据未改动，详见日志")
+
+        courses_imported = len(result['courses'])
+        schedule_imported = len(result['entries'])
+        return ImportDataResponse(
+            success=True,
+            message=f"成功导入 {courses_imported} 门课程和 {schedule_imported} 条课程表",
+            courses_imported=courses_imported,
+            schedule_imported=schedule_imported
+        )
+
     except Exception as e:
         _logger.log_message("error", f"Failed to import data: {e}")
         return ImportDataResponse(
@@ -1111,18 +1257,13 @@ class TestConnectionResponse(BaseModel):
     data: Optional[Dict] = None
 
 
-@commands.command()
+@command()
 async def test_server_connection() -> TestConnectionResponse:
     """测试与 Management Server 的连接"""
     try:
-        # 从 db 模块获取 sync_client
-        if _db.sync_client:
-            result = _db.sync_client.test_connection()
-        else:
-            # 如果没有初始化，创建临时实例
-            from .sync_client import SyncClient
-            sync_client = SyncClient(_db.settings_manager, _db.schedule_manager)
-            result = sync_client.test_connection()
+        # 从 db 模块获取 sync_client（首次使用时创建）
+        sync_client = await run_db(_db.get_sync_client)
+        result = await run_db(sync_client.test_connection)
 
         return TestConnectionResponse(
             success=result.get("success", False),
@@ -1137,18 +1278,13 @@ async def test_server_connection() -> TestConnectionResponse:
         )
 
 
-@commands.command()
+@command()
 async def sync_now() -> SyncResponse:
     """立即同步数据到 Management Server"""
     try:
-        # 从 db 模块获取 sync_client
-        if _db.sync_client:
-            success = _db.sync_client.sync_to_server()
-        else:
-            # 如果没有初始化，创建临时实例
-            from .sync_client import SyncClient
-            sync_client = SyncClient(_db.settings_manager, _db.schedule_manager)
-            success = sync_client.sync_to_server()
+        # 从 db 模块获取 sync_client（首次使用时创建）
+        sync_client = await run_db(_db.get_sync_client)
+        success = await run_db(sync_client.sync_to_server)
 
         return SyncResponse(
             success=success,
@@ -1162,18 +1298,13 @@ async def sync_now() -> SyncResponse:
         )
 
 
-@commands.command()
+@command()
 async def register_to_server() -> SyncResponse:
     """注册客户端到 Management Server"""
     try:
-        # 从 db 模块获取 sync_client
-        if _db.sync_client:
-            success = _db.sync_client.register_client()
-        else:
-            # 如果没有初始化，创建临时实例
-            from .sync_client import SyncClient
-            sync_client = SyncClient(_db.settings_manager, _db.schedule_manager)
-            success = sync_client.register_client()
+        # 从 db 模块获取 sync_client（首次使用时创建）
+        sync_client = await run_db(_db.get_sync_client)
+        success = await run_db(sync_client.register_client)
 
         return SyncResponse(
             success=success,
@@ -1194,17 +1325,18 @@ class SyncStatusResponse(BaseModel):
     last_sync_time: Optional[str] = None
 
 
-@commands.command()
+@command()
 async def get_sync_status() -> SyncStatusResponse:
     """获取 Management Server 同步状态"""
     try:
-        sync_enabled = _db.settings_manager.get_setting_bool("sync_enabled", False)
-        server_url = _db.settings_manager.get_setting("server_url", "")
+        sync_enabled = await run_db(_db.settings_manager.get_setting_bool, "sync_enabled", False)
+        server_url = await run_db(_db.settings_manager.get_setting, "server_url", "")
 
         # 检查连接状态
         connected = False
-        if sync_enabled and server_url and _db.sync_client:
-            result = _db.sync_client.test_connection()
+        if sync_enabled and server_url:
+            sync_client = await run_db(_db.get_sync_client)
+            result = await run_db(sync_client.test_connection)
             connected = result.get("success", False)
 
         return SyncStatusResponse(
@@ -1230,20 +1362,21 @@ class PullDataResponse(BaseModel):
     entries_count: int = 0
 
 
-@commands.command()
+@command()
 async def pull_from_server() -> PullDataResponse:
     """从 Management Server 下载数据"""
     try:
-        if not _db.sync_client:
+        sync_client = await run_db(_db.get_sync_client)
+        if not sync_client:
             return PullDataResponse(
                 success=False,
                 message="同步客户端未初始化"
             )
 
-        result = _db.sync_client.download_from_server()
+        result = await run_db(sync_client.download_from_server)
         if result.get("success"):
             # 应用下载的数据到本地
-            apply_success = _db.sync_client.apply_server_data(result)
+            apply_success = await run_db(sync_client.apply_server_data, result)
             if apply_success:
                 return PullDataResponse(
                     success=True,
@@ -1283,18 +1416,19 @@ class CheckConflictsResponse(BaseModel):
     conflicted_entries: List[ConflictItem] = []
 
 
-@commands.command()
+@command()
 async def check_sync_conflicts() -> CheckConflictsResponse:
     """检查本地和服务器数据冲突"""
     try:
-        if not _db.sync_client:
+        sync_client = await run_db(_db.get_sync_client)
+        if not sync_client:
             return CheckConflictsResponse(
                 success=False,
                 message="同步客户端未初始化"
             )
 
         # 下载服务器数据
-        server_result = _db.sync_client.download_from_server()
+        server_result = await run_db(sync_client.download_from_server)
         if not server_result.get("success"):
             return CheckConflictsResponse(
                 success=False,
@@ -1308,12 +1442,12 @@ async def check_sync_conflicts() -> CheckConflictsResponse:
 
         # 获取本地数据
         local_data = {
-            "courses": _db.schedule_manager.get_all_courses(),
-            "schedule_entries": _db.schedule_manager.get_all_schedule_entries()
+            "courses": await run_db(_db.schedule_manager.get_all_courses),
+            "schedule_entries": await run_db(_db.schedule_manager.get_all_schedule_entries)
         }
 
         # 检测冲突
-        conflicts = _db.sync_client.detect_conflicts(local_data, server_data)
+        conflicts = sync_client.detect_conflicts(local_data, server_data)
 
         return CheckConflictsResponse(
             success=True,
@@ -1347,17 +1481,18 @@ class BidirectionalSyncResponse(BaseModel):
     entries_updated: int = 0
 
 
-@commands.command()
+@command()
 async def bidirectional_sync_now(body: BidirectionalSyncRequest) -> BidirectionalSyncResponse:
     """执行双向同步（包含冲突解决）"""
     try:
-        if not _db.sync_client:
+        sync_client = await run_db(_db.get_sync_client)
+        if not sync_client:
             return BidirectionalSyncResponse(
                 success=False,
                 message="同步客户端未初始化"
             )
 
-        result = _db.sync_client.bidirectional_sync(strategy=body.strategy)
+        result = await run_db(sync_client.bidirectional_sync, strategy=body.strategy)
 
         return BidirectionalSyncResponse(
             success=result.get("success", False),
@@ -1398,40 +1533,45 @@ class GetSyncHistoryResponse(BaseModel):
     history: List[SyncHistoryEntry] = []
 
 
-@commands.command()
+def _fetch_sync_history(limit: int) -> List[tuple]:
+    """Read the latest sync history rows (runs on the database thread pool)."""
+    with _db.schedule_manager.get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, timestamp, direction, status, message,
+                   courses_synced, schedule_synced, conflicts_found
+            FROM sync_history
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        """, (limit,))
+        return cur.fetchall()
+
+
+@command()
 async def get_sync_history(body: GetSyncHistoryRequest) -> GetSyncHistoryResponse:
     """获取同步历史记录"""
     try:
-        with _db.schedule_manager.get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute("""
-                SELECT id, timestamp, direction, status, message,
-                       courses_synced, schedule_synced, conflicts_found
-                FROM sync_history
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (body.limit,))
-            rows = cur.fetchall()
-
-            history = [
-                SyncHistoryEntry(
-                    id=row[0],
-                    timestamp=row[1],
-                    direction=row[2],
-                    status=row[3],
-                    message=row[4] or "",
-                    courses_synced=row[5] or 0,
-                    schedule_synced=row[6] or 0,
-                    conflicts_found=row[7] or 0
-                )
-                for row in rows
-            ]
-
-            return GetSyncHistoryResponse(
-                success=True,
-                message="获取历史成功",
-                history=history
+        rows = await run_db(_fetch_sync_history, body.limit)
+
+        history = [
+            SyncHistoryEntry(
+                id=row[0],
+                timestamp=row[1],
+                direction=row[2],
+                status=row[3],
+                message=row[4] or "",
+                courses_synced=row[5] or 0,
+                schedule_synced=row[6] or 0,
+                conflicts_found=row[7] or 0
             )
+            for row in rows
+        ]
+
+        return GetSyncHistoryResponse(
+            success=True,
+            message="获取历史成功",
+            history=history
+        )
     except Exception as e:
         _logger.log_message("error", f"Get sync history failed: {e}")
         return GetSyncHistoryResponse(
@@ -1458,7 +1598,7 @@ class MarkAttendanceResponse(BaseModel):
     session_id: int = 0
 
 
-@commands.command()
+@command()
 async def mark_attendance(body: MarkAttendanceRequest) -> MarkAttendanceResponse:
     """Mark attendance for a specific class session."""
     try:
@@ -1468,7 +1608,8 @@ async def mark_attendance(body: MarkAttendanceRequest) -> MarkAttendanceResponse
                 message="Statistics manager not available"
             )
 
-        session_id = _db.statistics_manager.mark_attendance(
+        session_id = await run_db(
+            _db.statistics_manager.mark_attendance,
             course_id=body.course_id,
             schedule_entry_id=body.schedule_entry_id,
             date_str=body.date,
@@ -1526,7 +1667,7 @@ class GetAttendanceHistoryResponse(BaseModel):
     records: List[AttendanceRecord] = []
 
 
-@commands.command()
+@command()
 async def get_attendance_history(body: GetAttendanceHistoryRequest) -> GetAttendanceHistoryResponse:
     """Get attendance history with optional filters."""
     try:
@@ -1536,7 +1677,8 @@ async def get_attendance_history(body: GetAttendanceHistoryRequest) -> GetAttend
                 message="Statistics manager not available"
             )
 
-        records = _db.statistics_manager.get_attendance_history(
+        records = await run_db(
+            _db.statistics_manager.get_attendance_history,
             course_id=body.course_id,
             start_date=body.start_date,
             end_date=body.end_date,
@@ -1567,7 +1709,7 @@ class DeleteAttendanceResponse(BaseModel):
     message: str
 
 
-@commands.command()
+@command()
 async def delete_attendance_record(body: DeleteAttendanceRequest) -> DeleteAttendanceResponse:
     """Delete an attendance record."""
     try:
@@ -1577,7 +1719,7 @@ async def delete_attendance_record(body: DeleteAttendanceRequest) -> DeleteAtten
                 message="Statistics manager not available"
             )
 
-        success = _db.statistics_manager.delete_attendance_record(body.session_id)
+        success = await run_db(_db.statistics_manager.delete_attendance_record, body.session_id)
 
         if success:
             return DeleteAttendanceResponse(
@@ -1639,6 +1781,12 @@ class BusiestDayItem(BaseModel):
     total_hours: float
 
 
+class StatisticsFreshness(BaseModel):
+    """When a statistics aggregate was computed and whether it came from the cache"""
+    computed_at: str
+    cached: bool
+
+
 class GetCourseStatisticsResponse(BaseModel):
     """Response with comprehensive course statistics"""
     success: bool
@@ -1649,9 +1797,10 @@ class GetCourseStatisticsResponse(BaseModel):
     weekly_load: List[WeeklyLoadItem] = []
     busiest_days: List[BusiestDayItem] = []
     time_slots: Dict[str, int] = {}
+    freshness: Dict[str, StatisticsFreshness] = {}
 
 
-@commands.command()
+@command()
 async def get_course_statistics(body: GetCourseStatisticsRequest) -> GetCourseStatisticsResponse:
     """Get comprehensive course statistics."""
     try:
@@ -1661,7 +1810,8 @@ async def get_course_statistics(body: GetCourseStatisticsRequest) -> GetCourseSt
                 message="Statistics manager not available"
             )
 
-        stats = _db.statistics_manager.calculate_all_statistics(
+        stats = await run_db(
+            _db.statistics_manager.calculate_all_statistics,
             start_week=body.start_week,
             end_week=body.end_week
         )
@@ -1674,7 +1824,10 @@ async def get_course_statistics(body: GetCourseStatisticsRequest) -> GetCourseSt
             attendance=AttendanceRateData(**stats.get("attendance", {})) if stats.get("attendance") else None,
             weekly_load=[WeeklyLoadItem(**item) for item in stats.get("weekly_load", [])],
             busiest_days=[BusiestDayItem(**item) for item in stats.get("busiest_days", [])],
-            time_slots=stats.get("time_slots", {})
+            time_slots=stats.get("time_slots", {}),
+            freshness={
+                name: StatisticsFreshness(**item) for name, item in stats.get("freshness", {}).items()
+            }
         )
     except Exception as e:
         _logger.log_message("error", f"Get course statistics failed: {e}")
@@ -1696,7 +1849,7 @@ class GetWeeklyLoadResponse(BaseModel):
     weekly_load: List[WeeklyLoadItem] = []
 
 
-@commands.command()
+@command()
 async def get_weekly_load(body: GetWeeklyLoadRequest) -> GetWeeklyLoadResponse:
     """Get weekly course load for all days."""
     try:
@@ -1706,7 +1859,7 @@ async def get_weekly_load(body: GetWeeklyLoadRequest) -> GetWeeklyLoadResponse:
                 message="Statistics manager not available"
             )
 
-        load = _db.statistics_manager.get_weekly_load(body.week_number)
+        load = await run_db(_db.statistics_manager.get_weekly_load, body.week_number)
 
         return GetWeeklyLoadResponse(
             success=True,
@@ -1735,7 +1888,7 @@ class GetAttendanceRateResponse(BaseModel):
     statistics: Optional[AttendanceRateData] = None
 
 
-@commands.command()
+@command()
 async def get_attendance_rate(body: GetAttendanceRateRequest) -> GetAttendanceRateResponse:
     """Get attendance rate with optional filters."""
     try:
@@ -1745,7 +1898,8 @@ async def get_attendance_rate(body: GetAttendanceRateRequest) -> GetAttendanceRa
                 message="Statistics manager not available"
             )
 
-        stats = _db.statistics_manager.get_attendance_rate(
+        stats = await run_db(
+            _db.statistics_manager.get_attendance_rate,
             course_id=body.course_id,
             start_date=body.start_date,
             end_date=body.end_date
@@ -1780,7 +1934,7 @@ class CourseAttendanceSummaryResponse(BaseModel):
     recent_sessions: List[AttendanceRecord] = []
 
 
-@commands.command()
+@command()
 async def get_course_attendance_summary(body: GetCourseAttendanceSummaryRequest) -> CourseAttendanceSummaryResponse:
     """Get comprehensive attendance summary for a specific course."""
     try:
@@ -1790,7 +1944,7 @@ async def get_course_attendance_summary(body: GetCourseAttendanceSummaryRequest)
                 message="Statistics manager not available"
             )
 
-        summary = _db.statistics_manager.get_course_attendance_summary(body.course_id)
+        summary = await run_db(_db.statistics_manager.get_course_attendance_summary, body.course_id)
 
         if not summary:
             return CourseAttendanceSummaryResponse(
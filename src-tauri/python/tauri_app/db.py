@@ -1,7 +1,11 @@
 import sqlite3
+import threading
+from datetime import datetime
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional, Dict, List
-from . import logger
+from . import logger, migrations
+from . import tracing as _tracing
 
 # Store DB in user home directory under .classtop
 APP_DIR = Path.home() / ".classtop"
@@ -15,124 +19,175 @@ camera_manager = None
 audio_manager = None
 sync_client = None
 statistics_manager = None
+class_state_service = None
 
+# Guards the on-demand creation of optional subsystems (get_audio_manager, get_sync_client)
+_lazy_lock = threading.Lock()
+_audio_manager_failed = False
+
+# PRAGMAs applied to every pooled connection. WAL lets the API server thread,
+# the sync thread and the reminder loop read while another thread writes.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",  # 8 MB page cache
+    "PRAGMA mmap_size=67108864",  # 64 MB memory-mapped I/O
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA busy_timeout=5000",
+)
+
+# One connection per (thread, database file); sqlite3 connections must not be
+# shared across threads, so a thread-local pool is the natural fit.
+_local = threading.local()
+
+
+class _PooledConnection:
+    """A cached connection plus the nesting depth of get_connection() users."""
+
+    __slots__ = ("conn", "depth")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.depth = 0
+
+
+# Statements longer than this are shortened in tracing spans
+SQL_SPAN_TEXT = 200
+
+
+class _TracedCursor(sqlite3.Cursor):
+    """Cursor that records each statement as a span of the active trace."""
+
+    def execute(self, sql, parameters=()):
+        if _tracing.current_span() is None:
+            return super().execute(sql, parameters)
+        with _tracing.span("sql", "sql", statement=sql[:SQL_SPAN_TEXT]):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if _tracing.current_span() is None:
+            return super().executemany(sql, seq_of_parameters)
+        with _tracing.span("sql", "sql", statement=sql[:SQL_SPAN_TEXT], many=True):
+            return super().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        if _tracing.current_span() is None:
+            return super().executescript(sql_script)
+        with _tracing.span("sql", "sql", statement=sql_script[:SQL_SPAN_TEXT], script=True):
+            return super().executescript(sql_script)
+
+
+class _TracedConnection(sqlite3.Connection):
+    """Connection whose cursors (including the execute shortcuts) are traced."""
+
+    def cursor(self, factory=_TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def _open_connection(path: str) -> sqlite3.Connection:
+    """Open a new connection and apply the tuned PRAGMAs."""
+    conn = sqlite3.connect(path, timeout=5.0, factory=_TracedConnection)
+    cur = conn.cursor()
+    for pragma in CONNECTION_PRAGMAS:
+        cur.execute(pragma)
+    cur.close()
+    logger.log_message("debug", "Database connection opened for thread {}: {}",
+                       threading.current_thread().name, path)
+    return conn
+
+
+def _pooled(db_path=None) -> _PooledConnection:
+    """Return the current thread's pooled connection for a database file."""
+    path = str(db_path if db_path is not None else DB_PATH)
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = _local.pool = {}
+
+    pooled = pool.get(path)
+    if pooled is None:
+        with _tracing.span("db.connect", "db", path=path):
+            conn = _open_connection(path)
+            # Every database handed out is at the current schema version; for an
+            # up-to-date file this is a single SELECT per new connection.
+            try:
+                migrations.migrate(conn)
+            except Exception:
+                conn.close()
+                raise
+        pooled = pool[path] = _PooledConnection(conn)
+    return pooled
+
+
+@contextmanager
+def get_connection(db_path=None, row_factory=None):
+    """Context manager yielding the shared connection for this thread.
 
-def init_db() -> None:
-    """Initialize database and create tables."""
-    logger.log_message("info", "Initializing database")
+    All managers and the fallbacks below go through this single contract.
+    The connection stays open for the lifetime of the thread and nested
+    ``with`` blocks on the same thread reuse it. Work that is still
+    uncommitted when the outermost block exits is rolled back, matching the
+    old open/close-per-call behaviour.
+
+    Args:
+        db_path: Database file path, defaults to ``DB_PATH``
+        row_factory: Optional row factory (e.g. ``sqlite3.Row``) for cursors
+            created inside this block
+    """
+    pooled = _pooled(db_path)
+    conn = pooled.conn
+    previous_factory = conn.row_factory
+    if row_factory is not None:
+        conn.row_factory = row_factory
 
-    conn = sqlite3.connect(DB_PATH)
+    pooled.depth += 1
     try:
-        cur = conn.cursor()
-
-        # Settings table
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-            """
-        )
-        logger.log_message("debug", "Settings table ready")
-
-        # Courses table - stores course information
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS courses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                teacher TEXT,
-                location TEXT,
-                color TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-        )
-        logger.log_message("debug", "Courses table ready")
-
-        # Schedule table - stores weekly schedule
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS schedule (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                course_id INTEGER NOT NULL,
-                day_of_week INTEGER NOT NULL CHECK (day_of_week >= 1 AND day_of_week <= 7),
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                weeks TEXT,  -- JSON array of week numbers
-                note TEXT,
-                FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
-            )
-            """
-        )
-        logger.log_message("debug", "Schedule table ready")
-
-        # Sync history table - tracks synchronization operations
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS sync_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                direction TEXT CHECK(direction IN ('upload', 'download', 'bidirectional')) NOT NULL,
-                status TEXT CHECK(status IN ('success', 'failure', 'conflict')) NOT NULL,
-                message TEXT,
-                courses_synced INTEGER DEFAULT 0,
-                schedule_synced INTEGER DEFAULT 0,
-                conflicts_found INTEGER DEFAULT 0
-            )
-            """
-        )
-        logger.log_message("debug", "Sync history table ready")
-
-        # Course sessions table - for attendance tracking
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS course_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                course_id INTEGER NOT NULL,
-                schedule_entry_id INTEGER NOT NULL,
-                date DATE NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                attended BOOLEAN DEFAULT 1,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
-                FOREIGN KEY (schedule_entry_id) REFERENCES schedule(id) ON DELETE CASCADE
-            )
-            """
-        )
-        logger.log_message("debug", "Course sessions table ready")
-
-        # Statistics cache table - for performance optimization
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS statistics_cache (
-                key TEXT PRIMARY KEY,
-                value TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-        )
-        logger.log_message("debug", "Statistics cache table ready")
-
-        # Current week settings with semester start date
-        cur.execute(
-            """
-            INSERT OR IGNORE INTO settings(key, value)
-            VALUES('current_week', '1'), ('total_weeks', '20'), ('semester_start_date', '')
-            """
-        )
-
-        conn.commit()
-        logger.log_message("info", "Database initialized successfully")
-
-    except Exception as e:
-        logger.log_message("error", f"Error initializing database: {e}")
-        raise
+        yield conn
     finally:
-        conn.close()
+        pooled.depth -= 1
+        conn.row_factory = previous_factory
+        if pooled.depth == 0 and conn.in_transaction:
+            conn.rollback()
+
+
+def close_connections(db_path=None) -> None:
+    """Close this thread's pooled connections (all, or only for ``db_path``)."""
+    pool = getattr(_local, "pool", None)
+    if not pool:
+        return
+
+    paths = [str(db_path)] if db_path is not None else list(pool.keys())
+    for path in paths:
+        pooled = pool.pop(path, None)
+        if pooled is not None:
+            pooled.conn.close()
+            logger.log_message("debug", "Database connection closed: {}", path)
+
+
+def init_db(db_path=None) -> None:
+    """Initialize database and bring the schema up to date.
+
+    Table creation, indexes and default settings live in ``migrations``;
+    an already up-to-date database only costs one version lookup.
+    """
+    logger.log_message("info", "Initializing database")
+
+    with get_connection(db_path) as conn:
+        try:
+            version = migrations.migrate(conn)
+            logger.log_message("info", f"Database initialized successfully (schema version {version})")
+
+        except Exception as e:
+            logger.log_message("error", f"Error initializing database: {e}")
+            raise
 
 
 def set_schedule_manager(manager) -> None:
@@ -170,6 +225,38 @@ def set_sync_client(client) -> None:
     logger.log_message("info", "Sync client instance set")
 
 
+def get_audio_manager():
+    """Return the audio manager, creating it on first use.
+
+    Importing ``audio_manager`` loads sounddevice and numpy, so it is deferred
+    until audio monitoring is first requested. Returns None if it is unavailable.
+    """
+    global _audio_manager_failed
+    if audio_manager is None and not _audio_manager_failed:
+        with _lazy_lock:
+            if audio_manager is None and not _audio_manager_failed:
+                try:
+                    from .audio_manager import AudioManager
+                    set_audio_manager(AudioManager())
+                except Exception as e:
+                    _audio_manager_failed = True
+                    logger.log_message("warning", f"Failed to initialize audio manager: {e}")
+    return audio_manager
+
+
+def get_sync_client():
+    """Return the sync client, creating it on first use.
+
+    Requires the settings and schedule managers to be set; returns None until they are.
+    """
+    if sync_client is None and settings_manager is not None and schedule_manager is not None:
+        with _lazy_lock:
+            if sync_client is None:
+                from .sync_client import SyncClient
+                set_sync_client(SyncClient(settings_manager, schedule_manager))
+    return sync_client
+
+
 def set_statistics_manager(manager) -> None:
     """Set the global statistics manager instance."""
     global statistics_manager
@@ -177,6 +264,13 @@ def set_statistics_manager(manager) -> None:
     logger.log_message("info", "Statistics manager instance set")
 
 
+def set_class_state_service(service) -> None:
+    """Set the global class state service instance."""
+    global class_state_service
+    class_state_service = service
+    logger.log_message("info", "Class state service instance set")
+
+
 # Configuration management functions - delegated to settings manager
 def set_config(key: str, value: str) -> None:
     """Set a configuration value."""
@@ -186,19 +280,17 @@ def set_config(key: str, value: str) -> None:
     else:
         # Fallback to direct database access if manager not initialized
         logger.log_message("warning", "Settings manager not initialized, using direct DB access")
-        conn = sqlite3.connect(DB_PATH)
-        try:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO settings(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
-                (key, value),
-            )
-            conn.commit()
-            logger.log_message("info", f"Config set: {key} = {value}")
-        except Exception as e:
-            logger.log_message("error", f"Error setting config for key '{key}': {e}")
-        finally:
-            conn.close()
+        with get_connection() as conn:
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    "INSERT INTO settings(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                    (key, value),
+                )
+                conn.commit()
+                logger.log_message("info", f"Config set: {key} = {value}")
+            except Exception as e:
+                logger.log_message("error", f"Error setting config for key '{key}': {e}")
 
 
 def get_config(key: str) -> Optional[str]:
@@ -209,17 +301,15 @@ def get_config(key: str) -> Optional[str]:
     else:
         # Fallback to direct database access
         logger.log_message("warning", "Settings manager not initialized, using direct DB access")
-        conn = sqlite3.connect(DB_PATH)
-        try:
-            cur = conn.cursor()
-            cur.execute("SELECT value FROM settings WHERE key=?", (key,))
-            row = cur.fetchone()
-            return row[0] if row else None
-        except Exception as e:
-            logger.log_message("error", f"Error getting config for key '{key}': {e}")
-            return None
-        finally:
-            conn.close()
+        with get_connection() as conn:
+            try:
+                cur = conn.cursor()
+                cur.execute("SELECT value FROM settings WHERE key=?", (key,))
+                row = cur.fetchone()
+                return row[0] if row else None
+            except Exception as e:
+                logger.log_message("error", f"Error getting config for key '{key}': {e}")
+                return None
 
 
 def list_configs() -> Dict[str, str]:
@@ -230,16 +320,14 @@ def list_configs() -> Dict[str, str]:
     else:
         # Fallback to direct database access
         logger.log_message("warning", "Settings manager not initialized, using direct DB access")
-        conn = sqlite3.connect(DB_PATH)
-        try:
-            cur = conn.cursor()
-            cur.execute("SELECT key, value FROM settings")
-            return {k: v for k, v in cur.fetchall()}
-        except Exception as e:
-            logger.log_message("error", f"Error listing configs: {e}")
-            return {}
-        finally:
-            conn.close()
+        with get_connection() as conn:
+            try:
+                cur = conn.cursor()
+                cur.execute("SELECT key, value FROM settings")
+                return {k: v for k, v in cur.fetchall()}
+            except Exception as e:
+                logger.log_message("error", f"Error listing configs: {e}")
+                return {}
 
 
 # Course management functions - delegated to schedule manager
@@ -291,6 +379,33 @@ def add_schedule_entry(course_id: int, day_of_week: int, start_time: str, end_ti
     return schedule_manager.add_schedule_entry(course_id, day_of_week, start_time, end_time, weeks, note)
 
 
+def add_courses_bulk(courses: List[Dict]) -> List[int]:
+    """Add many courses in one transaction."""
+    global schedule_manager
+    if not schedule_manager:
+        logger.log_message("error", "Schedule manager not initialized")
+        return []
+    return schedule_manager.add_courses_bulk(courses)
+
+
+def add_schedule_entries_bulk(entries: List[Dict]) -> List[int]:
+    """Add many schedule entries in one transaction."""
+    global schedule_manager
+    if not schedule_manager:
+        logger.log_message("error", "Schedule manager not initialized")
+        return []
+    return schedule_manager.add_schedule_entries_bulk(entries)
+
+
+def import_bulk(courses: List[Dict], entries: List[Dict], replace: bool = False) -> Dict[str, List[int]]:
+    """Import courses and schedule entries in one all-or-nothing transaction."""
+    global schedule_manager
+    if not schedule_manager:
+        logger.log_message("error", "Schedule manager not initialized")
+        return {}
+    return schedule_manager.import_bulk(courses, entries, replace)
+
+
 def get_schedule(week: Optional[int] = None) -> List[Dict]:
     """Get schedule for a specific week or all schedules."""
     global schedule_manager
@@ -309,8 +424,8 @@ def delete_schedule_entry(entry_id: int) -> bool:
     return schedule_manager.delete_schedule_entry(entry_id)
 
 
-def get_calculated_week_number() -> int:
-    """Get current week number, either from manual setting or calculated from semester start."""
+def get_calculated_week_number(today: Optional[datetime] = None) -> int:
+    """Get the week number (of ``today``, default now), either from manual setting or calculated from semester start."""
     # First check if semester start date is configured
     semester_start = get_config("semester_start_date")
 
@@ -318,7 +433,7 @@ def get_calculated_week_number() -> int:
         # Calculate week from semester start date
         global schedule_manager
         if schedule_manager:
-            week_num = schedule_manager.calculate_week_number(semester_start)
+            week_num = schedule_manager.calculate_week_number(semester_start, today)
             return week_num
 
     # Fall back to manually set current week
@@ -346,56 +461,53 @@ def get_schedule_for_week(week: Optional[int] = None) -> List[Dict]:
     return schedule_manager.get_schedule_for_week(week)
 
 
-def get_current_class() -> Optional[Dict]:
+def get_timeline_state(now: Optional[datetime] = None) -> Dict:
     """
-    DEPRECATED: Use get_schedule_by_day() and calculate on frontend.
-    Kept for backward compatibility.
+    Get the current, next and previous class from the cached timeline.
+
+    Args:
+        now: Point in time to evaluate (defaults to the current time)
+
+    Returns:
+        Dict with week, day_of_week, minute, current, next, previous and
+        minutes_until_transition (None when nothing is left in the timeline)
     """
     global schedule_manager
     if not schedule_manager:
         logger.log_message("error", "Schedule manager not initialized")
-        return None
+        return {}
 
-    from datetime import datetime
-    now = datetime.now()
+    now = now or datetime.now()
+    week = get_calculated_week_number(now)
     day_of_week = now.isoweekday()
-    current_time = now.strftime("%H:%M")
-    week_num = get_calculated_week_number()
+    minute = now.hour * 60 + now.minute
 
-    classes = schedule_manager.get_schedule_by_day(day_of_week, week_num)
-    for cls in classes:
-        if cls["start_time"] <= current_time <= cls["end_time"]:
-            return cls
-    return None
+    timeline, _, position = schedule_manager.timeline_at(get_config("semester_start_date"), now, week)
+    return {
+        "week": week,
+        "day_of_week": day_of_week,
+        "minute": minute,
+        "current": timeline.current(position),
+        "next": timeline.next(position),
+        "previous": timeline.previous(position),
+        "minutes_until_transition": timeline.until_next_transition(position),
+    }
 
 
-def get_next_class() -> Optional[Dict]:
+def get_current_class() -> Optional[Dict]:
     """
     DEPRECATED: Use get_schedule_by_day() and calculate on frontend.
     Kept for backward compatibility.
     """
-    global schedule_manager
-    if not schedule_manager:
-        logger.log_message("error", "Schedule manager not initialized")
-        return None
+    return get_timeline_state().get("current")
 
-    from datetime import datetime
-    now = datetime.now()
-    day_of_week = now.isoweekday()
-    current_time = now.strftime("%H:%M")
-    week_num = get_calculated_week_number()
-
-    classes = schedule_manager.get_schedule_by_day(day_of_week, week_num)
-    for cls in classes:
-        if cls["start_time"] > current_time:
-            return cls
-
-    for day_offset in range(1, 8):
-        next_day = ((day_of_week - 1 + day_offset) % 7) + 1
-        classes = schedule_manager.get_schedule_by_day(next_day, week_num)
-        if classes:
-            return classes[0]
-    return None
+
+def get_next_class() -> Optional[Dict]:
+    """
+    DEPRECATED: Use get_schedule_by_day() and calculate on frontend.
+    Kept for backward compatibility.
+    """
+    return get_timeline_state().get("next")
 
 
 def get_last_class() -> Optional[Dict]:
@@ -403,25 +515,12 @@ def get_last_class() -> Optional[Dict]:
     DEPRECATED: Use get_schedule_by_day() and calculate on frontend.
     Kept for backward compatibility.
     """
-    global schedule_manager
-    if not schedule_manager:
-        logger.log_message("error", "Schedule manager not initialized")
-        return None
-
-    from datetime import datetime
-    now = datetime.now()
-    day_of_week = now.isoweekday()
-    current_time = now.strftime("%H:%M")
-    week_num = get_calculated_week_number()
-
-    classes = schedule_manager.get_schedule_by_day(day_of_week, week_num)
-    last_class = None
-    for cls in classes:
-        if cls["end_time"] <= current_time:
-            last_class = cls
-        else:
-            break
-    return last_class
+    state = get_timeline_state()
+    previous = state.get("previous")
+    # Only classes that ended earlier today count as the last class
+    if previous and previous["week"] == state["week"] and previous["day_of_week"] == state["day_of_week"]:
+        return previous
+    return None
 
 
 def get_schedule_statistics() -> Dict:
@@ -6,11 +6,12 @@ Manages all event emissions to the frontend in a thread-safe manner.
 import asyncio
 import json
 import threading
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List
 from datetime import datetime
 from pydantic import BaseModel
 from pytauri import AppHandle, Emitter
 from . import logger
+from . import metrics as _metrics
 
 
 class ScheduleUpdateEvent(BaseModel):
@@ -58,8 +59,10 @@ class EventHandler:
 
         try:
             Emitter.emit_str(self._app_handle, event_name, message)
+            _metrics.EVENTS_EMITTED.inc(event_name)
             logger.log_message("debug", f"String event emitted: {event_name} - {message}")
         except Exception as e:
+            _metrics.EVENT_EMIT_ERRORS.inc(event_name)
             logger.log_message("error", f"Failed to emit string event: {e}")
     
     def emit_setting_update(self, key: str, value: Any) -> None:
@@ -75,8 +78,10 @@ class EventHandler:
                 timestamp=datetime.now().isoformat()
             )
             Emitter.emit(self._app_handle, "setting-update", event_data)
+            _metrics.EVENTS_EMITTED.inc("setting-update")
             logger.log_message("info", f"Setting update event emitted: {key} = {value}")
         except Exception as e:
+            _metrics.EVENT_EMIT_ERRORS.inc("setting-update")
             logger.log_message("error", f"Failed to emit setting update event: {e}")
 
     def emit_schedule_update(self, event_type: str, payload: Dict[str, Any]) -> None:
@@ -96,6 +101,7 @@ class EventHandler:
             # Try to emit directly - PyTauri's Emitter should be thread-safe
             try:
                 Emitter.emit(self._app_handle, "schedule-update", event_data)
+                _metrics.EVENTS_EMITTED.inc("schedule-update")
                 logger.log_message("debug", f"Event emitted successfully: {event_type}")
             except RuntimeError as e:
                 # If we get a runtime error about event loop, try using portal
@@ -107,8 +113,10 @@ class EventHandler:
                         try:
                             # In async context, we can safely emit
                             Emitter.emit(self._app_handle, "schedule-update", event_data)
+                            _metrics.EVENTS_EMITTED.inc("schedule-update")
                             logger.log_message("debug", f"Event emitted via portal: {event_type}")
                         except Exception as e2:
+                            _metrics.EVENT_EMIT_ERRORS.inc("schedule-update")
                             logger.log_message("error", f"Failed to emit via portal: {e2}")
 
                     # Check if we're in a thread that can use portal
@@ -131,8 +139,10 @@ class EventHandler:
                         else:
                             logger.log_message("error", "Cannot emit: no portal available")
                 else:
+                    _metrics.EVENT_EMIT_ERRORS.inc("schedule-update")
                     logger.log_message("error", f"Failed to emit event: {e}")
             except Exception as e:
+                _metrics.EVENT_EMIT_ERRORS.inc("schedule-update")
                 logger.log_message("error", f"Unexpected error emitting event: {e}")
 
         except Exception as e:
@@ -164,6 +174,27 @@ class EventHandler:
         """Emit event when a schedule entry is deleted."""
         self.emit_schedule_update("schedule_deleted", {"id": entry_id})
 
+    def emit_schedule_bulk_added(self, course_ids: List[int], entry_ids: List[int],
+                                 deleted_course_ids: Optional[List[int]] = None) -> None:
+        """Emit a single event when courses/schedule entries are added in bulk.
+
+        ``deleted_course_ids`` lists the courses (and with them their entries)
+        removed by the same write, e.g. when an import replaces the timetable.
+        """
+        deleted_course_ids = deleted_course_ids or []
+        self.emit_schedule_update("schedule_bulk_added", {
+            "course_ids": course_ids,
+            "entry_ids": entry_ids,
+            "deleted_course_ids": deleted_course_ids,
+            "courses_added": len(course_ids),
+            "entries_added": len(entry_ids),
+            "courses_deleted": len(deleted_course_ids)
+        })
+
+    def emit_schedule_sync_applied(self, stats: Dict[str, int]) -> None:
+        """Emit a single event after server data has been applied locally."""
+        self.emit_schedule_update("schedule_sync_applied", dict(stats))
+
     def emit_settings_batch_updated(self, updated_keys: list) -> None:
         """Emit event when multiple settings are updated at once."""
         if not self._app_handle:
@@ -176,8 +207,10 @@ class EventHandler:
                 timestamp=datetime.now().isoformat()
             )
             Emitter.emit(self._app_handle, "settings-batch-update", event_data)
+            _metrics.EVENTS_EMITTED.inc("settings-batch-update")
             logger.log_message("info", f"Settings batch update event emitted: {len(updated_keys)} settings")
         except Exception as e:
+            _metrics.EVENT_EMIT_ERRORS.inc("settings-batch-update")
             logger.log_message("error", f"Failed to emit settings batch update event: {e}")
 
     def emit_camera_initialized(self, camera_count: int, encoder_info: Dict) -> None:
@@ -206,8 +239,10 @@ class EventHandler:
 
         try:
             Emitter.emit_str(self._app_handle, event_name, json.dumps(payload))
+            _metrics.EVENTS_EMITTED.inc(event_name)
             logger.log_message("debug", f"Custom event emitted: {event_name}")
         except Exception as e:
+            _metrics.EVENT_EMIT_ERRORS.inc(event_name)
             logger.log_message("error", f"Failed to emit custom event: {e}")
 
     @classmethod
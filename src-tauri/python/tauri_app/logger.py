@@ -1,8 +1,13 @@
 from loguru import logger
 from pathlib import Path
+import atexit
+import re
 import sys
-from typing import List
-import inspect
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
 
 # Place logs in user home directory under .classtop
 APP_DIR = Path.home() / ".classtop"
@@ -10,6 +15,286 @@ APP_DIR.mkdir(parents=True, exist_ok=True)
 LOG_DIR = APP_DIR / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = LOG_DIR / "app.log"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_RETENTION_DAYS = 10
+
+# Queued logging: sinks are written by a background thread so that audio
+# callbacks, camera loops and the sync thread never wait for disk or console.
+QUEUED_SINKS = True
+QUEUE_MAXSIZE = 10000
+QUEUE_BATCH_SIZE = 256
+QUEUE_FLUSH_INTERVAL = 0.5  # seconds
+# "coalesce": consecutive identical records up to QUEUE_DROP_LEVEL are merged
+# into one line with a repeat count; "drop": they are only dropped when full
+QUEUE_POLICY = "coalesce"
+# Records up to this level are dropped when the queue is full; more severe
+# records evict the oldest queued record instead
+QUEUE_DROP_LEVEL = "DEBUG"
+
+# Level number of every sink added through add_sink(), keyed by loguru handler id.
+# log_message() drops records below the lowest of them before doing any work.
+_sink_levels: Dict[int, int] = {}
+_min_level_no = 0
+_level_nos: Dict[str, Optional[int]] = {}
+# QueuedSink behind each handler added with add_queued_sink()
+_queued_sinks: Dict[int, "QueuedSink"] = {}
+
+# Frames whose globals are this module's are wrappers, not callers
+_MODULE_GLOBALS = globals()
+
+
+def _level_no(level: str) -> Optional[int]:
+    """Severity number of a level name (cached), or None for unknown levels."""
+    try:
+        return _level_nos[level]
+    except KeyError:
+        try:
+            no = logger.level(level).no
+        except (ValueError, TypeError):
+            no = None
+        _level_nos[level] = no
+        return no
+
+
+def _update_min_level() -> None:
+    global _min_level_no
+    _min_level_no = min(_sink_levels.values(), default=0)
+
+
+def add_sink(sink: Any, level: str = "DEBUG", **kwargs: Any) -> int:
+    """Add a loguru sink and take its level into account for early filtering.
+
+    Returns:
+        The loguru handler id, for remove_sink()
+    """
+    handler_id = logger.add(sink, level=level, **kwargs)
+    _sink_levels[handler_id] = _level_no(level.upper()) or 0
+    _update_min_level()
+    return handler_id
+
+
+def remove_sink(handler_id: int) -> None:
+    """Remove a sink added with add_sink() or add_queued_sink()."""
+    logger.remove(handler_id)
+    _sink_levels.pop(handler_id, None)
+    _update_min_level()
+    queued = _queued_sinks.pop(handler_id, None)
+    if queued is not None:
+        queued.close()
+
+
+def is_enabled(level: str) -> bool:
+    """Return True if a message at ``level`` would reach at least one sink."""
+    no = _level_no((level or "info").upper())
+    return no is None or no >= _min_level_no
+
+
+class RotatingFileWriter:
+    """Append-only text file that rotates by size and prunes old rotated files.
+
+    Rotated files are renamed to ``<stem>.<YYYY-MM-DD_HH-MM-SS><suffix>`` next
+    to the log file; those older than ``retention_days`` are deleted.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = LOG_MAX_BYTES,
+                 retention_days: int = LOG_RETENTION_DAYS, encoding: str = "utf-8"):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.encoding = encoding
+        self._file = None
+        self._size = 0
+
+    def _open(self) -> None:
+        self._file = open(self.path, "a", encoding=self.encoding)
+        self._size = self._file.tell()
+
+    def write(self, text: str) -> None:
+        if self._file is None:
+            self._open()
+        elif self._size >= self.max_bytes:
+            self.rotate()
+        self._file.write(text)
+        self._size += len(text.encode(self.encoding, "replace"))
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def rotate(self) -> None:
+        """Move the current file aside, prune expired ones and start a new file."""
+        self.close()
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        target = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        try:
+            self.path.replace(target)
+        except OSError:
+            pass
+
+        cutoff = time.time() - self.retention_days * 86400
+        for old in self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}"):
+            try:
+                if old.stat().st_mtime < cutoff:
+                    old.unlink()
+            except OSError:
+                continue
+        self._open()
+
+
+class QueuedSink:
+    """Loguru sink that hands formatted records to a background writer thread.
+
+    The logging thread only appends to a bounded in-memory buffer. The writer
+    wakes when a record arrives, waits up to ``flush_interval`` (or until
+    ``batch_size`` records are queued), writes the batch and flushes once.
+    When the buffer is full, records up to ``drop_level`` are dropped and
+    more severe ones evict the oldest record; both are counted in
+    ``dropped`` and reported in the sink itself.
+    """
+
+    def __init__(self, write: Callable[[str], Any], flush: Optional[Callable[[], Any]] = None,
+                 close: Optional[Callable[[], Any]] = None, name: str = "sink",
+                 maxsize: int = QUEUE_MAXSIZE, batch_size: int = QUEUE_BATCH_SIZE,
+                 flush_interval: float = QUEUE_FLUSH_INTERVAL, policy: str = QUEUE_POLICY,
+                 drop_level: str = QUEUE_DROP_LEVEL):
+        if policy not in ("coalesce", "drop"):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self._write = write
+        self._flush = flush
+        self._close = close
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self._drop_level_no = _level_no(drop_level.upper()) or 0
+
+        self.dropped = 0
+        self.coalesced = 0
+        self._reported_dropped = 0
+        # Entries are [message, coalesce key, repeats]
+        self._buffer: deque = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"classtop-log-{name}", daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def __call__(self, message) -> None:
+        record = message.record
+        droppable = record["level"].no <= self._drop_level_no
+        key = ((record["level"].no, record["name"], record["function"], record["line"], record["message"])
+               if droppable else None)
+
+        with self._cond:
+            if self._closed:
+                self._write_one(message, 0)
+                return
+
+            buffer = self._buffer
+            if key is not None and self.policy == "coalesce" and buffer and buffer[-1][1] == key:
+                buffer[-1][2] += 1
+                self.coalesced += 1
+                return
+
+            if len(buffer) >= self.maxsize:
+                self.dropped += 1
+                if droppable:
+                    return
+                buffer.popleft()
+
+            buffer.append([message, key, 0])
+            if len(buffer) == 1 or len(buffer) == self.batch_size:
+                self._cond.notify()
+
+    def _write_one(self, message: str, repeats: int) -> None:
+        if repeats:
+            message = message.rstrip("\n") + f" (repeated {repeats} more times)\n"
+        self._write(message)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if len(self._buffer) < self.batch_size and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                batch, self._buffer = self._buffer, deque()
+                dropped = self.dropped - self._reported_dropped
+                self._reported_dropped = self.dropped
+                closed = self._closed
+
+            try:
+                for message, _, repeats in batch:
+                    self._write_one(message, repeats)
+                if dropped:
+                    stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+                    self._write(f"{stamp} | WARNING  | {__name__} - "
+                                f"Dropped {dropped} log records (queue full)\n")
+                if self._flush is not None:
+                    self._flush()
+            except Exception:
+                # A broken sink must not kill the writer thread
+                pass
+
+            if closed:
+                break
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Write out everything still queued and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        if self._close is not None:
+            try:
+                self._close()
+            except Exception:
+                pass
+
+
+def add_queued_sink(write: Callable[[str], Any], level: str = "DEBUG",
+                    flush: Optional[Callable[[], Any]] = None, close: Optional[Callable[[], Any]] = None,
+                    name: str = "sink", **kwargs: Any) -> int:
+    """Add a sink written by a background thread through a QueuedSink.
+
+    ``kwargs`` are passed to loguru (format, colorize, ...).
+
+    Returns:
+        The loguru handler id, for remove_sink()
+    """
+    sink = QueuedSink(write, flush=flush, close=close, name=name)
+    handler_id = add_sink(sink, level=level, **kwargs)
+    _queued_sinks[handler_id] = sink
+    return handler_id
+
+
+def get_queue_stats() -> Dict[str, int]:
+    """Records currently queued, dropped and coalesced across all queued sinks."""
+    sinks = list(_queued_sinks.values())
+    return {
+        "queued": sum(len(sink) for sink in sinks),
+        "dropped": sum(sink.dropped for sink in sinks),
+        "coalesced": sum(sink.coalesced for sink in sinks),
+    }
+
+
+def shutdown() -> None:
+    """Flush and stop all queued sinks; later records are written synchronously."""
+    for sink in list(_queued_sinks.values()):
+        sink.close()
+
+
+atexit.register(shutdown)
+
 
 # Configure loguru
 logger.remove()
@@ -18,14 +303,24 @@ logger.remove()
 if sys.stderr is not None:
     try:
         TERMINAL_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
-        logger.add(sys.stderr, level="INFO", colorize=True, format=TERMINAL_FORMAT)
+        if QUEUED_SINKS:
+            add_queued_sink(sys.stderr.write, level="INFO", flush=sys.stderr.flush, name="stderr",
+                            colorize=True, format=TERMINAL_FORMAT)
+        else:
+            add_sink(sys.stderr, level="INFO", colorize=True, format=TERMINAL_FORMAT)
     except Exception:
         # In production mode without console, stderr might not be writable
         pass
 
 # File sink: plain text with full context
 FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}"
-logger.add(str(LOG_FILE), rotation="10 MB", retention="10 days", encoding="utf-8", level="DEBUG", format=FILE_FORMAT)
+if QUEUED_SINKS:
+    _file_writer = RotatingFileWriter(LOG_FILE)
+    add_queued_sink(_file_writer.write, level="DEBUG", flush=_file_writer.flush, close=_file_writer.close,
+                    name="file", format=FILE_FORMAT)
+else:
+    add_sink(str(LOG_FILE), level="DEBUG", rotation=LOG_MAX_BYTES, retention=f"{LOG_RETENTION_DAYS} days",
+             encoding="utf-8", format=FILE_FORMAT)
 
 def init_logger():
     logger.info("Logger initialized")
@@ -34,48 +329,288 @@ def init_logger():
 def _caller_depth() -> int:
     """Return number of stack frames to skip so loguru reports the original caller.
 
-    We need to skip the frames inside this module (wrapper functions) so loguru
-    reports the user's calling file/line instead of this module.
+    Called from log_message(). Walks back from log_message's caller with
+    sys._getframe and skips every frame that belongs to this module, so
+    wrappers defined here are never reported. loguru's opt(depth=N) counts
+    from the function that calls logger.log (log_message itself is depth 0).
     """
-    # Walk the stack until we find a frame outside this file
-    current_file = Path(__file__).resolve()
-    for depth, frame_info in enumerate(inspect.stack()):
-        try:
-            fpath = Path(frame_info.filename).resolve()
-            if fpath != current_file:
-                # We need to subtract 1 because:
-                # - enumerate starts at 0 (this function's frame)
-                # - depth=1 would be log_message's frame
-                # - depth=2+ would be the actual caller
-                # But loguru's opt(depth=N) counts from the opt() call itself,
-                # so we need to adjust by -1 to get the right frame
-                return max(0, depth - 1)
-        except Exception:
-            continue
-    return 0
+    frame = sys._getframe(2)
+    depth = 1
+    while frame is not None and frame.f_globals is _MODULE_GLOBALS:
+        frame = frame.f_back
+        depth += 1
+    return depth
 
 
-def log_message(level: str, message: str) -> None:
+def log_message(level: str, message: Union[str, Callable[[], str]], *args: Any, **kwargs: Any) -> None:
     """Log a message at given level (debug/info/warning/error/critical).
 
+    Messages below every sink's level return immediately, before the caller
+    frame is looked up. For messages that are expensive to build, pass a
+    callable returning the text, or a ``str.format`` template plus ``args``
+    / ``kwargs``; either is only evaluated when the level is enabled::
+
+        log_message("debug", "Opened {} for {}", path, thread_name)
+        log_message("debug", lambda: f"Plan: {explain(query)}")
+
     Uses logger.opt(depth=...) to skip the wrapper and report the actual caller.
     """
     level = (level or "info").upper()
+    no = _level_no(level)
+    if no is not None and no < _min_level_no:
+        return
+    if callable(message):
+        message = message()
     depth = _caller_depth()
     try:
         # Use logger.opt to skip wrapper frames and then call logger.log with the
         # provided level string. logger.log accepts level names like "INFO".
-        logger.opt(depth=depth).log(level, message)
+        logger.opt(depth=depth).log(level, message, *args, **kwargs)
     except Exception:
         # fallback to plain logger.log if something goes wrong
-        logger.log(level, message)
+        logger.log(level, message, *args, **kwargs)
+
+
+# Reverse tailing reads the log file backwards in blocks of this size
+TAIL_BLOCK_SIZE = 64 * 1024
+# Entries per block of the log query index
+INDEX_BLOCK_ENTRIES = 256
+
+# "2025-10-07 10:30:00.123 | INFO     | tauri_app.db:init_db:130 - message"
+# (records written by QueuedSink itself have no function and line)
+_ENTRY_RE = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) \| (\w+)\s*\| ([^\s:]+)(?::([^:]*):(\d+))? - (.*)$"
+)
+
+
+def log_files() -> List[Path]:
+    """The log file and its rotated predecessors, oldest first."""
+    rotated = sorted(LOG_DIR.glob(f"{LOG_FILE.stem}.*{LOG_FILE.suffix}"))
+    return rotated + ([LOG_FILE] if LOG_FILE.exists() else [])
+
+
+def _tail_file(path: Path, lines: int) -> List[str]:
+    """The last ``lines`` lines of one file, reading backwards from the end."""
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        pos = f.tell()
+        data = b""
+        # One newline more than requested guarantees the first line is complete
+        while pos > 0 and data.count(b"\n") <= lines:
+            step = min(TAIL_BLOCK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+
+    result = data.decode("utf-8", "replace").splitlines()
+    if pos > 0:
+        result = result[1:]
+    return result[-lines:]
 
 
 def tail_logs(lines: int = 200) -> List[str]:
-    """Return the last `lines` lines from the log file as a list of strings."""
-    try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            all_lines = f.readlines()
-            return [l.rstrip("\n") for l in all_lines[-lines:]]
-    except FileNotFoundError:
-        return []
+    """Return the last `lines` lines of the logs as a list of strings, oldest first.
+
+    Reads backwards in TAIL_BLOCK_SIZE blocks and continues into rotated files
+    when the current file is shorter than ``lines``.
+    """
+    result: List[str] = []
+    if lines <= 0:
+        return result
+    for path in reversed(log_files()):
+        try:
+            result = _tail_file(path, lines - len(result)) + result
+        except FileNotFoundError:
+            continue
+        if len(result) >= lines:
+            break
+    return result
+
+
+class _LogBlock(NamedTuple):
+    """Summary of up to INDEX_BLOCK_ENTRIES consecutive entries of a log file."""
+    start: int  # byte offsets in the file
+    end: int
+    first_time: str
+    last_time: str
+    max_level: int
+    modules: frozenset
+
+
+class _FileIndex:
+    """Block index of one log file, extended incrementally as the file grows."""
+
+    def __init__(self, identity: Tuple[int, int]):
+        self.identity = identity
+        self.blocks: List[_LogBlock] = []
+        # Offset of the entries after the last complete block
+        self.tail_offset = 0
+        self.tail: Optional[_LogBlock] = None
+        self.size = -1
+
+    def all_blocks(self) -> List[_LogBlock]:
+        return self.blocks + ([self.tail] if self.tail else [])
+
+    def update(self, path: Path, size: int) -> None:
+        """Index everything from the start of the incomplete block up to ``size``."""
+        if size == self.size:
+            return
+        with open(path, "rb") as f:
+            f.seek(self.tail_offset)
+            offset = self.tail_offset
+            block_start, count = offset, 0
+            first = last = ""
+            max_level, modules = 0, set()
+
+            for raw in f:
+                if offset >= size:
+                    break
+                match = _ENTRY_RE.match(raw.decode("utf-8", "replace"))
+                if match:
+                    if count == INDEX_BLOCK_ENTRIES:
+                        self.blocks.append(_LogBlock(block_start, offset, first, last,
+                                                     max_level, frozenset(modules)))
+                        block_start, count = offset, 0
+                        max_level, modules = 0, set()
+                    if count == 0:
+                        first = match.group(1)
+                    last = match.group(1)
+                    max_level = max(max_level, _level_no(match.group(2)) or 0)
+                    modules.add(match.group(3))
+                    count += 1
+                offset += len(raw)
+
+        self.tail_offset = block_start
+        self.tail = (_LogBlock(block_start, offset, first, last, max_level, frozenset(modules))
+                     if offset > block_start else None)
+        self.size = size
+
+
+_log_index: Dict[Path, _FileIndex] = {}
+_log_index_lock = threading.Lock()
+
+
+def _indexed_files() -> List[Tuple[Path, List[_LogBlock]]]:
+    """Bring the block index up to date and return ``(file, blocks)``, oldest first."""
+    result = []
+    with _log_index_lock:
+        files = log_files()
+        for path in list(_log_index):
+            if path not in files:
+                del _log_index[path]
+        for path in files:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            identity = (stat.st_ino, stat.st_dev)
+            index = _log_index.get(path)
+            # A different or truncated file (e.g. after rotation) is indexed anew
+            if index is None or index.identity != identity or stat.st_size < index.size:
+                index = _log_index[path] = _FileIndex(identity)
+            try:
+                index.update(path, stat.st_size)
+            except FileNotFoundError:
+                continue
+            result.append((path, index.all_blocks()))
+    return result
+
+
+def _read_entries(path: Path, block: _LogBlock) -> List[Dict[str, Any]]:
+    """Parse the entries of one block; unmatched lines continue the previous entry."""
+    with open(path, "rb") as f:
+        f.seek(block.start)
+        text = f.read(block.end - block.start).decode("utf-8", "replace")
+
+    entries: List[Dict[str, Any]] = []
+    for line in text.splitlines():
+        match = _ENTRY_RE.match(line)
+        if match:
+            time_, level, module, function, lineno, message = match.groups()
+            entries.append({
+                "time": time_,
+                "level": level,
+                "module": module,
+                "function": function,
+                "line": int(lineno) if lineno else None,
+                "message": message,
+            })
+        elif entries:
+            entries[-1]["message"] += "\n" + line
+    return entries
+
+
+def _normalize_time(value: Optional[str]) -> Optional[str]:
+    """Bring an ISO date/time into the log timestamp format for string comparison."""
+    return value.replace("T", " ") if value else None
+
+
+def query_logs(level: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+               module: Optional[str] = None, contains: Optional[str] = None,
+               offset: int = 0, limit: int = 200) -> Dict[str, Any]:
+    """Search the log file and rotated files, newest entries first.
+
+    Blocks of the offset index whose time range, highest level or modules
+    cannot match are skipped without being read; only the substring filter
+    needs the entry text.
+
+    Args:
+        level: Minimum level name (e.g. "WARNING" also returns ERROR)
+        start: Earliest time, ISO format or "YYYY-MM-DD HH:MM:SS" (inclusive)
+        end: Latest time, same format (inclusive when given to the second)
+        module: Module name prefix, e.g. "tauri_app.sync_client"
+        contains: Case-insensitive substring of the message
+        offset: Number of matching entries to skip
+        limit: Maximum number of entries to return
+
+    Returns:
+        Dict with entries (newest first), offset, limit and has_more
+    """
+    min_level = (_level_no(level.upper()) or 0) if level else 0
+    start = _normalize_time(start)
+    end = _normalize_time(end)
+    if end and len(end) < 23:
+        # Make "2025-10-07" or "2025-10-07 10:30" cover the whole day/minute
+        end += "\uffff"
+    needle = contains.lower() if contains else None
+
+    wanted = max(0, offset) + max(0, limit)
+    matched: List[Dict[str, Any]] = []
+    has_more = False
+
+    for path, blocks in reversed(_indexed_files()):
+        for block in reversed(blocks):
+            if block.max_level < min_level:
+                continue
+            if (start and block.last_time < start) or (end and block.first_time > end):
+                continue
+            if module and not any(name.startswith(module) for name in block.modules):
+                continue
+            try:
+                entries = _read_entries(path, block)
+            except FileNotFoundError:
+                break
+            for entry in reversed(entries):
+                if (_level_no(entry["level"]) or 0) < min_level:
+                    continue
+                if (start and entry["time"] < start) or (end and entry["time"] > end):
+                    continue
+                if module and not entry["module"].startswith(module):
+                    continue
+                if needle and needle not in entry["message"].lower():
+                    continue
+                if len(matched) == wanted:
+                    has_more = True
+                    break
+                matched.append(entry)
+            if has_more:
+                break
+        if has_more:
+            break
+
+    return {
+        "entries": matched[max(0, offset):],
+        "offset": offset,
+        "limit": limit,
+        "has_more": has_more,
+    }
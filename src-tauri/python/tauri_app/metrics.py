@@ -0,0 +1,386 @@
+"""
+In-process metrics: counters, gauges and latency histograms.
+
+Metrics are collected only while enabled (``metrics_enabled`` setting). When
+disabled, ``inc``/``set``/``observe`` return after one flag check, and the
+manager classes registered with ``instrumented()`` run their original,
+unwrapped methods. Their public methods are wrapped with timing code only
+while metrics or tracing (see tracing.py) are on; the same wrappers open the
+tracing spans.
+
+``render()`` produces the Prometheus text exposition format served at
+``/api/metrics``; ``snapshot()`` returns the same data as plain dicts for the
+``get_metrics`` command and WebSocket command.
+"""
+
+import bisect
+import functools
+import inspect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import logger as _logger
+from . import tracing as _tracing
+
+# Setting that switches collection on and off
+SETTING_KEY = "metrics_enabled"
+
+_enabled = False
+# True while the instrumented classes carry wrapped methods
+_wrapped = False
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow network calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def enabled() -> bool:
+    """Return True while metrics are being collected."""
+    return _enabled
+
+
+def set_enabled(value: bool) -> None:
+    """Turn metrics collection on or off and (un)wrap the instrumented classes."""
+    global _enabled
+    with _instrument_lock:
+        _enabled = value
+        refresh_instrumentation()
+
+
+def refresh_instrumentation() -> None:
+    """Wrap the instrumented classes if metrics or tracing need them, else unwrap."""
+    global _wrapped
+    with _instrument_lock:
+        wanted = _enabled or _tracing.sampling()
+        if wanted == _wrapped:
+            return
+        _wrapped = wanted
+        for cls, component in _instrumented:
+            if wanted:
+                _wrap_class(cls, component)
+            else:
+                _unwrap_class(cls)
+
+
+def follow_setting(settings_manager) -> None:
+    """Apply the ``metrics_enabled`` setting now and whenever it changes."""
+    def on_change(keys: List[str], version: int) -> None:
+        if SETTING_KEY in keys:
+            set_enabled(settings_manager.get_setting_bool(SETTING_KEY, False))
+
+    set_enabled(settings_manager.get_setting_bool(SETTING_KEY, False))
+    settings_manager.add_listener(on_change)
+    _logger.log_message("info", f"Metrics collection {'enabled' if _enabled else 'disabled'}")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    """A metric family: one value per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _labels(self, labelvalues: Tuple[Any, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, (str(v) for v in labelvalues)))
+
+    def _label_text(self, labels: Dict[str, str]) -> str:
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._values.items())
+        return [{"labels": self._labels(key), "value": value} for key, value in items]
+
+    def render(self) -> List[str]:
+        lines = []
+        for sample in self.samples():
+            lines.append(f"{self.name}{self._label_text(sample['labels'])} {_format_value(sample['value'])}")
+        return lines
+
+
+class Counter(_Metric):
+    """A monotonically increasing count (e.g. frames, emitted events)."""
+
+    kind = "counter"
+
+    def inc(self, *labelvalues: Any, amount: float = 1.0) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """A value that can go up and down, set directly or read from a callback."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+
+    def set(self, value: float, *labelvalues: Any) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[labelvalues] = float(value)
+
+    def samples(self) -> List[Dict[str, Any]]:
+        if self._function is not None:
+            try:
+                return [{"labels": {}, "value": float(self._function())}]
+            except Exception:
+                return []
+        return super().samples()
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies in seconds) over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: Any) -> None:
+        if not _enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                state = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues: Any) -> Iterator[None]:
+        """Observe the duration of the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def samples(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+
+        result = []
+        for key, (counts, total, count) in items:
+            cumulative, buckets = 0, {}
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                buckets[_format_value(bound)] = cumulative
+            result.append({"labels": self._labels(key), "count": count, "sum": total, "buckets": buckets})
+        return result
+
+    def render(self) -> List[str]:
+        lines = []
+        for sample in self.samples():
+            labels = sample["labels"]
+            for bound, cumulative in sample["buckets"].items():
+                text = self._label_text({**labels, "le": bound})
+                lines.append(f"{self.name}_bucket{text} {cumulative}")
+            text = self._label_text(labels)
+            lines.append(f"{self.name}_sum{text} {_format_value(sample['sum'])}")
+            lines.append(f"{self.name}_count{text} {sample['count']}")
+        return lines
+
+
+class Registry:
+    """Holds metric families by name; get-or-create helpers keep names unique."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args: Any, **kwargs: Any):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames, function=function)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda m: m.name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """All metrics as ``{name: {type, help, samples}}``."""
+        return {
+            metric.name: {"type": metric.kind, "help": metric.documentation, "samples": metric.samples()}
+            for metric in self.metrics()
+        }
+
+    def reset(self) -> None:
+        """Drop all collected values (metric families stay registered)."""
+        for metric in self.metrics():
+            metric.clear()
+
+
+REGISTRY = Registry()
+render = REGISTRY.render
+snapshot = REGISTRY.snapshot
+reset = REGISTRY.reset
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Metrics shared by the instrumented modules
+METHOD_DURATION = REGISTRY.histogram(
+    "classtop_method_duration_seconds", "Duration of manager method calls", ("component", "method"))
+METHOD_ERRORS = REGISTRY.counter(
+    "classtop_method_errors_total", "Manager method calls that raised", ("component", "method"))
+COMMAND_DURATION = REGISTRY.histogram(
+    "classtop_command_duration_seconds", "Duration of IPC command handlers", ("command",))
+COMMAND_ERRORS = REGISTRY.counter(
+    "classtop_command_errors_total", "IPC command handlers that raised", ("command",))
+SYNC_REQUEST_DURATION = REGISTRY.histogram(
+    "classtop_sync_request_duration_seconds", "Round trip time of Management Server requests",
+    ("operation", "outcome"))
+EVENTS_EMITTED = REGISTRY.counter(
+    "classtop_events_emitted_total", "Events emitted to the frontend", ("event",))
+EVENT_EMIT_ERRORS = REGISTRY.counter(
+    "classtop_event_emit_errors_total", "Events that failed to emit", ("event",))
+CAMERA_FRAMES = REGISTRY.counter(
+    "classtop_camera_frames_total", "Camera preview frames sent", ("camera",))
+AUDIO_FRAMES = REGISTRY.counter(
+    "classtop_audio_frames_total", "Audio level updates processed", ("source",))
+LOG_RECORDS_DROPPED = REGISTRY.gauge(
+    "classtop_log_records_dropped", "Log records dropped by full log sink queues since start",
+    function=lambda: _logger.get_queue_stats()["dropped"])
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+# ---------------------------------------------------------------------------
+
+_instrument_lock = threading.RLock()
+_instrumented: List[Tuple[type, str]] = []
+
+
+def _timed_method(func: Callable, component: str) -> Callable:
+    method = func.__name__
+    span_name = f"{component}.{method}"
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            with _tracing.span(span_name, "method"):
+                return func(*args, **kwargs)
+        except Exception:
+            METHOD_ERRORS.inc(component, method)
+            raise
+        finally:
+            METHOD_DURATION.observe(time.perf_counter() - start, component, method)
+
+    wrapper.__metrics_original__ = func
+    return wrapper
+
+
+def _wrap_class(cls: type, component: str) -> None:
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(attr) or hasattr(attr, "__metrics_original__"):
+            continue
+        setattr(cls, name, _timed_method(attr, component))
+
+
+def _unwrap_class(cls: type) -> None:
+    for name, attr in list(vars(cls).items()):
+        original = getattr(attr, "__metrics_original__", None)
+        if original is not None:
+            setattr(cls, name, original)
+
+
+def instrumented(component: str) -> Callable[[type], type]:
+    """Class decorator: time and trace every public method while metrics or tracing are on.
+
+    Usage::
+
+        @_metrics.instrumented("schedule_manager")
+        class ScheduleManager: ...
+    """
+    def decorator(cls: type) -> type:
+        with _instrument_lock:
+            _instrumented.append((cls, component))
+            if _wrapped:
+                _wrap_class(cls, component)
+        return cls
+    return decorator
+
+
+def instrument_command(func: Callable) -> Callable:
+    """Wrap an async command handler to record its latency and failures.
+
+    The handler also becomes the root span of a trace when it is sampled.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not _enabled and not _tracing.sampling():
+            return await func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            with _tracing.start_trace(name, "command"):
+                return await func(*args, **kwargs)
+        except Exception:
+            COMMAND_ERRORS.inc(name)
+            raise
+        finally:
+            COMMAND_DURATION.observe(time.perf_counter() - start, name)
+
+    return wrapper
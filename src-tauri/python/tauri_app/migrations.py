@@ -0,0 +1,574 @@
+"""
+Schema migrations for ClassTop database.
+
+Migrations are applied once, in version order, and recorded in the
+``schema_version`` table. When the database is already at the latest version
+only a single SELECT is executed, so opening an up-to-date database does not
+re-run any DDL.
+"""
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+from . import logger
+
+
+def _v1_baseline_tables(cur: sqlite3.Cursor) -> None:
+    """Create the tables that used to be created by init_db()."""
+    # Settings table
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """
+    )
+
+    # Courses table - stores course information
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS courses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            teacher TEXT,
+            location TEXT,
+            color TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Schedule table - stores weekly schedule
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schedule (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id INTEGER NOT NULL,
+            day_of_week INTEGER NOT NULL CHECK (day_of_week >= 1 AND day_of_week <= 7),
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            weeks TEXT,  -- JSON array of week numbers
+            note TEXT,
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+    # Sync history table - tracks synchronization operations
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sync_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            direction TEXT CHECK(direction IN ('upload', 'download', 'bidirectional')) NOT NULL,
+            status TEXT CHECK(status IN ('success', 'failure', 'conflict')) NOT NULL,
+            message TEXT,
+            courses_synced INTEGER DEFAULT 0,
+            schedule_synced INTEGER DEFAULT 0,
+            conflicts_found INTEGER DEFAULT 0
+        )
+        """
+    )
+
+    # Course sessions table - for attendance tracking
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS course_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id INTEGER NOT NULL,
+            schedule_entry_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            attended BOOLEAN DEFAULT 1,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+            FOREIGN KEY (schedule_entry_id) REFERENCES schedule(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+    # Statistics cache table - for performance optimization
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS statistics_cache (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Current week settings with semester start date
+    cur.execute(
+        """
+        INSERT OR IGNORE INTO settings(key, value)
+        VALUES('current_week', '1'), ('total_weeks', '20'), ('semester_start_date', '')
+        """
+    )
+
+
+def _v2_hot_query_indexes(cur: sqlite3.Cursor) -> None:
+    """Add secondary indexes for the hot schedule, attendance and sync queries."""
+    # get_schedule_by_day / conflict checks filter by day and order by start time
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_schedule_day_start "
+        "ON schedule(day_of_week, start_time)"
+    )
+    # Joins on courses and ON DELETE CASCADE from courses
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_schedule_course "
+        "ON schedule(course_id)"
+    )
+    # mark_attendance looks up an existing session by (course, entry, date)
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sessions_course_entry_date "
+        "ON course_sessions(course_id, schedule_entry_id, date)"
+    )
+    # Attendance history / rate queries filter by date range
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sessions_date "
+        "ON course_sessions(date)"
+    )
+    # ON DELETE CASCADE from schedule
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sessions_entry "
+        "ON course_sessions(schedule_entry_id)"
+    )
+    # Sync history is always read newest first
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sync_history_timestamp "
+        "ON sync_history(timestamp)"
+    )
+
+
+def _weeks_mask_sql(column: str) -> str:
+    """SQL expression converting a JSON weeks array to a week bitmask.
+
+    Malformed JSON, non-arrays and weeks outside 1-63 contribute nothing, so
+    legacy rows can never make the backfill or the triggers fail.
+    """
+    return f"""
+        CASE
+            WHEN {column} IS NULL OR NOT json_valid({column}) THEN 0
+            WHEN json_type({column}) != 'array' THEN 0
+            ELSE (SELECT COALESCE(SUM(DISTINCT 1 << (CAST(value AS INTEGER) - 1)), 0)
+                  FROM json_each({column})
+                  WHERE type IN ('integer', 'text')
+                    AND CAST(value AS INTEGER) BETWEEN 1 AND 63)
+        END
+    """
+
+
+def _v3_schedule_weeks_mask(cur: sqlite3.Cursor) -> None:
+    """Add schedule.weeks_mask (bit n-1 = week n, 0 = every week).
+
+    The JSON ``weeks`` column is kept for sync/export; triggers derive the
+    mask from it so every writer (managers, imports, raw SQL) stays consistent.
+    """
+    cur.execute("ALTER TABLE schedule ADD COLUMN weeks_mask INTEGER NOT NULL DEFAULT 0")
+    cur.execute(f"UPDATE schedule SET weeks_mask = {_weeks_mask_sql('weeks')}")
+
+    cur.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_schedule_weeks_mask_insert
+        AFTER INSERT ON schedule
+        BEGIN
+            UPDATE schedule SET weeks_mask = {_weeks_mask_sql('NEW.weeks')}
+            WHERE id = NEW.id;
+        END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_schedule_weeks_mask_update
+        AFTER UPDATE OF weeks ON schedule
+        BEGIN
+            UPDATE schedule SET weeks_mask = {_weeks_mask_sql('NEW.weeks')}
+            WHERE id = NEW.id;
+        END
+        """
+    )
+
+
+def _v4_statistics_cache_invalidation(cur: sqlite3.Cursor) -> None:
+    """Turn statistics_cache into a dependency-tracked aggregate cache.
+
+    Each cached aggregate records what it was computed from: ``depends_on``
+    is a bit set (1 = schedule, 2 = courses, 4 = course_sessions),
+    ``weeks_mask`` the weeks it covers (NULL = all), and ``course_id`` /
+    ``date_from`` / ``date_to`` the attendance slice (NULL = unbounded).
+    Triggers delete exactly the rows a write can affect, so every writer
+    (managers, sync, raw SQL) keeps the cache correct.
+    """
+    # The table was never read before this version; drop any leftovers
+    cur.execute("DELETE FROM statistics_cache")
+    cur.execute("ALTER TABLE statistics_cache ADD COLUMN depends_on INTEGER NOT NULL DEFAULT 0")
+    cur.execute("ALTER TABLE statistics_cache ADD COLUMN weeks_mask INTEGER")
+    cur.execute("ALTER TABLE statistics_cache ADD COLUMN course_id INTEGER")
+    cur.execute("ALTER TABLE statistics_cache ADD COLUMN date_from TEXT")
+    cur.execute("ALTER TABLE statistics_cache ADD COLUMN date_to TEXT")
+
+    def schedule_rows(mask: str) -> str:
+        # An entry without week restriction (mask 0) touches every week
+        return f"""
+            DELETE FROM statistics_cache
+            WHERE (depends_on & 1) != 0
+              AND (weeks_mask IS NULL OR ({mask}) = 0 OR (weeks_mask & ({mask})) != 0);
+        """
+
+    def session_rows(row: str) -> str:
+        return f"""
+            DELETE FROM statistics_cache
+            WHERE (depends_on & 4) != 0
+              AND (course_id IS NULL OR course_id = {row}.course_id)
+              AND (date_from IS NULL OR {row}.date >= date_from)
+              AND (date_to IS NULL OR {row}.date <= date_to);
+        """
+
+    course_rows = "DELETE FROM statistics_cache WHERE (depends_on & 2) != 0;"
+
+    triggers = {
+        # weeks_mask is filled in by the v3 triggers, which may run after these
+        # (and whose own UPDATE sees the 0 default as OLD); derive it from JSON
+        "trg_stats_schedule_insert": ("AFTER INSERT ON schedule",
+                                      schedule_rows(_weeks_mask_sql("NEW.weeks"))),
+        "trg_stats_schedule_update": ("AFTER UPDATE ON schedule",
+                                      schedule_rows(_weeks_mask_sql("OLD.weeks"))
+                                      + schedule_rows(_weeks_mask_sql("NEW.weeks"))),
+        "trg_stats_schedule_delete": ("AFTER DELETE ON schedule", schedule_rows("OLD.weeks_mask")),
+        "trg_stats_courses_insert": ("AFTER INSERT ON courses", course_rows),
+        "trg_stats_courses_update": ("AFTER UPDATE OF teacher, location ON courses", course_rows),
+        "trg_stats_courses_delete": ("AFTER DELETE ON courses", course_rows),
+        "trg_stats_sessions_insert": ("AFTER INSERT ON course_sessions", session_rows("NEW")),
+        "trg_stats_sessions_update": ("AFTER UPDATE ON course_sessions",
+                                      session_rows("OLD") + session_rows("NEW")),
+        "trg_stats_sessions_delete": ("AFTER DELETE ON course_sessions", session_rows("OLD")),
+    }
+    for name, (event, body) in triggers.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+
+def _v5_attendance_rollups(cur: sqlite3.Cursor) -> None:
+    """Per-course/day attendance rollups kept current by triggers.
+
+    ``attendance_daily`` holds session counts per (course, date) and
+    ``attendance_course_totals`` per course, so attendance rates for any
+    course or date filter cost O(days) instead of a scan of course_sessions.
+    ``attendance_weekly`` groups the daily rows by the Monday of each week.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS attendance_daily (
+            course_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            total_sessions INTEGER NOT NULL DEFAULT 0,
+            attended_sessions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (course_id, date)
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_attendance_daily_date ON attendance_daily(date)")
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS attendance_course_totals (
+            course_id INTEGER PRIMARY KEY,
+            total_sessions INTEGER NOT NULL DEFAULT 0,
+            attended_sessions INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE VIEW IF NOT EXISTS attendance_weekly AS
+        SELECT course_id,
+               date(date, '-6 days', 'weekday 1') AS week_start,
+               SUM(total_sessions) AS total_sessions,
+               SUM(attended_sessions) AS attended_sessions
+        FROM attendance_daily
+        GROUP BY course_id, week_start
+        """
+    )
+
+    # Backfill from existing sessions
+    cur.execute(
+        """
+        INSERT INTO attendance_daily (course_id, date, total_sessions, attended_sessions)
+        SELECT course_id, date, COUNT(*), SUM(CASE WHEN attended = 1 THEN 1 ELSE 0 END)
+        FROM course_sessions
+        GROUP BY course_id, date
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO attendance_course_totals (course_id, total_sessions, attended_sessions)
+        SELECT course_id, SUM(total_sessions), SUM(attended_sessions)
+        FROM attendance_daily
+        GROUP BY course_id
+        """
+    )
+
+    def add(row: str) -> str:
+        attended = f"(CASE WHEN {row}.attended = 1 THEN 1 ELSE 0 END)"
+        return f"""
+            INSERT INTO attendance_daily (course_id, date, total_sessions, attended_sessions)
+            VALUES ({row}.course_id, {row}.date, 1, {attended})
+            ON CONFLICT (course_id, date) DO UPDATE SET
+                total_sessions = total_sessions + 1,
+                attended_sessions = attended_sessions + excluded.attended_sessions;
+            INSERT INTO attendance_course_totals (course_id, total_sessions, attended_sessions)
+            VALUES ({row}.course_id, 1, {attended})
+            ON CONFLICT (course_id) DO UPDATE SET
+                total_sessions = total_sessions + 1,
+                attended_sessions = attended_sessions + excluded.attended_sessions;
+        """
+
+    def remove(row: str) -> str:
+        attended = f"(CASE WHEN {row}.attended = 1 THEN 1 ELSE 0 END)"
+        return f"""
+            UPDATE attendance_daily
+            SET total_sessions = total_sessions - 1,
+                attended_sessions = attended_sessions - {attended}
+            WHERE course_id = {row}.course_id AND date = {row}.date;
+            DELETE FROM attendance_daily
+            WHERE course_id = {row}.course_id AND date = {row}.date AND total_sessions <= 0;
+            UPDATE attendance_course_totals
+            SET total_sessions = total_sessions - 1,
+                attended_sessions = attended_sessions - {attended}
+            WHERE course_id = {row}.course_id;
+            DELETE FROM attendance_course_totals
+            WHERE course_id = {row}.course_id AND total_sessions <= 0;
+        """
+
+    triggers = {
+        "trg_attendance_rollup_insert": ("AFTER INSERT ON course_sessions", add("NEW")),
+        "trg_attendance_rollup_update": ("AFTER UPDATE OF course_id, date, attended ON course_sessions",
+                                         remove("OLD") + add("NEW")),
+        "trg_attendance_rollup_delete": ("AFTER DELETE ON course_sessions", remove("OLD")),
+    }
+    for name, (event, body) in triggers.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+
+def _minutes_sql(column: str) -> str:
+    """SQL expression converting an ``H:MM``/``HH:MM`` time to minutes since midnight.
+
+    Anything else (NULL, malformed text, out-of-range values) yields NULL.
+    """
+    return f"""
+        CASE
+            WHEN {column} GLOB '[0-9]:[0-5][0-9]' OR {column} GLOB '[0-9][0-9]:[0-5][0-9]'
+            THEN CASE
+                WHEN CAST(substr({column}, 1, instr({column}, ':') - 1) AS INTEGER) <= 23
+                THEN CAST(substr({column}, 1, instr({column}, ':') - 1) AS INTEGER) * 60
+                     + CAST(substr({column}, instr({column}, ':') + 1) AS INTEGER)
+            END
+        END
+    """
+
+
+def _v6_minute_of_day_columns(cur: sqlite3.Cursor) -> None:
+    """Add integer ``start_min``/``end_min`` (minutes since midnight).
+
+    ``schedule`` and ``course_sessions`` keep their ``HH:MM`` text columns for
+    sync/export; triggers derive the minute columns from them so durations,
+    overlaps and ordering are plain integer arithmetic that can use an index.
+    """
+    for table in ("schedule", "course_sessions"):
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN start_min INTEGER")
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN end_min INTEGER")
+        cur.execute(
+            f"UPDATE {table} SET start_min = {_minutes_sql('start_time')}, "
+            f"end_min = {_minutes_sql('end_time')}"
+        )
+
+        body = f"""
+            UPDATE {table}
+            SET start_min = {_minutes_sql('NEW.start_time')},
+                end_min = {_minutes_sql('NEW.end_time')}
+            WHERE id = NEW.id;
+        """
+        cur.execute(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_minutes_insert "
+            f"AFTER INSERT ON {table} BEGIN {body} END"
+        )
+        cur.execute(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_minutes_update "
+            f"AFTER UPDATE OF start_time, end_time ON {table} BEGIN {body} END"
+        )
+
+    # Day views, conflict checks and ordering sort by minute ("9:00" < "10:00")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_schedule_day_start_min "
+        "ON schedule(day_of_week, start_min)"
+    )
+
+
+def _occurrences_insert_sql(schedule_from: str, entry_id: str, day: str,
+                            start_min: str, end_min: str, mask: str) -> str:
+    """INSERT expanding schedule rows into dated rows of schedule_occurrences.
+
+    Week ``w`` covers the seven days starting ``(w - 1) * 7`` days after
+    ``semester_start_date``, matching ScheduleManager.calculate_week_number();
+    weeks run from 1 to ``total_weeks``. Without a valid start date nothing
+    is generated.
+    """
+    # Days from the start date to the first matching weekday (strftime %w: Sunday = 0)
+    offset = f"(({day} - 1 - (CAST(strftime('%w', st.value) AS INTEGER) + 6) % 7 + 7) % 7)"
+    return f"""
+        INSERT OR REPLACE INTO schedule_occurrences (date, entry_id, week, start_min, end_min)
+        SELECT date(st.value, '+' || ((w.week - 1) * 7 + {offset}) || ' days'),
+               {entry_id}, w.week, {start_min}, {end_min}
+        FROM week_numbers w, settings st{schedule_from}
+        WHERE st.key = 'semester_start_date' AND date(st.value) IS NOT NULL
+          AND w.week <= COALESCE((SELECT CAST(value AS INTEGER) FROM settings
+                                  WHERE key = 'total_weeks'), 0)
+          AND ({mask} = 0 OR ({mask} & (1 << (w.week - 1))) != 0)
+          AND {start_min} IS NOT NULL AND {end_min} IS NOT NULL;
+    """
+
+
+def _v7_schedule_occurrences(cur: sqlite3.Cursor) -> None:
+    """Materialise each schedule entry as dated occurrences for the semester.
+
+    ``schedule_occurrences`` holds one row per (date, entry) generated from
+    ``semester_start_date``, ``total_weeks`` and the schedule, so date-range
+    views, hour totals and attendance pre-population are range scans on the
+    date primary key. Triggers refresh the rows of a single entry when it
+    changes and rebuild the table when either setting changes.
+    """
+    cur.execute("CREATE TABLE IF NOT EXISTS week_numbers (week INTEGER PRIMARY KEY)")
+    cur.executemany("INSERT OR IGNORE INTO week_numbers (week) VALUES (?)",
+                    [(week,) for week in range(1, 64)])
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schedule_occurrences (
+            date TEXT NOT NULL,
+            entry_id INTEGER NOT NULL,
+            week INTEGER NOT NULL,
+            start_min INTEGER NOT NULL,
+            end_min INTEGER NOT NULL,
+            PRIMARY KEY (date, entry_id)
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_schedule_occurrences_entry "
+        "ON schedule_occurrences(entry_id)"
+    )
+
+    rebuild = "DELETE FROM schedule_occurrences;" + _occurrences_insert_sql(
+        ", schedule s", "s.id", "s.day_of_week", "s.start_min", "s.end_min", "s.weeks_mask"
+    )
+    # The minute/mask columns of NEW are filled in by other AFTER triggers,
+    # so derive them from the text columns here
+    add_entry = _occurrences_insert_sql(
+        "", "NEW.id", "NEW.day_of_week", _minutes_sql("NEW.start_time"),
+        _minutes_sql("NEW.end_time"), f"({_weeks_mask_sql('NEW.weeks')})"
+    )
+    remove_entry = "DELETE FROM schedule_occurrences WHERE entry_id = OLD.id;"
+    semester_key = "NEW.key IN ('semester_start_date', 'total_weeks')"
+
+    for statement in rebuild.split(";"):
+        if statement.strip():
+            cur.execute(statement)
+
+    triggers = {
+        "trg_occurrences_schedule_insert": ("AFTER INSERT ON schedule", add_entry),
+        "trg_occurrences_schedule_update": (
+            "AFTER UPDATE OF id, day_of_week, start_time, end_time, weeks ON schedule",
+            remove_entry + add_entry),
+        "trg_occurrences_schedule_delete": ("AFTER DELETE ON schedule", remove_entry),
+        "trg_occurrences_settings_insert": (f"AFTER INSERT ON settings WHEN {semester_key}", rebuild),
+        "trg_occurrences_settings_update": (
+            f"AFTER UPDATE OF value ON settings WHEN {semester_key} AND OLD.value IS NOT NEW.value",
+            rebuild),
+    }
+    for name, (event, body) in triggers.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+
+# Ordered list of (version, description, migration function).
+# Never edit or reorder an existing entry; append a new one instead.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "baseline tables", _v1_baseline_tables),
+    (2, "indexes for hot queries", _v2_hot_query_indexes),
+    (3, "schedule week bitmask", _v3_schedule_weeks_mask),
+    (4, "statistics cache invalidation", _v4_statistics_cache_invalidation),
+    (5, "attendance rollups", _v5_attendance_rollups),
+    (6, "minute-of-day time columns", _v6_minute_of_day_columns),
+    (7, "schedule occurrence calendar", _v7_schedule_occurrences),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version recorded in the database (0 if none)."""
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        # schema_version table does not exist yet
+        return 0
+    return row[0] or 0
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Bring the database schema up to date.
+
+    Fast path: a database that is already at ``SCHEMA_VERSION`` costs a single
+    SELECT. Otherwise pending migrations run in order, each inside its own
+    ``BEGIN IMMEDIATE`` transaction so concurrent openers cannot apply the
+    same migration twice.
+
+    Args:
+        conn: Open database connection
+
+    Returns:
+        The schema version after migrating
+    """
+    version = get_schema_version(conn)
+    if version >= SCHEMA_VERSION:
+        return version
+
+    if conn.in_transaction:
+        conn.commit()
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    for target, description, apply in MIGRATIONS:
+        cur = conn.cursor()
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            # Another connection may have migrated while we waited for the lock
+            if get_schema_version(conn) >= target:
+                conn.rollback()
+                continue
+
+            logger.log_message("info", f"Applying schema migration {target}: {description}")
+            apply(cur)
+            cur.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (target, description)
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.log_message("error", f"Schema migration {target} failed: {e}")
+            raise
+        finally:
+            cur.close()
+
+    version = get_schema_version(conn)
+    logger.log_message("info", f"Database schema at version {version}")
+    return version
@@ -1,10 +1,26 @@
-"""Reminder Manager - 课程提醒管理器"""
+"""Reminder Manager - 课程提醒管理器
+
+提醒不再每分钟轮询：根据课程时间轴（Timeline）计算即将到来的提醒时间，放入
+最小堆，后台任务只睡眠到下一次提醒。课程表或相关设置变化时通过监听器唤醒并
+重新计算；通过比较墙上时钟与单调时钟的流逝检测系统休眠/唤醒，补发错过的提醒。
+"""
 import asyncio
+import heapq
 import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 from . import logger
 
+# 影响提醒时间的设置项
+REMINDER_SETTING_KEYS = frozenset({'reminder_enabled', 'reminder_minutes', 'semester_start_date'})
+
+# 最长睡眠时间（秒）。即使没有提醒也定期醒来一次（不访问数据库），用于及时发现时钟跳变
+MAX_SLEEP_SECONDS = 300
+
+# 墙上时钟与单调时钟的流逝差超过该值（秒）即认为系统休眠后被唤醒或时间被调整
+DRIFT_TOLERANCE_SECONDS = 30
+
 
 class ReminderManager:
     """管理课程提醒通知的后台任务"""
@@ -25,8 +41,16 @@ class ReminderManager:
         # 跟踪已发送的提醒，避免重复发送 (格式: "entry_id_date")
         self.sent_reminders: Set[str] = set()
 
+        # 提醒队列：(触发时间戳, 上课时间戳, 提醒ID, 课程信息) 的最小堆
+        self._queue: List[Tuple[float, float, str, Dict]] = []
+        # 队列有效期截止时间戳（下周一零点，届时周数变化需要重新计算）
+        self._horizon = 0.0
+        self._dirty = True
+
         # 后台任务
         self._task = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
         self._running = False
 
         self.logger.log_message("info", "ReminderManager initialized")
@@ -44,8 +68,12 @@ class ReminderManager:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             self._task = loop.create_task(self._reminder_loop())
-            loop.run_until_complete(self._task)
-            loop.close()
+            try:
+                loop.run_until_complete(self._task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                loop.close()
 
         thread = threading.Thread(target=run_loop, daemon=True)
         thread.start()
@@ -55,76 +83,125 @@ class ReminderManager:
     def stop(self):
         """停止提醒服务"""
         self._running = False
-        if self._task:
-            self._task.cancel()
+        if self._task and self._loop and not self._loop.is_closed():
+            # 任务属于提醒线程的事件循环，必须在该循环中取消
+            self._loop.call_soon_threadsafe(self._task.cancel)
         self.logger.log_message("info", "Reminder service stopped")
 
+    def _request_recompute(self):
+        """标记提醒队列需要重新计算并唤醒后台任务（可在任意线程调用）"""
+        self._dirty = True
+        loop, wakeup = self._loop, self._wakeup
+        if loop and wakeup and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def _on_schedule_changed(self, version: int):
+        """课程表变更监听器"""
+        self._request_recompute()
+
+    def _on_settings_changed(self, keys: List[str], version: int):
+        """设置变更监听器，只关心影响提醒时间的设置"""
+        if REMINDER_SETTING_KEYS.intersection(keys):
+            self._request_recompute()
+
     async def _reminder_loop(self):
-        """提醒循环 - 每分钟检查一次"""
-        while self._running:
-            try:
-                await self._check_and_send_reminders()
-                # 每60秒检查一次
-                await asyncio.sleep(60)
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                self.logger.log_message("error", f"Error in reminder loop: {e}")
-                await asyncio.sleep(60)
+        """提醒循环 - 睡眠到下一次提醒、队列过期或被监听器唤醒"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._dirty = True
+        self.schedule_manager.add_listener(self._on_schedule_changed)
+        self.settings_manager.add_listener(self._on_settings_changed)
 
-    async def _check_and_send_reminders(self):
-        """检查并发送课程提醒"""
         try:
-            # 检查是否启用提醒
-            enabled = self.settings_manager.get_setting('reminder_enabled')
-            if enabled != 'true':
-                return
-
-            # 获取提醒提前时间
-            reminder_minutes_str = self.settings_manager.get_setting('reminder_minutes')
-            reminder_minutes = int(reminder_minutes_str) if reminder_minutes_str else 10
-
-            # 获取当前时间和周数
-            now = datetime.now()
-            current_day = now.isoweekday()  # 1-7 (Monday-Sunday)
-            current_time = now.strftime("%H:%M")
-
-            # 计算当前周数
-            week_number = self.schedule_manager.calculate_week_number(
-                self.settings_manager.get_setting('semester_start_date')
-            )
-
-            # 获取今天的课程
-            today_classes = self.schedule_manager.get_schedule_by_day(current_day, week_number)
-
-            # 检查每节课
-            for class_info in today_classes:
-                start_time = class_info['start_time']
-                class_id = class_info['id']
-
-                # 生成唯一的提醒ID（包含日期，避免每天重复）
-                reminder_id = f"{class_id}_{now.strftime('%Y-%m-%d')}"
-
-                # 如果已经发送过这个提醒，跳过
-                if reminder_id in self.sent_reminders:
-                    continue
-
-                # 计算距离上课的分钟数
-                start_hour, start_minute = map(int, start_time.split(':'))
-                start_datetime = now.replace(hour=start_hour, minute=start_minute, second=0, microsecond=0)
-                minutes_until_class = (start_datetime - now).total_seconds() / 60
-
-                # 如果在提醒时间范围内（提前reminder_minutes分钟到上课时间之间）
-                if 0 <= minutes_until_class <= reminder_minutes:
-                    await self._send_notification(class_info, int(minutes_until_class))
-                    self.sent_reminders.add(reminder_id)
-                    self.logger.log_message("info", f"Sent reminder for class: {class_info['name']}")
-
-            # 清理过期的提醒记录（超过24小时）
-            self._cleanup_old_reminders()
+            while self._running:
+                try:
+                    wall, mono = time.time(), time.monotonic()
+                    self._wakeup.clear()
+
+                    if self._dirty or wall >= self._horizon:
+                        self._dirty = False
+                        self._rebuild_queue(datetime.fromtimestamp(wall))
+
+                    await self._fire_due(wall)
+
+                    timeout = self._seconds_until_next(wall)
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+
+                    # 单调时钟在系统休眠时不走，墙上时钟会跳过休眠时间
+                    drift = (time.time() - wall) - (time.monotonic() - mono)
+                    if abs(drift) > DRIFT_TOLERANCE_SECONDS:
+                        self.logger.log_message(
+                            "info", f"Clock jumped by {drift:.0f}s (system resume?), recomputing reminders")
+                        self._dirty = True
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    self.logger.log_message("error", f"Error in reminder loop: {e}")
+                    await asyncio.sleep(MAX_SLEEP_SECONDS)
+        finally:
+            self.schedule_manager.remove_listener(self._on_schedule_changed)
+            self.settings_manager.remove_listener(self._on_settings_changed)
+
+    def _rebuild_queue(self, now: datetime):
+        """根据课程时间轴重新计算提醒队列
+
+        只读取设置缓存和内存中的课程时间轴；本周和下周尚未开始的课程都会入队。
+        触发时间已过但课程还没开始的提醒（如刚启动或从休眠中唤醒）会立即发送。
+        """
+        self._queue = []
+        # 学期周从开学日期起每 7 天为一周（与 calculate_week_number 和 schedule_occurrences 一致），
+        # 周起始日不一定是周一；进入下一个学期周时重新计算
+        timeline, week_start, position = self.schedule_manager.timeline_at(
+            self.settings_manager.get_setting('semester_start_date'), now
+        )
+        self._horizon = (week_start + timedelta(days=7)).timestamp()
+
+        # 检查是否启用提醒
+        if not self.settings_manager.get_setting_bool('reminder_enabled', False):
+            self.logger.log_message("debug", "Reminders disabled, queue cleared")
+            return
 
-        except Exception as e:
-            self.logger.log_message("error", f"Error checking reminders: {e}")
+        # 获取提醒提前时间
+        reminder_minutes = self.settings_manager.get_setting_int('reminder_minutes', 10)
+
+        for start_position, class_info in timeline.starting_from(position):
+            start = week_start + timedelta(minutes=start_position)
+            # 提醒ID包含上课日期，避免每天重复
+            reminder_id = f"{class_info['id']}_{start.strftime('%Y-%m-%d')}"
+            if reminder_id in self.sent_reminders:
+                continue
+            fire_at = start - timedelta(minutes=reminder_minutes)
+            self._queue.append((fire_at.timestamp(), start.timestamp(), reminder_id, class_info))
+
+        heapq.heapify(self._queue)
+        self._cleanup_old_reminders()
+        self.logger.log_message("debug", f"Reminder queue rebuilt: {len(self._queue)} upcoming")
+
+    async def _fire_due(self, now: float):
+        """发送所有触发时间已到的提醒；课程已经开始的提醒直接丢弃"""
+        while self._queue and self._queue[0][0] <= now:
+            _, start, reminder_id, class_info = heapq.heappop(self._queue)
+
+            # 如果已经发送过这个提醒，跳过
+            if reminder_id in self.sent_reminders:
+                continue
+
+            minutes_until_class = (start - now) / 60
+            if minutes_until_class < 0:
+                self.logger.log_message("debug", f"Skipped reminder for class already started: {reminder_id}")
+                continue
+
+            await self._send_notification(class_info, int(minutes_until_class))
+            self.sent_reminders.add(reminder_id)
+            self.logger.log_message("info", f"Sent reminder for class: {class_info['name']}")
+
+    def _seconds_until_next(self, now: float) -> float:
+        """距离下一次需要醒来的秒数（下一个提醒、队列过期，最长 MAX_SLEEP_SECONDS）"""
+        wake_at = min(self._horizon, self._queue[0][0] if self._queue else self._horizon)
+        return max(0.0, min(wake_at - now, MAX_SLEEP_SECONDS))
 
     async def _send_notification(self, class_info: dict, minutes_until: int):
         """发送通知
@@ -173,14 +250,15 @@ class ReminderManager:
             self.logger.log_message("error", f"Error sending notification: {e}")
 
     def _cleanup_old_reminders(self):
-        """清理超过1天的提醒记录"""
+        """清理上课日期早于今天的提醒记录"""
         today_str = datetime.now().strftime('%Y-%m-%d')
         self.sent_reminders = {
             r for r in self.sent_reminders
-            if r.endswith(today_str)
+            if r.rsplit('_', 1)[-1] >= today_str
         }
 
     def clear_sent_reminders(self):
         """手动清空已发送的提醒记录（用于测试）"""
         self.sent_reminders.clear()
+        self._request_recompute()
         self.logger.log_message("info", "Cleared all sent reminders")
@@ -3,16 +3,476 @@ Schedule Manager for ClassTop application.
 Handles all schedule-related operations with proper logging.
 """
 
+import bisect
+import heapq
+import itertools
 import json
 import sqlite3
-from typing import Optional, Dict, List
+import threading
+from typing import Callable, Optional, Dict, Iterable, List, Tuple
 from datetime import datetime, timedelta
-from contextlib import contextmanager
 from pathlib import Path
 
+from . import db as _db
 from . import logger as _logger
+from . import metrics as _metrics
+from .weeks import week_bit, weeks_to_mask, mask_to_weeks
+
+
+def _time_to_minutes(value: str) -> int:
+    """Convert an ``H:MM``/``HH:MM`` time string to minutes since midnight."""
+    hour, minute = value.split(":")
+    return int(hour) * 60 + int(minute)
+
+
+def _weeks_overlap(mask: int, other: int) -> bool:
+    """Two week masks overlap if either is 0 (every week) or they share a week."""
+    return not mask or not other or bool(mask & other)
+
+
+def _conflict_weeks(mask: int, other: int) -> List[int]:
+    """Weeks in which two overlapping entries collide; [] means every week."""
+    if mask and other:
+        return mask_to_weeks(mask & other)
+    return mask_to_weeks(mask or other)
+
+
+class IntervalIndex:
+    """
+    Static overlap index over one day's schedule entries.
+
+    Items are ``(start_min, end_min, entry_id, weeks_mask, ...)`` tuples kept
+    sorted by start. No item is longer than the longest one, so every item
+    overlapping ``[start, end)`` starts inside
+    ``(start - max_length, end)``; two bisections find that window.
+    """
+
+    def __init__(self, items: Iterable[Tuple]):
+        self.items = sorted(items, key=lambda item: (item[0], item[1], item[2]))
+        self._starts = [item[0] for item in self.items]
+        self._max_length = max((item[1] - item[0] for item in self.items), default=0)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def overlapping(self, start: int, end: int, mask: int = 0,
+                    exclude_id: Optional[int] = None) -> List[Tuple]:
+        """Return items overlapping ``[start, end)`` in time and in weeks."""
+        lo = bisect.bisect_right(self._starts, start - self._max_length)
+        hi = bisect.bisect_left(self._starts, end)
+        return [
+            item for item in self.items[lo:hi]
+            if item[1] > start and item[2] != exclude_id and _weeks_overlap(mask, item[3])
+        ]
+
+
+def sweep_conflicts(items: Iterable[Tuple]) -> List[Tuple[Tuple, Tuple]]:
+    """
+    Find every pair of items that overlap both in time and in weeks.
+
+    Items are ``(start_min, end_min, key, weeks_mask, ...)`` tuples. They are
+    sorted once and swept in start order while a min-heap keyed by end time
+    holds the intervals still running, so the cost is O(n log n + k) for k
+    reported pairs. Each pair is returned as ``(earlier, later)``.
+    """
+    ordered = sorted(items, key=lambda item: (item[0], item[1]))
+    active: List[Tuple[int, int]] = []
+    pairs = []
+    for position, item in enumerate(ordered):
+        start, end, _, mask = item[:4]
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, other in active:
+            if _weeks_overlap(mask, ordered[other][3]):
+                pairs.append((ordered[other], item))
+        heapq.heappush(active, (end, position))
+    return pairs
+
+
+class TimetableIndex:
+    """
+    In-memory copy of the timetable, pre-sorted per day.
+
+    Courses are stored as ``(name, teacher, location, color)`` tuples and
+    schedule entries as ``(start_min, entry_id, end_min, course_id, weeks_mask,
+    start_time, end_time)`` tuples kept sorted by start minute for each day. The index is loaded lazily
+    from the database on first read, patched in place by ScheduleManager's
+    write methods and reloaded only after invalidate(). Conflict queries use
+    a per-day IntervalIndex built on demand and dropped whenever that day
+    changes.
+
+    Anything that writes courses/schedule without going through
+    ScheduleManager must call invalidate().
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._courses: Dict[int, Tuple] = {}
+        self._days: Dict[int, List[Tuple]] = {day: [] for day in range(1, 8)}
+        self._entry_days: Dict[int, int] = {}
+        self._intervals: Dict[int, IntervalIndex] = {}
+        self._version = 0
+        self._listeners: List[Callable[[int], None]] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def version(self) -> int:
+        """Incremented by every change to the timetable (not by reloads)."""
+        return self._version
+
+    def add_listener(self, callback: Callable[[int], None]) -> None:
+        """Register a callback invoked with the new version after every change."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[int], None]) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _changed(self) -> None:
+        """Bump the version and notify listeners (lock held); listeners must not block."""
+        self._version += 1
+        for callback in list(self._listeners):
+            try:
+                callback(self._version)
+            except Exception as e:
+                _logger.log_message("error", f"Timetable listener failed: {e}")
+
+    def invalidate(self) -> None:
+        """Drop the cached timetable; the next read reloads it."""
+        with self._lock:
+            self._changed()
+            self._loaded = False
+            self._courses = {}
+            self._days = {day: [] for day in range(1, 8)}
+            self._entry_days = {}
+            self._intervals = {}
+
+    def load(self, rows: Iterable[Tuple]) -> None:
+        """
+        Replace the index contents.
+
+        Args:
+            rows: ``(course_id, name, teacher, location, color, entry_id,
+                day_of_week, start_time, end_time, weeks_mask, start_min,
+                end_min)`` tuples; the entry columns are None for courses
+                without schedule entries
+        """
+        courses = {}
+        days = {day: [] for day in range(1, 8)}
+        entry_days = {}
+
+        for (course_id, name, teacher, location, color, entry_id, day, start, end, mask,
+             start_min, end_min) in rows:
+            courses[course_id] = (name, teacher, location, color)
+            if entry_id is not None and day in days:
+                # Malformed legacy times have NULL minutes; keep them visible
+                days[day].append((start_min or 0, entry_id, end_min or 0, course_id,
+                                  mask or 0, start, end))
+                entry_days[entry_id] = day
+
+        for entries in days.values():
+            entries.sort()
+
+        with self._lock:
+            self._courses = courses
+            self._days = days
+            self._entry_days = entry_days
+            self._intervals = {}
+            self._loaded = True
+
+    def get_days(self, days: Iterable[int], week_bits: Optional[int],
+                 loader: Callable[[], Iterable[Tuple]]) -> Dict[int, List[Dict]]:
+        """
+        Return classes for the given days, loading the index first if needed.
 
+        Args:
+            days: Days of week (1-7)
+            week_bits: OR of week bits to match, or None for no week filter
+            loader: Called (under the index lock) to fetch rows for load()
+        """
+        with self._lock:
+            if not self._loaded:
+                self.load(loader())
+
+            grouped = {}
+            for day in days:
+                classes = []
+                for start_min, entry_id, end_min, course_id, mask, start, end in self._days.get(day, ()):
+                    if week_bits is not None and mask and not mask & week_bits:
+                        continue
+                    name, teacher, location, color = self._courses[course_id]
+                    classes.append({
+                        "id": entry_id,
+                        "name": name,
+                        "teacher": teacher,
+                        "location": location,
+                        "day_of_week": day,
+                        "start_time": start,
+                        "end_time": end,
+                        "start_min": start_min,
+                        "end_min": end_min,
+                        "weeks": mask_to_weeks(mask),
+                        "color": color
+                    })
+                grouped[day] = classes
+            return grouped
+
+    def _interval_index(self, day: int) -> IntervalIndex:
+        """Return the day's IntervalIndex, building it if needed (lock held)."""
+        index = self._intervals.get(day)
+        if index is None:
+            index = IntervalIndex(
+                (start_min, end_min, entry_id, mask, course_id, start, end)
+                for start_min, entry_id, end_min, course_id, mask, start, end
+                in self._days.get(day, ())
+            )
+            self._intervals[day] = index
+        return index
+
+    def _conflict_entry(self, day: int, item: Tuple) -> Dict:
+        _, _, entry_id, mask, course_id, start, end = item
+        name, teacher, location, _ = self._courses[course_id]
+        return {
+            "id": entry_id,
+            "course_id": course_id,
+            "course_name": name,
+            "teacher": teacher,
+            "location": location,
+            "start_time": start,
+            "end_time": end,
+            "day_of_week": day,
+            "weeks": mask_to_weeks(mask),
+        }
+
+    def find_conflicts(self, day: int, start_min: int, end_min: int, weeks_mask: int,
+                       exclude_id: Optional[int],
+                       loader: Callable[[], Iterable[Tuple]]) -> List[Dict]:
+        """
+        Return the entries of a day overlapping a candidate interval.
 
+        Each entry uses the get_days() fields (``name`` as ``course_name``)
+        plus ``conflict_weeks``, where [] means every week.
+        """
+        with self._lock:
+            if not self._loaded:
+                self.load(loader())
+
+            conflicts = []
+            for item in self._interval_index(day).overlapping(start_min, end_min,
+                                                              weeks_mask, exclude_id):
+                entry = self._conflict_entry(day, item)
+                entry["conflict_weeks"] = _conflict_weeks(weeks_mask, item[3])
+                conflicts.append(entry)
+            return conflicts
+
+    def all_conflicts(self, week_bits: Optional[int],
+                      loader: Callable[[], Iterable[Tuple]]) -> List[Dict]:
+        """
+        Sweep every day and return each conflicting pair of entries.
+
+        Args:
+            week_bits: Only consider entries running in these weeks, or None
+            loader: Called (under the index lock) to fetch rows for load()
+        """
+        with self._lock:
+            if not self._loaded:
+                self.load(loader())
+
+            report = []
+            for day in range(1, 8):
+                items = self._interval_index(day).items
+                if week_bits is not None:
+                    items = [item for item in items if not item[3] or item[3] & week_bits]
+                for first, second in sweep_conflicts(items):
+                    overlap = first[3] & second[3] if first[3] and second[3] else first[3] or second[3]
+                    if overlap and week_bits is not None:
+                        overlap &= week_bits
+                        if not overlap:
+                            continue
+                    weeks = mask_to_weeks(overlap)
+                    overlap_start = max(first, second, key=lambda item: item[0])[5]
+                    overlap_end = min(first, second, key=lambda item: item[1])[6]
+                    report.append({
+                        "day_of_week": day,
+                        "overlap_start": overlap_start,
+                        "overlap_end": overlap_end,
+                        "conflict_weeks": weeks,
+                        "entries": [self._conflict_entry(day, first),
+                                    self._conflict_entry(day, second)],
+                    })
+            report.sort(key=lambda c: (c["day_of_week"],
+                                       _time_to_minutes(c["overlap_start"]),
+                                       c["entries"][0]["id"], c["entries"][1]["id"]))
+            return report
+
+    def put_course(self, course_id: int, name: str, teacher: Optional[str],
+                   location: Optional[str], color: Optional[str]) -> None:
+        with self._lock:
+            self._changed()
+            if self._loaded:
+                self._courses[course_id] = (name, teacher, location, color)
+
+    def update_course(self, course_id: int, **fields) -> None:
+        with self._lock:
+            self._changed()
+            if not self._loaded:
+                return
+            current = self._courses.get(course_id)
+            if current is None:
+                self.invalidate()
+                return
+            name, teacher, location, color = current
+            self._courses[course_id] = (
+                fields.get("name", name),
+                fields.get("teacher", teacher),
+                fields.get("location", location),
+                fields.get("color", color),
+            )
+
+    def remove_course(self, course_id: int) -> None:
+        with self._lock:
+            self._changed()
+            if not self._loaded:
+                return
+            self._courses.pop(course_id, None)
+            self._intervals = {}
+            # Mirror ON DELETE CASCADE
+            for day, entries in self._days.items():
+                kept = [entry for entry in entries if entry[3] != course_id]
+                if len(kept) != len(entries):
+                    for entry in entries:
+                        if entry[3] == course_id:
+                            self._entry_days.pop(entry[1], None)
+                    self._days[day] = kept
+
+    def put_entry(self, entry_id: int, course_id: int, day_of_week: int,
+                  start_time: str, end_time: str, weeks_mask: int) -> None:
+        with self._lock:
+            self._changed()
+            if not self._loaded or entry_id in self._entry_days:
+                return
+            if course_id not in self._courses or day_of_week not in self._days:
+                self.invalidate()
+                return
+            bisect.insort(self._days[day_of_week],
+                          (_time_to_minutes(start_time), entry_id, _time_to_minutes(end_time),
+                           course_id, weeks_mask, start_time, end_time))
+            self._entry_days[entry_id] = day_of_week
+            self._intervals.pop(day_of_week, None)
+
+    def remove_entry(self, entry_id: int) -> None:
+        with self._lock:
+            self._changed()
+            if not self._loaded:
+                return
+            day = self._entry_days.pop(entry_id, None)
+            if day is not None:
+                self._days[day] = [entry for entry in self._days[day] if entry[1] != entry_id]
+                self._intervals.pop(day, None)
+
+
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+
+
+class Timeline:
+    """
+    Class boundaries of consecutive semester weeks, sorted for binary search.
+
+    Semester weeks are 7-day blocks from ``semester_start_date``, as in
+    ScheduleManager.calculate_week_number() and ``schedule_occurrences``, so
+    a week begins on the start date's weekday (``start_weekday``), not
+    necessarily on Monday. Positions are minutes since 00:00 of the first
+    day of ``first_week`` (see position()); every class becomes a
+    ``(start, end, entry_id, week, entry)`` item. Current, next and previous
+    class and the time until the next start/end are answered with bisect in
+    O(log n).
+    """
+
+    def __init__(self, first_week: int, weeks: Dict[int, Dict[int, List[Dict]]],
+                 start_weekday: int = 1):
+        """
+        Args:
+            first_week: Week that position 0 belongs to
+            weeks: Week number -> get_schedule_for_days() result for that week
+            start_weekday: ISO weekday (1 = Monday) every week begins on
+        """
+        self.first_week = first_week
+        self.start_weekday = start_weekday
+
+        items = []
+        for week, by_day in weeks.items():
+            for day, classes in by_day.items():
+                base = self.position(week, day, 0)
+                for cls in classes:
+                    items.append((base + cls["start_min"], base + cls["end_min"],
+                                  cls["id"], week, cls))
+
+        self._items = sorted(items, key=lambda item: item[:3])
+        self._starts = [item[0] for item in self._items]
+        # Running maximum of end times, to stop the backwards scan in current()
+        self._max_ends = list(itertools.accumulate((item[1] for item in self._items), max))
+        self._by_end = sorted(items, key=lambda item: (item[1], item[0], item[2]))
+        self._ends = [item[1] for item in self._by_end]
+        self._boundaries = sorted({item[0] for item in items} | {item[1] for item in items})
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def position(self, week: int, day_of_week: int, minute: int) -> int:
+        """Convert a week, day (1-7) and minute of day to a timeline position."""
+        day_offset = (day_of_week - self.start_weekday) % 7
+        return (week - self.first_week) * WEEK_MINUTES + day_offset * DAY_MINUTES + minute
+
+    def week_of(self, position: int) -> int:
+        """The semester week a position falls in (positions before 0 count as ``first_week``)."""
+        return self.first_week + max(position, 0) // WEEK_MINUTES
+
+    def day_of_week(self, position: int) -> int:
+        """The ISO weekday (1-7) a position falls on."""
+        return (position // DAY_MINUTES + self.start_weekday - 1) % 7 + 1
+
+    @staticmethod
+    def _entry(item: Tuple) -> Dict:
+        return {**item[4], "week": item[3]}
+
+    def current(self, position: int) -> Optional[Dict]:
+        """The class in progress (start <= position < end); the latest started wins."""
+        i = bisect.bisect_right(self._starts, position) - 1
+        while i >= 0 and self._max_ends[i] > position:
+            if self._items[i][1] > position:
+                return self._entry(self._items[i])
+            i -= 1
+        return None
+
+    def next(self, position: int) -> Optional[Dict]:
+        """The first class starting after position."""
+        i = bisect.bisect_right(self._starts, position)
+        return self._entry(self._items[i]) if i < len(self._items) else None
+
+    def previous(self, position: int) -> Optional[Dict]:
+        """The class that most recently ended at or before position."""
+        i = bisect.bisect_right(self._ends, position) - 1
+        return self._entry(self._by_end[i]) if i >= 0 else None
+
+    def starting_from(self, position: int) -> List[Tuple[int, Dict]]:
+        """``(start position, class)`` for every class starting at or after position."""
+        i = bisect.bisect_left(self._starts, position)
+        return [(item[0], self._entry(item)) for item in self._items[i:]]
+
+    def until_next_transition(self, position: int) -> Optional[int]:
+        """Minutes until the next class starts or ends, or None if none is left."""
+        i = bisect.bisect_right(self._boundaries, position)
+        return self._boundaries[i] - position if i < len(self._boundaries) else None
+
+
+@_metrics.instrumented("schedule_manager")
 class ScheduleManager:
     """Manages course schedules and related operations."""
 
@@ -20,22 +480,14 @@ class ScheduleManager:
         self.db_path = db_path
         self.logger = _logger
         self.event_handler = event_handler
+        self.timetable = TimetableIndex()
+        self._timeline_lock = threading.Lock()
+        self._timeline: Optional[Timeline] = None
+        self._timeline_key: Optional[Tuple[int, int]] = None
 
-    @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            self.logger.log_message("debug", f"Database connection opened: {self.db_path}")
-            yield conn
-        except Exception as e:
-            self.logger.log_message("error", f"Database connection failed: {e}")
-            raise
-        finally:
-            if conn:
-                conn.close()
-                self.logger.log_message("debug", "Database connection closed")
+        """Context manager for the shared (thread-local) database connection."""
+        return _db.get_connection(self.db_path)
 
     # Course Management Methods
     def add_course(self, name: str, teacher: Optional[str] = None,
@@ -55,6 +507,7 @@ class ScheduleManager:
 
                 if course_id > 0:
                     self.logger.log_message("info", f"Course added successfully with ID: {course_id}")
+                    self.timetable.put_course(course_id, name, teacher, location, color)
                     # Emit event if handler is available
                     if self.event_handler:
                         self.event_handler.emit_course_added(course_id, name)
@@ -120,6 +573,7 @@ class ScheduleManager:
                 success = cur.rowcount > 0
                 if success:
                     self.logger.log_message("info", f"Course {course_id} updated successfully")
+                    self.timetable.update_course(course_id, **fields_to_update)
                     # Emit event if handler is available
                     if self.event_handler:
                         self.event_handler.emit_course_updated(course_id, **fields_to_update)
@@ -152,6 +606,7 @@ class ScheduleManager:
                 conn.commit()
 
                 self.logger.log_message("info", f"Course '{course[0]}' (ID: {course_id}) deleted successfully")
+                self.timetable.remove_course(course_id)
                 # Emit event if handler is available
                 if self.event_handler:
                     self.event_handler.emit_course_deleted(course_id)
@@ -177,6 +632,12 @@ class ScheduleManager:
             self.logger.log_message("error", f"Invalid day_of_week: {day_of_week}")
             return -1
 
+        try:
+            weeks_mask = weeks_to_mask(weeks)
+        except ValueError as e:
+            self.logger.log_message("error", str(e))
+            return -1
+
         with self.get_connection() as conn:
             try:
                 cur = conn.cursor()
@@ -203,6 +664,8 @@ class ScheduleManager:
                 entry_id = cur.lastrowid if cur.lastrowid is not None else -1
                 if entry_id > 0:
                     self.logger.log_message("info", f"Schedule entry added with ID: {entry_id}")
+                    self.timetable.put_entry(entry_id, course_id, day_of_week,
+                                             start_time, end_time, weeks_mask)
                     # Emit event if handler is available
                     if self.event_handler:
                         self.event_handler.emit_schedule_added(entry_id, course_id, day_of_week, start_time, end_time)
@@ -221,21 +684,23 @@ class ScheduleManager:
                 cur = conn.cursor()
                 query = """
                     SELECT s.id, s.course_id, c.name, c.teacher, c.location, c.color,
-                           s.day_of_week, s.start_time, s.end_time, s.weeks, s.note
+                           s.day_of_week, s.start_time, s.end_time, s.weeks_mask, s.note
                     FROM schedule s
                     JOIN courses c ON s.course_id = c.id
-                    ORDER BY s.day_of_week, s.start_time
                 """
-                cur.execute(query)
+                params = []
+
+                # Filter by week if specified (weeks_mask = 0 means every week)
+                if week is not None:
+                    query += " WHERE (s.weeks_mask = 0 OR (s.weeks_mask & ?) != 0)"
+                    params.append(week_bit(week))
+
+                query += " ORDER BY s.day_of_week, s.start_min"
+                cur.execute(query, params)
 
                 schedule = []
                 for row in cur.fetchall():
-                    weeks_json = row[9]
-                    weeks_list = json.loads(weeks_json) if weeks_json else []
-
-                    # Filter by week if specified
-                    if week is not None and weeks_list and week not in weeks_list:
-                        continue
+                    weeks_list = mask_to_weeks(row[9])
 
                     schedule.append({
                         "id": row[0],
@@ -270,6 +735,7 @@ class ScheduleManager:
                 success = cur.rowcount > 0
                 if success:
                     self.logger.log_message("info", f"Schedule entry {entry_id} deleted")
+                    self.timetable.remove_entry(entry_id)
                     # Emit event if handler is available
                     if self.event_handler:
                         self.event_handler.emit_schedule_deleted(entry_id)
@@ -281,59 +747,687 @@ class ScheduleManager:
                 self.logger.log_message("error", f"Error deleting schedule entry: {e}")
                 return False
 
-    def get_schedule_by_day(self, day_of_week: int, week: Optional[int] = None) -> List[Dict]:
-        """Get all classes for a specific day, optionally filtered by week."""
-        self.logger.log_message("debug", f"Getting schedule for day {day_of_week}, week {week}")
+    # Bulk Write Methods
+    def add_courses_bulk(self, courses: List[Dict]) -> List[int]:
+        """
+        Add many courses in a single transaction.
+
+        Args:
+            courses: Dicts with ``name`` and optional ``teacher``, ``location``, ``color``
+
+        Returns:
+            New course IDs in input order, or [] if validation or the write failed
+            (nothing is written in that case)
+        """
+        self.logger.log_message("info", f"Bulk adding {len(courses)} courses")
+        if not courses:
+            return []
+
+        rows = self._course_rows(courses)
+        if rows is None:
+            return []
 
         with self.get_connection() as conn:
             try:
                 cur = conn.cursor()
-                query = """
-                    SELECT s.id, c.name, c.teacher, c.location, s.day_of_week,
-                           s.start_time, s.end_time, s.weeks, c.color
-                    FROM schedule s
-                    JOIN courses c ON s.course_id = c.id
-                    WHERE s.day_of_week = ?
-                    ORDER BY s.start_time
-                """
-                cur.execute(query, (day_of_week,))
+                cur.execute("BEGIN IMMEDIATE")
+                # AUTOINCREMENT ids are monotonic and we hold the write lock, so
+                # the new rows are exactly those above the current maximum.
+                cur.execute("SELECT COALESCE(MAX(id), 0) FROM courses")
+                last_id = cur.fetchone()[0]
 
-                classes = []
-                for row in cur.fetchall():
-                    weeks_list = json.loads(row[7]) if row[7] else []
+                cur.executemany(
+                    "INSERT INTO courses (name, teacher, location, color) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                cur.execute("SELECT id FROM courses WHERE id > ? ORDER BY id", (last_id,))
+                course_ids = [row[0] for row in cur.fetchall()]
+                if len(course_ids) != len(rows):
+                    raise sqlite3.DatabaseError(
+                        f"expected {len(rows)} new course ids, got {len(course_ids)}")
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                self.logger.log_message("error", f"Error bulk adding courses: {e}")
+                return []
 
-                    # Filter by week if specified
-                    if week is not None and weeks_list and week not in weeks_list:
-                        continue
+        for course_id, row in zip(course_ids, rows):
+            self.timetable.put_course(course_id, *row)
 
-                    classes.append({
-                        "id": row[0],
-                        "name": row[1],
-                        "teacher": row[2],
-                        "location": row[3],
-                        "day_of_week": row[4],
-                        "start_time": row[5],
-                        "end_time": row[6],
-                        "weeks": weeks_list,
-                        "color": row[8] if len(row) > 8 else None
-                    })
+        self.logger.log_message("info", f"Bulk added {len(course_ids)} courses")
+        if self.event_handler:
+            self.event_handler.emit_schedule_bulk_added(course_ids, [])
+        return course_ids
+
+    def add_schedule_entries_bulk(self, entries: List[Dict]) -> List[int]:
+        """
+        Add many schedule entries in a single transaction.
+
+        Every entry is validated before anything is written. Conflicts are
+        detected once for the whole batch (against existing entries and within
+        the batch) and logged, like add_schedule_entry() does per entry.
+
+        Args:
+            entries: Dicts with ``course_id``, ``day_of_week``, ``start_time``,
+                ``end_time`` and optional ``weeks`` and ``note``
+
+        Returns:
+            New entry IDs in input order, or [] if validation or the write failed
+            (nothing is written in that case)
+        """
+        self.logger.log_message("info", f"Bulk adding {len(entries)} schedule entries")
+        if not entries:
+            return []
 
-                return classes
+        validated = self._entry_rows(entries)
+        if validated is None:
+            return []
+        rows, masks = validated
+
+        with self.get_connection() as conn:
+            try:
+                cur = conn.cursor()
+                cur.execute("BEGIN IMMEDIATE")
+
+                # Check that all referenced courses exist with one query
+                course_ids = sorted({row[0] for row in rows})
+                placeholders = ", ".join("?" for _ in course_ids)
+                cur.execute(f"SELECT id FROM courses WHERE id IN ({placeholders})", course_ids)
+                missing = set(course_ids) - {row[0] for row in cur.fetchall()}
+                if missing:
+                    conn.rollback()
+                    self.logger.log_message("error", f"Courses do not exist: {sorted(missing)}")
+                    return []
+
+                conflicts = self._count_batch_conflicts(conn, rows, masks)
+                if conflicts:
+                    self.logger.log_message("warning", f"Bulk insert has {conflicts} schedule conflicts")
+
+                cur.execute("SELECT COALESCE(MAX(id), 0) FROM schedule")
+                last_id = cur.fetchone()[0]
+                cur.executemany(
+                    """INSERT INTO schedule (course_id, day_of_week, start_time, end_time, weeks, note)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    rows
+                )
+                cur.execute("SELECT id FROM schedule WHERE id > ? ORDER BY id", (last_id,))
+                entry_ids = [row[0] for row in cur.fetchall()]
+                if len(entry_ids) != len(rows):
+                    raise sqlite3.DatabaseError(
+                        f"expected {len(rows)} new entry ids, got {len(entry_ids)}")
+                conn.commit()
             except Exception as e:
-                self.logger.log_message("error", f"Error getting schedule by day: {e}")
+                conn.rollback()
+                self.logger.log_message("error", f"Error bulk adding schedule entries: {e}")
                 return []
 
+        for entry_id, row, mask in zip(entry_ids, rows, masks):
+            self.timetable.put_entry(entry_id, row[0], row[1], row[2], row[3], mask)
+
+        self.logger.log_message("info", f"Bulk added {len(entry_ids)} schedule entries")
+        if self.event_handler:
+            self.event_handler.emit_schedule_bulk_added([], entry_ids)
+        return entry_ids
+
+    def import_bulk(self, courses: List[Dict], entries: List[Dict],
+                    replace: bool = False) -> Dict[str, List[int]]:
+        """
+        Import courses and schedule entries as one all-or-nothing transaction.
+
+        Every course and entry is validated before anything is written; with
+        ``replace`` the existing timetable is deleted inside the same
+        transaction, so a failed import leaves it untouched.
+
+        Args:
+            courses: Dicts with ``id`` (the course's key in the imported data, e.g. its
+                exported ID), ``name`` and optional ``teacher``, ``location``, ``color``
+            entries: Dicts as for add_schedule_entries_bulk(), whose ``course_id``
+                is the ``id`` of one of ``courses``
+            replace: Delete all existing courses and schedule entries first; their
+                IDs are sent as ``deleted_course_ids`` in the one ``schedule_bulk_added`` event
+
+        Returns:
+            ``{"courses": [...], "entries": [...]}`` with the new IDs in input order,
+            or {} if validation or the write failed (nothing is changed in that case)
+        """
+        self.logger.log_message(
+            "info", f"Importing {len(courses)} courses and {len(entries)} schedule entries (replace={replace})")
+
+        course_rows = self._course_rows(courses)
+        if course_rows is None:
+            return {}
+        keys = [course.get("id") for course in courses]
+        if len(set(keys)) != len(keys):
+            self.logger.log_message("error", "Imported courses have duplicate ids")
+            return {}
+        validated = self._entry_rows(entries)
+        if validated is None:
+            return {}
+        entry_rows, masks = validated
+        unknown = {row[0] for row in entry_rows} - set(keys)
+        if unknown:
+            self.logger.log_message("error", f"Imported schedule entries reference unknown courses: {sorted(unknown, key=str)}")
+            return {}
+
+        with self.get_connection() as conn:
+            try:
+                cur = conn.cursor()
+                cur.execute("BEGIN IMMEDIATE")
+                deleted_course_ids = []
+                if replace:
+                    cur.execute("SELECT id FROM courses")
+                    deleted_course_ids = [row[0] for row in cur.fetchall()]
+                    cur.execute("DELETE FROM schedule")
+                    cur.execute("DELETE FROM courses")
+
+                course_ids = []
+                if course_rows:
+                    cur.execute("SELECT COALESCE(MAX(id), 0) FROM courses")
+                    last_id = cur.fetchone()[0]
+                    cur.executemany(
+                        "INSERT INTO courses (name, teacher, location, color) VALUES (?, ?, ?, ?)",
+                        course_rows
+                    )
+                    cur.execute("SELECT id FROM courses WHERE id > ? ORDER BY id", (last_id,))
+                    course_ids = [row[0] for row in cur.fetchall()]
+                    if len(course_ids) != len(course_rows):
+                        raise sqlite3.DatabaseError(
+                            f"expected {len(course_rows)} new course ids, got {len(course_ids)}")
+
+                id_map = dict(zip(keys, course_ids))
+                entry_rows = [(id_map[row[0]], *row[1:]) for row in entry_rows]
+                entry_ids = []
+                if entry_rows:
+                    conflicts = self._count_batch_conflicts(conn, entry_rows, masks)
+                    if conflicts:
+                        self.logger.log_message("warning", f"Import has {conflicts} schedule conflicts")
+
+                    cur.execute("SELECT COALESCE(MAX(id), 0) FROM schedule")
+                    last_id = cur.fetchone()[0]
+                    cur.executemany(
+                        """INSERT INTO schedule (course_id, day_of_week, start_time, end_time, weeks, note)
+                           VALUES (?, ?, ?, ?, ?, ?)""",
+                        entry_rows
+                    )
+                    cur.execute("SELECT id FROM schedule WHERE id > ? ORDER BY id", (last_id,))
+                    entry_ids = [row[0] for row in cur.fetchall()]
+                    if len(entry_ids) != len(entry_rows):
+                        raise sqlite3.DatabaseError(
+                            f"expected {len(entry_rows)} new entry ids, got {len(entry_ids)}")
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                self.logger.log_message("error", f"Error importing timetable, rolled back: {e}")
+                return {}
+
+        if replace:
+            self.timetable.invalidate()
+        else:
+            for course_id, row in zip(course_ids, course_rows):
+                self.timetable.put_course(course_id, *row)
+            for entry_id, row, mask in zip(entry_ids, entry_rows, masks):
+                self.timetable.put_entry(entry_id, row[0], row[1], row[2], row[3], mask)
+
+        self.logger.log_message("info", f"Imported {len(course_ids)} courses and {len(entry_ids)} schedule entries")
+        if self.event_handler:
+            if course_ids or entry_ids or deleted_course_ids:
+                self.event_handler.emit_schedule_bulk_added(course_ids, entry_ids, deleted_course_ids)
+        return {"courses": course_ids, "entries": entry_ids}
+
+    def _course_rows(self, courses: List[Dict]) -> Optional[List[Tuple]]:
+        """Validate course dicts into ``(name, teacher, location, color)`` rows; None if any is invalid."""
+        rows = []
+        for index, course in enumerate(courses):
+            name = course.get("name")
+            if not isinstance(name, str) or not name.strip():
+                self.logger.log_message("error", f"Invalid course at index {index}: missing name")
+                return None
+            rows.append((name, course.get("teacher"), course.get("location"), course.get("color")))
+        return rows
+
+    def _entry_rows(self, entries: List[Dict]) -> Optional[Tuple[List[Tuple], List[int]]]:
+        """
+        Validate schedule entry dicts.
+
+        Returns:
+            ``(rows, masks)`` with ``(course_id, day_of_week, start_time, end_time,
+            weeks_json, note)`` rows and their week masks, or None if any entry is invalid
+        """
+        rows = []
+        masks = []
+        for index, entry in enumerate(entries):
+            course_id = entry.get("course_id")
+            day_of_week = entry.get("day_of_week")
+            start_time = entry.get("start_time")
+            end_time = entry.get("end_time")
+            weeks = entry.get("weeks")
+
+            if not isinstance(start_time, str) or not isinstance(end_time, str) \
+                    or not self._validate_time_format(start_time) or not self._validate_time_format(end_time):
+                self.logger.log_message("error", f"Invalid time format at index {index}. Use HH:MM")
+                return None
+            if not isinstance(day_of_week, int) or not 1 <= day_of_week <= 7:
+                self.logger.log_message("error", f"Invalid day_of_week at index {index}: {day_of_week}")
+                return None
+            try:
+                masks.append(weeks_to_mask(weeks))
+            except ValueError as e:
+                self.logger.log_message("error", f"Invalid weeks at index {index}: {e}")
+                return None
+
+            weeks_json = json.dumps(weeks) if weeks else None
+            rows.append((course_id, day_of_week, start_time, end_time, weeks_json, entry.get("note")))
+        return rows, masks
+
+    # Sync Apply Methods
+    def apply_sync_data(self, courses: List[Dict], entries: List[Dict],
+                        delete_missing: bool = False) -> Optional[Dict[str, int]]:
+        """
+        Apply server data as a keyed diff in one transaction.
+
+        Rows are matched by ID. Only inserted and changed rows are written
+        (server IDs are kept, so local IDs stay stable across syncs); unchanged
+        rows cost nothing beyond the initial snapshot read. Invalid incoming rows
+        are skipped with a warning. Entries without a ``note`` key keep their
+        local note.
+
+        Args:
+            courses: Server courses (``id``, ``name``, ``teacher``, ``location``, ``color``)
+            entries: Server schedule entries (``id``, ``course_id``, ``day_of_week``,
+                ``start_time``, ``end_time``, ``weeks`` as a list, optional ``note``)
+            delete_missing: Also delete local rows that are absent from the server data
+
+        Returns:
+            Exact counts per table and operation (``courses_inserted``,
+            ``courses_updated``, ``courses_deleted``, ``courses_unchanged`` and the
+            same for ``entries_*``, plus ``skipped``), or None if the apply failed
+            and was rolled back
+        """
+        self.logger.log_message("info", f"Applying sync data: {len(courses)} courses, {len(entries)} entries")
+        stats = {f"{table}_{op}": 0 for table in ("courses", "entries")
+                 for op in ("inserted", "updated", "deleted", "unchanged")}
+        stats["skipped"] = 0
+
+        incoming_courses = {}
+        for course in courses:
+            course_id = course.get("id")
+            name = course.get("name")
+            if not isinstance(course_id, int) or course_id <= 0 or not isinstance(name, str) or not name.strip():
+                self.logger.log_message("warning", f"Skipping invalid course from sync: {course}")
+                stats["skipped"] += 1
+                continue
+            incoming_courses[course_id] = (name, course.get("teacher"), course.get("location"), course.get("color"))
+
+        incoming_entries = {}
+        for entry in entries:
+            entry_id = entry.get("id")
+            day_of_week = entry.get("day_of_week")
+            start_time = entry.get("start_time")
+            end_time = entry.get("end_time")
+            try:
+                if not isinstance(entry_id, int) or entry_id <= 0:
+                    raise ValueError(f"invalid id {entry_id!r}")
+                if not isinstance(day_of_week, int) or not 1 <= day_of_week <= 7:
+                    raise ValueError(f"invalid day_of_week {day_of_week!r}")
+                if not isinstance(start_time, str) or not isinstance(end_time, str) \
+                        or not self._validate_time_format(start_time) or not self._validate_time_format(end_time):
+                    raise ValueError("invalid time format")
+                weeks = entry.get("weeks") or None
+                mask = weeks_to_mask(weeks)
+            except ValueError as e:
+                self.logger.log_message("warning", f"Skipping invalid schedule entry from sync ({e}): {entry}")
+                stats["skipped"] += 1
+                continue
+            incoming_entries[entry_id] = {
+                "course_id": entry.get("course_id"),
+                "day_of_week": day_of_week,
+                "start_time": start_time,
+                "end_time": end_time,
+                "weeks_mask": mask,
+                "weeks_json": json.dumps(weeks) if weeks else None,
+                "has_note": "note" in entry,
+                "note": entry.get("note"),
+            }
+
+        def same_course(local: Tuple, server: Tuple) -> bool:
+            # NULL and "" are equivalent for optional text columns
+            return all((a or "") == (b or "") for a, b in zip(local, server))
+
+        with self.get_connection() as conn:
+            try:
+                cur = conn.cursor()
+                cur.execute("BEGIN IMMEDIATE")
+
+                # Snapshot local state inside the write transaction
+                cur.execute("SELECT id, name, teacher, location, color FROM courses")
+                local_courses = {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+                cur.execute("""
+                    SELECT id, course_id, day_of_week, start_time, end_time, weeks_mask, note
+                    FROM schedule
+                """)
+                local_entries = {row[0]: row[1:] for row in cur.fetchall()}
+
+                # Course diff
+                course_inserts, course_updates = [], []
+                for course_id, values in incoming_courses.items():
+                    local = local_courses.get(course_id)
+                    if local is None:
+                        course_inserts.append((course_id, *values))
+                    elif same_course(local, values):
+                        stats["courses_unchanged"] += 1
+                    else:
+                        course_updates.append((*values, course_id))
+                course_deletes = [(course_id,) for course_id in local_courses
+                                  if course_id not in incoming_courses] if delete_missing else []
+
+                # Entry diff; entries must reference a course that exists after the apply
+                deleted_course_ids = {row[0] for row in course_deletes}
+                known_courses = (set(local_courses) - deleted_course_ids) | set(incoming_courses)
+                entry_inserts, entry_updates = [], []
+                for entry_id, new in incoming_entries.items():
+                    if new["course_id"] not in known_courses:
+                        self.logger.log_message("warning",
+                            f"Skipping schedule entry {entry_id}: course {new['course_id']} does not exist")
+                        stats["skipped"] += 1
+                        continue
+
+                    local = local_entries.get(entry_id)
+                    note = new["note"] if new["has_note"] or local is None else local[5]
+                    if local is None:
+                        entry_inserts.append((entry_id, new["course_id"], new["day_of_week"],
+                                              new["start_time"], new["end_time"], new["weeks_json"], note))
+                    elif (local[0], local[1], local[2], local[3], local[4] or 0, local[5] or "") == \
+                            (new["course_id"], new["day_of_week"], new["start_time"], new["end_time"],
+                             new["weeks_mask"], note or ""):
+                        stats["entries_unchanged"] += 1
+                    else:
+                        entry_updates.append((new["course_id"], new["day_of_week"], new["start_time"],
+                                              new["end_time"], new["weeks_json"], note, entry_id))
+                entry_deletes = [(entry_id,) for entry_id, local in local_entries.items()
+                                 if entry_id not in incoming_entries and local[0] not in deleted_course_ids
+                                 ] if delete_missing else []
+
+                # Apply only the changes: entries first, then courses (CASCADE covers the rest)
+                if entry_deletes:
+                    cur.executemany("DELETE FROM schedule WHERE id = ?", entry_deletes)
+                if course_deletes:
+                    cur.execute(
+                        f"SELECT COUNT(*) FROM schedule WHERE course_id IN "
+                        f"({', '.join('?' for _ in course_deletes)})",
+                        [row[0] for row in course_deletes]
+                    )
+                    cascaded = cur.fetchone()[0]
+                    cur.executemany("DELETE FROM courses WHERE id = ?", course_deletes)
+                    stats["entries_deleted"] += cascaded
+                if course_inserts:
+                    cur.executemany(
+                        "INSERT INTO courses (id, name, teacher, location, color) VALUES (?, ?, ?, ?, ?)",
+                        course_inserts
+                    )
+                if course_updates:
+                    cur.executemany(
+                        "UPDATE courses SET name = ?, teacher = ?, location = ?, color = ? WHERE id = ?",
+                        course_updates
+                    )
+                if entry_inserts:
+                    cur.executemany(
+                        """INSERT INTO schedule (id, course_id, day_of_week, start_time, end_time, weeks, note)
+                           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                        entry_inserts
+                    )
+                if entry_updates:
+                    cur.executemany(
+                        """UPDATE schedule SET course_id = ?, day_of_week = ?, start_time = ?,
+                           end_time = ?, weeks = ?, note = ? WHERE id = ?""",
+                        entry_updates
+                    )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                self.logger.log_message("error", f"Error applying sync data, rolled back: {e}")
+                return None
+
+        stats["courses_inserted"] = len(course_inserts)
+        stats["courses_updated"] = len(course_updates)
+        stats["courses_deleted"] = len(course_deletes)
+        stats["entries_inserted"] = len(entry_inserts)
+        stats["entries_updated"] = len(entry_updates)
+        stats["entries_deleted"] += len(entry_deletes)
+
+        changed = any(stats[f"{table}_{op}"] for table in ("courses", "entries")
+                      for op in ("inserted", "updated", "deleted"))
+        if changed:
+            self.timetable.invalidate()
+            if self.event_handler:
+                self.event_handler.emit_schedule_sync_applied(stats)
+
+        self.logger.log_message("info", f"Sync data applied: {stats}")
+        return stats
+
+    def _count_batch_conflicts(self, conn: sqlite3.Connection, rows: List[Tuple],
+                               masks: List[int]) -> int:
+        """
+        Count overlapping pairs that involve at least one new row.
+
+        One query loads the existing entries of the affected days; each day is
+        then passed through sweep_conflicts().
+        """
+        days = sorted({row[1] for row in rows})
+        placeholders = ", ".join("?" for _ in days)
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT day_of_week, start_min, end_min, weeks_mask FROM schedule "
+            f"WHERE day_of_week IN ({placeholders}) AND start_min IS NOT NULL",
+            days
+        )
+
+        by_day: Dict[int, List[Tuple]] = {day: [] for day in days}
+        for day, start_min, end_min, mask in cur.fetchall():
+            by_day[day].append((start_min, end_min, False, mask or 0))
+        for row, mask in zip(rows, masks):
+            by_day[row[1]].append((_time_to_minutes(row[2]), _time_to_minutes(row[3]), True, mask))
+
+        conflicts = 0
+        for intervals in by_day.values():
+            conflicts += sum(1 for first, second in sweep_conflicts(intervals)
+                             if first[2] or second[2])
+        return conflicts
+
+    def get_schedule_by_day(self, day_of_week: int, week: Optional[int] = None) -> List[Dict]:
+        """Get all classes for a specific day, optionally filtered by week."""
+        self.logger.log_message("debug", f"Getting schedule for day {day_of_week}, week {week}")
+
+        weeks = [week] if week is not None else None
+        return self.get_schedule_for_days([day_of_week], weeks).get(day_of_week, [])
+
+    def get_schedule_for_days(self, days: Optional[Iterable[int]] = None,
+                              weeks: Optional[Iterable[int]] = None) -> Dict[int, List[Dict]]:
+        """
+        Get classes for several days, grouped by day.
+
+        Served from the in-memory TimetableIndex; after invalidation the index
+        is reloaded with a single query.
+
+        Args:
+            days: Days of week (1-7) to fetch, defaults to the whole week
+            weeks: Only include entries running in any of these weeks
+                (entries without a week restriction always match)
+
+        Returns:
+            Dict mapping each requested day to its classes ordered by start time,
+            using the same entry shape as get_schedule_by_day()
+        """
+        day_list = sorted({d for d in (days if days is not None else range(1, 8)) if 1 <= d <= 7})
+
+        week_bits = None
+        if weeks is not None:
+            week_bits = 0
+            for week in weeks:
+                week_bits |= week_bit(week)
+
+        try:
+            return self.timetable.get_days(day_list, week_bits, self._fetch_timetable)
+        except Exception as e:
+            self.logger.log_message("error", f"Error getting schedule for days {day_list}: {e}")
+            return {day: [] for day in day_list}
+
+    def _fetch_timetable(self) -> List[Tuple]:
+        """Read every course and schedule entry in one query for TimetableIndex.load()."""
+        self.logger.log_message("debug", "Loading timetable index from database")
+
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT c.id, c.name, c.teacher, c.location, c.color,
+                       s.id, s.day_of_week, s.start_time, s.end_time, s.weeks_mask,
+                       s.start_min, s.end_min
+                FROM courses c
+                LEFT JOIN schedule s ON s.course_id = c.id
+            """)
+            return cur.fetchall()
+
     def get_schedule_for_week(self, week: Optional[int] = None) -> List[Dict]:
         """Get all classes for the entire week, optionally filtered by week number."""
         self.logger.log_message("debug", f"Getting schedule for week {week}")
 
+        weeks = [week] if week is not None else None
+        by_day = self.get_schedule_for_days(weeks=weeks)
+
         all_classes = []
         for day in range(1, 8):  # Monday to Sunday
-            day_classes = self.get_schedule_by_day(day, week)
-            all_classes.extend(day_classes)
+            all_classes.extend(by_day.get(day, []))
 
         return all_classes
 
+    def add_listener(self, callback: Callable[[int], None]) -> None:
+        """
+        Register a callback for timetable changes.
+
+        Called with TimetableIndex.version after every course/schedule write
+        made through this manager (and after invalidate()); it runs on the
+        writing thread, so it must return quickly.
+        """
+        self.timetable.add_listener(callback)
+
+    def remove_listener(self, callback: Callable[[int], None]) -> None:
+        """Remove a callback registered with add_listener()."""
+        self.timetable.remove_listener(callback)
+
+    def get_timeline(self, week: int, start_weekday: int = 1) -> Timeline:
+        """
+        Get the Timeline covering ``week`` and the week after it.
+
+        The timeline is cached and rebuilt only when the timetable changes or
+        a different week or week start is requested (e.g. after the semester
+        start moved).
+        """
+        with self._timeline_lock:
+            key = (self.timetable.version, week, start_weekday)
+            if self._timeline is None or self._timeline_key != key:
+                self.logger.log_message("debug", f"Building timeline from week {week}")
+                self._timeline = Timeline(week, {
+                    w: self.get_schedule_for_days(weeks=[w]) for w in (week, week + 1)
+                }, start_weekday)
+                self._timeline_key = key
+            return self._timeline
+
+    def timeline_at(self, semester_start_date: Optional[str], now: datetime,
+                    week: Optional[int] = None) -> Tuple[Timeline, datetime, int]:
+        """
+        Get the timeline for the semester week containing ``now``.
+
+        With a valid ``semester_start_date`` week N begins ``(N - 1) * 7`` days
+        after it (before the semester starts, on the start date itself);
+        without one weeks begin on Monday.
+
+        Args:
+            semester_start_date: ``YYYY-MM-DD`` or empty
+            now: Point in time to place on the timeline
+            week: Week number to use instead of calculate_week_number()
+                (e.g. the manually set current week)
+
+        Returns:
+            ``(timeline, week_start, position)``: the timeline, the midnight that
+            its position 0 corresponds to, and ``now`` as a timeline position
+        """
+        try:
+            start = datetime.strptime(semester_start_date or "", "%Y-%m-%d")
+        except ValueError:
+            start = None
+        if week is None:
+            week = self.calculate_week_number(semester_start_date, now)
+
+        if start is None:
+            week_start = (now - timedelta(days=now.isoweekday() - 1)).replace(
+                hour=0, minute=0, second=0, microsecond=0)
+            start_weekday = 1
+        else:
+            week_start = start + timedelta(days=(week - 1) * 7)
+            start_weekday = start.isoweekday()
+
+        position = int((now - week_start).total_seconds() // 60)
+        return self.get_timeline(week, start_weekday), week_start, position
+
+    def get_schedule_for_dates(self, start_date: str, end_date: str) -> List[Dict]:
+        """
+        Get the dated class occurrences between two dates (inclusive).
+
+        Reads the schedule_occurrences calendar, which is generated from the
+        ``semester_start_date`` and ``total_weeks`` settings; without a
+        semester start date there are no occurrences.
+
+        Args:
+            start_date: First date (YYYY-MM-DD)
+            end_date: Last date (YYYY-MM-DD)
+
+        Returns:
+            Occurrences ordered by date and start time, each with ``date`` and
+            ``week`` plus the get_schedule_by_day() entry fields
+        """
+        self.logger.log_message("debug", f"Getting schedule occurrences {start_date} - {end_date}")
+
+        try:
+            datetime.strptime(start_date, "%Y-%m-%d")
+            datetime.strptime(end_date, "%Y-%m-%d")
+        except (ValueError, TypeError):
+            self.logger.log_message("error", f"Invalid date range: {start_date} - {end_date}")
+            return []
+
+        with self.get_connection() as conn:
+            try:
+                cur = conn.cursor()
+                cur.execute("""
+                    SELECT o.date, o.week, s.id, c.name, c.teacher, c.location, s.day_of_week,
+                           s.start_time, s.end_time, o.start_min, o.end_min, s.weeks_mask, c.color
+                    FROM schedule_occurrences o
+                    JOIN schedule s ON s.id = o.entry_id
+                    JOIN courses c ON c.id = s.course_id
+                    WHERE o.date BETWEEN ? AND ?
+                    ORDER BY o.date, o.start_min
+                """, (start_date, end_date))
+
+                return [
+                    {
+                        "date": row[0],
+                        "week": row[1],
+                        "id": row[2],
+                        "name": row[3],
+                        "teacher": row[4],
+                        "location": row[5],
+                        "day_of_week": row[6],
+                        "start_time": row[7],
+                        "end_time": row[8],
+                        "start_min": row[9],
+                        "end_min": row[10],
+                        "weeks": mask_to_weeks(row[11]),
+                        "color": row[12]
+                    }
+                    for row in cur.fetchall()
+                ]
+            except Exception as e:
+                self.logger.log_message("error", f"Error getting schedule occurrences: {e}")
+                return []
+
     # Utility Methods
     def _validate_time_format(self, time_str: str) -> bool:
         """Validate time string format (HH:MM)."""
@@ -346,49 +1440,75 @@ class ScheduleManager:
     def _has_time_conflict(self, conn: sqlite3.Connection, day_of_week: int,
                           start_time: str, end_time: str,
                           weeks: Optional[List[int]] = None) -> bool:
-        """Check if there's a time conflict with existing schedule."""
+        """
+        Check if there's a time conflict with existing schedule.
+
+        Uses the TimetableIndex when it is loaded; otherwise one indexed query
+        runs on ``conn`` so that writes never force a full reload.
+        """
         try:
-            cur = conn.cursor()
-            query = """
-                SELECT s.id, s.start_time, s.end_time, s.weeks, c.name
-                FROM schedule s
-                JOIN courses c ON s.course_id = c.id
-                WHERE s.day_of_week = ?
-            """
-            cur.execute(query, (day_of_week,))
-
-            for row in cur.fetchall():
-                existing_start = row[1]
-                existing_end = row[2]
-                existing_weeks = json.loads(row[3]) if row[3] else []
-
-                # Check time overlap
-                if not (end_time <= existing_start or start_time >= existing_end):
-                    # Check week overlap
-                    if not weeks or not existing_weeks:
-                        self.logger.log_message("warning",
-                            f"Time conflict with course '{row[4]}' ({existing_start}-{existing_end})")
-                        return True
+            mask = weeks_to_mask(weeks)
+            start_min, end_min = _time_to_minutes(start_time), _time_to_minutes(end_time)
+
+            if self.timetable.loaded:
+                conflicts = [
+                    (c["course_name"], c["start_time"], c["end_time"], c["conflict_weeks"])
+                    for c in self.timetable.find_conflicts(day_of_week, start_min, end_min,
+                                                           mask, None, self._fetch_timetable)
+                ]
+            else:
+                cur = conn.cursor()
+                # Integer overlap test served by idx_schedule_day_start_min
+                cur.execute(
+                    """SELECT c.name, s.start_time, s.end_time, s.weeks_mask
+                       FROM schedule s
+                       JOIN courses c ON s.course_id = c.id
+                       WHERE s.day_of_week = ?
+                         AND s.start_min < ? AND s.end_min > ?
+                         AND (? = 0 OR s.weeks_mask = 0 OR (s.weeks_mask & ?) != 0)
+                       LIMIT 1""",
+                    (day_of_week, end_min, start_min, mask, mask)
+                )
+                conflicts = [
+                    (name, start, end, _conflict_weeks(mask, other))
+                    for name, start, end, other in cur.fetchall()
+                ]
 
-                    week_overlap = set(weeks) & set(existing_weeks)
-                    if week_overlap:
-                        self.logger.log_message("warning",
-                            f"Time conflict with course '{row[4]}' in weeks {week_overlap}")
-                        return True
+            if not conflicts:
+                return False
 
-            return False
+            name, existing_start, existing_end, conflict_weeks = conflicts[0]
+            if conflict_weeks:
+                self.logger.log_message("warning",
+                    f"Time conflict with course '{name}' in weeks {set(conflict_weeks)}")
+            else:
+                self.logger.log_message("warning",
+                    f"Time conflict with course '{name}' ({existing_start}-{existing_end})")
+            return True
         except Exception as e:
             self.logger.log_message("error", f"Error checking time conflict: {e}")
             return False
 
-    def calculate_week_number(self, semester_start_date: Optional[str] = None) -> int:
-        """Calculate current week number based on semester start date."""
+    def calculate_week_number(self, semester_start_date: Optional[str] = None,
+                              today: Optional[datetime] = None) -> int:
+        """
+        Calculate the week number based on semester start date.
+
+        Weeks are 7-day blocks counted from the start date (week 1 is the
+        start date and the six days after it).
+
+        Args:
+            semester_start_date: ``YYYY-MM-DD``; without it the week is 1
+            today: Date or datetime to evaluate (defaults to now)
+        """
         if not semester_start_date:
             return 1
 
         try:
-            start_date = datetime.strptime(semester_start_date, "%Y-%m-%d")
-            current_date = datetime.now()
+            start_date = datetime.strptime(semester_start_date, "%Y-%m-%d").date()
+            current_date = today or datetime.now()
+            if isinstance(current_date, datetime):
+                current_date = current_date.date()
             days_diff = (current_date - start_date).days
             return max(1, (days_diff // 7) + 1)
         except Exception as e:
@@ -401,6 +1521,8 @@ class ScheduleManager:
         """
         Check for schedule conflicts and return detailed conflict information.
 
+        Answered from the day's IntervalIndex, comparing times in minutes.
+
         Args:
             day_of_week: Day of week (1-7)
             start_time: Start time (HH:MM)
@@ -413,70 +1535,52 @@ class ScheduleManager:
         """
         self.logger.log_message("debug", f"Checking conflicts for {day_of_week} {start_time}-{end_time}")
 
-        with self.get_connection() as conn:
-            try:
-                cur = conn.cursor()
-                query = """
-                    SELECT s.id, c.name, c.teacher, c.location, s.start_time, s.end_time,
-                           s.day_of_week, s.weeks
-                    FROM schedule s
-                    JOIN courses c ON s.course_id = c.id
-                    WHERE s.day_of_week = ?
-                """
-                params = [day_of_week]
+        try:
+            conflicts = self.timetable.find_conflicts(
+                day_of_week, _time_to_minutes(start_time), _time_to_minutes(end_time),
+                weeks_to_mask(weeks), exclude_entry_id or None, self._fetch_timetable
+            )
+        except Exception as e:
+            self.logger.log_message("error", f"Error checking conflicts: {e}")
+            return []
 
-                # Exclude specific entry if editing
-                if exclude_entry_id:
-                    query += " AND s.id != ?"
-                    params.append(exclude_entry_id)
+        for conflict in conflicts:
+            # Entries without week restrictions conflict in every week; this
+            # API has always reported that as [1]
+            conflict["conflict_weeks"] = conflict["conflict_weeks"] or [1]
+            self.logger.log_message("warning",
+                f"Conflict detected with '{conflict['course_name']}' "
+                f"({conflict['start_time']}-{conflict['end_time']}) in weeks {conflict['conflict_weeks']}")
 
-                cur.execute(query, params)
+        return conflicts
 
-                conflicts = []
-                for row in cur.fetchall():
-                    existing_id = row[0]
-                    existing_name = row[1]
-                    existing_teacher = row[2]
-                    existing_location = row[3]
-                    existing_start = row[4]
-                    existing_end = row[5]
-                    existing_day = row[6]
-                    existing_weeks = json.loads(row[7]) if row[7] else []
-
-                    # Check time overlap
-                    if not (end_time <= existing_start or start_time >= existing_end):
-                        # Check week overlap
-                        conflict_weeks = []
-
-                        if not weeks or not existing_weeks:
-                            # If either has no week restriction, it conflicts for all weeks
-                            conflict_weeks = weeks if weeks else existing_weeks if existing_weeks else [1]
-                        else:
-                            # Calculate actual conflicting weeks
-                            conflict_weeks = list(set(weeks) & set(existing_weeks))
-
-                        if conflict_weeks or (not weeks and not existing_weeks):
-                            conflicts.append({
-                                "id": existing_id,
-                                "course_name": existing_name,
-                                "teacher": existing_teacher,
-                                "location": existing_location,
-                                "start_time": existing_start,
-                                "end_time": existing_end,
-                                "day_of_week": existing_day,
-                                "weeks": existing_weeks,
-                                "conflict_weeks": conflict_weeks
-                            })
-
-                            self.logger.log_message("warning",
-                                f"Conflict detected with '{existing_name}' ({existing_start}-{existing_end}) "
-                                f"in weeks {conflict_weeks}")
-
-                return conflicts
+    def get_all_conflicts(self, week: Optional[int] = None) -> List[Dict]:
+        """
+        Report every pair of schedule entries that overlap in time and weeks.
 
-            except Exception as e:
-                self.logger.log_message("error", f"Error checking conflicts: {e}")
-                return []
+        Each day is sorted once and swept (see sweep_conflicts()), so checking
+        a whole imported timetable costs O(n log n + k) for k conflicts.
+
+        Args:
+            week: Only consider entries running in this week
+
+        Returns:
+            List of conflicts ordered by day and overlap start, each with
+            ``day_of_week``, ``overlap_start``, ``overlap_end``,
+            ``conflict_weeks`` ([] means every week) and the two ``entries``
+        """
+        self.logger.log_message("debug", f"Checking whole timetable for conflicts (week {week})")
+
+        try:
+            week_bits = week_bit(week) if week is not None else None
+            conflicts = self.timetable.all_conflicts(week_bits, self._fetch_timetable)
+        except Exception as e:
+            self.logger.log_message("error", f"Error checking timetable conflicts: {e}")
+            return []
+
+        if conflicts:
+            self.logger.log_message("info", f"Found {len(conflicts)} schedule conflicts")
+        return conflicts
 
     def get_statistics(self) -> Dict:
         """Get schedule statistics."""
@@ -559,7 +1663,7 @@ class ScheduleManager:
                            c.name, c.teacher, c.location, c.color
                     FROM schedule s
                     JOIN courses c ON s.course_id = c.id
-                    ORDER BY s.day_of_week, s.start_time
+                    ORDER BY s.day_of_week, s.start_min
                 """)
 
                 entries = []
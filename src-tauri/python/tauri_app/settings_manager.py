@@ -1,12 +1,15 @@
 """Settings Manager - 统一管理应用设置"""
-import sqlite3
+import threading
 import uuid
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
+from . import db as _db
 from . import logger
+from . import metrics as _metrics
 
 APP_DIR = Path.home() / ".classtop"
 
+@_metrics.instrumented("settings_manager")
 class SettingsManager:
     """设置管理器，负责设置的初始化、读取和更新"""
 
@@ -27,6 +30,8 @@ class SettingsManager:
         'api_server_enabled': 'false',  # 是否启用 API 服务器
         'api_server_host': '0.0.0.0',  # API 服务器监听地址
         'api_server_port': '8765',  # API 服务器端口
+        'metrics_enabled': 'false',  # 是否收集性能指标（/api/metrics）
+        'tracing_sample_rate': '0',  # 请求追踪采样率 0-1（/api/traces），0 为关闭
 
         # 外观设置
         'theme_mode': 'auto',  # auto, dark, light
@@ -76,36 +81,119 @@ class SettingsManager:
         self.db_path = db_path
         self.event_handler = event_handler
         self.logger = logger
+
+        # 进程内设置缓存：首次读取时整体加载，之后由写操作同步更新（write-through）
+        self._cache_lock = threading.RLock()
+        self._cache: Optional[Dict[str, str]] = None
+        self._typed_cache: Dict[tuple, Any] = {}  # (key, 类型) -> 已解析的值
+        self._version = 0
+        self._listeners: List[Callable[[List[str], int], None]] = []
+
         self.logger.log_message("info", "SettingsManager initialized")
 
     def get_connection(self):
-        """获取数据库连接"""
-        return sqlite3.connect(self.db_path)
+        """获取共享（线程本地）数据库连接的上下文管理器"""
+        return _db.get_connection(self.db_path)
+
+    # 缓存管理
+    @property
+    def version(self) -> int:
+        """设置版本号，每次写入后递增，可用于判断设置是否变化"""
+        return self._version
+
+    def add_listener(self, callback: Callable[[List[str], int], None]) -> None:
+        """注册设置变更监听器
+
+        Args:
+            callback: 回调函数，参数为 (变更的键列表, 新版本号)
+        """
+        with self._cache_lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[List[str], int], None]) -> None:
+        """移除设置变更监听器"""
+        with self._cache_lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def invalidate_cache(self) -> None:
+        """丢弃缓存，下次读取时从数据库重新加载（绕过本管理器直接写库后调用）"""
+        with self._cache_lock:
+            self._cache = None
+            self._typed_cache.clear()
+            self._version += 1
+
+    def _get_cache(self) -> Dict[str, str]:
+        """返回设置缓存，未加载时用一次查询整体加载"""
+        cache = self._cache
+        if cache is not None:
+            return cache
+
+        with self._cache_lock:
+            if self._cache is None:
+                with self.get_connection() as conn:
+                    cur = conn.cursor()
+                    cur.execute("SELECT key, value FROM settings")
+                    self._cache = {k: v for k, v in cur.fetchall()}
+                self._typed_cache.clear()
+                self.logger.log_message("debug", f"Settings cache loaded: {len(self._cache)} keys")
+            return self._cache
+
+    def _apply_to_cache(self, values: Dict[str, str]) -> None:
+        """写入成功后同步更新缓存、版本号并通知监听器（调用方需持有 _cache_lock）"""
+        if self._cache is not None:
+            self._cache.update(values)
+        for key in values:
+            self._typed_cache.pop((key, bool), None)
+            self._typed_cache.pop((key, int), None)
+        self._version += 1
+
+        keys = list(values.keys())
+        for callback in list(self._listeners):
+            try:
+                callback(keys, self._version)
+            except Exception as e:
+                self.logger.log_message("error", f"Settings listener failed: {e}")
+
+    def _write_settings(self, values: Dict[str, str]) -> None:
+        """在单个事务中写入设置并同步更新缓存"""
+        with self._cache_lock:
+            with self.get_connection() as conn:
+                cur = conn.cursor()
+                cur.executemany(
+                    "INSERT INTO settings(key, value) VALUES(?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                    list(values.items())
+                )
+                conn.commit()
+            self._apply_to_cache(values)
 
     def initialize_defaults(self) -> None:
         """初始化默认设置（如果不存在）"""
         self.logger.log_message("info", "Initializing default settings")
 
-        with self.get_connection() as conn:
-            cur = conn.cursor()
+        rows = []
+        for key, default_value in self.DEFAULT_SETTINGS.items():
+            # 如果默认值是函数（如 uuid），调用它
+            value = default_value() if callable(default_value) else default_value
+            rows.append((key, str(value)))
 
-            for key, default_value in self.DEFAULT_SETTINGS.items():
-                # 检查设置是否已存在
-                cur.execute("SELECT value FROM settings WHERE key=?", (key,))
-                existing = cur.fetchone()
-
-                if not existing:
-                    # 如果默认值是函数（如 uuid），调用它
-                    value = default_value() if callable(default_value) else default_value
-                    cur.execute(
-                        "INSERT INTO settings(key, value) VALUES(?, ?)",
-                        (key, str(value))
-                    )
-                    self.logger.log_message("debug", f"Initialized setting: {key} = {value}")
+        with self._cache_lock:
+            with self.get_connection() as conn:
+                cur = conn.cursor()
+                # 一条 INSERT OR IGNORE 批量写入，已存在的设置保持不变
+                placeholders = ", ".join("(?, ?)" for _ in rows)
+                cur.execute(
+                    f"INSERT OR IGNORE INTO settings(key, value) VALUES {placeholders}",
+                    [item for row in rows for item in row]
+                )
+                inserted = cur.rowcount
+                conn.commit()
 
-            conn.commit()
+            if inserted:
+                self.invalidate_cache()
 
-        self.logger.log_message("info", "Default settings initialized")
+        self.logger.log_message("info", f"Default settings initialized ({inserted} added)")
 
     def get_setting(self, key: str, default: Optional[str] = None) -> Optional[str]:
         """获取单个设置值
@@ -117,11 +205,7 @@ class SettingsManager:
         Returns:
             设置值，如果不存在返回默认值
         """
-        with self.get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT value FROM settings WHERE key=?", (key,))
-            row = cur.fetchone()
-            return row[0] if row else default
+        return self._get_cache().get(key, default)
 
     def set_setting(self, key: str, value: str) -> bool:
         """设置单个设置值
@@ -134,15 +218,8 @@ class SettingsManager:
             是否成功
         """
         try:
-            with self.get_connection() as conn:
-                cur = conn.cursor()
-                cur.execute(
-                    "INSERT INTO settings(key, value) VALUES(?, ?) "
-                    "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
-                    (key, str(value))
-                )
-                conn.commit()
-                
+            self._write_settings({key: str(value)})
+
             # Emit event if handler is available
             if self.event_handler:
                 self.event_handler.emit_setting_update(key, value)
@@ -163,10 +240,17 @@ class SettingsManager:
         Returns:
             布尔值
         """
-        value = self.get_setting(key, str(default).lower())
-        if value is None:
-            return default
-        return value.lower() in ('true', '1', 'yes', 'on')
+        cached = self._typed_cache.get((key, bool))
+        if cached is not None:
+            return cached
+
+        with self._cache_lock:
+            value = self.get_setting(key)
+            if value is None:
+                return default
+            result = value.lower() in ('true', '1', 'yes', 'on')
+            self._typed_cache[(key, bool)] = result
+            return result
 
     def set_setting_bool(self, key: str, value: bool) -> bool:
         """设置布尔类型设置值
@@ -190,14 +274,21 @@ class SettingsManager:
         Returns:
             整数值
         """
-        value = self.get_setting(key)
-        if value is None:
-            return default
-        try:
-            return int(value)
-        except ValueError:
-            self.logger.log_message("warning", f"Cannot convert '{value}' to int for key '{key}', using default {default}")
-            return default
+        cached = self._typed_cache.get((key, int))
+        if cached is not None:
+            return cached
+
+        with self._cache_lock:
+            value = self.get_setting(key)
+            if value is None:
+                return default
+            try:
+                result = int(value)
+                self._typed_cache[(key, int)] = result
+                return result
+            except ValueError:
+                self.logger.log_message("warning", f"Cannot convert '{value}' to int for key '{key}', using default {default}")
+                return default
 
     def set_setting_int(self, key: str, value: int) -> bool:
         """设置整数类型设置值
@@ -217,10 +308,7 @@ class SettingsManager:
         Returns:
             设置字典 {key: value}
         """
-        with self.get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT key, value FROM settings")
-            return {k: v for k, v in cur.fetchall()}
+        return dict(self._get_cache())
 
     def update_multiple(self, settings: Dict[str, str]) -> bool:
         """批量更新设置
@@ -232,15 +320,8 @@ class SettingsManager:
             是否全部成功
         """
         try:
-            with self.get_connection() as conn:
-                cur = conn.cursor()
-                for key, value in settings.items():
-                    cur.execute(
-                        "INSERT INTO settings(key, value) VALUES(?, ?) "
-                        "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
-                        (key, str(value))
-                    )
-                conn.commit()
+            if settings:
+                self._write_settings({key: str(value) for key, value in settings.items()})
 
             # Emit batch update event
             if self.event_handler:
@@ -275,10 +356,21 @@ class SettingsManager:
         exclude_keys = exclude_keys or []
 
         try:
+            values = {}
             for key, default_value in self.DEFAULT_SETTINGS.items():
                 if key not in exclude_keys:
                     value = default_value() if callable(default_value) else default_value
-                    self.set_setting(key, str(value))
+                    values[key] = str(value)
+
+            # 单个事务写入并同步缓存；之后仍为每个键发送 setting-update 事件
+            # （前端部分逻辑只监听单键事件，例如 TopBar 按 topbar_height/font_size 调整窗口大小），
+            # 最后再发送一次批量更新事件
+            if values:
+                self._write_settings(values)
+                if self.event_handler:
+                    for key, value in values.items():
+                        self.event_handler.emit_setting_update(key, value)
+                    self.event_handler.emit_settings_batch_updated(list(values.keys()))
 
             self.logger.log_message("info", "Settings reset to defaults")
             return True
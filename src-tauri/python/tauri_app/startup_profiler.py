@@ -0,0 +1,206 @@
+"""
+Startup profiler.
+
+Set ``CLASSTOP_PROFILE_IMPORTS=1`` before launching the app to record how
+long every module takes to import (like ``python -X importtime``, which a
+frozen build cannot be given) plus named ``checkpoint``s in ``main()``.
+``report()`` logs the slowest imports once startup has finished and writes
+the full profile to ``import_profile.json`` in the log directory.
+
+This module only uses the standard library: it is installed from the
+package ``__init__`` before the logger (and loguru) are imported, so their
+cost is measured too. Without the environment variable it does nothing.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+ENV_VAR = "CLASSTOP_PROFILE_IMPORTS"
+PROFILE_FILE_NAME = "import_profile.json"
+REPORT_TOP = 25
+
+_lock = threading.Lock()
+_local = threading.local()
+_finder = None
+_started: Optional[float] = None
+_records: List[Dict[str, Any]] = []
+_checkpoints: List[Dict[str, Any]] = []
+
+
+def _stack() -> List[list]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class _TimedLoader:
+    """Wraps a module's loader to time ``exec_module``.
+
+    The real loader is put back on the module and its spec once it has been
+    executed, so nothing outside the import itself sees the wrapper.
+    """
+
+    def __init__(self, loader, name: str):
+        self._loader = loader
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        stack = _stack()
+        frame = [self._name, 0.0]  # name, time spent importing children
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][1] += elapsed
+            spec = getattr(module, "__spec__", None)
+            if spec is not None and spec.loader is self:
+                spec.loader = self._loader
+            if getattr(module, "__loader__", None) is self:
+                module.__loader__ = self._loader
+            with _lock:
+                _records.append({
+                    "module": self._name,
+                    "self_ms": round((elapsed - frame[1]) * 1000, 3),
+                    "cumulative_ms": round(elapsed * 1000, 3),
+                    "parent": stack[-1][0] if stack else None,
+                })
+
+
+class _TimingFinder:
+    """Meta path finder that resolves specs through the remaining finders
+    and wraps their loaders in ``_TimedLoader``."""
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, fullname)
+        return spec
+
+
+def enabled() -> bool:
+    """Whether imports are currently being profiled."""
+    return _finder is not None
+
+
+def install() -> None:
+    """Start timing imports; modules already imported are not re-measured."""
+    global _finder, _started
+    if _finder is not None:
+        return
+    _started = time.perf_counter()
+    _finder = _TimingFinder()
+    sys.meta_path.insert(0, _finder)
+
+
+def install_from_env() -> None:
+    """``install()`` if the ``CLASSTOP_PROFILE_IMPORTS`` environment variable is set."""
+    if os.environ.get(ENV_VAR, "").strip().lower() not in ("", "0", "false", "no"):
+        install()
+
+
+def uninstall() -> None:
+    """Stop timing imports. Recorded data is kept for ``get_profile``."""
+    global _finder
+    if _finder is None:
+        return
+    try:
+        sys.meta_path.remove(_finder)
+    except ValueError:
+        pass
+    _finder = None
+
+
+def reset() -> None:
+    """Uninstall and discard everything recorded."""
+    global _started
+    uninstall()
+    with _lock:
+        _records.clear()
+        _checkpoints.clear()
+    _started = None
+
+
+def checkpoint(name: str) -> None:
+    """Record how long after ``install()`` a startup phase finished."""
+    if _finder is None or _started is None:
+        return
+    with _lock:
+        _checkpoints.append({"name": name, "at_ms": round((time.perf_counter() - _started) * 1000, 1)})
+
+
+def get_profile() -> Dict[str, Any]:
+    """The recorded profile.
+
+    Returns:
+        ``{"elapsed_ms", "import_ms", "checkpoints", "modules"}``; ``modules``
+        is sorted by cumulative time and ``import_ms`` sums the top-level imports.
+    """
+    with _lock:
+        modules = sorted(_records, key=lambda r: r["cumulative_ms"], reverse=True)
+        checkpoints = list(_checkpoints)
+    elapsed = (time.perf_counter() - _started) * 1000 if _started is not None else 0.0
+    return {
+        "elapsed_ms": round(elapsed, 1),
+        "import_ms": round(sum(r["cumulative_ms"] for r in modules if r["parent"] is None), 1),
+        "checkpoints": checkpoints,
+        "modules": modules,
+    }
+
+
+def report(top: int = REPORT_TOP) -> Optional[Dict[str, Any]]:
+    """Stop profiling, log the slowest imports and write the full profile.
+
+    Returns:
+        The profile, or None if profiling was not enabled
+    """
+    if _finder is None:
+        return None
+    uninstall()
+    from . import logger as _logger
+
+    profile = get_profile()
+    lines = [
+        f"Startup profile: {profile['elapsed_ms']:.0f} ms since start, "
+        f"{profile['import_ms']:.0f} ms importing {len(profile['modules'])} modules"
+    ]
+    lines += [f"  {c['at_ms']:>9.1f} ms  {c['name']}" for c in profile["checkpoints"]]
+    lines.append(f"  {'cumulative':>12} {'self':>10}  module")
+    lines += [
+        f"  {r['cumulative_ms']:>9.1f} ms {r['self_ms']:>7.1f} ms  {r['module']}"
+        for r in profile["modules"][:top]
+    ]
+    _logger.log_message("info", "\n".join(lines))
+
+    path = _logger.LOG_DIR / PROFILE_FILE_NAME
+    try:
+        path.write_text(json.dumps(profile, indent=2), encoding="utf-8")
+        _logger.log_message("info", f"Import profile written to {path}")
+    except OSError as e:
+        _logger.log_message("warning", f"Failed to write import profile: {e}")
+    return profile
@@ -6,14 +6,60 @@ Handles course statistics calculation and attendance tracking
 import json
 import sqlite3
 import threading
-from typing import Optional, Dict, List
+from typing import Any, Callable, NamedTuple, Optional, Dict, List, Tuple
 from datetime import datetime, timedelta, date
-from contextlib import contextmanager
 from pathlib import Path
 
+from . import db as _db
 from . import logger as _logger
+from . import metrics as _metrics
+from .weeks import MAX_WEEK, week_bit
 
+# statistics_cache.depends_on bits; must match the triggers of schema migration 4
+DEPENDS_ON_SCHEDULE = 1
+DEPENDS_ON_COURSES = 2
+DEPENDS_ON_SESSIONS = 4
 
+
+class _Aggregate(NamedTuple):
+    """A cacheable statistics aggregate and the data slice it depends on."""
+    name: str
+    key: str
+    compute: Callable[[sqlite3.Cursor], Any]
+    depends_on: int
+    decode: Optional[Callable[[Any], Any]]
+    weeks_mask: Optional[int]
+    course_id: Optional[int]
+    date_from: Optional[str]
+    date_to: Optional[str]
+
+
+def _int_keys(mapping: Dict) -> Dict:
+    """Restore integer keys that JSON turned into strings."""
+    return {int(k): v for k, v in mapping.items()}
+
+
+def _decode_total_hours(value: Dict) -> Dict:
+    return {**value, "weekly_hours": _int_keys(value.get("weekly_hours", {}))}
+
+
+def _decode_distribution(value: Dict) -> Dict:
+    return {**value, "by_day": _int_keys(value.get("by_day", {}))}
+
+
+def _day_loads(rows) -> List[Dict]:
+    """Convert (day_of_week, class_count, total_hours) rows to load dicts."""
+    return [
+        {
+            "day_of_week": row['day_of_week'],
+            "class_count": row['class_count'],
+            "total_hours": round(row['total_hours'], 2) if row['total_hours'] else 0
+        }
+        for row in rows
+    ]
+
+
+@_metrics.instrumented("statistics_manager")
 class StatisticsManager:
     """Manages course statistics and attendance tracking"""
 
@@ -23,22 +69,15 @@ class StatisticsManager:
         self.event_handler = event_handler
         self._write_lock = threading.Lock()  # Thread safety for write operations
 
-    @contextmanager
+        # Aggregates are cached in statistics_cache; triggers invalidate them on writes
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Enable column access by name
-            self.logger.log_message("debug", f"Database connection opened: {self.db_path}")
-            yield conn
-        except Exception as e:
-            self.logger.log_message("error", f"Database connection failed: {e}")
-            raise
-        finally:
-            if conn:
-                conn.close()
-                self.logger.log_message("debug", "Database connection closed")
+        """Context manager for the shared (thread-local) database connection"""
+        # Enable column access by name for cursors created in the block
+        return _db.get_connection(self.db_path, row_factory=sqlite3.Row)
 
     def _validate_date_format(self, date_str: str) -> bool:
         """Validate date string is in YYYY-MM-DD format
@@ -158,6 +197,62 @@ class StatisticsManager:
                 self.logger.log_message("error", f"Failed to mark attendance: {e}")
                 return -1
 
+    def prepopulate_attendance(self, start_date: str, end_date: str,
+                               attended: bool = True) -> int:
+        """
+        Create attendance sessions for every scheduled occurrence in a date range.
+
+        Occurrences come from the schedule_occurrences calendar; dates that
+        already have a session for the entry are left untouched.
+
+        Args:
+            start_date: First date in YYYY-MM-DD format
+            end_date: Last date in YYYY-MM-DD format
+            attended: Initial attendance flag for the new sessions
+
+        Returns:
+            Number of sessions created, -1 if failed
+        """
+        if not self._validate_date_format(start_date) or not self._validate_date_format(end_date):
+            self.logger.log_message("error", f"Invalid date range: {start_date} - {end_date}")
+            return -1
+
+        with self._write_lock:
+            try:
+                with self.get_connection() as conn:
+                    cur = conn.cursor()
+                    cur.execute("""
+                        INSERT INTO course_sessions
+                        (course_id, schedule_entry_id, date, start_time, end_time, attended)
+                        SELECT s.course_id, o.entry_id, o.date, s.start_time, s.end_time, ?
+                        FROM schedule_occurrences o
+                        JOIN schedule s ON s.id = o.entry_id
+                        WHERE o.date BETWEEN ? AND ?
+                          AND NOT EXISTS (
+                              SELECT 1 FROM course_sessions cs
+                              WHERE cs.course_id = s.course_id
+                                AND cs.schedule_entry_id = o.entry_id
+                                AND cs.date = o.date
+                          )
+                    """, (1 if attended else 0, start_date, end_date))
+                    created = cur.rowcount
+                    conn.commit()
+
+                self.logger.log_message("info", f"Pre-populated {created} sessions for {start_date} - {end_date}")
+
+                if created and self.event_handler:
+                    self.event_handler.emit_custom_event("attendance-updated", {
+                        "start_date": start_date,
+                        "end_date": end_date,
+                        "created": created
+                    })
+
+                return created
+
+            except Exception as e:
+                self.logger.log_message("error", f"Failed to pre-populate attendance: {e}")
+                return -1
+
     def get_attendance_history(self, course_id: Optional[int] = None,
                                start_date: Optional[str] = None,
                                end_date: Optional[str] = None,
@@ -198,7 +293,7 @@ class StatisticsManager:
                     query += " AND cs.date <= ?"
                     params.append(end_date)
 
-                query += " ORDER BY cs.date DESC, cs.start_time DESC LIMIT ?"
+                query += " ORDER BY cs.date DESC, cs.start_min DESC LIMIT ?"
                 params.append(limit)
 
                 cur.execute(query, params)
@@ -245,7 +340,182 @@ class StatisticsManager:
                 self.logger.log_message("error", f"Failed to delete attendance record: {e}")
                 return False
 
+    # Statistics Cache
+    def _aggregate(self, name: str, compute: Callable[[sqlite3.Cursor], Any], depends_on: int,
+                   decode: Optional[Callable[[Any], Any]] = None, weeks_mask: Optional[int] = None,
+                   course_id: Optional[int] = None, date_from: Optional[str] = None,
+                   date_to: Optional[str] = None, **params) -> _Aggregate:
+        """Describe a cacheable aggregate; ``params`` become part of the cache key."""
+        key = f"{name}:{json.dumps(params, sort_keys=True)}"
+        return _Aggregate(name, key, compute, depends_on, decode, weeks_mask, course_id, date_from, date_to)
+
+    def _load_aggregates(self, aggregates: List[_Aggregate]) -> Dict[str, Tuple[Any, str, bool]]:
+        """
+        Serve aggregates from statistics_cache, computing and storing the misses.
+
+        Hits cost one SELECT for the whole batch. Misses are computed and stored
+        inside one read transaction; if a concurrent write lands in between, the
+        freshly computed values are returned but not cached.
+
+        Returns:
+            Dict mapping aggregate name to (value, computed_at, served_from_cache)
+
+        Raises:
+            Exception: If computing a missing aggregate fails (nothing is cached)
+        """
+        results = {}
+        by_key = {agg.key: agg for agg in aggregates}
+
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT key, value, updated_at FROM statistics_cache "
+                f"WHERE key IN ({', '.join('?' for _ in by_key)})",
+                list(by_key)
+            )
+            for row in cur.fetchall():
+                agg = by_key[row['key']]
+                value = json.loads(row['value'])
+                results[agg.name] = (agg.decode(value) if agg.decode else value, row['updated_at'], True)
+
+            misses = [agg for agg in aggregates if agg.name not in results]
+            if misses:
+                own_transaction = not conn.in_transaction
+                if own_transaction:
+                    cur.execute("BEGIN")
+
+                computed = [(agg, agg.compute(cur)) for agg in misses]
+                cur.execute("SELECT strftime('%Y-%m-%d %H:%M:%f', 'now') AS now")
+                computed_at = cur.fetchone()['now']
+
+                if own_transaction:
+                    try:
+                        cur.executemany("""
+                            INSERT OR REPLACE INTO statistics_cache
+                            (key, value, updated_at, depends_on, weeks_mask, course_id, date_from, date_to)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """, [
+                            (agg.key, json.dumps(value), computed_at, agg.depends_on, agg.weeks_mask,
+                             agg.course_id, agg.date_from, agg.date_to)
+                            for agg, value in computed
+                        ])
+                        conn.commit()
+                    except sqlite3.Error as e:
+                        # A write committed after our snapshot; don't cache possibly stale values
+                        conn.rollback()
+                        self.logger.log_message("debug", f"Statistics not cached: {e}")
+
+                for agg, value in computed:
+                    results[agg.name] = (value, computed_at, False)
+
+        with self._cache_lock:
+            self._cache_hits += len(aggregates) - len(misses)
+            self._cache_misses += len(misses)
+
+        return results
+
+    def _cached(self, aggregate: _Aggregate) -> Any:
+        """Return a single aggregate value, served from the cache when fresh."""
+        return self._load_aggregates([aggregate])[aggregate.name][0]
+
+    def get_cache_status(self) -> Dict:
+        """
+        Report hit/miss counters and the freshness of every cached aggregate.
+
+        Returns:
+            Dictionary with ``hits``, ``misses`` and ``entries`` (key, computed_at, age_seconds)
+        """
+        try:
+            with self.get_connection() as conn:
+                cur = conn.cursor()
+                cur.execute("""
+                    SELECT key, updated_at,
+                           (julianday('now') - julianday(updated_at)) * 86400.0 AS age_seconds
+                    FROM statistics_cache
+                    ORDER BY key
+                """)
+                entries = [
+                    {
+                        "key": row['key'],
+                        "computed_at": row['updated_at'],
+                        "age_seconds": round(max(row['age_seconds'] or 0, 0), 3)
+                    }
+                    for row in cur.fetchall()
+                ]
+        except Exception as e:
+            self.logger.log_message("error", f"Failed to read statistics cache status: {e}")
+            entries = []
+
+        with self._cache_lock:
+            return {"hits": self._cache_hits, "misses": self._cache_misses, "entries": entries}
+
+    def clear_cache(self) -> bool:
+        """
+        Drop every cached aggregate (writes invalidate precisely on their own).
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self.get_connection() as conn:
+                conn.execute("DELETE FROM statistics_cache")
+                conn.commit()
+            self.logger.log_message("info", "Statistics cache cleared")
+            return True
+        except Exception as e:
+            self.logger.log_message("error", f"Failed to clear statistics cache: {e}")
+            return False
+
     # Statistics Calculation Methods
+    def _total_hours_aggregate(self, start_week: Optional[int], end_week: Optional[int]) -> _Aggregate:
+        first = max(start_week or 1, 1)
+        last = min(end_week or MAX_WEEK, MAX_WEEK)
+        weeks_mask = 0
+        for week in range(first, last + 1):
+            weeks_mask |= week_bit(week)
+        return self._aggregate(
+            "total_hours", lambda cur: self._compute_total_hours(cur, first, last),
+            DEPENDS_ON_SCHEDULE, decode=_decode_total_hours, weeks_mask=weeks_mask,
+            first=first, last=last
+        )
+
+    def _compute_total_hours(self, cur: sqlite3.Cursor, first: int, last: int) -> Dict:
+        # Expand each entry's week bitmask against the week range in SQL.
+        # Entries without explicit weeks (weeks_mask = 0) are not counted.
+        cur.execute("""
+            WITH RECURSIVE week_range(week) AS (
+                SELECT :first WHERE :first <= :last
+                UNION ALL
+                SELECT week + 1 FROM week_range WHERE week < :last
+            )
+            SELECT w.week,
+                   SUM((s.end_min - s.start_min) / 60.0) as hours
+            FROM week_range w
+            JOIN schedule s ON (s.weeks_mask & (1 << (w.week - 1))) != 0
+            JOIN courses c ON s.course_id = c.id
+            GROUP BY w.week
+            ORDER BY w.week
+        """, {"first": first, "last": last})
+
+        total_hours = 0.0
+        weekly_hours = {}
+
+        for row in cur.fetchall():
+            hours = row['hours'] or 0
+            total_hours += hours
+            weekly_hours[row['week']] = hours
+
+        avg_per_week = total_hours / len(weekly_hours) if weekly_hours else 0
+
+        result = {
+            "total_hours": round(total_hours, 2),
+            "weekly_hours": {k: round(v, 2) for k, v in weekly_hours.items()},
+            "average_per_week": round(avg_per_week, 2)
+        }
+
+        self.logger.log_message("debug", f"Calculated total hours: {result['total_hours']}")
+        return result
+
     def get_total_course_hours(self, start_week: Optional[int] = None,
                                end_week: Optional[int] = None) -> Dict:
         """
@@ -259,49 +529,94 @@ class StatisticsManager:
             Dictionary with total hours, weekly breakdown, and average
         """
         try:
-            with self.get_connection() as conn:
-                cur = conn.cursor()
-
-                # Get all schedule entries with duration calculation
-                cur.execute("""
-                    SELECT s.*, c.name as course_name,
-                           CAST((julianday('1970-01-01 ' || s.end_time) -
-                                 julianday('1970-01-01 ' || s.start_time)) * 24 AS REAL) as duration
-                    FROM schedule s
-                    JOIN courses c ON s.course_id = c.id
-                """)
-                entries = cur.fetchall()
-
-                total_hours = 0.0
-                weekly_hours = {}
+            return self._cached(self._total_hours_aggregate(start_week, end_week))
+        except Exception as e:
+            self.logger.log_message("error", f"Failed to calculate total hours: {e}")
+            return {"total_hours": 0, "weekly_hours": {}, "average_per_week": 0}
 
-                for entry in entries:
-                    weeks = json.loads(entry['weeks']) if entry['weeks'] else []
-                    duration = entry['duration'] if entry['duration'] else 0
+    def get_hours_between(self, start_date: str, end_date: str) -> Dict:
+        """
+        Get scheduled class hours between two dates (inclusive).
 
-                    for week in weeks:
-                        if start_week and week < start_week:
-                            continue
-                        if end_week and week > end_week:
-                            continue
+        A range scan over the schedule_occurrences calendar, so only dates
+        inside the semester (``semester_start_date`` / ``total_weeks``) count.
 
-                        total_hours += duration
-                        weekly_hours[week] = weekly_hours.get(week, 0.0) + duration
+        Args:
+            start_date: First date in YYYY-MM-DD format
+            end_date: Last date in YYYY-MM-DD format
 
-                avg_per_week = total_hours / len(weekly_hours) if weekly_hours else 0
+        Returns:
+            Dictionary with total_hours and daily_hours (date -> hours)
+        """
+        if not self._validate_date_format(start_date) or not self._validate_date_format(end_date):
+            self.logger.log_message("error", f"Invalid date range: {start_date} - {end_date}")
+            return {"total_hours": 0.0, "daily_hours": {}}
 
-                result = {
-                    "total_hours": round(total_hours, 2),
-                    "weekly_hours": {k: round(v, 2) for k, v in weekly_hours.items()},
-                    "average_per_week": round(avg_per_week, 2)
+        try:
+            with self.get_connection() as conn:
+                cur = conn.cursor()
+                cur.execute("""
+                    SELECT date, SUM((end_min - start_min) / 60.0) AS hours
+                    FROM schedule_occurrences
+                    WHERE date BETWEEN ? AND ?
+                    GROUP BY date
+                    ORDER BY date
+                """, (start_date, end_date))
+
+                daily_hours = {row['date']: row['hours'] for row in cur.fetchall()}
+                return {
+                    "total_hours": round(sum(daily_hours.values()), 2),
+                    "daily_hours": daily_hours
                 }
 
-                self.logger.log_message("debug", f"Calculated total hours: {result['total_hours']}")
-                return result
-
         except Exception as e:
-            self.logger.log_message("error", f"Failed to calculate total hours: {e}")
-            return {"total_hours": 0, "weekly_hours": {}, "average_per_week": 0}
+            self.logger.log_message("error", f"Failed to get hours between dates: {e}")
+            return {"total_hours": 0.0, "daily_hours": {}}
+
+    def _distribution_aggregate(self) -> _Aggregate:
+        return self._aggregate(
+            "distribution", self._compute_distribution,
+            DEPENDS_ON_SCHEDULE | DEPENDS_ON_COURSES, decode=_decode_distribution
+        )
+
+    def _compute_distribution(self, cur: sqlite3.Cursor) -> Dict:
+        # By day of week
+        cur.execute("""
+            SELECT s.day_of_week, COUNT(*) as count
+            FROM schedule s
+            GROUP BY s.day_of_week
+            ORDER BY s.day_of_week
+        """)
+        by_day = {row['day_of_week']: row['count'] for row in cur.fetchall()}
+
+        # By teacher
+        cur.execute("""
+            SELECT c.teacher, COUNT(DISTINCT s.id) as count
+            FROM courses c
+            LEFT JOIN schedule s ON c.id = s.course_id
+            WHERE c.teacher IS NOT NULL AND c.teacher != ''
+            GROUP BY c.teacher
+            ORDER BY count DESC
+        """)
+        by_teacher = {row['teacher']: row['count'] for row in cur.fetchall()}
+
+        # By location
+        cur.execute("""
+            SELECT c.location, COUNT(DISTINCT s.id) as count
+            FROM courses c
+            LEFT JOIN schedule s ON c.id = s.course_id
+            WHERE c.location IS NOT NULL AND c.location != ''
+            GROUP BY c.location
+            ORDER BY count DESC
+        """)
+        by_location = {row['location']: row['count'] for row in cur.fetchall()}
+
+        self.logger.log_message("debug", f"Calculated course distribution")
+        return {
+            "by_day": by_day,
+            "by_teacher": by_teacher,
+            "by_location": by_location
+        }
 
     def get_course_distribution(self) -> Dict:
         """
@@ -311,52 +626,62 @@ class StatisticsManager:
             Dictionary with distributions by day, teacher, and location
         """
         try:
-            with self.get_connection() as conn:
-                cur = conn.cursor()
+            return self._cached(self._distribution_aggregate())
+        except Exception as e:
+            self.logger.log_message("error", f"Failed to get distribution: {e}")
+            return {"by_day": {}, "by_teacher": {}, "by_location": {}}
 
-                # By day of week
-                cur.execute("""
-                    SELECT s.day_of_week, COUNT(*) as count
-                    FROM schedule s
-                    GROUP BY s.day_of_week
-                    ORDER BY s.day_of_week
-                """)
-                by_day = {row['day_of_week']: row['count'] for row in cur.fetchall()}
+    def _attendance_aggregate(self, course_id: Optional[int], start_date: Optional[str],
+                              end_date: Optional[str]) -> _Aggregate:
+        course_id = course_id or None
+        start_date = start_date or None
+        end_date = end_date or None
+        return self._aggregate(
+            "attendance", lambda cur: self._compute_attendance_rate(cur, course_id, start_date, end_date),
+            DEPENDS_ON_SESSIONS, course_id=course_id, date_from=start_date, date_to=end_date,
+            course=course_id, start=start_date, end=end_date
+        )
+
+    def _compute_attendance_rate(self, cur: sqlite3.Cursor, course_id: Optional[int],
+                                 start_date: Optional[str], end_date: Optional[str]) -> Dict:
+        # Read the trigger-maintained rollups instead of scanning course_sessions:
+        # per-course totals without a date filter, per-day rows otherwise
+        rollup = "attendance_daily" if start_date or end_date else "attendance_course_totals"
+        query = f"""
+            SELECT
+                SUM(total_sessions) as total_sessions,
+                SUM(attended_sessions) as attended_sessions
+            FROM {rollup}
+            WHERE 1=1
+        """
+        params = []
 
-                # By teacher
-                cur.execute("""
-                    SELECT c.teacher, COUNT(DISTINCT s.id) as count
-                    FROM courses c
-                    LEFT JOIN schedule s ON c.id = s.course_id
-                    WHERE c.teacher IS NOT NULL AND c.teacher != ''
-                    GROUP BY c.teacher
-                    ORDER BY count DESC
-                """)
-                by_teacher = {row['teacher']: row['count'] for row in cur.fetchall()}
+        if course_id:
+            query += " AND course_id = ?"
+            params.append(course_id)
 
-                # By location
-                cur.execute("""
-                    SELECT c.location, COUNT(DISTINCT s.id) as count
-                    FROM courses c
-                    LEFT JOIN schedule s ON c.id = s.course_id
-                    WHERE c.location IS NOT NULL AND c.location != ''
-                    GROUP BY c.location
-                    ORDER BY count DESC
-                """)
-                by_location = {row['location']: row['count'] for row in cur.fetchall()}
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
 
-                result = {
-                    "by_day": by_day,
-                    "by_teacher": by_teacher,
-                    "by_location": by_location
-                }
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
 
-                self.logger.log_message("debug", f"Calculated course distribution")
-                return result
+        cur.execute(query, params)
+        result = cur.fetchone()
 
-        except Exception as e:
-            self.logger.log_message("error", f"Failed to get distribution: {e}")
-            return {"by_day": {}, "by_teacher": {}, "by_location": {}}
+        total = result['total_sessions'] if result['total_sessions'] else 0
+        attended = result['attended_sessions'] if result['attended_sessions'] else 0
+        rate = (attended / total * 100) if total > 0 else 0
+
+        self.logger.log_message("debug", f"Calculated attendance rate: {rate:.2f}%")
+        return {
+            "total_sessions": total,
+            "attended_sessions": attended,
+            "absence_sessions": total - attended,
+            "attendance_rate": round(rate, 2)
+        }
 
     def get_attendance_rate(self, course_id: Optional[int] = None,
                            start_date: Optional[str] = None,
@@ -372,15 +697,41 @@ class StatisticsManager:
         Returns:
             Dictionary with attendance statistics
         """
+        try:
+            return self._cached(self._attendance_aggregate(course_id, start_date, end_date))
+        except Exception as e:
+            self.logger.log_message("error", f"Failed to calculate attendance rate: {e}")
+            return {
+                "total_sessions": 0,
+                "attended_sessions": 0,
+                "absence_sessions": 0,
+                "attendance_rate": 0.0
+            }
+
+    def get_weekly_attendance(self, course_id: Optional[int] = None,
+                              start_date: Optional[str] = None,
+                              end_date: Optional[str] = None) -> List[Dict]:
+        """
+        Get attendance per week (weeks start on Monday) from the rollups.
+
+        Args:
+            course_id: Filter by course ID (optional)
+            start_date: Only include days on or after this YYYY-MM-DD date (optional)
+            end_date: Only include days on or before this YYYY-MM-DD date (optional)
+
+        Returns:
+            List of weekly records ordered by week_start
+        """
         try:
             with self.get_connection() as conn:
                 cur = conn.cursor()
 
                 query = """
                     SELECT
-                        COUNT(*) as total_sessions,
-                        SUM(CASE WHEN attended = 1 THEN 1 ELSE 0 END) as attended_sessions
-                    FROM course_sessions
+                        date(date, '-6 days', 'weekday 1') as week_start,
+                        SUM(total_sessions) as total_sessions,
+                        SUM(attended_sessions) as attended_sessions
+                    FROM attendance_daily
                     WHERE 1=1
                 """
                 params = []
@@ -397,31 +748,58 @@ class StatisticsManager:
                     query += " AND date <= ?"
                     params.append(end_date)
 
+                query += " GROUP BY week_start ORDER BY week_start"
+
                 cur.execute(query, params)
-                result = cur.fetchone()
+                result = [
+                    {
+                        "week_start": row['week_start'],
+                        "total_sessions": row['total_sessions'],
+                        "attended_sessions": row['attended_sessions'],
+                        "absence_sessions": row['total_sessions'] - row['attended_sessions'],
+                        "attendance_rate": round(row['attended_sessions'] / row['total_sessions'] * 100, 2)
+                        if row['total_sessions'] else 0.0
+                    }
+                    for row in cur.fetchall()
+                ]
 
-                total = result['total_sessions'] if result['total_sessions'] else 0
-                attended = result['attended_sessions'] if result['attended_sessions'] else 0
-                rate = (attended / total * 100) if total > 0 else 0
+                self.logger.log_message("debug", f"Retrieved weekly attendance for {len(result)} weeks")
+                return result
 
-                stats = {
-                    "total_sessions": total,
-                    "attended_sessions": attended,
-                    "absence_sessions": total - attended,
-                    "attendance_rate": round(rate, 2)
-                }
+        except Exception as e:
+            self.logger.log_message("error", f"Failed to get weekly attendance: {e}")
+            return []
 
-                self.logger.log_message("debug", f"Calculated attendance rate: {rate:.2f}%")
-                return stats
+    def _weekly_load_aggregate(self, week_number: Optional[int]) -> _Aggregate:
+        week_number = week_number or None
+        return self._aggregate(
+            "weekly_load", lambda cur: self._compute_weekly_load(cur, week_number),
+            DEPENDS_ON_SCHEDULE, weeks_mask=week_bit(week_number) if week_number else None,
+            week=week_number
+        )
+
+    def _compute_weekly_load(self, cur: sqlite3.Cursor, week_number: Optional[int]) -> List[Dict]:
+        query = """
+            SELECT
+                s.day_of_week,
+                COUNT(*) as class_count,
+                SUM((s.end_min - s.start_min) / 60.0) as total_hours
+            FROM schedule s
+            WHERE 1=1
+        """
+        params = []
 
-        except Exception as e:
-            self.logger.log_message("error", f"Failed to calculate attendance rate: {e}")
-            return {
-                "total_sessions": 0,
-                "attended_sessions": 0,
-                "absence_sessions": 0,
-                "attendance_rate": 0.0
-            }
+        if week_number:
+            query += " AND (s.weeks_mask = 0 OR (s.weeks_mask & ?) != 0)"
+            params.append(week_bit(week_number))
+
+        query += " GROUP BY s.day_of_week ORDER BY s.day_of_week"
+
+        cur.execute(query, params)
+        result = _day_loads(cur.fetchall())
+
+        self.logger.log_message("debug", f"Retrieved weekly load for week {week_number}")
+        return result
 
     def get_weekly_load(self, week_number: Optional[int] = None) -> List[Dict]:
         """
@@ -434,45 +812,34 @@ class StatisticsManager:
             List of daily course loads
         """
         try:
-            with self.get_connection() as conn:
-                cur = conn.cursor()
-
-                query = """
-                    SELECT
-                        s.day_of_week,
-                        COUNT(*) as class_count,
-                        SUM(CAST((julianday('1970-01-01 ' || s.end_time) -
-                                  julianday('1970-01-01 ' || s.start_time)) * 24 AS REAL)) as total_hours
-                    FROM schedule s
-                    WHERE 1=1
-                """
-                params = []
-
-                if week_number:
-                    query += " AND s.weeks LIKE ?"
-                    params.append(f'%{week_number}%')
-
-                query += " GROUP BY s.day_of_week ORDER BY s.day_of_week"
-
-                cur.execute(query, params)
-                rows = cur.fetchall()
-
-                result = [
-                    {
-                        "day_of_week": row['day_of_week'],
-                        "class_count": row['class_count'],
-                        "total_hours": round(row['total_hours'], 2) if row['total_hours'] else 0
-                    }
-                    for row in rows
-                ]
-
-                self.logger.log_message("debug", f"Retrieved weekly load for week {week_number}")
-                return result
-
+            return self._cached(self._weekly_load_aggregate(week_number))
         except Exception as e:
             self.logger.log_message("error", f"Failed to get weekly load: {e}")
             return []
 
+    def _busiest_days_aggregate(self, limit: int) -> _Aggregate:
+        return self._aggregate(
+            "busiest_days", lambda cur: self._compute_busiest_days(cur, limit),
+            DEPENDS_ON_SCHEDULE, limit=limit
+        )
+
+    def _compute_busiest_days(self, cur: sqlite3.Cursor, limit: int) -> List[Dict]:
+        cur.execute("""
+            SELECT
+                s.day_of_week,
+                COUNT(*) as class_count,
+                SUM((s.end_min - s.start_min) / 60.0) as total_hours
+            FROM schedule s
+            GROUP BY s.day_of_week
+            ORDER BY class_count DESC, total_hours DESC
+            LIMIT ?
+        """, (limit,))
+
+        result = _day_loads(cur.fetchall())
+
+        self.logger.log_message("debug", f"Retrieved {len(result)} busiest days")
+        return result
+
     def get_busiest_days(self, limit: int = 5) -> List[Dict]:
         """
         Get busiest days of the week.
@@ -484,38 +851,31 @@ class StatisticsManager:
             List of busiest days with statistics
         """
         try:
-            with self.get_connection() as conn:
-                cur = conn.cursor()
-
-                cur.execute("""
-                    SELECT
-                        s.day_of_week,
-                        COUNT(*) as class_count,
-                        SUM(CAST((julianday('1970-01-01 ' || s.end_time) -
-                                  julianday('1970-01-01 ' || s.start_time)) * 24 AS REAL)) as total_hours
-                    FROM schedule s
-                    GROUP BY s.day_of_week
-                    ORDER BY class_count DESC, total_hours DESC
-                    LIMIT ?
-                """, (limit,))
+            return self._cached(self._busiest_days_aggregate(limit))
+        except Exception as e:
+            self.logger.log_message("error", f"Failed to get busiest days: {e}")
+            return []
 
-                rows = cur.fetchall()
+    def _time_slots_aggregate(self) -> _Aggregate:
+        return self._aggregate("time_slots", self._compute_time_slots, DEPENDS_ON_SCHEDULE)
 
-                result = [
-                    {
-                        "day_of_week": row['day_of_week'],
-                        "class_count": row['class_count'],
-                        "total_hours": round(row['total_hours'], 2) if row['total_hours'] else 0
-                    }
-                    for row in rows
-                ]
+    def _compute_time_slots(self, cur: sqlite3.Cursor) -> Dict:
+        cur.execute("""
+            SELECT
+                CASE
+                    WHEN start_min < 12 * 60 THEN 'morning'
+                    WHEN start_min < 18 * 60 THEN 'afternoon'
+                    ELSE 'evening'
+                END as time_slot,
+                COUNT(*) as count
+            FROM schedule
+            GROUP BY time_slot
+        """)
 
-                self.logger.log_message("debug", f"Retrieved {len(result)} busiest days")
-                return result
+        result = {row['time_slot']: row['count'] for row in cur.fetchall()}
 
-        except Exception as e:
-            self.logger.log_message("error", f"Failed to get busiest days: {e}")
-            return []
+        self.logger.log_message("debug", f"Calculated time slot distribution")
+        return result
 
     def get_time_slot_distribution(self) -> Dict:
         """
@@ -525,28 +885,7 @@ class StatisticsManager:
             Dictionary with counts for each time slot
         """
         try:
-            with self.get_connection() as conn:
-                cur = conn.cursor()
-
-                cur.execute("""
-                    SELECT
-                        CASE
-                            WHEN CAST(substr(start_time, 1, 2) AS INTEGER) < 12 THEN 'morning'
-                            WHEN CAST(substr(start_time, 1, 2) AS INTEGER) < 18 THEN 'afternoon'
-                            ELSE 'evening'
-                        END as time_slot,
-                        COUNT(*) as count
-                    FROM schedule
-                    GROUP BY time_slot
-                """)
-
-                rows = cur.fetchall()
-
-                result = {row['time_slot']: row['count'] for row in rows}
-
-                self.logger.log_message("debug", f"Calculated time slot distribution")
-                return result
-
+            return self._cached(self._time_slots_aggregate())
         except Exception as e:
             self.logger.log_message("error", f"Failed to get time slot distribution: {e}")
             return {}
@@ -556,24 +895,37 @@ class StatisticsManager:
         """
         Calculate comprehensive statistics.
 
+        Cached aggregates are read with a single query; only aggregates
+        invalidated by a write since the last call are recomputed.
+
         Args:
             start_week: Start week number (optional)
             end_week: End week number (optional)
 
         Returns:
-            Dictionary with all statistics
+            Dictionary with all statistics, plus ``freshness`` mapping each
+            aggregate to its ``computed_at`` timestamp and whether it was
+            ``cached``
         """
         try:
             self.logger.log_message("info", "Calculating comprehensive statistics")
 
-            return {
-                "total_hours": self.get_total_course_hours(start_week, end_week),
-                "distribution": self.get_course_distribution(),
-                "attendance": self.get_attendance_rate(),
-                "weekly_load": self.get_weekly_load(),
-                "busiest_days": self.get_busiest_days(),
-                "time_slots": self.get_time_slot_distribution()
+            aggregates = [
+                self._total_hours_aggregate(start_week, end_week),
+                self._distribution_aggregate(),
+                self._attendance_aggregate(None, None, None),
+                self._weekly_load_aggregate(None),
+                self._busiest_days_aggregate(5),
+                self._time_slots_aggregate(),
+            ]
+            loaded = self._load_aggregates(aggregates)
+
+            stats = {name: value for name, (value, _, _) in loaded.items()}
+            stats["freshness"] = {
+                name: {"computed_at": computed_at, "cached": cached}
+                for name, (_, computed_at, cached) in loaded.items()
             }
+            return stats
         except Exception as e:
             self.logger.log_message("error", f"Failed to calculate statistics: {e}")
             return {}
@@ -12,6 +12,8 @@ import uuid
 from typing import Optional, Dict, List
 
 from . import logger as _logger
+from . import metrics as _metrics
+from . import tracing as _tracing
 
 
 class SyncClient:
@@ -27,6 +29,7 @@ class SyncClient:
         self.sync_thread = None
         self.is_running = False
         self.uuid_lock = threading.Lock()  # 用于 UUID 生成的线程锁
+        self.last_apply_stats: Optional[Dict[str, int]] = None  # 最近一次应用服务器数据的统计
 
     def _validate_strategy(self, strategy: str) -> bool:
         """Validate sync strategy
@@ -65,6 +68,28 @@ class SyncClient:
 
         return True
 
+    def _request(self, operation: str, method: str, url: str, **kwargs) -> requests.Response:
+        """发送 HTTP 请求，并记录往返耗时指标（classtop_sync_request_duration_seconds）
+
+        处于追踪中的请求还会记录一个 http 类型的 span。
+
+        Args:
+            operation: 指标中的操作名
+            method: "get" 或 "post"
+            url: 请求地址
+            **kwargs: 传给 requests 的参数
+        """
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            with _tracing.span(f"HTTP {method.upper()} {operation}", "http", url=url) as span:
+                response = getattr(requests, method)(url, **kwargs)
+                span.set_attribute("status_code", response.status_code)
+            outcome = "ok" if response.ok else "http_error"
+            return response
+        finally:
+            _metrics.SYNC_REQUEST_DURATION.observe(time.perf_counter() - start, operation, outcome)
+
     def _log_sync_history(self, direction: str, status: str, message: str,
                          courses_synced: int = 0, schedule_synced: int = 0,
                          conflicts_found: int = 0):
@@ -75,8 +100,8 @@ class SyncClient:
                 cur = conn.cursor()
                 cur.execute("""
                     INSERT INTO sync_history
-                    (direction, status, message, courses_synced, schedule_synced, conflicts_found)
-                    VALUES (?, ?, ?, ?, ?, ?)
+                    (timestamp, direction, status, message, courses_synced, schedule_synced, conflicts_found)
+                    VALUES (strftime('%Y-%m-%d %H:%M:%f', 'now'), ?, ?, ?, ?, ?, ?)
                 """, (direction, status, message, courses_synced, schedule_synced, conflicts_found))
                 conn.commit()
                 self.logger.log_message("debug", f"Sync history logged: {direction} - {status}")
@@ -116,7 +141,7 @@ class SyncClient:
 
             # 发送注册请求
             url = f"{server_url.rstrip('/')}/api/clients/register"
-            response = requests.post(url, json=data, timeout=10)
+            response = self._request("register", "post", url, json=data, timeout=10)
             response.raise_for_status()
 
             result = response.json()
@@ -185,7 +210,7 @@ class SyncClient:
 
             # 发送同步请求
             url = f"{server_url.rstrip('/')}/api/sync"
-            response = requests.post(url, json=sync_data, timeout=30)
+            response = self._request("sync", "post", url, json=sync_data, timeout=30)
             response.raise_for_status()
 
             result = response.json()
@@ -254,7 +279,7 @@ class SyncClient:
                 return {"success": False, "message": "服务器地址必须使用HTTPS协议"}
 
             url = f"{server_url.rstrip('/')}/api/health"
-            response = requests.get(url, timeout=5)
+            response = self._request("health", "get", url, timeout=5)
             response.raise_for_status()
 
             result = response.json()
@@ -388,7 +413,7 @@ class SyncClient:
 
             # Download courses
             courses_url = f"{server_url.rstrip('/')}/api/clients/{client_uuid}/courses"
-            courses_response = requests.get(courses_url, timeout=30)
+            courses_response = self._request("download_courses", "get", courses_url, timeout=30)
             courses_response.raise_for_status()
             courses_result = courses_response.json()
 
@@ -400,7 +425,7 @@ class SyncClient:
 
             # Download schedule entries
             schedule_url = f"{server_url.rstrip('/')}/api/clients/{client_uuid}/schedule"
-            schedule_response = requests.get(schedule_url, timeout=30)
+            schedule_response = self._request("download_schedule", "get", schedule_url, timeout=30)
             schedule_response.raise_for_status()
             schedule_result = schedule_response.json()
 
@@ -642,14 +667,17 @@ class SyncClient:
                 "schedule_entries": local_data.get("schedule_entries", [])
             }
 
-    def apply_server_data(self, server_data: Dict) -> bool:
+    def apply_server_data(self, server_data: Dict, delete_missing: bool = False) -> bool:
         """Apply server data to local database
 
-        Updates local courses and schedule entries with server data.
-        Uses schedule_manager's update_course() and add_schedule_entry() methods.
+        Computes a keyed diff between server and local data and writes only the
+        rows that were inserted or changed, in a single transaction, keeping the
+        server's IDs. Exact per-operation counts are stored in
+        ``last_apply_stats``.
 
         Args:
             server_data: Dict with "courses" and "schedule_entries" keys
+            delete_missing: Also delete local rows that are absent on the server
 
         Returns:
             bool: True if successful, False otherwise
@@ -658,82 +686,26 @@ class SyncClient:
             self.logger.log_message("info", "应用服务器数据到本地数据库")
 
             courses = server_data.get("courses", [])
-            schedule_entries = server_data.get("schedule_entries", [])
-
-            courses_updated = 0
-            entries_updated = 0
-
-            # Get existing local courses and entries for reference
-            local_courses = {c["id"]: c for c in self.schedule_manager.get_all_courses()}
-            local_entries = {e["id"]: e for e in self.schedule_manager.get_all_schedule_entries()}
-
-            # Update or add courses
-            for course in courses:
-                course_id = course.get("id")
-                if not course_id:
-                    continue
-
-                if course_id in local_courses:
-                    # Update existing course
-                    success = self.schedule_manager.update_course(
-                        course_id=course_id,
-                        name=course.get("name"),
-                        teacher=course.get("teacher"),
-                        location=course.get("location"),
-                        color=course.get("color")
-                    )
-                    if success:
-                        courses_updated += 1
-                else:
-                    # Add new course (note: this will create a new ID, need special handling)
-                    # For now, we'll skip adding courses that don't exist locally
-                    # This should be handled by proper sync logic
-                    self.logger.log_message(
-                        "warning",
-                        f"课程 ID {course_id} 在本地不存在，跳过"
-                    )
-
-            # Update or add schedule entries
-            for entry in schedule_entries:
-                entry_id = entry.get("id")
-                if not entry_id:
-                    continue
-
-                # Parse weeks data
+            entries = []
+            for entry in server_data.get("schedule_entries", []):
                 weeks = entry.get("weeks", [])
                 if isinstance(weeks, str):
-                    weeks = self._parse_weeks(weeks)
-
-                if entry_id in local_entries:
-                    # Delete and re-add (simpler than update for schedule entries)
-                    self.schedule_manager.delete_schedule_entry(entry_id)
-                    new_id = self.schedule_manager.add_schedule_entry(
-                        course_id=entry.get("course_id"),
-                        day_of_week=entry.get("day_of_week"),
-                        start_time=entry.get("start_time"),
-                        end_time=entry.get("end_time"),
-                        weeks=weeks,
-                        note=entry.get("note")
-                    )
-                    if new_id > 0:
-                        entries_updated += 1
-                else:
-                    # Add new entry
-                    new_id = self.schedule_manager.add_schedule_entry(
-                        course_id=entry.get("course_id"),
-                        day_of_week=entry.get("day_of_week"),
-                        start_time=entry.get("start_time"),
-                        end_time=entry.get("end_time"),
-                        weeks=weeks,
-                        note=entry.get("note")
-                    )
-                    if new_id > 0:
-                        entries_updated += 1
+                    entry = {**entry, "weeks": self._parse_weeks(weeks)}
+                entries.append(entry)
 
+            stats = self.schedule_manager.apply_sync_data(courses, entries, delete_missing=delete_missing)
+            if stats is None:
+                self.logger.log_message("error", "应用服务器数据失败，已回滚")
+                return False
+
+            self.last_apply_stats = stats
             self.logger.log_message(
                 "info",
-                f"服务器数据应用完成: {courses_updated} 门课程更新, "
-                f"{entries_updated} 个课程表条目更新"
+                f"服务器数据应用完成: 课程 新增 {stats['courses_inserted']} / 更新 {stats['courses_updated']} / "
+                f"删除 {stats['courses_deleted']} / 未变 {stats['courses_unchanged']}, "
+                f"课程表条目 新增 {stats['entries_inserted']} / 更新 {stats['entries_updated']} / "
+                f"删除 {stats['entries_deleted']} / 未变 {stats['entries_unchanged']}, "
+                f"跳过 {stats['skipped']}"
             )
 
             return True
@@ -815,6 +787,10 @@ class SyncClient:
                     "entries_updated": 0
                 }
 
+            stats = self.last_apply_stats or {}
+            courses_updated = stats.get("courses_inserted", 0) + stats.get("courses_updated", 0)
+            entries_updated = stats.get("entries_inserted", 0) + stats.get("entries_updated", 0)
+
             # Step 6: Upload final data to server
             upload_success = self.sync_to_server()
             if not upload_success:
@@ -822,8 +798,8 @@ class SyncClient:
                     "success": False,
                     "message": "上传合并数据到服务器失败",
                     "conflicts_found": conflicts_found,
-                    "courses_updated": len(merged_data.get("courses", [])),
-                    "entries_updated": len(merged_data.get("schedule_entries", []))
+                    "courses_updated": courses_updated,
+                    "entries_updated": entries_updated
                 }
 
             # Step 7: Return detailed result
@@ -831,8 +807,8 @@ class SyncClient:
                 "success": True,
                 "message": "双向同步成功",
                 "conflicts_found": conflicts_found,
-                "courses_updated": len(merged_data.get("courses", [])),
-                "entries_updated": len(merged_data.get("schedule_entries", []))
+                "courses_updated": courses_updated,
+                "entries_updated": entries_updated
             }
 
             self.logger.log_message(
@@ -0,0 +1,289 @@
+"""
+Request-scoped tracing.
+
+A trace starts at an IPC command or API request (``start_trace``) and is kept
+for a sampled fraction of them (``tracing_sample_rate`` setting, 0 = off).
+Spans opened below it (``span``) - manager methods, SQL statements,
+connection setup, outbound HTTP calls - find their parent through a context
+variable, so they follow the request into ``run_db`` worker threads.
+
+Without an active trace, ``span()`` returns a shared no-op context manager
+after a single context variable lookup.
+
+Finished traces go to an in-memory ring buffer (``get_traces``) and are
+appended to ``traces.jsonl`` in the log directory. Spans slower than
+``SLOW_SPAN_MS`` for their kind are logged as warnings.
+"""
+
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from . import logger as _logger
+
+# Setting holding the fraction of commands/requests to trace (0.0 - 1.0)
+SETTING_KEY = "tracing_sample_rate"
+
+TRACE_BUFFER_SIZE = 200
+TRACE_FILE = _logger.LOG_DIR / "traces.jsonl"
+
+# Spans at or above these durations (milliseconds) are logged as warnings
+SLOW_SPAN_MS = {
+    "command": 500.0,
+    "request": 500.0,
+    "method": 200.0,
+    "db": 100.0,
+    "sql": 100.0,
+    "http": 2000.0,
+}
+
+_sample_rate = 0.0
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("classtop_span", default=None)
+_traces: deque = deque(maxlen=TRACE_BUFFER_SIZE)
+_traces_lock = threading.Lock()
+
+
+def sampling() -> bool:
+    """Return True if new traces can be started."""
+    return _sample_rate > 0.0
+
+
+def sample_rate() -> float:
+    """The fraction of commands/requests currently traced."""
+    return _sample_rate
+
+
+def set_sample_rate(rate: float) -> None:
+    """Set the fraction of commands/requests that are traced (0 disables tracing)."""
+    global _sample_rate
+    _sample_rate = min(1.0, max(0.0, float(rate)))
+    # Manager methods are wrapped only while metrics or tracing need them
+    from . import metrics as _metrics
+    _metrics.refresh_instrumentation()
+
+
+def follow_setting(settings_manager) -> None:
+    """Apply the ``tracing_sample_rate`` setting now and whenever it changes."""
+    def apply() -> None:
+        try:
+            set_sample_rate(float(settings_manager.get_setting(SETTING_KEY) or 0))
+        except ValueError:
+            set_sample_rate(0.0)
+
+    def on_change(keys: List[str], version: int) -> None:
+        if SETTING_KEY in keys:
+            apply()
+
+    apply()
+    settings_manager.add_listener(on_change)
+    _logger.log_message("info", f"Tracing sample rate: {_sample_rate}")
+
+
+class Trace:
+    """The spans of one command or request."""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self):
+        self.trace_id = os.urandom(8).hex()
+        self.spans: List["Span"] = []
+
+
+class Span:
+    """A timed operation within a trace; also its own context manager."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "attributes",
+                 "start", "duration_ms", "error", "_t0", "_token")
+
+    def __init__(self, trace: Trace, parent_id: Optional[str], name: str, kind: str,
+                 attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(4).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start = 0.0
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self._token = _current.set(self)
+        self.trace.spans.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration_ms = (time.perf_counter() - self._t0) * 1000
+        _current.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+
+        threshold = SLOW_SPAN_MS.get(self.kind)
+        if threshold is not None and self.duration_ms >= threshold:
+            _logger.log_message(
+                "warning", "Slow {} span {}: {:.1f} ms (trace {})",
+                self.kind, self.name, self.duration_ms, self.trace.trace_id)
+
+        if self.parent_id is None:
+            _finish_trace(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned when nothing is being traced."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def current_span() -> Optional[Span]:
+    """The innermost active span of this context, if any."""
+    return _current.get()
+
+
+def start_trace(name: str, kind: str = "command", **attributes: Any):
+    """Open a root span for a command or request, subject to sampling.
+
+    Inside an existing trace this is an ordinary child span.
+    """
+    parent = _current.get()
+    if parent is not None:
+        return Span(parent.trace, parent.span_id, name, kind, attributes)
+    if _sample_rate <= 0.0 or (_sample_rate < 1.0 and random.random() >= _sample_rate):
+        return _NOOP
+    return Span(Trace(), None, name, kind, attributes)
+
+
+def span(name: str, kind: str = "internal", **attributes: Any):
+    """Open a child span of the active trace; a no-op when nothing is traced."""
+    parent = _current.get()
+    if parent is None:
+        return _NOOP
+    return Span(parent.trace, parent.span_id, name, kind, attributes)
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+_export_queue: "queue.SimpleQueue[Dict[str, Any]]" = queue.SimpleQueue()
+_exporter: Optional[threading.Thread] = None
+_exporter_lock = threading.Lock()
+
+
+def _trace_dict(root: Span) -> Dict[str, Any]:
+    spans = sorted(root.trace.spans, key=lambda s: s.start)
+    return {
+        "trace_id": root.trace.trace_id,
+        "name": root.name,
+        "kind": root.kind,
+        "start": root.start,
+        "duration_ms": root.duration_ms,
+        "error": root.error,
+        "spans": [s.to_dict() for s in spans],
+    }
+
+
+def _finish_trace(root: Span) -> None:
+    trace = _trace_dict(root)
+    with _traces_lock:
+        _traces.append(trace)
+    _export_queue.put(trace)
+    _ensure_exporter()
+
+
+def _ensure_exporter() -> None:
+    global _exporter
+    if _exporter is not None:
+        return
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = threading.Thread(target=_export_loop, name="classtop-traces", daemon=True)
+            _exporter.start()
+
+
+def _export_loop() -> None:
+    """Append finished traces to TRACE_FILE, one JSON object per line."""
+    writer = None
+    while True:
+        trace = _export_queue.get()
+        try:
+            if writer is None or writer.path != TRACE_FILE:
+                if writer is not None:
+                    writer.close()
+                writer = _logger.RotatingFileWriter(TRACE_FILE)
+            writer.write(json.dumps(trace, ensure_ascii=False, default=str) + "\n")
+            # Write out whatever else is already waiting before flushing
+            while True:
+                try:
+                    trace = _export_queue.get_nowait()
+                except queue.Empty:
+                    break
+                writer.write(json.dumps(trace, ensure_ascii=False, default=str) + "\n")
+            writer.flush()
+        except Exception as e:
+            _logger.log_message("error", f"Failed to export trace: {e}")
+
+
+def get_traces(limit: int = 50, min_duration_ms: Optional[float] = None,
+               name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Recently finished traces from the ring buffer, newest first.
+
+    Args:
+        limit: Maximum number of traces
+        min_duration_ms: Only traces whose root took at least this long
+        name: Only traces whose root name contains this text
+    """
+    with _traces_lock:
+        traces = list(_traces)
+
+    result = []
+    for trace in reversed(traces):
+        if min_duration_ms is not None and (trace["duration_ms"] or 0) < min_duration_ms:
+            continue
+        if name and name not in trace["name"]:
+            continue
+        result.append(trace)
+        if len(result) >= limit:
+            break
+    return result
+
+
+def clear_traces() -> None:
+    """Empty the ring buffer (the JSON-lines file is kept)."""
+    with _traces_lock:
+        _traces.clear()
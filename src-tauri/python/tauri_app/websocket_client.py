@@ -5,6 +5,7 @@ from typing import Optional, Dict, Any, Callable
 import websockets
 from websockets.exceptions import ConnectionClosed, WebSocketException
 from . import logger
+from .async_db import run_db
 
 
 class WebSocketClient:
@@ -200,6 +201,15 @@ class WebSocketClient:
                 return {'success': success}
             return {'success': False}
 
+        elif command == 'get_timeline_state':
+            return await run_db(_db.get_timeline_state)
+
+        elif command == 'get_metrics':
+            from . import metrics as _metrics
+            if params.get('format') == 'prometheus':
+                return {'enabled': _metrics.enabled(), 'text': _metrics.render()}
+            return {'enabled': _metrics.enabled(), 'metrics': _metrics.snapshot()}
+
         elif command == 'refresh_state':
             await self._send_state_update()
             return {'success': True}
@@ -311,6 +321,11 @@ class WebSocketClient:
             if self.settings_manager:
                 state_data['settings'] = self.settings_manager.get_all_settings()
 
+            # Get classroom state; later changes arrive as class_state messages
+            from . import db as _db
+            if _db.class_state_service:
+                state_data['class_state'] = await run_db(_db.class_state_service.get_state)
+
             # Send update
             message = {
                 'type': 'state_update',
@@ -338,6 +353,38 @@ class WebSocketClient:
         if self.websocket:
             await self.websocket.close()
 
+    def send_class_state(self, event: str, payload: Dict[str, Any]):
+        """Forward a class state transition to the server (non-blocking).
+
+        Registered with ClassStateService.add_subscriber(), so it is called from
+        the service thread.
+
+        Args:
+            event: Event name (class-started, class-ended, break-started, day-finished)
+            payload: State of the interval that just began
+        """
+        if not self.websocket or not self.running:
+            return
+
+        message = {
+            'type': 'class_state',
+            'event': event,
+            'data': payload
+        }
+
+        async def send_state():
+            try:
+                if self.websocket:
+                    await self.websocket.send(json.dumps(message))
+            except Exception as e:
+                self.logger.log_message("error", f"Error sending class state: {e}")
+
+        try:
+            if self.portal:
+                self.portal.start_task_soon(send_state)
+        except Exception as e:
+            self.logger.log_message("error", f"Failed to schedule class state send: {e}")
+
     def send_camera_frame(self, camera_index: int, frame_base64: str):
         """Send camera frame to server (non-blocking).
 
@@ -0,0 +1,45 @@
+"""
+Week bitmask helpers for ClassTop schedule entries.
+
+Week ``n`` (1-based) is stored as bit ``n - 1`` of ``schedule.weeks_mask``.
+A mask of 0 means the entry has no week restriction and applies every week,
+matching the old "empty weeks list" semantics. Weeks are limited to 1-63 so
+the mask always fits in a positive SQLite 64-bit integer.
+"""
+
+from typing import Iterable, List, Optional
+
+MAX_WEEK = 63
+ALL_WEEKS = 0
+
+
+def week_bit(week: Optional[int]) -> int:
+    """Return the bit for a single week, or 0 if the week is out of range."""
+    if week is None or not 1 <= week <= MAX_WEEK:
+        return 0
+    return 1 << (week - 1)
+
+
+def weeks_to_mask(weeks: Optional[Iterable[int]]) -> int:
+    """Convert a list of week numbers to a bitmask.
+
+    Raises:
+        ValueError: If a week is not an integer in 1..MAX_WEEK
+    """
+    mask = ALL_WEEKS
+    for week in weeks or ():
+        if isinstance(week, bool) or not isinstance(week, int) or not 1 <= week <= MAX_WEEK:
+            raise ValueError(f"Invalid week number: {week!r} (expected 1-{MAX_WEEK})")
+        mask |= 1 << (week - 1)
+    return mask
+
+
+def mask_to_weeks(mask: Optional[int]) -> List[int]:
+    """Convert a bitmask back to a sorted list of week numbers ([] = all weeks)."""
+    weeks = []
+    mask = mask or 0
+    while mask:
+        low = mask & -mask
+        weeks.append(low.bit_length())
+        mask ^= low
+    return weeks
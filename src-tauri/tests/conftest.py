@@ -5,6 +5,7 @@ import os
 import sys
 import sqlite3
 import tempfile
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Generator
 import pytest
@@ -12,7 +13,10 @@ import pytest
 # Add the python module to the path
 sys.path.insert(0, str(Path(__file__).parent.parent / "python"))
 
-from tauri_app import db, schedule_manager, settings_manager
+from tauri_app import db, schedule_manager, settings_manager, statistics_manager
+
+# Monday of the first semester week in the timeline tests
+SEMESTER_MONDAY = datetime(2025, 9, 1)
 
 
 @pytest.fixture
@@ -86,6 +90,7 @@ def temp_db() -> Generator[str, None, None]:
     yield db_path
 
     # Cleanup
+    db.close_connections(db_path)
     try:
         os.unlink(db_path)
     except OSError:
@@ -193,6 +198,96 @@ def initialized_settings_manager(temp_db: str, mock_event_handler):
     return manager
 
 
+@pytest.fixture
+def initialized_statistics_manager(temp_db: str, mock_event_handler):
+    """
+    Initialize a StatisticsManager with a temporary database.
+
+    Args:
+        temp_db: Path to the temporary database
+        mock_event_handler: Mocked EventHandler
+
+    Returns:
+        Initialized StatisticsManager instance
+    """
+    return statistics_manager.StatisticsManager(temp_db, mock_event_handler)
+
+
+@pytest.fixture
+def at():
+    """
+    Build times relative to the first semester week.
+
+    Returns:
+        Function ``at(hour, minute, day=0)`` returning the time ``day`` days
+        after Monday 2025-09-01
+    """
+    def build(hour, minute, day=0):
+        return SEMESTER_MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+    return build
+
+
+@pytest.fixture
+def week_one_timetable(initialized_schedule_manager, sample_course, mocker):
+    """
+    Build a timetable whose current week is pinned to 1.
+
+    Returns:
+        Function ``week_one_timetable(*entries)`` that adds sample_course with one
+        schedule entry per ``(day_of_week, start_time, end_time[, weeks])`` tuple
+        and returns the schedule manager
+    """
+    manager = initialized_schedule_manager
+
+    def build(*entries):
+        mocker.patch.object(manager, "calculate_week_number", return_value=1)
+        course_id = manager.add_course(**sample_course)
+        for entry in entries:
+            manager.add_schedule_entry(course_id, *entry)
+        return manager
+
+    return build
+
+
+@pytest.fixture
+def trace_sql():
+    """
+    Record the SQL statements a call issues on a manager's connection.
+
+    Returns:
+        Function ``trace_sql(manager, func, *args, **kwargs)`` returning
+        ``(result, statements)``
+    """
+    def trace(manager, func, *args, **kwargs):
+        statements = []
+        with manager.get_connection() as conn:
+            conn.set_trace_callback(statements.append)
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                conn.set_trace_callback(None)
+        return result, statements
+
+    return trace
+
+
+@pytest.fixture
+def count_selects(trace_sql):
+    """
+    Record the queries (SELECT or WITH statements) a call issues on a manager's connection.
+
+    Returns:
+        Function ``count_selects(manager, func, *args, **kwargs)`` returning
+        ``(result, queries)``
+    """
+    def count(manager, func, *args, **kwargs):
+        result, statements = trace_sql(manager, func, *args, **kwargs)
+        return result, [sql for sql in statements if sql.lstrip().upper().startswith(("SELECT", "WITH"))]
+
+    return count
+
+
 @pytest.fixture
 def skip_on_non_windows():
     """
@@ -0,0 +1,96 @@
+"""
+Unit tests for the async database facade (async_db.py).
+"""
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from tauri_app import async_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_executor():
+    """Give every test its own thread pool and stop it afterwards."""
+    async_db.shutdown()
+    yield
+    async_db.shutdown()
+
+
+class TestRunDb:
+    """Tests for run_db()."""
+
+    async def test_runs_off_the_event_loop_thread(self):
+        """Test that the call runs on a pool thread and returns its result."""
+        loop_thread = threading.get_ident()
+
+        def work(a, b=0):
+            return threading.get_ident(), a + b
+
+        thread_id, result = await async_db.run_db(work, 1, b=2)
+
+        assert result == 3
+        assert thread_id != loop_thread
+
+    async def test_exceptions_propagate(self):
+        """Test that errors raised in the worker reach the awaiting coroutine."""
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            await async_db.run_db(fail)
+
+    async def test_context_variables_propagate(self):
+        """Test that the caller's context variables are visible in the worker."""
+        var = contextvars.ContextVar("request_id", default=None)
+        var.set("abc")
+
+        assert await async_db.run_db(var.get) == "abc"
+
+    async def test_loop_keeps_running_during_slow_call(self):
+        """Test that a slow query does not block other coroutines."""
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(async_db.run_db(time.sleep, 0.2), ticker())
+
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.2
+
+    async def test_pool_is_bounded(self):
+        """Test that no more than MAX_WORKERS calls run at the same time."""
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def work():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+
+        await asyncio.gather(*(async_db.run_db(work) for _ in range(async_db.MAX_WORKERS * 3)))
+
+        assert max(peak) <= async_db.MAX_WORKERS
+
+
+class TestAsyncProxy:
+    """Tests for AsyncProxy."""
+
+    async def test_wraps_manager_methods(self, initialized_schedule_manager):
+        """Test that manager methods become awaitables backed by the database."""
+        proxy = async_db.AsyncProxy(initialized_schedule_manager)
+
+        course_id = await proxy.add_course("Math")
+        courses = await proxy.get_courses()
+
+        assert [c["id"] for c in courses] == [course_id]
+        assert proxy.db_path == initialized_schedule_manager.db_path
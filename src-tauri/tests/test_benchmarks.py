@@ -0,0 +1,47 @@
+"""
+Smoke tests for the benchmark suite (benchmarks/).
+"""
+import pytest
+
+from benchmarks import run as bench
+from benchmarks.synthetic import SCALES
+
+
+def result(median_ms, **dataset):
+    return {
+        "dataset": {"courses": 5, "entries": 100, "sessions": 2000, "seed": 0, **dataset},
+        "results": {"sync.merge_data": {"median_ms": median_ms}},
+    }
+
+
+class TestCompare:
+    """Tests for the baseline comparison."""
+
+    def test_flags_slowdowns_beyond_tolerance(self):
+        """Test that only slowdowns over both the ratio and the absolute delta regress."""
+        assert bench.compare(result(13.0), result(10.0))["regressions"] == ["sync.merge_data"]
+        assert bench.compare(result(12.0), result(10.0))["regressions"] == []
+        # 50% slower but under the minimum delta
+        assert bench.compare(result(0.3), result(0.2))["regressions"] == []
+
+    def test_different_dataset_is_not_compared(self):
+        """Test that baselines for another dataset are ignored."""
+        report = bench.compare(result(100.0), result(1.0, sessions=100_000))
+
+        assert report["comparable"] is False
+        assert report["regressions"] == []
+
+
+@pytest.mark.slow
+def test_small_scale_run():
+    """Test that every benchmark runs against a small synthetic database."""
+    results = bench.run(SCALES["small"], repeat=1)
+
+    assert results["dataset"]["rows"] == {"courses": 5, "entries": 100, "sessions": 2000}
+    assert set(results["results"]) == {
+        "schedule.get_schedule", "schedule.get_schedule_week", "schedule.get_schedule_for_week",
+        "schedule.check_conflicts_x200", "statistics.calculate_all_statistics_cold",
+        "statistics.calculate_all_statistics_cached", "sync.detect_conflicts", "sync.merge_data",
+        "sync.apply_server_data", "export.json", "import.json",
+    }
+    assert all(r["median_ms"] > 0 for r in results["results"].values())
@@ -0,0 +1,175 @@
+"""
+Unit tests for ClassStateService (class_state.py).
+"""
+import asyncio
+
+import pytest
+
+from tauri_app.class_state import (
+    BREAK_STARTED, CLASS_ENDED, CLASS_STARTED, DAY_FINISHED, ClassStateService,
+)
+
+
+@pytest.fixture
+def service(week_one_timetable, initialized_settings_manager, mocker):
+    """A ClassStateService over two Monday classes and one Tuesday class."""
+    schedule = week_one_timetable((1, "9:00", "10:00"), (1, "10:10", "11:00"), (2, "14:00", "15:00", [1]))
+    return ClassStateService(schedule, initialized_settings_manager, mocker.Mock())
+
+
+class TestEvaluate:
+    """Tests for evaluate()."""
+
+    def test_state_and_upcoming_interval(self, service, at):
+        """Test that the state carries the precomputed next interval."""
+        state = service.evaluate(at(9, 30))
+
+        assert state["status"] == "class"
+        assert state["current"]["start_time"] == "9:00"
+        assert state["next_transition_at"] == at(10, 0).isoformat()
+        assert state["minutes_until_transition"] == 30
+
+        upcoming = state["upcoming"]
+        assert upcoming["status"] == "break"
+        assert upcoming["at"] == at(10, 0).isoformat()
+        assert upcoming["current"] is None
+        assert upcoming["next"]["start_time"] == "10:10"
+
+    def test_statuses_through_the_day(self, service, at):
+        """Test idle before the first class and finished after the last one."""
+        assert service.evaluate(at(7, 0))["status"] == "idle"
+        assert service.evaluate(at(10, 5))["status"] == "break"
+        assert service.evaluate(at(12, 0))["status"] == "finished"
+        assert service.evaluate(at(12, 0))["next"]["day_of_week"] == 2
+
+    def test_week_follows_evaluated_time(
+        self, initialized_schedule_manager, initialized_settings_manager, sample_course, mocker, at
+    ):
+        """Test that the week is calculated for ``now``, not the wall clock."""
+        schedule = initialized_schedule_manager
+        course_id = schedule.add_course(**sample_course)
+        schedule.add_schedule_entry(course_id, 2, "14:00", "15:00", [1])
+        initialized_settings_manager.set_setting("semester_start_date", "2025-09-01")
+        service = ClassStateService(schedule, initialized_settings_manager, mocker.Mock())
+
+        assert service.evaluate(at(14, 30, day=1))["current"]["week"] == 1
+        state = service.evaluate(at(14, 30, day=8))
+        assert (state["week"], state["current"]) == (2, None)
+
+    def test_semester_starting_midweek(
+        self, initialized_schedule_manager, initialized_settings_manager, sample_course, mocker, at
+    ):
+        """Test the look-ahead across a semester week that does not start on Monday."""
+        schedule = initialized_schedule_manager
+        course_id = schedule.add_course(**sample_course)
+        schedule.add_schedule_entry(course_id, 3, "9:00", "10:00", [1])
+        week_2 = schedule.add_schedule_entry(course_id, 3, "10:00", "11:00", [2])
+        initialized_settings_manager.set_setting("semester_start_date", "2025-09-03")  # a Wednesday
+        service = ClassStateService(schedule, initialized_settings_manager, mocker.Mock())
+
+        # Tuesday 2025-09-09 is the last day of week 1
+        state = service.evaluate(at(23, 0, day=8))
+
+        assert (state["week"], state["day_of_week"], state["status"]) == (1, 2, "finished")
+        assert state["next"]["id"] == week_2
+        assert state["next_transition_at"] == at(10, 0, day=9).isoformat()
+        assert (state["upcoming"]["week"], state["upcoming"]["day_of_week"]) == (2, 3)
+
+
+class TestTransitions:
+    """Tests for the emitted transition events."""
+
+    def test_events_at_boundaries(self, service, at):
+        """Test the event sequence of a day and the payload emitted with it."""
+        assert service._step(at(8, 0)) == []
+        assert service._step(at(8, 30)) == []
+        assert service._step(at(9, 0)) == [CLASS_STARTED]
+        assert service._step(at(10, 0)) == [CLASS_ENDED, BREAK_STARTED]
+        assert service._step(at(10, 10)) == [CLASS_STARTED]
+        assert service._step(at(11, 0)) == [CLASS_ENDED, DAY_FINISHED]
+        assert service._step(at(14, 0, day=1)) == [CLASS_STARTED]
+
+        name, payload = service.event_handler.emit_custom_event.call_args.args
+        assert name == CLASS_STARTED
+        assert payload["event"] == CLASS_STARTED
+        assert payload["current"]["day_of_week"] == 2
+        assert payload["upcoming"]["status"] == "finished"
+
+    def test_back_to_back_classes(self, service, at):
+        """Test that a class following directly ends the old one and starts the new one."""
+        schedule = service.schedule_manager
+        course_id = schedule.get_courses()[0]["id"]
+        schedule.add_schedule_entry(course_id, 3, "8:00", "9:00")
+        schedule.add_schedule_entry(course_id, 3, "9:00", "10:00")
+
+        service._step(at(8, 30, day=2))
+        assert service._step(at(9, 0, day=2)) == [CLASS_ENDED, CLASS_STARTED]
+
+    def test_subscribers_receive_events(self, service, mocker, at):
+        """Test that subscribers get the same events, and a failing one does not stop others."""
+        failing = mocker.Mock(side_effect=RuntimeError("boom"))
+        subscriber = mocker.Mock()
+        service.add_subscriber(failing)
+        service.add_subscriber(subscriber)
+
+        service._step(at(8, 0))
+        service._step(at(9, 0))
+
+        subscriber.assert_called_once()
+        assert subscriber.call_args.args[0] == CLASS_STARTED
+
+        service.remove_subscriber(subscriber)
+        service._step(at(10, 0))
+        subscriber.assert_called_once()
+
+    def test_sleeps_until_next_boundary(self, service, at):
+        """Test that the loop waits exactly until the next boundary."""
+        service._step(at(8, 59))
+
+        assert service._seconds_until_transition(at(8, 59).timestamp()) == 60
+
+
+class TestStateLoop:
+    """Tests for the background loop."""
+
+    async def test_schedule_change_wakes_loop(self, service, mocker):
+        """Test that a schedule change re-evaluates without waiting for a timeout."""
+        step = mocker.spy(service, "_step")
+        service._running = True
+        task = asyncio.create_task(service._state_loop())
+
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if step.call_count:
+                break
+        assert step.call_count == 1
+
+        course_id = service.schedule_manager.get_courses()[0]["id"]
+        service.schedule_manager.add_schedule_entry(course_id, 4, "8:00", "9:00")
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if step.call_count == 2:
+                break
+        assert step.call_count == 2
+
+        service._running = False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert service._on_schedule_changed not in service.schedule_manager.timetable._listeners
+
+    async def test_failed_step_retries_soon(self, service, mocker):
+        """Test that an error is retried after ERROR_RETRY_SECONDS instead of the sleep cap."""
+        mocker.patch("tauri_app.class_state.ERROR_RETRY_SECONDS", 0.01)
+        step = mocker.patch.object(service, "_step", side_effect=[RuntimeError("boom"), []])
+        service._running = True
+        task = asyncio.create_task(service._state_loop())
+
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if step.call_count == 2:
+                break
+        assert step.call_count == 2
+
+        service._running = False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
@@ -51,6 +51,46 @@ class TestBasicCommands:
         assert result.lines[0] == "Log line 1"
         mock_tail.assert_called_once_with(100)
 
+    @pytest.mark.asyncio
+    async def test_query_logs_command(self, mocker):
+        """Test query_logs passes the filters and wraps the entries."""
+        mock_query = mocker.patch(
+            "tauri_app.commands._logger.query_logs",
+            return_value={
+                "entries": [{"time": "2025-10-07 10:00:00.000", "level": "ERROR",
+                             "module": "tauri_app.db", "function": "init_db",
+                             "line": 130, "message": "boom"}],
+                "offset": 0, "limit": 50, "has_more": False
+            }
+        )
+
+        req = commands.QueryLogsRequest(level="error", module="tauri_app.db", limit=50)
+        result = await commands.query_logs(req)
+
+        assert isinstance(result, commands.QueryLogsResponse)
+        assert result.entries[0].message == "boom"
+        assert result.has_more is False
+        mock_query.assert_called_once_with(
+            level="error", start=None, end=None, module="tauri_app.db",
+            contains=None, offset=0, limit=50
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_traces_command(self, mocker):
+        """Test get_traces passes the filters and reports the sample rate."""
+        trace = {"trace_id": "abc", "name": "get_courses", "kind": "command",
+                 "start": 0.0, "duration_ms": 12.5, "error": None, "spans": []}
+        mock_traces = mocker.patch("tauri_app.commands._tracing.get_traces", return_value=[trace])
+        mocker.patch("tauri_app.commands._tracing.sample_rate", return_value=0.1)
+
+        req = commands.GetTracesRequest(limit=10, min_duration_ms=5)
+        result = await commands.get_traces(req)
+
+        assert isinstance(result, commands.GetTracesResponse)
+        assert result.sample_rate == 0.1
+        assert result.traces == [trace]
+        mock_traces.assert_called_once_with(limit=10, min_duration_ms=5, name=None)
+
 
 class TestConfigCommands:
     """Test configuration command handlers."""
@@ -291,6 +331,133 @@ class TestScheduleCommands:
         assert result.conflicts[0].course_name == "Conflicting Course"
         assert result.conflicts[0].conflict_weeks == [1, 2]
 
+    @pytest.mark.asyncio
+    async def test_get_all_conflicts_command(self, mocker):
+        """Test the whole-timetable conflict report command."""
+        entry = {
+            "id": 1,
+            "course_id": 1,
+            "course_name": "Course",
+            "teacher": None,
+            "location": None,
+            "start_time": "09:00",
+            "end_time": "10:30",
+            "day_of_week": 1,
+            "weeks": []
+        }
+        mock_manager = mocker.MagicMock()
+        mock_manager.get_all_conflicts.return_value = [
+            {
+                "day_of_week": 1,
+                "overlap_start": "09:30",
+                "overlap_end": "10:30",
+                "conflict_weeks": [],
+                "entries": [entry, {**entry, "id": 2, "start_time": "09:30", "end_time": "11:00"}]
+            }
+        ]
+        mocker.patch("tauri_app.commands._db.schedule_manager", mock_manager)
+
+        result = await commands.get_all_conflicts(commands.WeekRequest(week=3))
+
+        assert result.has_conflict is True
+        assert [e.id for e in result.conflicts[0].entries] == [1, 2]
+        mock_manager.get_all_conflicts.assert_called_once_with(3)
+
+
+    @pytest.mark.asyncio
+    async def test_get_schedule_for_dates_command(self, mocker):
+        """Test the dated schedule view command."""
+        mock_manager = mocker.MagicMock()
+        mock_manager.get_schedule_for_dates.return_value = [
+            {
+                "date": "2025-09-01",
+                "week": 1,
+                "id": 1,
+                "name": "Course",
+                "teacher": None,
+                "location": None,
+                "day_of_week": 1,
+                "start_time": "09:00",
+                "end_time": "10:30",
+                "start_min": 540,
+                "end_min": 630,
+                "weeks": [],
+                "color": None
+            }
+        ]
+        mocker.patch("tauri_app.commands._db.schedule_manager", mock_manager)
+
+        req = commands.DateRangeRequest(start_date="2025-09-01", end_date="2025-09-07")
+        result = await commands.get_schedule_for_dates(req)
+
+        assert [(r.date, r.week) for r in result] == [("2025-09-01", 1)]
+        mock_manager.get_schedule_for_dates.assert_called_once_with("2025-09-01", "2025-09-07")
+
+
+    @pytest.mark.asyncio
+    async def test_get_timeline_state_command(self, mocker):
+        """Test the timeline state command."""
+        entry = {
+            "id": 1,
+            "name": "Course",
+            "teacher": None,
+            "location": None,
+            "day_of_week": 1,
+            "start_time": "09:00",
+            "end_time": "10:30",
+            "start_min": 540,
+            "end_min": 630,
+            "week": 2,
+            "color": None
+        }
+        mocker.patch("tauri_app.commands._db.get_timeline_state", return_value={
+            "week": 2,
+            "day_of_week": 1,
+            "minute": 560,
+            "current": entry,
+            "next": None,
+            "previous": None,
+            "minutes_until_transition": 70
+        })
+
+        result = await commands.get_timeline_state()
+
+        assert result.current.id == 1
+        assert result.next is None
+        assert result.minutes_until_transition == 70
+
+
+    @pytest.mark.asyncio
+    async def test_import_schedule_data_csv_single_transaction(self, mocker):
+        """Test that a CSV import is handed to import_bulk as one call keyed by course name."""
+        mock_import = mocker.patch("tauri_app.commands._db.import_bulk",
+                                   return_value={"courses": [10], "entries": [20, 21]})
+        csv_data = (
+            "course_name,teacher,location,color,day_of_week,start_time,end_time,weeks,note\n"
+            "Math,T1,R1,#fff,1,08:00,09:00,[1],\n"
+            "Math,,,,3,10:00,11:00,[],\n"
+        )
+
+        result = await commands.import_schedule_data(
+            commands.ImportDataRequest(format="csv", data=csv_data, replace_existing=True))
+
+        assert result.success is True
+        assert (result.courses_imported, result.schedule_imported) == (1, 2)
+        courses, entries, replace = mock_import.call_args.args
+        assert courses == [{"id": "Math", "name": "Math", "teacher": "T1", "location": "R1", "color": "#fff"}]
+        assert [(e["course_id"], e["day_of_week"]) for e in entries] == [("Math", 1), ("Math", 3)]
+        assert replace is True
+
+    @pytest.mark.asyncio
+    async def test_import_schedule_data_failure(self, mocker):
+        """Test that a rejected import reports failure."""
+        mocker.patch("tauri_app.commands._db.import_bulk", return_value={})
+
+        result = await commands.import_schedule_data(commands.ImportDataRequest(
+            format="json", data='{"courses": [], "schedule": []}', replace_existing=True))
+
+        assert result.success is False
+        assert result.courses_imported == 0
 
 class TestWeekCommands:
     """Test week calculation command handlers."""
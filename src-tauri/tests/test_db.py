@@ -1,12 +1,15 @@
 """
 Unit tests for the database layer (db.py).
 """
+import os
 import sqlite3
+import sys
 import tempfile
+import types
 from pathlib import Path
 import pytest
 
-from tauri_app import db
+from tauri_app import db, migrations
 
 
 class TestDatabaseInitialization:
@@ -262,7 +265,7 @@ class TestWeekCalculation:
 
         # Verify that calculate_week_number was called
         mock_schedule_manager.calculate_week_number.assert_called_once_with(
-            start_date
+            start_date, None
         )
         assert week == 5
 
@@ -283,6 +286,48 @@ class TestWeekCalculation:
         assert week == 10
 
 
+class TestTimelineState:
+    """Tests for the timeline-backed current/next/last class helpers."""
+
+    def test_timeline_state(self, initialized_schedule_manager, sample_course, mocker):
+        """Test lookups for a fixed point in time."""
+        from datetime import datetime
+
+        manager = initialized_schedule_manager
+        course_id = manager.add_course(**sample_course)
+        first = manager.add_schedule_entry(course_id, 1, "8:00", "9:30")
+        second = manager.add_schedule_entry(course_id, 1, "10:00", "11:00")
+
+        only_week_3 = manager.add_schedule_entry(course_id, 1, "9:50", "10:00", [3])
+        mocker.patch.object(db, "schedule_manager", manager)
+        mocker.patch.object(db, "settings_manager", None)
+        mocker.patch.object(db, "DB_PATH", manager.db_path)
+        db.set_config("semester_start_date", "2025-09-01")
+
+        monday = datetime(2025, 9, 8, 9, 45)
+        state = db.get_timeline_state(monday)
+
+        assert (state["week"], state["day_of_week"], state["minute"]) == (2, 1, 585)
+        assert state["current"] is None
+        assert state["previous"]["id"] == first
+        assert state["next"]["id"] == second
+        assert state["minutes_until_transition"] == 15
+
+        # The week comes from the given time, not the wall clock
+        state = db.get_timeline_state(datetime(2025, 9, 15, 9, 45))
+        assert state["week"] == 3
+        assert state["next"]["id"] == only_week_3
+
+    def test_no_manager(self, mocker):
+        """Test that the helpers degrade gracefully without a schedule manager."""
+        mocker.patch("tauri_app.db.logger.log_message")
+        mocker.patch.object(db, "schedule_manager", None)
+
+        assert db.get_timeline_state() == {}
+        assert db.get_current_class() is None
+        assert db.get_last_class() is None
+
+
 class TestManagerSetters:
     """Tests for manager setter functions."""
 
@@ -321,3 +366,288 @@ class TestManagerSetters:
         db.set_sync_client(mock_client)
 
         assert db.sync_client is mock_client
+
+    def test_get_sync_client_created_on_first_use(self, mocker, monkeypatch):
+        """Test that the sync client is only created once both managers are set."""
+        mocker.patch("tauri_app.db.logger.log_message")
+        monkeypatch.setattr(db, "sync_client", None)
+        monkeypatch.setattr(db, "schedule_manager", None)
+        monkeypatch.setattr(db, "settings_manager", mocker.MagicMock())
+
+        assert db.get_sync_client() is None
+
+        monkeypatch.setattr(db, "schedule_manager", mocker.MagicMock())
+        client = db.get_sync_client()
+
+        assert client is not None
+        assert client.schedule_manager is db.schedule_manager
+        assert db.get_sync_client() is client
+
+    def test_get_audio_manager_failure_is_not_retried(self, mocker, monkeypatch):
+        """Test that an unavailable audio backend returns None without retrying."""
+        log = mocker.patch("tauri_app.db.logger.log_message")
+        monkeypatch.setattr(db, "audio_manager", None)
+        monkeypatch.setattr(db, "_audio_manager_failed", False)
+        backend = types.ModuleType("tauri_app.audio_manager")
+        backend.AudioManager = mocker.MagicMock(side_effect=OSError("PortAudio library not found"))
+        mocker.patch.dict(sys.modules, {"tauri_app.audio_manager": backend})
+
+        assert db.get_audio_manager() is None
+        assert db.get_audio_manager() is None
+        backend.AudioManager.assert_called_once()
+        log.assert_called_once_with("warning", "Failed to initialize audio manager: PortAudio library not found")
+
+
+class TestConnectionProvider:
+    """Tests for the shared thread-local connection provider."""
+
+    def test_connection_uses_wal_and_foreign_keys(self, temp_db: str):
+        """Test that pooled connections are opened with the tuned PRAGMAs."""
+        with db.get_connection(temp_db) as conn:
+            cur = conn.cursor()
+            cur.execute("PRAGMA journal_mode")
+            assert cur.fetchone()[0].lower() == "wal"
+            cur.execute("PRAGMA foreign_keys")
+            assert cur.fetchone()[0] == 1
+
+    def test_connection_reused_within_thread(self, temp_db: str):
+        """Test that the same thread gets the same connection back."""
+        with db.get_connection(temp_db) as first:
+            with db.get_connection(temp_db) as nested:
+                assert nested is first
+
+        with db.get_connection(temp_db) as again:
+            assert again is first
+
+    def test_connection_per_thread(self, temp_db: str):
+        """Test that different threads get their own connection."""
+        import threading
+
+        connections = []
+
+        def worker():
+            with db.get_connection(temp_db) as conn:
+                connections.append(conn)
+            db.close_connections(temp_db)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        with db.get_connection(temp_db) as conn:
+            assert connections[0] is not conn
+
+    def test_uncommitted_work_rolled_back(self, temp_db: str):
+        """Test that uncommitted writes do not leak past the outermost block."""
+        with db.get_connection(temp_db) as conn:
+            conn.execute("INSERT INTO courses (name) VALUES ('Uncommitted')")
+
+        with db.get_connection(temp_db) as conn:
+            count = conn.execute(
+                "SELECT COUNT(*) FROM courses WHERE name = 'Uncommitted'"
+            ).fetchone()[0]
+            assert count == 0
+
+    def test_row_factory_restored(self, temp_db: str):
+        """Test that a per-block row factory does not leak to later users."""
+        with db.get_connection(temp_db, row_factory=sqlite3.Row) as conn:
+            row = conn.execute("SELECT 1 AS one").fetchone()
+            assert row["one"] == 1
+
+        with db.get_connection(temp_db) as conn:
+            row = conn.execute("SELECT 1 AS one").fetchone()
+            assert isinstance(row, tuple)
+
+    def test_close_connections(self, temp_db: str):
+        """Test that closing drops the cached connection."""
+        with db.get_connection(temp_db) as first:
+            pass
+
+        db.close_connections(temp_db)
+
+        with db.get_connection(temp_db) as second:
+            assert second is not first
+
+
+class TestSchemaMigrations:
+    """Tests for the versioned schema migrations."""
+
+    @pytest.fixture
+    def empty_db(self):
+        """Create an empty database file and clean up pooled connections."""
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        yield path
+        db.close_connections(path)
+        Path(path).unlink(missing_ok=True)
+
+    def test_fresh_database_migrated_to_latest(self, empty_db: str):
+        """Test that init_db brings an empty database to the latest version."""
+        db.init_db(empty_db)
+
+        with db.get_connection(empty_db) as conn:
+            assert migrations.get_schema_version(conn) == migrations.SCHEMA_VERSION
+            tables = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table'"
+            )}
+            indexes = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='index'"
+            )}
+
+        for table in ("settings", "courses", "schedule", "sync_history",
+                      "course_sessions", "statistics_cache", "schema_version"):
+            assert table in tables
+        for index in ("idx_schedule_day_start", "idx_schedule_course",
+                      "idx_sessions_course_entry_date", "idx_sync_history_timestamp"):
+            assert index in indexes
+
+    def test_up_to_date_database_skips_ddl(self, empty_db: str):
+        """Test that migrate() is a no-op once the schema is current."""
+        db.init_db(empty_db)
+
+        with db.get_connection(empty_db) as conn:
+            conn.execute("DROP INDEX idx_schedule_course")
+            conn.commit()
+
+            assert migrations.migrate(conn) == migrations.SCHEMA_VERSION
+            index = conn.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'idx_schedule_course'"
+            ).fetchone()
+            assert index is None, "Current schema must not re-run migrations"
+
+    def test_legacy_database_upgraded_in_place(self, temp_db: str):
+        """Test that a pre-migration database keeps its data when upgraded."""
+        # temp_db is created by hand without schema_version
+        raw = sqlite3.connect(temp_db)
+        raw.execute("INSERT INTO courses (name) VALUES ('Legacy')")
+        raw.commit()
+        raw.close()
+
+        with db.get_connection(temp_db) as conn:
+            assert migrations.get_schema_version(conn) == migrations.SCHEMA_VERSION
+            name = conn.execute("SELECT name FROM courses").fetchone()[0]
+            assert name == "Legacy"
+
+    def test_weeks_mask_backfilled_from_json(self, temp_db: str):
+        """Test that existing JSON weeks are converted to a bitmask."""
+        raw = sqlite3.connect(temp_db)
+        raw.execute("INSERT INTO courses (id, name) VALUES (1, 'Legacy')")
+        raw.executemany(
+            "INSERT INTO schedule (course_id, day_of_week, start_time, end_time, weeks) "
+            "VALUES (1, 1, '08:00', '09:00', ?)",
+            [("[1, 3]",), (None,), ("not json",), ("[2, 99]",)]
+        )
+        raw.commit()
+        raw.close()
+
+        with db.get_connection(temp_db) as conn:
+            masks = [row[0] for row in conn.execute(
+                "SELECT weeks_mask FROM schedule ORDER BY id"
+            )]
+        assert masks == [0b101, 0, 0, 0b10]
+
+    def test_minute_columns_backfilled_and_maintained(self, temp_db: str):
+        """Test that start_min/end_min follow the HH:MM text columns."""
+        raw = sqlite3.connect(temp_db)
+        raw.execute("INSERT INTO courses (id, name) VALUES (1, 'Legacy')")
+        raw.executemany(
+            "INSERT INTO schedule (course_id, day_of_week, start_time, end_time) VALUES (1, 1, ?, ?)",
+            [("08:00", "09:40"), ("9:05", "10:00"), ("bad", "25:00")]
+        )
+        raw.commit()
+        raw.close()
+
+        with db.get_connection(temp_db) as conn:
+            backfilled = conn.execute("SELECT start_min, end_min FROM schedule ORDER BY id").fetchall()
+            conn.execute(
+                "INSERT INTO schedule (course_id, day_of_week, start_time, end_time) "
+                "VALUES (1, 2, '13:30', '15:00')"
+            )
+            conn.execute("UPDATE schedule SET start_time = '7:45' WHERE id = 1")
+            conn.commit()
+            maintained = conn.execute(
+                "SELECT start_min, end_min FROM schedule WHERE id IN (1, 4) ORDER BY id"
+            ).fetchall()
+
+        assert backfilled == [(480, 580), (545, 600), (None, None)]
+        assert maintained == [(465, 580), (810, 900)]
+
+    def test_occurrence_calendar_maintained(self, temp_db: str):
+        """Test that schedule_occurrences follows schedule and semester settings."""
+        with db.get_connection(temp_db) as conn:
+            conn.execute("INSERT INTO courses (id, name) VALUES (1, 'Math')")
+            conn.execute(
+                "INSERT INTO schedule (id, course_id, day_of_week, start_time, end_time, weeks) "
+                "VALUES (1, 1, 1, '9:00', '10:30', '[1, 3]')"
+            )
+            conn.commit()
+            assert conn.execute("SELECT COUNT(*) FROM schedule_occurrences").fetchone()[0] == 0
+
+            # Semester starting on a Wednesday: week 1 ends the following Tuesday
+            conn.execute("UPDATE settings SET value = '2025-09-03' WHERE key = 'semester_start_date'")
+            conn.commit()
+            rows = conn.execute("SELECT * FROM schedule_occurrences ORDER BY date").fetchall()
+            assert [tuple(row) for row in rows] == [
+                ("2025-09-08", 1, 1, 540, 630), ("2025-09-22", 1, 3, 540, 630)
+            ]
+
+            conn.execute("UPDATE schedule SET weeks = NULL, start_time = '8:00' WHERE id = 1")
+            conn.execute("UPDATE settings SET value = '4' WHERE key = 'total_weeks'")
+            conn.commit()
+            rows = conn.execute("SELECT date, start_min FROM schedule_occurrences ORDER BY date").fetchall()
+            assert [tuple(row) for row in rows] == [
+                ("2025-09-08", 480), ("2025-09-15", 480), ("2025-09-22", 480), ("2025-09-29", 480)
+            ]
+
+            conn.execute("DELETE FROM schedule WHERE id = 1")
+            conn.commit()
+            assert conn.execute("SELECT COUNT(*) FROM schedule_occurrences").fetchone()[0] == 0
+
+    def test_attendance_rollups_backfilled(self, temp_db: str):
+        """Test that existing sessions are rolled up when the rollups are created."""
+        raw = sqlite3.connect(temp_db)
+        migrations._v1_baseline_tables(raw.cursor())  # pre-rollup schema incl. course_sessions
+        raw.execute("INSERT INTO courses (id, name) VALUES (1, 'Legacy')")
+        raw.execute(
+            "INSERT INTO schedule (id, course_id, day_of_week, start_time, end_time) "
+            "VALUES (1, 1, 1, '08:00', '09:00')"
+        )
+        raw.executemany(
+            "INSERT INTO course_sessions (course_id, schedule_entry_id, date, start_time, end_time, attended) "
+            "VALUES (1, 1, ?, '08:00', '09:00', ?)",
+            [("2025-03-03", 1), ("2025-03-03", 0), ("2025-03-10", 1)]
+        )
+        raw.commit()
+        raw.close()
+
+        with db.get_connection(temp_db) as conn:
+            daily = conn.execute(
+                "SELECT date, total_sessions, attended_sessions FROM attendance_daily ORDER BY date"
+            ).fetchall()
+            totals = conn.execute(
+                "SELECT total_sessions, attended_sessions FROM attendance_course_totals"
+            ).fetchall()
+        assert daily == [("2025-03-03", 2, 1), ("2025-03-10", 1, 1)]
+        assert totals == [(3, 2)]
+
+    def test_query_plan_uses_day_index(self, temp_db: str):
+        """Test that per-day schedule lookups are served by an index."""
+        with db.get_connection(temp_db) as conn:
+            plan = " ".join(
+                str(row[-1]) for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT * FROM schedule "
+                    "WHERE day_of_week = 1 ORDER BY start_time"
+                )
+            )
+        assert "idx_schedule_day_start" in plan
+
+    def test_query_plan_uses_minute_index(self, temp_db: str):
+        """Test that integer overlap lookups are served by the minute index."""
+        with db.get_connection(temp_db) as conn:
+            plan = " ".join(
+                str(row[-1]) for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT id FROM schedule "
+                    "WHERE day_of_week = 1 AND start_min < 600 AND end_min > 540"
+                )
+            )
+        assert "idx_schedule_day_start_min" in plan
@@ -251,6 +251,47 @@ class TestConvenienceEmitMethods:
 
         mock_emit.assert_called_once_with("schedule_deleted", {"id": 1})
 
+    def test_emit_schedule_bulk_added(self, mocker):
+        """Test emit_schedule_bulk_added convenience method."""
+        mock_emit = mocker.patch.object(EventHandler, "emit_schedule_update")
+        handler = EventHandler()
+
+        handler.emit_schedule_bulk_added([1, 2], [10])
+
+        mock_emit.assert_called_once_with(
+            "schedule_bulk_added",
+            {
+                "course_ids": [1, 2],
+                "entry_ids": [10],
+                "deleted_course_ids": [],
+                "courses_added": 2,
+                "entries_added": 1,
+                "courses_deleted": 0
+            }
+        )
+
+    def test_emit_schedule_bulk_added_with_deletions(self, mocker):
+        """Test that a replacing write reports the deleted courses in the same event."""
+        mock_emit = mocker.patch.object(EventHandler, "emit_schedule_update")
+        handler = EventHandler()
+
+        handler.emit_schedule_bulk_added([3], [10, 11], [1, 2])
+
+        payload = mock_emit.call_args[0][1]
+        assert payload["deleted_course_ids"] == [1, 2]
+        assert payload["courses_deleted"] == 2
+        assert mock_emit.call_count == 1
+
+    def test_emit_schedule_sync_applied(self, mocker):
+        """Test emit_schedule_sync_applied convenience method."""
+        mock_emit = mocker.patch.object(EventHandler, "emit_schedule_update")
+        handler = EventHandler()
+
+        stats = {"courses_inserted": 1, "entries_updated": 2}
+        handler.emit_schedule_sync_applied(stats)
+
+        mock_emit.assert_called_once_with("schedule_sync_applied", stats)
+
 
 class TestEmitSettingsBatchUpdate:
     """Test emit_settings_batch_updated functionality."""
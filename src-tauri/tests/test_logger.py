@@ -0,0 +1,246 @@
+"""
+Unit tests for the logging wrapper (logger.py).
+"""
+import threading
+import time
+
+import pytest
+
+from tauri_app import logger as _logger
+
+
+@pytest.fixture
+def records():
+    """Capture records at every level through an extra sink."""
+    captured = []
+    handler_id = _logger.add_sink(lambda msg: captured.append(msg.record), level="DEBUG")
+    yield captured
+    _logger.remove_sink(handler_id)
+
+
+def log_from_caller():
+    _logger.log_message("info", "from caller")
+
+
+class TestLogMessage:
+    """Tests for log_message()."""
+
+    def test_reports_original_caller(self, records):
+        """Test that the caller, not the wrapper, is reported."""
+        log_from_caller()
+
+        assert records[-1]["function"] == "log_from_caller"
+        assert records[-1]["name"] == __name__
+
+    def test_filtered_levels_skip_frame_lookup(self, records, monkeypatch, mocker):
+        """Test that suppressed levels return before inspecting frames or building messages."""
+        monkeypatch.setattr(_logger, "_min_level_no", 20)
+        depth = mocker.spy(_logger, "_caller_depth")
+        build = mocker.Mock(return_value="expensive")
+
+        _logger.log_message("debug", build)
+        _logger.log_message("debug", "value {}", object())
+
+        assert records == []
+        depth.assert_not_called()
+        build.assert_not_called()
+        assert not _logger.is_enabled("debug")
+        assert _logger.is_enabled("warning")
+
+    def test_lazy_messages(self, records):
+        """Test that callables and format arguments are rendered for enabled levels."""
+        _logger.log_message("debug", lambda: "built")
+        _logger.log_message("info", "{} of {}", 1, 2)
+        _logger.log_message("info", "literal {braces} without args")
+
+        assert [r["message"] for r in records] == ["built", "1 of 2", "literal {braces} without args"]
+
+    def test_min_level_follows_sinks(self):
+        """Test that removing the most verbose sink raises the filtering threshold."""
+        before = _logger._min_level_no
+        handler_id = _logger.add_sink(lambda msg: None, level="TRACE")
+        assert _logger._min_level_no == 5
+
+        _logger.remove_sink(handler_id)
+        assert _logger._min_level_no == before
+
+
+class _Message(str):
+    """Stand-in for loguru's formatted message (a str with a ``record``)."""
+
+
+class _Level:
+    def __init__(self, no):
+        self.no = no
+
+
+def message(text, level_no=10, line=1):
+    msg = _Message(f"{text}\n")
+    msg.record = {"level": _Level(level_no), "name": "test", "function": "f",
+                  "line": line, "message": text}
+    return msg
+
+
+class TestQueuedSink:
+    """Tests for QueuedSink."""
+
+    def test_batches_written_by_background_thread(self):
+        """Test that records are written in order on the writer thread."""
+        written, threads = [], []
+
+        def write(text):
+            written.append(text)
+            threads.append(threading.get_ident())
+
+        sink = _logger.QueuedSink(write, flush_interval=0.01)
+        for i in range(5):
+            sink(message(f"line {i}", line=i))
+        sink.close()
+
+        assert written == [f"line {i}\n" for i in range(5)]
+        assert set(threads) == {sink._thread.ident}
+
+    def test_coalesces_repeated_debug_records(self):
+        """Test that a flood of identical debug records becomes one line."""
+        written = []
+        sink = _logger.QueuedSink(written.append, flush_interval=5)
+
+        for _ in range(100):
+            sink(message("poll"))
+        sink(message("warn", level_no=30))
+        sink(message("warn", level_no=30))
+        sink.close()
+
+        assert written == ["poll (repeated 99 more times)\n", "warn\n", "warn\n"]
+        assert sink.coalesced == 99
+
+    def test_full_queue_drops_without_blocking(self):
+        """Test that a full queue drops debug records and keeps newer errors."""
+        written = []
+        gate = threading.Event()
+
+        def write(text):
+            gate.wait(5)
+            written.append(text)
+
+        sink = _logger.QueuedSink(write, maxsize=3, batch_size=3, flush_interval=0.01, policy="drop")
+        sink(message("first"))
+        time.sleep(0.1)  # the writer is now blocked on "first"
+
+        start = time.monotonic()
+        for i in range(5):
+            sink(message("debug", line=i))
+        sink(message("error", level_no=40))
+        assert time.monotonic() - start < 0.5
+
+        assert sink.dropped == 3
+
+        gate.set()
+        sink.close()
+
+        assert written[0] == "first\n"
+        assert written[1:4] == ["debug\n", "debug\n", "error\n"]
+        assert "Dropped 3 log records" in written[-1]
+
+
+class TestRotatingFileWriter:
+    """Tests for RotatingFileWriter."""
+
+    def test_rotates_by_size(self, tmp_path):
+        """Test that the file is moved aside once it reaches max_bytes."""
+        writer = _logger.RotatingFileWriter(tmp_path / "app.log", max_bytes=10)
+        writer.write("0123456789\n")
+        writer.write("next\n")
+        writer.close()
+
+        rotated = list(tmp_path.glob("app.*.log"))
+        assert len(rotated) == 1
+        assert rotated[0].read_text(encoding="utf-8") == "0123456789\n"
+        assert (tmp_path / "app.log").read_text(encoding="utf-8") == "next\n"
+
+
+def log_line(second, level, module, message):
+    return (f"2025-10-07 10:00:{second:02d}.000 | {level: <8} | "
+            f"{module}:func:{second} - {message}\n")
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """Point the log file at a temporary directory with one rotated file."""
+    monkeypatch.setattr(_logger, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(_logger, "LOG_FILE", tmp_path / "app.log")
+    monkeypatch.setattr(_logger, "INDEX_BLOCK_ENTRIES", 4)
+    monkeypatch.setattr(_logger, "TAIL_BLOCK_SIZE", 64)
+    monkeypatch.setattr(_logger, "_log_index", {})
+
+    modules = ["tauri_app.db", "tauri_app.sync_client"]
+    levels = ["DEBUG", "INFO", "WARNING", "ERROR"]
+    with open(tmp_path / "app.2025-10-07_09-59-59.log", "w", encoding="utf-8") as f:
+        for i in range(10):
+            f.write(log_line(i, levels[i % 4], modules[i % 2], f"old {i}"))
+    with open(tmp_path / "app.log", "w", encoding="utf-8") as f:
+        for i in range(10, 20):
+            f.write(log_line(i, levels[i % 4], modules[i % 2], f"new {i}"))
+        f.write("Traceback (most recent call last):\n  boom\n")
+    return tmp_path
+
+
+class TestTailLogs:
+    """Tests for tail_logs()."""
+
+    def test_reads_the_last_lines(self, log_dir):
+        """Test that the last lines come back in file order."""
+        lines = _logger.tail_logs(3)
+
+        assert lines[0].endswith("new 19")
+        assert lines[1:] == ["Traceback (most recent call last):", "  boom"]
+
+    def test_spans_rotated_files(self, log_dir):
+        """Test that older lines are taken from the rotated file."""
+        lines = _logger.tail_logs(15)
+
+        assert len(lines) == 15
+        assert lines[0].endswith("old 7")
+        assert lines[-1] == "  boom"
+        assert len(_logger.tail_logs(1000)) == 22
+
+
+class TestQueryLogs:
+    """Tests for query_logs()."""
+
+    def test_filters_and_newest_first(self, log_dir):
+        """Test level, module and substring filters across files."""
+        result = _logger.query_logs(level="warning", module="tauri_app.db")
+
+        assert [e["message"] for e in result["entries"]] == ["new 18", "new 14", "new 10", "old 6", "old 2"]
+        assert result["has_more"] is False
+
+        result = _logger.query_logs(contains="BOOM")
+        assert result["entries"][0]["message"].endswith("  boom")
+        assert result["entries"][0]["line"] == 19
+
+    def test_time_range_and_pagination(self, log_dir):
+        """Test the time range filter and offset/limit paging."""
+        page = _logger.query_logs(start="2025-10-07T10:00:05", end="2025-10-07 10:00:12",
+                                  offset=2, limit=3)
+
+        assert [e["message"] for e in page["entries"]] == ["new 10", "old 9", "old 8"]
+        assert page["has_more"] is True
+
+        last = _logger.query_logs(start="2025-10-07T10:00:05", end="2025-10-07 10:00:12",
+                                  offset=6, limit=3)
+        assert [e["message"] for e in last["entries"]] == ["old 6", "old 5"]
+        assert last["has_more"] is False
+
+    def test_index_skips_blocks_and_follows_appends(self, log_dir, mocker):
+        """Test that non-matching blocks are not read and appended lines are found."""
+        read = mocker.spy(_logger, "_read_entries")
+        _logger.query_logs(start="2025-10-07 10:00:16")
+        # Of six blocks only app.log's entries 14-17 and 18-19 can match
+        assert read.call_count == 2
+
+        with open(log_dir / "app.log", "a", encoding="utf-8") as f:
+            f.write(log_line(30, "ERROR", "tauri_app.db", "appended"))
+
+        result = _logger.query_logs(level="ERROR", limit=1)
+        assert result["entries"][0]["message"] == "appended"
@@ -0,0 +1,120 @@
+"""
+Unit tests for the metrics registry (metrics.py).
+"""
+import pytest
+
+from tauri_app import metrics
+from tauri_app.schedule_manager import ScheduleManager
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    """Start every test disabled with empty values."""
+    metrics.set_enabled(False)
+    metrics.reset()
+    yield
+    metrics.set_enabled(False)
+    metrics.reset()
+
+
+def samples(name):
+    return metrics.snapshot()[name]["samples"]
+
+
+class TestRegistry:
+    """Tests for counters, gauges, histograms and rendering."""
+
+    def test_disabled_metrics_record_nothing(self):
+        """Test that updates are ignored while metrics are disabled."""
+        metrics.CAMERA_FRAMES.inc(0)
+        metrics.COMMAND_DURATION.observe(0.1, "greet")
+
+        assert samples("classtop_camera_frames_total") == []
+        assert samples("classtop_command_duration_seconds") == []
+
+    def test_counter_and_histogram(self):
+        """Test counting, bucketing and the JSON snapshot."""
+        metrics.set_enabled(True)
+        metrics.CAMERA_FRAMES.inc(0)
+        metrics.CAMERA_FRAMES.inc(0, amount=2)
+        metrics.COMMAND_DURATION.observe(0.002, "greet")
+        metrics.COMMAND_DURATION.observe(3.0, "greet")
+
+        assert samples("classtop_camera_frames_total") == [{"labels": {"camera": "0"}, "value": 3.0}]
+        histogram = samples("classtop_command_duration_seconds")[0]
+        assert histogram["count"] == 2
+        assert histogram["sum"] == pytest.approx(3.002)
+        assert histogram["buckets"]["0.001"] == 0
+        assert histogram["buckets"]["0.0025"] == 1
+        assert histogram["buckets"]["+Inf"] == 2
+
+    def test_prometheus_text(self):
+        """Test the text exposition format."""
+        metrics.set_enabled(True)
+        metrics.EVENTS_EMITTED.inc("course-reminder")
+        metrics.SYNC_REQUEST_DURATION.observe(0.3, "sync", "ok")
+
+        text = metrics.render()
+
+        assert "# TYPE classtop_events_emitted_total counter" in text
+        assert 'classtop_events_emitted_total{event="course-reminder"} 1' in text
+        assert 'classtop_sync_request_duration_seconds_bucket{operation="sync",outcome="ok",le="0.25"} 0' in text
+        assert 'classtop_sync_request_duration_seconds_bucket{operation="sync",outcome="ok",le="0.5"} 1' in text
+        assert 'classtop_sync_request_duration_seconds_count{operation="sync",outcome="ok"} 1' in text
+        assert text.endswith("\n")
+
+    def test_name_conflicts_are_rejected(self):
+        """Test that a name cannot be registered with two metric types."""
+        with pytest.raises(ValueError):
+            metrics.REGISTRY.gauge("classtop_camera_frames_total", "frames")
+
+
+class TestInstrumentation:
+    """Tests for manager and command instrumentation."""
+
+    def test_managers_unwrapped_while_disabled(self):
+        """Test that instrumented classes run their original methods when disabled."""
+        assert not hasattr(ScheduleManager.get_courses, "__metrics_original__")
+
+        metrics.set_enabled(True)
+        assert hasattr(ScheduleManager.get_courses, "__metrics_original__")
+        # Private helpers are never wrapped
+        assert not hasattr(ScheduleManager._has_time_conflict, "__metrics_original__")
+
+        metrics.set_enabled(False)
+        assert not hasattr(ScheduleManager.get_courses, "__metrics_original__")
+
+    def test_manager_method_latency(self, initialized_schedule_manager):
+        """Test that manager calls are timed per component and method."""
+        metrics.set_enabled(True)
+        initialized_schedule_manager.add_course("Math")
+        initialized_schedule_manager.get_courses()
+
+        recorded = {
+            (s["labels"]["component"], s["labels"]["method"]): s["count"]
+            for s in samples("classtop_method_duration_seconds")
+        }
+        assert recorded[("schedule_manager", "add_course")] == 1
+        assert recorded[("schedule_manager", "get_courses")] == 1
+
+    async def test_command_latency_and_errors(self):
+        """Test that wrapped command handlers record latency and failures."""
+        @metrics.instrument_command
+        async def failing_command(body=None):
+            raise RuntimeError("boom")
+
+        @metrics.instrument_command
+        async def ok_command(body=None):
+            return body
+
+        assert await ok_command("x") == "x"
+        metrics.set_enabled(True)
+        assert await ok_command("y") == "y"
+        with pytest.raises(RuntimeError):
+            await failing_command()
+
+        durations = {s["labels"]["command"]: s["count"] for s in samples("classtop_command_duration_seconds")}
+        assert durations == {"ok_command": 1, "failing_command": 1}
+        assert samples("classtop_command_errors_total") == [
+            {"labels": {"command": "failing_command"}, "value": 1.0}
+        ]
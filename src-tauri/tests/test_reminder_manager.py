@@ -0,0 +1,143 @@
+"""
+Unit tests for ReminderManager (reminder_manager.py).
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from tauri_app.reminder_manager import ReminderManager
+
+
+@pytest.fixture
+def reminders(week_one_timetable, initialized_settings_manager, mocker):
+    """A ReminderManager over a Monday 09:00 and a Tuesday 14:00 class."""
+    settings = initialized_settings_manager
+    settings.set_setting("reminder_enabled", "true")
+    settings.set_setting("reminder_minutes", "10")
+    schedule = week_one_timetable((1, "9:00", "10:00"), (2, "14:00", "15:00", [1]))
+
+    manager = ReminderManager(schedule, settings)
+    manager._send_notification = mocker.AsyncMock()
+    return manager
+
+
+class TestReminderQueue:
+    """Tests for the reminder timer queue."""
+
+    def test_queue_holds_upcoming_fire_times(self, reminders, at):
+        """Test that fire times are computed from the timeline, earliest first."""
+        reminders._rebuild_queue(at(8, 0))
+
+        fire_times = sorted(datetime.fromtimestamp(item[0]) for item in reminders._queue)
+        # Monday 9:00 and Tuesday 14:00 this week, Monday 9:00 next week
+        assert fire_times == [at(8, 50), at(13, 50, day=1), at(8, 50, day=7)]
+        assert datetime.fromtimestamp(reminders._queue[0][0]) == at(8, 50)
+        assert reminders._seconds_until_next(at(8, 45).timestamp()) == 300
+
+    async def test_fire_due_sends_once(self, reminders, at):
+        """Test that due reminders are sent once with the minutes left."""
+        reminders._rebuild_queue(at(8, 0))
+
+        await reminders._fire_due(at(8, 52).timestamp())
+        await reminders._fire_due(at(8, 53).timestamp())
+
+        reminders._send_notification.assert_awaited_once()
+        class_info, minutes = reminders._send_notification.await_args.args
+        assert (class_info["start_time"], minutes) == ("9:00", 8)
+
+        # A recompute does not queue the sent reminder again
+        reminders._rebuild_queue(at(8, 54))
+        assert len(reminders._queue) == 2
+        assert not any(item[2] in reminders.sent_reminders for item in reminders._queue)
+
+    async def test_catch_up_after_resume(self, reminders, at):
+        """Test that a rebuild after sleeping sends reminders whose class has not started."""
+        reminders._rebuild_queue(at(8, 0))
+
+        # Resumed on Tuesday at 13:55: Monday's class is gone, Tuesday's reminder is overdue
+        reminders._rebuild_queue(at(13, 55, day=1))
+        await reminders._fire_due(at(13, 55, day=1).timestamp())
+
+        class_info, minutes = reminders._send_notification.await_args.args
+        assert (class_info["start_time"], minutes) == ("14:00", 5)
+
+    async def test_started_classes_are_skipped(self, reminders, at):
+        """Test that a reminder popped after its class started is dropped."""
+        reminders._rebuild_queue(at(8, 0))
+
+        await reminders._fire_due(at(9, 1).timestamp())
+
+        reminders._send_notification.assert_not_awaited()
+
+    def test_semester_starting_midweek(
+        self, initialized_schedule_manager, initialized_settings_manager, sample_course, at
+    ):
+        """Test that next week's reminders use the semester weeks of a non-Monday start."""
+        schedule, settings = initialized_schedule_manager, initialized_settings_manager
+        settings.update_multiple({"reminder_enabled": "true", "reminder_minutes": "10",
+                                  "semester_start_date": "2025-09-03"})  # a Wednesday
+        course_id = schedule.add_course(**sample_course)
+        schedule.add_schedule_entry(course_id, 3, "9:00", "10:00", [1])
+        schedule.add_schedule_entry(course_id, 3, "10:00", "11:00", [2])
+        manager = ReminderManager(schedule, settings)
+
+        # Monday 2025-09-08 is in week 1; week 2 begins on Wednesday 2025-09-10
+        manager._rebuild_queue(at(8, 0, day=7))
+
+        assert [datetime.fromtimestamp(item[1]) for item in manager._queue] == [at(10, 0, day=9)]
+        assert datetime.fromtimestamp(manager._horizon) == at(0, 0, day=9)
+
+    def test_disabled_reminders_empty_queue(self, reminders, at):
+        """Test that disabling reminders leaves nothing to wait for."""
+        reminders.settings_manager.set_setting("reminder_enabled", "false")
+        reminders._rebuild_queue(at(8, 0))
+
+        assert reminders._queue == []
+
+    def test_changes_request_recompute(self, reminders):
+        """Test that schedule and relevant setting writes mark the queue dirty."""
+        schedule, settings = reminders.schedule_manager, reminders.settings_manager
+        schedule.add_listener(reminders._on_schedule_changed)
+        settings.add_listener(reminders._on_settings_changed)
+
+        reminders._dirty = False
+        settings.set_setting("theme_color", "#000000")
+        assert reminders._dirty is False
+
+        settings.set_setting("reminder_minutes", "5")
+        assert reminders._dirty is True
+
+        reminders._dirty = False
+        course_id = schedule.get_courses()[0]["id"]
+        schedule.add_schedule_entry(course_id, 3, "8:00", "9:00")
+        assert reminders._dirty is True
+
+
+class TestReminderLoop:
+    """Tests for the background loop."""
+
+    async def test_listener_wakes_sleeping_loop(self, reminders, mocker):
+        """Test that a schedule change wakes the loop without waiting for a timeout."""
+        rebuild = mocker.spy(reminders, "_rebuild_queue")
+        reminders._running = True
+        task = asyncio.create_task(reminders._reminder_loop())
+
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if rebuild.call_count:
+                break
+        assert rebuild.call_count == 1
+
+        course_id = reminders.schedule_manager.get_courses()[0]["id"]
+        reminders.schedule_manager.add_schedule_entry(course_id, 4, "8:00", "9:00")
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if rebuild.call_count == 2:
+                break
+        assert rebuild.call_count == 2
+
+        reminders._running = False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert reminders._on_schedule_changed not in reminders.schedule_manager.timetable._listeners
@@ -4,7 +4,7 @@ Unit tests for ScheduleManager (schedule_manager.py).
 import json
 import pytest
 
-from tauri_app.schedule_manager import ScheduleManager
+from tauri_app.schedule_manager import IntervalIndex, ScheduleManager, Timeline, sweep_conflicts
 
 
 class TestCourseManagement:
@@ -180,6 +180,39 @@ class TestScheduleManagement:
         week_schedule = manager.get_schedule_for_week(1)
         assert len(week_schedule) == 5
 
+    def test_get_schedule_for_days(self, initialized_schedule_manager, sample_course):
+        """Test fetching several days at once, grouped by day."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        manager.add_schedule_entry(course_id, 1, "14:00", "15:30", [1])
+        manager.add_schedule_entry(course_id, 1, "09:00", "10:30", [2])
+        manager.add_schedule_entry(course_id, 3, "09:00", "10:30")
+
+        by_day = manager.get_schedule_for_days([1, 3, 5], weeks=[1, 2])
+        assert set(by_day.keys()) == {1, 3, 5}
+        assert [entry["start_time"] for entry in by_day[1]] == ["09:00", "14:00"]
+        assert len(by_day[3]) == 1
+        assert by_day[5] == []
+
+        by_day = manager.get_schedule_for_days([1], weeks=[2])
+        assert [entry["start_time"] for entry in by_day[1]] == ["09:00"]
+
+    def test_get_schedule_for_week_single_query(
+        self, initialized_schedule_manager, sample_course, count_selects
+    ):
+        """Test that a whole week is fetched with one SELECT."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        for day in range(1, 8):
+            manager.add_schedule_entry(course_id, day, "09:00", "10:30", [1])
+
+        week_schedule, selects = count_selects(manager, manager.get_schedule_for_week, 1)
+
+        assert [entry["day_of_week"] for entry in week_schedule] == list(range(1, 8))
+        assert len(selects) == 1
+
     def test_delete_schedule_entry(
         self, initialized_schedule_manager, mock_event_handler, sample_course
     ):
@@ -202,6 +235,182 @@ class TestScheduleManagement:
         mock_event_handler.emit_schedule_deleted.assert_called_once()
 
 
+class TestWeekFiltering:
+    """Tests for week bitmask storage and filtering."""
+
+    def test_week_filter_is_exact(self, initialized_schedule_manager, sample_course):
+        """Test that week 1 does not match entries that only run in weeks 10-19."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        manager.add_schedule_entry(course_id, 1, "09:00", "10:30", list(range(10, 20)))
+        manager.add_schedule_entry(course_id, 1, "14:00", "15:30", [1, 2])
+        manager.add_schedule_entry(course_id, 1, "16:00", "17:30")  # every week
+
+        week_one = manager.get_schedule_by_day(1, week=1)
+        assert [entry["start_time"] for entry in week_one] == ["14:00", "16:00"]
+
+        week_ten = manager.get_schedule(week=10)
+        assert [entry["start_time"] for entry in week_ten] == ["09:00", "16:00"]
+        assert week_ten[0]["weeks"] == list(range(10, 20))
+        assert week_ten[1]["weeks"] == []
+
+    def test_invalid_week_rejected(self, initialized_schedule_manager, sample_course):
+        """Test that weeks outside the supported range are rejected."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        assert manager.add_schedule_entry(course_id, 1, "09:00", "10:30", [0]) == -1
+        assert manager.add_schedule_entry(course_id, 1, "09:00", "10:30", [64]) == -1
+
+    def test_conflicts_use_week_overlap(self, initialized_schedule_manager, sample_course):
+        """Test that conflicts require both time and week overlap."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        manager.add_schedule_entry(course_id, 1, "09:00", "10:30", [1, 2, 3])
+
+        assert manager.check_conflicts(1, "10:00", "11:00", [4, 5]) == []
+        assert manager.check_conflicts(1, "10:30", "11:00", [1]) == []
+
+        conflicts = manager.check_conflicts(1, "10:00", "11:00", [3, 2, 9])
+        assert len(conflicts) == 1
+        assert conflicts[0]["conflict_weeks"] == [2, 3]
+
+        conflicts = manager.check_conflicts(1, "10:00", "11:00")
+        assert conflicts[0]["conflict_weeks"] == [1, 2, 3]
+
+    def test_conflicts_compare_times_numerically(self, initialized_schedule_manager, sample_course):
+        """Test that unpadded times like "9:00" are compared as times, not strings."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        entry_id = manager.add_schedule_entry(course_id, 1, "9:00", "9:45")
+
+        conflicts = manager.check_conflicts(1, "9:30", "10:15")
+        assert [c["id"] for c in conflicts] == [entry_id]
+        assert conflicts[0]["conflict_weeks"] == [1]
+        assert manager.check_conflicts(1, "10:00", "11:00") == []
+        assert manager.check_conflicts(1, "9:30", "10:15", exclude_entry_id=entry_id) == []
+
+    def test_conflicts_follow_index_updates(self, initialized_schedule_manager, sample_course):
+        """Test that single-entry checks see entries added and deleted since the index was built."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        assert manager.check_conflicts(2, "08:00", "09:00") == []
+
+        entry_id = manager.add_schedule_entry(course_id, 2, "08:30", "09:30")
+        assert len(manager.check_conflicts(2, "08:00", "09:00")) == 1
+
+        manager.delete_schedule_entry(entry_id)
+        assert manager.check_conflicts(2, "08:00", "09:00") == []
+
+    def test_weeks_mask_follows_raw_writes(self, initialized_schedule_manager, sample_course):
+        """Test that rows written with raw SQL get a consistent weeks_mask."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        with manager.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO schedule (course_id, day_of_week, start_time, end_time, weeks) "
+                "VALUES (?, 3, '08:00', '09:00', ?)",
+                (course_id, json.dumps([2, 4]))
+            )
+            conn.commit()
+        manager.timetable.invalidate()  # raw writes bypass the index
+
+        assert len(manager.get_schedule_by_day(3, week=4)) == 1
+        assert manager.get_schedule_by_day(3, week=3) == []
+
+        with manager.get_connection() as conn:
+            conn.execute("UPDATE schedule SET weeks = '[3]' WHERE day_of_week = 3")
+            conn.commit()
+        manager.timetable.invalidate()
+
+        assert len(manager.get_schedule_by_day(3, week=3)) == 1
+
+
+class TestTimetableIndex:
+    """Tests for the in-memory timetable index."""
+
+    def test_days_sorted_by_minute(self, initialized_schedule_manager, sample_course):
+        """Test that unpadded times sort by time of day, both when patched and when loaded."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        manager.add_schedule_entry(course_id, 1, "10:00", "10:45")
+        manager.get_schedule_by_day(1)  # load the index, then patch it
+        manager.add_schedule_entry(course_id, 1, "9:00", "9:45")
+
+        patched = manager.get_schedule_by_day(1)
+        manager.timetable.invalidate()
+        loaded = manager.get_schedule_by_day(1)
+
+        for classes in (patched, loaded):
+            assert [c["start_time"] for c in classes] == ["9:00", "10:00"]
+            assert [(c["start_min"], c["end_min"]) for c in classes] == [(540, 585), (600, 645)]
+
+    def test_reads_served_from_memory(self, initialized_schedule_manager, sample_course, count_selects):
+        """Test that repeated reads do not hit the database."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        manager.add_schedule_entry(course_id, 1, "09:00", "10:30", [1])
+        manager.get_schedule_by_day(1, week=1)
+
+        classes, selects = count_selects(manager, manager.get_schedule_by_day, 1, week=1)
+        assert len(classes) == 1
+        assert selects == []
+
+    def test_writes_patch_index(self, initialized_schedule_manager, sample_course, count_selects):
+        """Test that every write method keeps the loaded index current."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        first = manager.add_schedule_entry(course_id, 1, "14:00", "15:30")
+        assert manager.timetable.loaded is False
+        manager.get_schedule_for_week()
+        assert manager.timetable.loaded is True
+
+        second = manager.add_schedule_entry(course_id, 1, "08:00", "09:30", [2])
+        other_id = manager.add_course("Other")
+        manager.add_schedule_entry(other_id, 1, "10:00", "11:00")
+        manager.update_course(course_id, name="Renamed")
+
+        classes, selects = count_selects(manager, manager.get_schedule_by_day, 1)
+        assert selects == []
+        assert [c["id"] for c in classes] == [second, classes[1]["id"], first]
+        assert classes[0]["name"] == "Renamed"
+        assert classes[0]["weeks"] == [2]
+        assert classes[1]["name"] == "Other"
+
+        manager.delete_schedule_entry(first)
+        manager.delete_course(other_id)
+        assert [c["id"] for c in manager.get_schedule_by_day(1)] == [second]
+        assert manager.get_schedule_by_day(1, week=1) == []
+
+        # The patched index matches a fresh load from the database
+        patched = manager.get_schedule_for_week()
+        manager.timetable.invalidate()
+        assert manager.get_schedule_for_week() == patched
+
+    def test_returned_dicts_are_copies(self, initialized_schedule_manager, sample_course):
+        """Test that callers mutating results cannot corrupt the index."""
+        manager = initialized_schedule_manager
+
+        course_id = manager.add_course(**sample_course)
+        manager.add_schedule_entry(course_id, 2, "09:00", "10:30", [1, 2])
+
+        classes = manager.get_schedule_by_day(2)
+        classes[0]["name"] = "Mutated"
+        classes[0]["weeks"].append(99)
+
+        fresh = manager.get_schedule_by_day(2)
+        assert fresh[0]["name"] == sample_course["name"]
+        assert fresh[0]["weeks"] == [1, 2]
+
+
 class TestWeekCalculation:
     """Tests for week number calculation."""
 
@@ -243,6 +452,17 @@ class TestWeekCalculation:
         # Should handle gracefully (might be 0 or negative, but shouldn't crash)
         assert isinstance(week_num, int)
 
+    def test_calculate_week_number_for_given_day(self, initialized_schedule_manager):
+        """Test that weeks are 7-day blocks from the start date of the given day."""
+        from datetime import date, datetime
+
+        manager = initialized_schedule_manager
+
+        # 2025-09-03 is a Wednesday
+        assert manager.calculate_week_number("2025-09-03", datetime(2025, 9, 9, 23, 59)) == 1
+        assert manager.calculate_week_number("2025-09-03", date(2025, 9, 10)) == 2
+        assert manager.calculate_week_number("2025-09-03", date(2025, 8, 1)) == 1
+
 
 class TestScheduleStatistics:
     """Tests for schedule statistics."""
@@ -274,3 +494,438 @@ class TestScheduleStatistics:
 
         assert stats["total_courses"] == 2
         assert stats["total_schedule_entries"] == 3
+
+
+class TestBulkWrites:
+    """Tests for the bulk write API."""
+
+    def test_add_courses_bulk(self, initialized_schedule_manager, mock_event_handler):
+        """Test that courses are added in order with one aggregate event."""
+        manager = initialized_schedule_manager
+        manager.add_course("Existing")
+        mock_event_handler.reset_mock()
+
+        ids = manager.add_courses_bulk([
+            {"name": "Math", "teacher": "T1"},
+            {"name": "Physics", "color": "#00FF00"},
+        ])
+
+        assert len(ids) == 2
+        courses = {c["id"]: c for c in manager.get_courses()}
+        assert courses[ids[0]]["name"] == "Math"
+        assert courses[ids[1]]["color"] == "#00FF00"
+        mock_event_handler.emit_schedule_bulk_added.assert_called_once_with(ids, [])
+        mock_event_handler.emit_course_added.assert_not_called()
+
+    def test_add_courses_bulk_all_or_nothing(self, initialized_schedule_manager):
+        """Test that one invalid course rejects the whole batch."""
+        manager = initialized_schedule_manager
+
+        assert manager.add_courses_bulk([{"name": "Math"}, {"teacher": "No name"}]) == []
+        assert manager.get_courses() == []
+
+    def test_add_schedule_entries_bulk(
+        self, initialized_schedule_manager, mock_event_handler, sample_course, trace_sql
+    ):
+        """Test that entries are written in one transaction with one event."""
+        manager = initialized_schedule_manager
+        course_id = manager.add_course(**sample_course)
+        manager.get_schedule_for_week()  # load the index so it gets patched
+        mock_event_handler.reset_mock()
+
+        entries = [
+            {"course_id": course_id, "day_of_week": day, "start_time": "09:00",
+             "end_time": "10:30", "weeks": [1, 2], "note": f"day {day}"}
+            for day in range(1, 6)
+        ]
+
+        ids, statements = trace_sql(manager, manager.add_schedule_entries_bulk, entries)
+
+        assert len(ids) == 5
+        assert sum(1 for sql in statements if sql.strip().upper() == "COMMIT") == 1
+        mock_event_handler.emit_schedule_bulk_added.assert_called_once_with([], ids)
+        mock_event_handler.emit_schedule_added.assert_not_called()
+
+        week = manager.get_schedule_for_week(2)
+        assert [entry["id"] for entry in week] == ids
+        assert manager.get_schedule_for_week(3) == []
+
+        manager.timetable.invalidate()
+        assert manager.get_schedule_for_week(2) == week
+
+    def test_add_schedule_entries_bulk_validates_up_front(
+        self, initialized_schedule_manager, sample_course
+    ):
+        """Test that invalid entries or unknown courses write nothing."""
+        manager = initialized_schedule_manager
+        course_id = manager.add_course(**sample_course)
+
+        valid = {"course_id": course_id, "day_of_week": 1,
+                 "start_time": "09:00", "end_time": "10:00"}
+        assert manager.add_schedule_entries_bulk([valid, {**valid, "start_time": "25:00"}]) == []
+        assert manager.add_schedule_entries_bulk([valid, {**valid, "day_of_week": 8}]) == []
+        assert manager.add_schedule_entries_bulk([valid, {**valid, "weeks": [70]}]) == []
+        assert manager.add_schedule_entries_bulk([valid, {**valid, "course_id": 999}]) == []
+        assert manager.get_schedule() == []
+
+    def test_import_bulk_replaces_in_one_transaction(
+        self, initialized_schedule_manager, mock_event_handler, sample_course
+    ):
+        """Test that an import maps course keys to new IDs and replaces the timetable."""
+        manager = initialized_schedule_manager
+        old_id = manager.add_course(**sample_course)
+        manager.add_schedule_entry(old_id, 1, "08:00", "09:00")
+        manager.get_schedule_for_week()  # load the index so it must be invalidated
+        mock_event_handler.reset_mock()
+
+        result = manager.import_bulk(
+            [{"id": 7, "name": "Math"}, {"id": 3, "name": "Physics"}],
+            [{"course_id": 3, "day_of_week": 2, "start_time": "09:00", "end_time": "10:00", "weeks": [1]},
+             {"course_id": 7, "day_of_week": 1, "start_time": "10:00", "end_time": "11:00"}],
+            replace=True,
+        )
+
+        math_id, physics_id = result["courses"]
+        assert [c["name"] for c in manager.get_courses()] == ["Math", "Physics"]
+        schedule = {e["id"]: e for e in manager.get_schedule()}
+        assert [schedule[i]["course_id"] for i in result["entries"]] == [physics_id, math_id]
+        # The cached timetable was rebuilt without the deleted course
+        assert [e["name"] for e in manager.get_schedule_for_week(1)] == ["Math", "Physics"]
+        # One aggregate event covers both the deletion and the additions
+        mock_event_handler.emit_course_deleted.assert_not_called()
+        mock_event_handler.emit_schedule_bulk_added.assert_called_once_with(
+            result["courses"], result["entries"], [old_id])
+
+    def test_import_bulk_failure_keeps_existing_timetable(
+        self, initialized_schedule_manager, sample_course
+    ):
+        """Test that an invalid entry or course reference leaves the database untouched."""
+        manager = initialized_schedule_manager
+        old_id = manager.add_course(**sample_course)
+        manager.add_schedule_entry(old_id, 1, "08:00", "09:00")
+        before = (manager.get_courses(), manager.get_schedule())
+
+        courses = [{"id": 1, "name": "Math"}]
+        valid = {"course_id": 1, "day_of_week": 1, "start_time": "09:00", "end_time": "10:00"}
+        assert manager.import_bulk(courses, [valid, {**valid, "end_time": "25:00"}], replace=True) == {}
+        assert manager.import_bulk(courses, [valid, {**valid, "weeks": [0]}], replace=True) == {}
+        assert manager.import_bulk(courses, [{**valid, "course_id": 2}], replace=True) == {}
+        assert manager.import_bulk(courses + courses, [], replace=True) == {}
+        assert (manager.get_courses(), manager.get_schedule()) == before
+
+    def test_batch_conflict_detection(self, initialized_schedule_manager, sample_course):
+        """Test that conflicts are counted once across existing and new entries."""
+        manager = initialized_schedule_manager
+        course_id = manager.add_course(**sample_course)
+        manager.add_schedule_entry(course_id, 1, "09:00", "10:00", [1])
+
+        rows = [
+            (course_id, 1, "09:30", "10:30", None, None),  # every week: hits existing
+            (course_id, 1, "10:15", "11:00", None, None),  # hits the row above
+            (course_id, 1, "09:00", "10:00", None, None),  # hits existing and first row
+            (course_id, 2, "09:00", "10:00", None, None),  # other day
+        ]
+        masks = [0, 0, 0, 0]
+        with manager.get_connection() as conn:
+            assert manager._count_batch_conflicts(conn, rows, masks) == 4
+
+        with manager.get_connection() as conn:
+            assert manager._count_batch_conflicts(
+                conn, [(course_id, 1, "09:30", "10:30", None, None)], [0b10]
+            ) == 0
+
+
+class TestConflictEngine:
+    """Tests for the interval index, the sweep line and whole-timetable reports."""
+
+    def test_interval_index_matches_brute_force(self):
+        """Test IntervalIndex.overlapping() against a pairwise scan."""
+        items = [(start, start + length, entry_id, mask)
+                 for entry_id, (start, length, mask) in enumerate(
+                     [(480, 90, 0), (500, 30, 0b1), (600, 45, 0b10), (610, 200, 0),
+                      (700, 10, 0b11), (900, 60, 0b100)], start=1)]
+        index = IntervalIndex(items)
+
+        for start, end, mask in [(490, 520, 0), (505, 600, 0b10), (640, 660, 0),
+                                 (810, 900, 0b100), (0, 1440, 0b1000)]:
+            expected = sorted(i for i in items if i[0] < end and i[1] > start
+                              and (not mask or not i[3] or mask & i[3]))
+            assert sorted(index.overlapping(start, end, mask)) == expected
+
+    def test_sweep_matches_brute_force(self):
+        """Test sweep_conflicts() against a pairwise scan."""
+        items = [(480, 570, 1, 0), (500, 530, 2, 0b1), (530, 600, 3, 0b10),
+                 (590, 700, 4, 0b1), (700, 760, 5, 0), (480, 570, 6, 0b100)]
+
+        pairs = {frozenset((a[2], b[2])) for a, b in sweep_conflicts(items)}
+
+        expected = {
+            frozenset((a[2], b[2]))
+            for i, a in enumerate(items) for b in items[i + 1:]
+            if a[0] < b[1] and b[0] < a[1] and (not a[3] or not b[3] or a[3] & b[3])
+        }
+        assert pairs == expected
+
+    def test_get_all_conflicts(self, initialized_schedule_manager, sample_course):
+        """Test the whole-timetable conflict report."""
+        manager = initialized_schedule_manager
+        course_id = manager.add_course(**sample_course)
+        other_id = manager.add_course(name="Physics")
+
+        first = manager.add_schedule_entry(course_id, 1, "9:00", "10:30", [1, 2, 3])
+        second = manager.add_schedule_entry(other_id, 1, "10:00", "11:00", [3, 4])
+        manager.add_schedule_entry(other_id, 1, "10:30", "12:00", [1])  # touches first only
+        every_week = manager.add_schedule_entry(course_id, 3, "14:00", "15:00")
+        late = manager.add_schedule_entry(other_id, 3, "14:30", "16:00")
+
+        conflicts = manager.get_all_conflicts()
+
+        assert len(conflicts) == 2
+        monday, wednesday = conflicts
+        assert monday["day_of_week"] == 1
+        assert (monday["overlap_start"], monday["overlap_end"]) == ("10:00", "10:30")
+        assert monday["conflict_weeks"] == [3]
+        assert [e["id"] for e in monday["entries"]] == [first, second]
+        assert monday["entries"][1]["course_name"] == "Physics"
+        assert wednesday["conflict_weeks"] == []
+        assert {e["id"] for e in wednesday["entries"]} == {every_week, late}
+
+        assert [c["day_of_week"] for c in manager.get_all_conflicts(week=3)] == [1, 3]
+        assert [c["day_of_week"] for c in manager.get_all_conflicts(week=1)] == [3]
+
+    def test_get_all_conflicts_empty(self, initialized_schedule_manager):
+        """Test that an empty timetable has no conflicts."""
+        assert initialized_schedule_manager.get_all_conflicts() == []
+
+
+class TestTimeline:
+    """Tests for the binary-searched class timeline."""
+
+    @staticmethod
+    def _week(entries):
+        by_day = {day: [] for day in range(1, 8)}
+        for entry_id, day, start, end in entries:
+            by_day[day].append({"id": entry_id, "day_of_week": day, "start_min": start, "end_min": end})
+        return by_day
+
+    def test_lookups(self):
+        """Test current/next/previous and transitions across days and weeks."""
+        timeline = Timeline(3, {
+            3: self._week([(1, 1, 480, 570), (2, 1, 540, 600), (3, 3, 600, 660)]),
+            4: self._week([(4, 1, 480, 570)]),
+        })
+        at = timeline.position
+
+        assert timeline.current(at(3, 1, 479)) is None
+        assert timeline.current(at(3, 1, 550))["id"] == 2  # latest started wins
+        assert timeline.current(at(3, 1, 580))["id"] == 2
+        assert timeline.current(at(3, 1, 600)) is None
+
+        assert timeline.next(at(3, 1, 500))["id"] == 2
+        following = timeline.next(at(3, 5, 0))
+        assert (following["id"], following["week"]) == (4, 4)
+        assert timeline.next(at(4, 1, 480)) is None
+
+        assert timeline.previous(at(3, 1, 500)) is None
+        assert timeline.previous(at(3, 2, 0))["id"] == 2
+        assert timeline.previous(at(3, 3, 660))["id"] == 3
+
+        assert timeline.until_next_transition(at(3, 1, 470)) == 10
+        assert timeline.until_next_transition(at(3, 1, 570)) == 30
+        assert timeline.until_next_transition(at(4, 1, 570)) is None
+
+    def test_rebuilt_only_on_change(self, initialized_schedule_manager, sample_course):
+        """Test that the timeline is cached until the timetable or week changes."""
+        manager = initialized_schedule_manager
+        course_id = manager.add_course(**sample_course)
+        manager.add_schedule_entry(course_id, 1, "9:00", "10:00", [1])
+
+        timeline = manager.get_timeline(1)
+        assert manager.get_timeline(1) is timeline
+        assert len(timeline) == 1
+
+        manager.add_schedule_entry(course_id, 2, "9:00", "10:00", [2])
+        rebuilt = manager.get_timeline(1)
+        assert rebuilt is not timeline
+        assert len(rebuilt) == 2  # week 2 is the following week
+        assert manager.get_timeline(2) is not rebuilt
+
+
+    def test_weeks_follow_semester_start_weekday(self, initialized_schedule_manager, sample_course):
+        """Test that a non-Monday semester start gives the occurrence calendar's weeks."""
+        from datetime import datetime, timedelta
+
+        manager = initialized_schedule_manager
+        course_id = manager.add_course(**sample_course)
+        tuesday = manager.add_schedule_entry(course_id, 2, "9:00", "10:00", [1])
+        monday = manager.add_schedule_entry(course_id, 1, "9:00", "10:00", [1, 2])
+        wednesday = manager.add_schedule_entry(course_id, 3, "9:00", "10:00", [2])
+        with manager.get_connection() as conn:
+            conn.executemany("UPDATE settings SET value = ? WHERE key = ?",
+                             [("2025-09-03", "semester_start_date"), ("20", "total_weeks")])
+            conn.commit()
+
+        # Week 1 runs Wednesday 2025-09-03 to Tuesday 2025-09-09
+        now = datetime(2025, 9, 8, 12, 0)  # Monday of week 1
+        timeline, week_start, position = manager.timeline_at("2025-09-03", now)
+        assert week_start == datetime(2025, 9, 3)
+        assert (timeline.week_of(position), timeline.day_of_week(position)) == (1, 1)
+
+        upcoming = [(week_start + timedelta(minutes=start), cls["id"], cls["week"])
+                    for start, cls in timeline.starting_from(position)]
+        occurrences = [(datetime.strptime(c["date"], "%Y-%m-%d") + timedelta(minutes=c["start_min"]),
+                        c["id"], c["week"])
+                       for c in manager.get_schedule_for_dates("2025-09-08", "2025-09-16")
+                       if c["date"] > "2025-09-08"]
+        assert upcoming == occurrences == [
+            (datetime(2025, 9, 9, 9, 0), tuesday, 1),
+            (datetime(2025, 9, 10, 9, 0), wednesday, 2),  # week 2 starts on Wednesday
+            (datetime(2025, 9, 15, 9, 0), monday, 2),
+        ]
+
+        # Before the semester starts, position 0 is the start date itself
+        timeline, week_start, position = manager.timeline_at("2025-09-03", datetime(2025, 9, 1, 9, 0))
+        assert week_start == datetime(2025, 9, 3) and position < 0
+        assert timeline.next(position)["id"] == monday
+        assert timeline.week_of(position) == 1
+
+class TestOccurrenceCalendar:
+    """Tests for the dated schedule view."""
+
+    def test_schedule_for_dates(self, initialized_schedule_manager, sample_course):
+        """Test that date ranges are answered from the occurrence calendar."""
+        manager = initialized_schedule_manager
+        course_id = manager.add_course(**sample_course)
+        monday = manager.add_schedule_entry(course_id, 1, "10:00", "11:00", [1, 2])
+        early = manager.add_schedule_entry(course_id, 1, "8:00", "9:00", [2])
+
+        assert manager.get_schedule_for_dates("2025-09-01", "2025-09-30") == []
+
+        with manager.get_connection() as conn:
+            conn.execute("UPDATE settings SET value = '2025-09-01' WHERE key = 'semester_start_date'")
+            conn.commit()
+
+        classes = manager.get_schedule_for_dates("2025-09-01", "2025-09-30")
+        assert [(c["date"], c["week"], c["id"]) for c in classes] == [
+            ("2025-09-01", 1, monday), ("2025-09-08", 2, early), ("2025-09-08", 2, monday)
+        ]
+        assert classes[0]["name"] == sample_course["name"]
+        assert classes[1]["start_min"] == 480
+
+        manager.delete_schedule_entry(early)
+        assert len(manager.get_schedule_for_dates("2025-09-08", "2025-09-08")) == 1
+
+    def test_invalid_dates(self, initialized_schedule_manager):
+        """Test that malformed dates return an empty list."""
+        assert initialized_schedule_manager.get_schedule_for_dates("2025-13-01", "2025-09-30") == []
+
+
+class TestApplySyncData:
+    """Tests for the diff-based sync apply."""
+
+    SERVER_COURSES = [
+        {"id": 10, "name": "Math", "teacher": "T1", "location": "101", "color": "#FF0000"},
+        {"id": 20, "name": "Physics", "teacher": None, "location": None, "color": None},
+    ]
+    SERVER_ENTRIES = [
+        {"id": 100, "course_id": 10, "day_of_week": 1, "start_time": "08:00",
+         "end_time": "09:30", "weeks": [1, 2, 3], "note": "first"},
+        {"id": 200, "course_id": 20, "day_of_week": 2, "start_time": "10:00",
+         "end_time": "11:30", "weeks": []},
+    ]
+
+    def test_inserts_keep_server_ids(self, initialized_schedule_manager, mock_event_handler):
+        """Test that new rows are inserted with the server's IDs."""
+        manager = initialized_schedule_manager
+
+        stats = manager.apply_sync_data(self.SERVER_COURSES, self.SERVER_ENTRIES)
+
+        assert stats["courses_inserted"] == 2
+        assert stats["entries_inserted"] == 2
+        assert stats["skipped"] == 0
+        assert sorted(c["id"] for c in manager.get_courses()) == [10, 20]
+        monday = manager.get_schedule_by_day(1)
+        assert [(e["id"], e["weeks"]) for e in monday] == [(100, [1, 2, 3])]
+        mock_event_handler.emit_schedule_sync_applied.assert_called_once_with(stats)
+
+    def test_unchanged_data_writes_nothing(self, initialized_schedule_manager, mock_event_handler, trace_sql):
+        """Test that re-applying identical data issues no writes and no events."""
+        manager = initialized_schedule_manager
+        manager.apply_sync_data(self.SERVER_COURSES, self.SERVER_ENTRIES)
+        mock_event_handler.reset_mock()
+
+        stats, statements = trace_sql(manager, manager.apply_sync_data, self.SERVER_COURSES, self.SERVER_ENTRIES)
+
+        assert stats["courses_unchanged"] == 2
+        assert stats["entries_unchanged"] == 2
+        writes = [sql for sql in statements
+                  if sql.strip().split()[0].upper() in ("INSERT", "UPDATE", "DELETE")]
+        assert writes == []
+        mock_event_handler.emit_schedule_sync_applied.assert_not_called()
+
+    def test_exact_update_counts(self, initialized_schedule_manager):
+        """Test that only changed rows are updated and IDs stay stable."""
+        manager = initialized_schedule_manager
+        manager.apply_sync_data(self.SERVER_COURSES, self.SERVER_ENTRIES)
+
+        courses = [dict(self.SERVER_COURSES[0], location="202"), self.SERVER_COURSES[1]]
+        entries = [dict(self.SERVER_ENTRIES[0], weeks=[4]), self.SERVER_ENTRIES[1]]
+        stats = manager.apply_sync_data(courses, entries)
+
+        assert (stats["courses_updated"], stats["courses_unchanged"]) == (1, 1)
+        assert (stats["entries_updated"], stats["entries_unchanged"]) == (1, 1)
+        assert {c["id"]: c for c in manager.get_courses()}[10]["location"] == "202"
+        assert [e["id"] for e in manager.get_schedule_for_week(4)] == [100, 200]
+        assert [e["id"] for e in manager.get_schedule_for_week(1)] == [200]
+        # Note is kept when the server does not send one
+        assert {e["id"]: e for e in manager.get_schedule()}[100]["note"] == "first"
+
+    def test_delete_missing(self, initialized_schedule_manager):
+        """Test that local-only rows are removed only when requested."""
+        manager = initialized_schedule_manager
+        manager.apply_sync_data(self.SERVER_COURSES, self.SERVER_ENTRIES)
+
+        stats = manager.apply_sync_data(self.SERVER_COURSES[:1], self.SERVER_ENTRIES[:1])
+        assert stats["courses_deleted"] == 0
+        assert len(manager.get_schedule_for_week()) == 2
+
+        stats = manager.apply_sync_data(
+            self.SERVER_COURSES[:1], self.SERVER_ENTRIES[:1], delete_missing=True
+        )
+        assert stats["courses_deleted"] == 1
+        assert stats["entries_deleted"] == 1
+        assert [c["id"] for c in manager.get_courses()] == [10]
+        assert [e["id"] for e in manager.get_schedule_for_week()] == [100]
+
+    def test_invalid_rows_skipped(self, initialized_schedule_manager):
+        """Test that invalid rows and orphan entries are skipped."""
+        manager = initialized_schedule_manager
+
+        entries = self.SERVER_ENTRIES + [
+            {"id": 300, "course_id": 99, "day_of_week": 3, "start_time": "08:00", "end_time": "09:00"},
+            {"id": 400, "course_id": 10, "day_of_week": 9, "start_time": "08:00", "end_time": "09:00"},
+        ]
+        stats = manager.apply_sync_data(self.SERVER_COURSES + [{"id": 30}], entries)
+
+        assert stats["skipped"] == 3
+        assert stats["entries_inserted"] == 2
+
+    def test_failure_rolls_back(self, initialized_schedule_manager, mock_event_handler):
+        """Test that a failing write leaves the database untouched."""
+        manager = initialized_schedule_manager
+        manager.apply_sync_data(self.SERVER_COURSES, self.SERVER_ENTRIES)
+        mock_event_handler.reset_mock()
+
+        with manager.get_connection() as conn:
+            conn.execute("""
+                CREATE TRIGGER fail_schedule_insert BEFORE INSERT ON schedule
+                BEGIN SELECT RAISE(ABORT, 'boom'); END
+            """)
+            conn.commit()
+
+        courses = [dict(self.SERVER_COURSES[0], name="Algebra"), self.SERVER_COURSES[1]]
+        entries = self.SERVER_ENTRIES + [dict(self.SERVER_ENTRIES[0], id=101, day_of_week=3)]
+        assert manager.apply_sync_data(courses, entries) is None
+
+        assert {c["id"]: c for c in manager.get_courses()}[10]["name"] == "Math"
+        mock_event_handler.emit_schedule_sync_applied.assert_not_called()
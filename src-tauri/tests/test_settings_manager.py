@@ -287,3 +287,87 @@ class TestSpecificSettings:
         assert manager.get_setting_bool("show_clock") is True
         assert manager.get_setting_bool("show_schedule") is True
         assert manager.get_setting_bool("show_sync_status") is True
+
+
+class TestSettingsCache:
+    """Tests for the write-through settings cache."""
+
+    def test_reads_served_from_cache(self, initialized_settings_manager, count_selects):
+        """Test that repeated reads do not query the database."""
+        manager = initialized_settings_manager
+        manager.get_setting("sync_interval")
+
+        values, selects = count_selects(manager, lambda: (
+            manager.get_setting("sync_interval"),
+            manager.get_setting_int("sync_interval"),
+            manager.get_setting_bool("sync_enabled"),
+            manager.get_all_settings(),
+        ))
+
+        assert values[:3] == ("300", 300, False)
+        assert selects == []
+
+    def test_writes_update_cache_and_typed_values(self, initialized_settings_manager):
+        """Test that set_setting, update_multiple and reset update the cache."""
+        manager = initialized_settings_manager
+
+        assert manager.get_setting_int("reminder_minutes") == 10
+        manager.set_setting("reminder_minutes", "15")
+        assert manager.get_setting_int("reminder_minutes") == 15
+
+        assert manager.get_setting_bool("sync_enabled") is False
+        manager.update_multiple({"sync_enabled": "true", "theme_mode": "dark"})
+        assert manager.get_setting_bool("sync_enabled") is True
+        assert manager.get_setting("theme_mode") == "dark"
+
+        manager.reset_to_defaults(exclude_keys=["client_uuid"])
+        assert manager.get_setting_int("reminder_minutes") == 10
+        assert manager.get_setting_bool("sync_enabled") is False
+
+    def test_cache_matches_database(self, initialized_settings_manager, db_connection):
+        """Test that the cache and the database agree after writes."""
+        manager = initialized_settings_manager
+
+        manager.set_setting("theme_color", "#123456")
+        manager.update_multiple({"font_size": "18"})
+
+        rows = dict(db_connection.execute("SELECT key, value FROM settings").fetchall())
+        assert rows == manager.get_all_settings()
+
+    def test_version_and_listeners(self, initialized_settings_manager, mocker):
+        """Test that writes bump the version and notify listeners."""
+        manager = initialized_settings_manager
+        listener = mocker.Mock()
+        manager.add_listener(listener)
+
+        version = manager.version
+        manager.set_setting("show_clock", "false")
+        assert manager.version == version + 1
+        listener.assert_called_once_with(["show_clock"], version + 1)
+
+        manager.remove_listener(listener)
+        manager.update_multiple({"show_clock": "true"})
+        assert manager.version == version + 2
+        listener.assert_called_once()
+
+    def test_reset_emits_per_key_and_batch_events(
+        self, initialized_settings_manager, mock_event_handler
+    ):
+        """Test that reset_to_defaults emits setting-update per reset key plus one batch event."""
+        manager = initialized_settings_manager
+        manager.update_multiple({"topbar_height": "5", "font_size": "24"})
+        mock_event_handler.reset_mock()
+
+        assert manager.reset_to_defaults(exclude_keys=["client_uuid"]) is True
+
+        mock_event_handler.emit_settings_batch_updated.assert_called_once()
+        keys = mock_event_handler.emit_settings_batch_updated.call_args[0][0]
+        assert "client_uuid" not in keys
+        assert "theme_color" in keys
+
+        # The TopBar resizes its window only on per-key updates
+        updates = dict(call.args for call in mock_event_handler.emit_setting_update.call_args_list)
+        assert list(updates) == keys
+        assert updates["topbar_height"] == manager.get_setting("topbar_height") == \
+            SettingsManager.DEFAULT_SETTINGS["topbar_height"]
+        assert updates["font_size"] == SettingsManager.DEFAULT_SETTINGS["font_size"]
@@ -0,0 +1,83 @@
+"""
+Unit tests for the startup import profiler (startup_profiler.py).
+"""
+import importlib
+import json
+import sys
+
+import pytest
+
+from tauri_app import logger as _logger
+from tauri_app import startup_profiler
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """A throwaway package whose module imports a submodule."""
+    root = tmp_path / "profiled_pkg"
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "outer.py").write_text("import time\nfrom . import inner\ntime.sleep(0.01)\n")
+    (root / "inner.py").write_text("import time\ntime.sleep(0.02)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    importlib.invalidate_caches()
+    yield "profiled_pkg"
+    for name in [n for n in sys.modules if n.startswith("profiled_pkg")]:
+        del sys.modules[name]
+
+
+@pytest.fixture(autouse=True)
+def clean_profiler():
+    """Start and end every test with the profiler uninstalled and empty."""
+    startup_profiler.reset()
+    yield
+    startup_profiler.reset()
+
+
+def test_disabled_without_env(monkeypatch):
+    """Test that nothing is installed unless the environment variable is set."""
+    monkeypatch.delenv(startup_profiler.ENV_VAR, raising=False)
+    startup_profiler.install_from_env()
+    assert not startup_profiler.enabled()
+    assert startup_profiler.report() is None
+
+    monkeypatch.setenv(startup_profiler.ENV_VAR, "1")
+    startup_profiler.install_from_env()
+    assert startup_profiler.enabled()
+
+
+def test_records_nested_import_cost(package):
+    """Test self and cumulative times, parents, and that loaders are restored."""
+    startup_profiler.install()
+    module = importlib.import_module(f"{package}.outer")
+    startup_profiler.uninstall()
+
+    records = {r["module"]: r for r in startup_profiler.get_profile()["modules"]}
+    outer, inner = records[f"{package}.outer"], records[f"{package}.inner"]
+    assert inner["parent"] == f"{package}.outer"
+    assert records[package]["parent"] is None
+    assert inner["cumulative_ms"] >= 20
+    assert outer["cumulative_ms"] >= outer["self_ms"] + inner["cumulative_ms"] - 1
+    assert 10 <= outer["self_ms"] < outer["cumulative_ms"]
+    assert not isinstance(module.__loader__, startup_profiler._TimedLoader)
+    assert module.__spec__.loader is module.__loader__
+    assert startup_profiler._finder not in sys.meta_path
+
+
+def test_report_writes_profile(package, tmp_path, monkeypatch, mocker):
+    """Test that report() logs the slowest imports and writes the JSON profile."""
+    monkeypatch.setattr(_logger, "LOG_DIR", tmp_path)
+    log = mocker.patch.object(_logger, "log_message")
+    startup_profiler.install()
+    importlib.import_module(f"{package}.outer")
+    startup_profiler.checkpoint("managers initialized")
+
+    profile = startup_profiler.report(top=2)
+
+    assert not startup_profiler.enabled()
+    summary = log.call_args_list[0].args[1]
+    assert f"{package}.outer" in summary and "managers initialized" in summary
+    written = json.loads((tmp_path / startup_profiler.PROFILE_FILE_NAME).read_text(encoding="utf-8"))
+    assert written["checkpoints"][0]["name"] == "managers initialized"
+    assert [r["module"] for r in written["modules"]] == [r["module"] for r in profile["modules"]]
+    assert written["import_ms"] >= 30
@@ -0,0 +1,257 @@
+"""
+Unit tests for StatisticsManager (statistics_manager.py).
+"""
+import pytest
+
+
+@pytest.fixture
+def timetable(initialized_schedule_manager, sample_course):
+    """A course with a Monday (weeks 1-2) and a Wednesday (all weeks) entry."""
+    manager = initialized_schedule_manager
+    course_id = manager.add_course(**sample_course)
+    monday = manager.add_schedule_entry(course_id, 1, "09:00", "10:30", weeks=[1, 2])
+    wednesday = manager.add_schedule_entry(course_id, 3, "14:00", "15:00")
+    return {"course_id": course_id, "monday": monday, "wednesday": wednesday}
+
+
+class TestStatistics:
+    """Tests for the aggregate values."""
+
+    def test_all_statistics(self, initialized_statistics_manager, timetable):
+        """Test that every aggregate is computed with the expected shape."""
+        stats = initialized_statistics_manager.calculate_all_statistics(1, 4)
+
+        assert stats["total_hours"]["weekly_hours"] == {1: 1.5, 2: 1.5}
+        assert stats["distribution"]["by_day"] == {1: 1, 3: 1}
+        assert stats["distribution"]["by_teacher"] == {"Test Teacher": 2}
+        assert stats["attendance"]["total_sessions"] == 0
+        assert [d["day_of_week"] for d in stats["weekly_load"]] == [1, 3]
+        assert stats["time_slots"] == {"morning": 1, "afternoon": 1}
+        assert set(stats["freshness"]) == {
+            "total_hours", "distribution", "attendance", "weekly_load", "busiest_days", "time_slots"
+        }
+
+    def test_unpadded_times_counted(self, initialized_statistics_manager, initialized_schedule_manager,
+                                    sample_course):
+        """Test that durations use the minute columns, so "9:00" is not dropped."""
+        manager = initialized_schedule_manager
+        course_id = manager.add_course(**sample_course)
+        manager.add_schedule_entry(course_id, 2, "9:00", "10:30", weeks=[1])
+        manager.add_schedule_entry(course_id, 2, "18:00", "19:15", weeks=[1])
+
+        stats = initialized_statistics_manager.calculate_all_statistics(1, 1)
+
+        assert stats["total_hours"]["weekly_hours"] == {1: 2.75}
+        assert stats["weekly_load"][0]["total_hours"] == 2.75
+        assert stats["time_slots"] == {"morning": 1, "evening": 1}
+
+    def test_cached_values_keep_integer_keys(self, initialized_statistics_manager, timetable):
+        """Test that values served from the cache match freshly computed ones."""
+        manager = initialized_statistics_manager
+
+        first = manager.calculate_all_statistics()
+        second = manager.calculate_all_statistics()
+
+        first.pop("freshness")
+        freshness = second.pop("freshness")
+        assert second == first
+        assert all(item["cached"] for item in freshness.values())
+
+
+class TestStatisticsCache:
+    """Tests for the statistics cache and its trigger-based invalidation."""
+
+    def test_warm_dashboard_load_is_one_query(self, initialized_statistics_manager, timetable, count_selects):
+        """Test that a repeated dashboard load is a single cache read."""
+        manager = initialized_statistics_manager
+        manager.calculate_all_statistics()
+
+        _, selects = count_selects(manager, manager.calculate_all_statistics)
+
+        assert len(selects) == 1
+        assert manager.get_cache_status()["hits"] == 6
+
+    def test_schedule_write_invalidates_only_affected_weeks(
+        self, initialized_statistics_manager, initialized_schedule_manager, timetable
+    ):
+        """Test that a schedule write drops only aggregates covering its weeks."""
+        stats = initialized_statistics_manager
+        stats.get_weekly_load(1)
+        stats.get_weekly_load(5)
+        stats.get_attendance_rate()
+
+        initialized_schedule_manager.add_schedule_entry(
+            timetable["course_id"], 2, "08:00", "09:00", weeks=[5]
+        )
+
+        keys = {entry["key"] for entry in stats.get_cache_status()["entries"]}
+        assert 'weekly_load:{"week": 1}' in keys
+        assert 'weekly_load:{"week": 5}' not in keys
+        assert any(key.startswith("attendance") for key in keys)
+        assert [d["day_of_week"] for d in stats.get_weekly_load(5)] == [2, 3]
+
+    def test_course_update_invalidates_distribution(
+        self, initialized_statistics_manager, initialized_schedule_manager, timetable
+    ):
+        """Test that changing a teacher refreshes the distribution only."""
+        stats = initialized_statistics_manager
+        stats.calculate_all_statistics()
+
+        initialized_schedule_manager.update_course(timetable["course_id"], teacher="New Teacher")
+
+        result = stats.calculate_all_statistics()
+        assert result["distribution"]["by_teacher"] == {"New Teacher": 2}
+        assert result["freshness"]["distribution"]["cached"] is False
+        assert result["freshness"]["time_slots"]["cached"] is True
+
+    def test_attendance_invalidation_by_course_and_date(
+        self, initialized_statistics_manager, initialized_schedule_manager, timetable
+    ):
+        """Test that attendance writes drop only overlapping attendance aggregates."""
+        stats = initialized_statistics_manager
+        other_course = initialized_schedule_manager.add_course("Other")
+        assert stats.get_attendance_rate(course_id=other_course)["total_sessions"] == 0
+        assert stats.get_attendance_rate(end_date="2025-01-31")["total_sessions"] == 0
+        assert stats.get_attendance_rate()["total_sessions"] == 0
+
+        stats.mark_attendance(timetable["course_id"], timetable["monday"], "2025-03-03", True)
+
+        cached = [entry["key"] for entry in stats.get_cache_status()["entries"]]
+        assert len(cached) == 2
+        assert stats.get_attendance_rate()["attended_sessions"] == 1
+
+    def test_freshness_reported(self, initialized_statistics_manager, timetable):
+        """Test that cache entries report when they were computed."""
+        stats = initialized_statistics_manager
+        stats.get_time_slot_distribution()
+
+        status = stats.get_cache_status()
+
+        assert status["misses"] == 1
+        assert len(status["entries"]) == 1
+        assert status["entries"][0]["computed_at"]
+        assert status["entries"][0]["age_seconds"] >= 0
+
+    def test_clear_cache(self, initialized_statistics_manager, timetable):
+        """Test that clear_cache forces recomputation."""
+        stats = initialized_statistics_manager
+        stats.calculate_all_statistics()
+
+        assert stats.clear_cache() is True
+        assert stats.get_cache_status()["entries"] == []
+        assert stats.calculate_all_statistics()["freshness"]["time_slots"]["cached"] is False
+
+
+class TestAttendanceRollups:
+    """Tests for the trigger-maintained attendance rollups."""
+
+    @staticmethod
+    def rollups(manager):
+        with manager.get_connection() as conn:
+            daily = [tuple(row) for row in conn.execute(
+                "SELECT course_id, date, total_sessions, attended_sessions "
+                "FROM attendance_daily ORDER BY course_id, date"
+            )]
+            totals = [tuple(row) for row in conn.execute(
+                "SELECT course_id, total_sessions, attended_sessions "
+                "FROM attendance_course_totals ORDER BY course_id"
+            )]
+        return daily, totals
+
+    def test_rollups_follow_writes(self, initialized_statistics_manager, timetable):
+        """Test that inserts, updates and deletes keep the rollups exact."""
+        stats = initialized_statistics_manager
+        course, monday = timetable["course_id"], timetable["monday"]
+
+        first = stats.mark_attendance(course, monday, "2025-03-03", True)
+        stats.mark_attendance(course, timetable["wednesday"], "2025-03-03", False)
+        stats.mark_attendance(course, monday, "2025-03-10", True)
+        assert self.rollups(stats) == (
+            [(course, "2025-03-03", 2, 1), (course, "2025-03-10", 1, 1)],
+            [(course, 3, 2)],
+        )
+
+        stats.mark_attendance(course, monday, "2025-03-03", False)  # update
+        stats.delete_attendance_record(first)
+        assert self.rollups(stats) == (
+            [(course, "2025-03-03", 1, 0), (course, "2025-03-10", 1, 1)],
+            [(course, 2, 1)],
+        )
+
+    def test_course_delete_clears_rollups(
+        self, initialized_statistics_manager, initialized_schedule_manager, timetable
+    ):
+        """Test that cascaded session deletes remove the course's rollup rows."""
+        stats = initialized_statistics_manager
+        stats.mark_attendance(timetable["course_id"], timetable["monday"], "2025-03-03", True)
+
+        initialized_schedule_manager.delete_course(timetable["course_id"])
+
+        assert self.rollups(stats) == ([], [])
+
+    def test_rate_reads_rollups_only(self, initialized_statistics_manager, timetable, trace_sql):
+        """Test that filtered attendance rates never scan course_sessions."""
+        stats = initialized_statistics_manager
+        course, monday = timetable["course_id"], timetable["monday"]
+        stats.mark_attendance(course, monday, "2025-03-03", True)
+        stats.mark_attendance(course, monday, "2025-03-10", False)
+        stats.mark_attendance(course, monday, "2025-03-17", True)
+
+        (ranged, overall), statements = trace_sql(stats, lambda: (
+            stats.get_attendance_rate(course_id=course, start_date="2025-03-04"),
+            stats.get_attendance_rate(),
+        ))
+
+        assert (ranged["total_sessions"], ranged["attended_sessions"]) == (2, 1)
+        assert overall["attendance_rate"] == pytest.approx(66.67)
+        assert not any("FROM course_sessions" in sql for sql in statements)
+
+    def test_weekly_attendance(self, initialized_statistics_manager, timetable):
+        """Test that sessions are grouped by the Monday of their week."""
+        stats = initialized_statistics_manager
+        course = timetable["course_id"]
+        stats.mark_attendance(course, timetable["monday"], "2025-03-03", True)
+        stats.mark_attendance(course, timetable["wednesday"], "2025-03-05", False)
+        stats.mark_attendance(course, timetable["monday"], "2025-03-10", True)
+
+        weekly = stats.get_weekly_attendance(course_id=course)
+
+        assert [(w["week_start"], w["total_sessions"], w["attendance_rate"]) for w in weekly] == [
+            ("2025-03-03", 2, 50.0),
+            ("2025-03-10", 1, 100.0),
+        ]
+        assert stats.get_weekly_attendance(start_date="2025-03-04")[0]["total_sessions"] == 1
+
+
+class TestOccurrenceStatistics:
+    """Tests for statistics served from the occurrence calendar."""
+
+    @pytest.fixture
+    def semester(self, initialized_statistics_manager, timetable):
+        with initialized_statistics_manager.get_connection() as conn:
+            conn.execute("UPDATE settings SET value = '2025-09-01' WHERE key = 'semester_start_date'")
+            conn.commit()
+        return timetable
+
+    def test_hours_between(self, initialized_statistics_manager, semester):
+        """Test hour totals over a date range."""
+        hours = initialized_statistics_manager.get_hours_between("2025-09-01", "2025-09-14")
+
+        assert hours["daily_hours"] == {
+            "2025-09-01": 1.5, "2025-09-03": 1.0, "2025-09-08": 1.5, "2025-09-10": 1.0
+        }
+        assert hours["total_hours"] == 5.0
+
+    def test_prepopulate_attendance(self, initialized_statistics_manager, semester):
+        """Test that sessions are created once per occurrence."""
+        manager = initialized_statistics_manager
+        manager.mark_attendance(semester["course_id"], semester["monday"], "2025-09-01", False)
+
+        assert manager.prepopulate_attendance("2025-09-01", "2025-09-07") == 1
+        assert manager.prepopulate_attendance("2025-09-01", "2025-09-07") == 0
+        assert manager.prepopulate_attendance("bad", "2025-09-07") == -1
+
+        history = manager.get_attendance_history(start_date="2025-09-01", end_date="2025-09-07")
+        assert sorted((h["date"], h["attended"]) for h in history) == [
+            ("2025-09-01", 0), ("2025-09-03", 1)
+        ]
@@ -657,13 +657,17 @@ class TestMergeData:
 class TestApplyServerData:
     """Tests for apply_server_data method."""
 
+    @staticmethod
+    def _stats(**counts):
+        stats = {f"{table}_{op}": 0 for table in ("courses", "entries")
+                 for op in ("inserted", "updated", "deleted", "unchanged")}
+        stats["skipped"] = 0
+        stats.update(counts)
+        return stats
+
     def test_apply_updates_courses(self, sync_client, mock_schedule_manager):
-        """Test apply_server_data updates existing courses."""
-        mock_schedule_manager.get_all_courses.return_value = [
-            {"id": 1, "name": "Math", "teacher": "Mr. Smith", "location": "Room 101", "color": "#FF0000"}
-        ]
-        mock_schedule_manager.get_all_schedule_entries.return_value = []
-        mock_schedule_manager.update_course.return_value = True
+        """Test apply_server_data hands courses to the diff-based apply."""
+        mock_schedule_manager.apply_sync_data.return_value = self._stats(courses_updated=1)
 
         server_data = {
             "courses": [
@@ -675,19 +679,15 @@ class TestApplyServerData:
         result = sync_client.apply_server_data(server_data)
 
         assert result is True
-        mock_schedule_manager.update_course.assert_called_once_with(
-            course_id=1,
-            name="Math",
-            teacher="Dr. Johnson",
-            location="Room 102",
-            color="#00FF00"
+        mock_schedule_manager.apply_sync_data.assert_called_once_with(
+            server_data["courses"], [], delete_missing=False
         )
+        mock_schedule_manager.update_course.assert_not_called()
+        assert sync_client.last_apply_stats["courses_updated"] == 1
 
     def test_apply_adds_schedule_entries(self, sync_client, mock_schedule_manager):
-        """Test apply_server_data adds new schedule entries."""
-        mock_schedule_manager.get_all_courses.return_value = []
-        mock_schedule_manager.get_all_schedule_entries.return_value = []
-        mock_schedule_manager.add_schedule_entry.return_value = 1
+        """Test apply_server_data passes entries with list weeks through unchanged."""
+        mock_schedule_manager.apply_sync_data.return_value = self._stats(entries_inserted=1)
 
         server_data = {
             "courses": [],
@@ -707,7 +707,43 @@ class TestApplyServerData:
         result = sync_client.apply_server_data(server_data)
 
         assert result is True
-        mock_schedule_manager.add_schedule_entry.assert_called_once()
+        mock_schedule_manager.add_schedule_entry.assert_not_called()
+        mock_schedule_manager.delete_schedule_entry.assert_not_called()
+        entries = mock_schedule_manager.apply_sync_data.call_args[0][1]
+        assert entries[0]["id"] == 1
+        assert entries[0]["weeks"] == [1, 2, 3]
+        assert entries[0]["note"] == "Test note"
+
+    def test_apply_parses_json_string_weeks(self, sync_client, mock_schedule_manager):
+        """Test apply_server_data parses weeks sent as a JSON string."""
+        mock_schedule_manager.apply_sync_data.return_value = self._stats(entries_inserted=1)
+
+        server_data = {
+            "courses": [],
+            "schedule_entries": [
+                {
+                    "id": 1,
+                    "course_id": 1,
+                    "day_of_week": 1,
+                    "start_time": "08:00",
+                    "end_time": "09:30",
+                    "weeks": "[1, 2, 3]"
+                }
+            ]
+        }
+
+        assert sync_client.apply_server_data(server_data) is True
+        entries = mock_schedule_manager.apply_sync_data.call_args[0][1]
+        assert entries[0]["weeks"] == [1, 2, 3]
+
+    def test_apply_failure_returns_false(self, sync_client, mock_schedule_manager):
+        """Test apply_server_data reports a rolled back apply as failure."""
+        mock_schedule_manager.apply_sync_data.return_value = None
+
+        result = sync_client.apply_server_data({"courses": [], "schedule_entries": []})
+
+        assert result is False
+        assert sync_client.last_apply_stats is None
 
 
 class TestBidirectionalSync:
@@ -727,7 +763,9 @@ class TestBidirectionalSync:
             {"id": 1, "name": "Math", "teacher": "Mr. Smith", "location": "101", "color": "#FF0000"}
         ]
         mock_schedule_manager.get_all_schedule_entries.return_value = []
-        mock_schedule_manager.update_course.return_value = True
+        mock_schedule_manager.apply_sync_data.return_value = TestApplyServerData._stats(
+            courses_updated=1
+        )
 
         # Mock download endpoints
         responses.add(
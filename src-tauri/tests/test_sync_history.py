@@ -85,6 +85,7 @@ def temp_db():
     yield db_path
 
     # Cleanup
+    db.close_connections(db_path)
     db_path.unlink(missing_ok=True)
 
 
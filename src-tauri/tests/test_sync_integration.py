@@ -18,6 +18,7 @@ from pathlib import Path
 from tauri_app.sync_client import SyncClient
 from tauri_app.settings_manager import SettingsManager
 from tauri_app.schedule_manager import ScheduleManager
+from tauri_app import db
 
 # Mark all tests in this module as integration tests
 pytestmark = pytest.mark.integration
@@ -120,6 +121,7 @@ def temp_db():
     yield db_path
 
     # Cleanup
+    db.close_connections(db_path)
     db_path.unlink(missing_ok=True)
 
 
@@ -0,0 +1,110 @@
+"""
+Unit tests for request-scoped tracing (tracing.py).
+"""
+import json
+import time
+
+import pytest
+
+from tauri_app import logger as _logger
+from tauri_app import metrics
+from tauri_app import tracing
+from tauri_app.async_db import run_db
+from tauri_app.schedule_manager import ScheduleManager
+
+
+@pytest.fixture(autouse=True)
+def clean_tracing():
+    """Start every test with tracing off and an empty ring buffer."""
+    tracing.set_sample_rate(0)
+    tracing.clear_traces()
+    yield
+    tracing.set_sample_rate(0)
+    tracing.clear_traces()
+
+
+class TestSpans:
+    """Tests for span creation and sampling."""
+
+    def test_no_trace_without_sampling(self):
+        """Test that nothing is recorded while the sample rate is 0."""
+        assert tracing.start_trace("cmd") is tracing._NOOP
+        with tracing.span("child") as span:
+            span.set_attribute("ignored", True)
+
+        assert tracing.get_traces() == []
+        assert not hasattr(ScheduleManager.get_courses, "__metrics_original__")
+
+    def test_nested_spans_form_one_trace(self):
+        """Test parent links, errors and the ring buffer order."""
+        tracing.set_sample_rate(1)
+
+        with tracing.start_trace("first") as root:
+            with tracing.span("inner", "method"):
+                pass
+            with pytest.raises(ValueError):
+                with tracing.span("failing"):
+                    raise ValueError("bad")
+        with tracing.start_trace("second"):
+            pass
+
+        traces = tracing.get_traces()
+        assert [t["name"] for t in traces] == ["second", "first"]
+        spans = {s["name"]: s for s in traces[1]["spans"]}
+        assert spans["inner"]["parent_id"] == root.span_id
+        assert spans["failing"]["error"] == "ValueError: bad"
+        assert tracing.get_traces(name="sec", limit=5)[0]["name"] == "second"
+        assert tracing.current_span() is None
+
+    def test_slow_spans_are_logged(self, monkeypatch):
+        """Test that spans over their kind's threshold log a warning."""
+        records = []
+        handler_id = _logger.add_sink(lambda msg: records.append(msg.record), level="WARNING")
+        monkeypatch.setitem(tracing.SLOW_SPAN_MS, "method", 0.0)
+        tracing.set_sample_rate(1)
+        try:
+            with tracing.start_trace("cmd"):
+                with tracing.span("schedule_manager.get_courses", "method"):
+                    pass
+        finally:
+            _logger.remove_sink(handler_id)
+
+        messages = [r["message"] for r in records]
+        assert any(m.startswith("Slow method span schedule_manager.get_courses") for m in messages)
+
+
+class TestPropagation:
+    """Tests for spans across commands, managers, SQL and worker threads."""
+
+    async def test_command_to_sql(self, initialized_schedule_manager):
+        """Test that a command's trace contains manager and SQL spans from run_db."""
+        @metrics.instrument_command
+        async def add_course(body=None):
+            return await run_db(initialized_schedule_manager.add_course, "Math")
+
+        tracing.set_sample_rate(1)
+        assert await add_course() > 0
+
+        trace = tracing.get_traces()[0]
+        spans = trace["spans"]
+        assert trace["name"] == "add_course"
+        assert spans[0]["kind"] == "command"
+        method = next(s for s in spans if s["name"] == "schedule_manager.add_course")
+        assert method["parent_id"] == spans[0]["span_id"]
+        sql = [s for s in spans if s["kind"] == "sql" and s["parent_id"] == method["span_id"]]
+        assert any(s["attributes"]["statement"].lstrip().upper().startswith("INSERT") for s in sql)
+
+    async def test_traces_exported_as_json_lines(self, tmp_path, monkeypatch):
+        """Test that finished traces are appended to the JSON-lines file."""
+        path = tmp_path / "traces.jsonl"
+        monkeypatch.setattr(tracing, "TRACE_FILE", path)
+        tracing.set_sample_rate(1)
+
+        with tracing.start_trace("exported"):
+            pass
+
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline and not (path.exists() and path.read_text(encoding="utf-8")):
+            time.sleep(0.01)
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert json.loads(lines[-1])["name"] == "exported"
@@ -53,4 +53,45 @@ async function getLogs(maxLines = 200) {
   }
 }
 
-export { setConfig, getConfig, listConfigs, logMessage, getLogs };
+/**
+ * Query logs (including rotated files), newest first.
+ * @param {Object} filters - { level, start, end, module, contains, offset, limit }
+ * @returns {Promise<{entries: Array, offset: number, limit: number, has_more: boolean}>}
+ */
+async function queryLogs(filters = {}) {
+  try {
+    return await pyInvoke('query_logs', filters);
+  } catch (err) {
+    console.error('queryLogs failed', err);
+    throw err;
+  }
+}
+
+/**
+ * Snapshot of the metrics registry.
+ * @returns {Promise<{enabled: boolean, metrics: Object}>}
+ */
+async function getMetrics() {
+  try {
+    return await pyInvoke('get_metrics');
+  } catch (err) {
+    console.error('getMetrics failed', err);
+    throw err;
+  }
+}
+
+/**
+ * Recently finished traces (newest first) with their spans.
+ * @param {{limit?: number, min_duration_ms?: number, name?: string}} filters
+ * @returns {Promise<{sample_rate: number, traces: Array<Object>}>}
+ */
+async function getTraces(filters = {}) {
+  try {
+    return await pyInvoke('get_traces', filters);
+  } catch (err) {
+    console.error('getTraces failed', err);
+    throw err;
+  }
+}
+
+export { setConfig, getConfig, listConfigs, logMessage, getLogs, queryLogs, getMetrics, getTraces };
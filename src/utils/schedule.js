@@ -455,6 +455,19 @@ export async function checkScheduleConflict(dayOfWeek, startTime, endTime, weeks
   }
 }
 
+/**
+ * 检查整个课程表中的所有冲突
+ */
+export async function getAllConflicts(week = null) {
+  try {
+    const result = await pyInvoke('get_all_conflicts', { week });
+    return result;
+  } catch (error) {
+    console.error('Failed to get schedule conflicts:', error);
+    return { has_conflict: false, conflicts: [] };
+  }
+}
+
 /**
  * 导出课程表数据
  */